@@ -0,0 +1,4 @@
+import sys
+from deeptracer.cli import main
+
+sys.exit(main())
@@ -1,5 +1,11 @@
 from .memoryAnalyzer import *
+from .leakCheckpoint import checkpoint
+from .liveMonitor import LiveMonitor
+from .memoryDiff import MemoryDiff
 
 __all__ = [
-    "MemoryAnalyzer"
-]
\ No newline at end of file
+    "MemoryAnalyzer",
+    "checkpoint",
+    "LiveMonitor",
+    "MemoryDiff"
+]
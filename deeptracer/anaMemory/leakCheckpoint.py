@@ -0,0 +1,72 @@
+"""
+泄漏检测检查点
+
+在目标脚本中标记需要检查泄漏的区间:
+    from deeptracer.anaMemory import checkpoint
+    checkpoint("warmup done")
+    ...
+    checkpoint("batch done")
+以检查点模式运行泄漏检测时,第一个检查点开始追踪,第二个检查点停止追踪,
+只报告两个检查点之间分配且在第二个检查点时仍未释放的内存。
+未在 deeptracer 下运行时 checkpoint 不做任何事
+"""
+
+_armed = None
+#memrayRunner 设置的追踪参数 为 None 时检查点不生效
+_tracker = None
+_names = []
+
+
+def arm(output:str,
+        **tracker_options
+        )->None:
+    """
+    启用检查点 由 memrayRunner 在运行目标脚本前调用
+
+    Args:
+        output(str):memray 捕获文件
+        **tracker_options:memray.Tracker 的参数
+    Returns:
+        None
+    """
+    global _armed
+    _armed = {"output": output,"options": tracker_options}
+    _names.clear()
+
+
+def checkpoint(name:str = None)->None:
+    """
+    标记检查点 第一个检查点开始追踪,第二个检查点停止追踪,之后的检查点被忽略
+
+    Args:
+        name(str):检查点名称 写入泄漏报告
+    Returns:
+        None
+    """
+    global _tracker
+    if _armed is None or len(_names) >= 2:
+        return
+    _names.append(name or f"checkpoint-{len(_names) + 1}")
+    if _tracker is None:
+        from memray import Tracker, FileDestination
+        _tracker = Tracker(destination=FileDestination(_armed["output"],overwrite=True),
+                           **_armed["options"])
+        _tracker.__enter__()
+    else:
+        finish()
+
+
+def finish()->list:
+    """
+    停止尚未结束的追踪 脚本未到达第二个检查点时在退出前调用
+
+    Args:
+        None
+    Returns:
+        names(list):已经到达的检查点名称
+    """
+    global _tracker
+    if _tracker is not None:
+        _tracker.__exit__(None,None,None)
+        _tracker = None
+    return list(_names)
@@ -0,0 +1,277 @@
+"""
+实时内存监控
+
+以 memray 的实时追踪 socket 运行目标脚本:子进程中的 Tracker 把分配记录写入本地端口,
+本进程以 memray.SocketReader 连接并在后台线程中持续接收。每次 poll() 读取当前存活分配,
+按分配位置汇总,给出当前堆大小、占用最多的分配位置与最近一段时间的增长速度,
+可以在长时间运行的任务发生 OOM 之前提前终止它
+"""
+import os
+import sys
+import time
+import socket
+import subprocess
+from collections import deque
+from pathlib import Path
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+from deeptracer.utils.quantity import format_quantity
+
+
+def _free_port()->int:
+    """
+    获取一个本地空闲端口
+
+    Args:
+        None
+    Returns:
+        port(int):端口号
+    """
+    with socket.socket(socket.AF_INET,socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1",0))
+        return sock.getsockname()[1]
+
+
+class LiveMonitor:
+    """
+    实时内存监控入口
+
+    with LiveMonitor("job.py") as monitor:
+        while monitor.running:
+            print(monitor.poll()["heap"])
+    """
+    def __init__(self,
+                 input_path:str,
+                 port:int = None,
+                 top_n:int = 10,
+                 window:float = 10.0,
+                 memory_interval_ms:int = 10,
+                 native_traces:bool = False
+                 )->None:
+        """
+        实时内存监控初始化函数
+
+        Args:
+            input_path(str):输入文件路径
+            port(int):实时追踪使用的本地端口 为None时自动选择空闲端口
+            top_n(int):每次 poll 保留的分配位置数量
+            window(float):计算增长速度的时间窗口(秒)
+            memory_interval_ms(int):子进程中 memray 的快照间隔(毫秒)
+            native_traces(bool):是否记录 C/C++ 调用栈
+        Returns:
+            None
+        """
+        self.target_script = Path(input_path).absolute()
+        if not self.target_script.exists():
+            raise FileNotFoundError(f"目标脚本不存在：{self.target_script}")
+        if self.target_script.suffix != ".py":
+            raise ValueError(f"仅支持 .py 脚本，当前文件：{self.target_script}")
+        self.port = port
+        self.top_n = top_n
+        self.window = window
+        self.memory_interval_ms = memory_interval_ms
+        self.native_traces = native_traces
+        self.process = None
+        self.reader = None
+        self.start_time = None
+        self.peak_heap = 0
+        self._history = deque()
+        #(时间, 堆大小) 用于计算窗口内的增长速度
+        self._locations = {}
+        #调用栈编号 -> 分配位置 每个调用栈只解析一次
+    @property
+    def running(self)->bool:
+        """
+        目标脚本是否仍在运行
+        """
+        return self.process is not None and self.process.poll() is None
+    def start(self)->"LiveMonitor":
+        """
+        启动目标脚本并连接实时追踪 socket
+
+        Args:
+            None
+        Returns:
+            monitor(LiveMonitor):自身
+        """
+        from memray import SocketReader
+        if self.port is None:
+            self.port = _free_port()
+        cmd = [
+            sys.executable,
+            "-m",
+            "deeptracer.anaMemory.memrayRunner",
+            "--live-port",
+            str(self.port),
+            "--memory-interval-ms",
+            str(self.memory_interval_ms),
+        ]
+        if self.native_traces:
+            cmd.append("--native")
+        cmd.append(str(self.target_script))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [DEEPTRACER_DEV_ROOT] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+        )
+        self.process = subprocess.Popen(cmd,env=env)
+        #目标脚本的输出直接显示在终端
+        self.start_time = time.perf_counter()
+        try:
+            self.reader = SocketReader(port=self.port)
+            self.reader.__enter__()
+            #Tracker 在客户端连接之前不会开始运行目标脚本 连接失败时由 SocketReader 重试
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+            raise
+        print_color(f"已连接实时内存追踪：{self.target_script.name} (pid {self.reader.pid}, 端口 {self.port})",
+                    fore_color="green")
+        return self
+    def _location(self,
+                  record
+                  )->tuple:
+        """
+        解析分配记录的位置(调用栈最内层的 Python 帧)
+
+        Args:
+            record(AllocationRecord):分配记录
+        Returns:
+            location(tuple):(函数名, 文件, 行号)
+        """
+        location = self._locations.get(record.stack_id)
+        if location is None:
+            frames = record.stack_trace(max_stacks=1)
+            location = tuple(frames[0]) if frames else ("<unknown>","",0)
+            self._locations[record.stack_id] = location
+        return location
+    def poll(self)->dict:
+        """
+        读取当前存活的分配并汇总
+
+        Args:
+            None
+        Returns:
+            stats(dict):{"running","elapsed","heap","peak_heap","growth_rate","allocations",
+                "top_sites":[{"function","file","line","bytes","count"}]}
+                内存单位为字节,growth_rate 为最近 window 秒内的堆增长速度(字节/秒)
+        """
+        if self.reader is None:
+            raise RuntimeError("实时监控尚未启动，请先调用 start()")
+        now = time.perf_counter()
+        sites = {}
+        heap = count = 0
+        for record in self.reader.get_current_snapshot(merge_threads=True):
+            heap += record.size
+            count += record.n_allocations
+            site = sites.setdefault(self._location(record),[0,0])
+            site[0] += record.size
+            site[1] += record.n_allocations
+        self.peak_heap = max(self.peak_heap,heap)
+        self._history.append((now,heap))
+        while len(self._history) > 2 and now - self._history[1][0] >= self.window:
+            self._history.popleft()
+        #保留覆盖整个窗口的最早一次采样
+        first_time,first_heap = self._history[0]
+        growth_rate = (heap - first_heap) / (now - first_time) if now > first_time else 0.0
+        ranked = sorted(sites.items(),key=lambda item: item[1][0],reverse=True)[:self.top_n]
+        return {
+            "running": self.running,
+            "elapsed": now - self.start_time,
+            "heap": heap,
+            "peak_heap": self.peak_heap,
+            "growth_rate": growth_rate,
+            "allocations": count,
+            "top_sites": [{
+                "function": function,
+                "file": file_path,
+                "line": line,
+                "bytes": size,
+                "count": site_count
+            } for (function,file_path,line),(size,site_count) in ranked]
+        }
+    def stop(self,
+             kill:bool = False
+             )->int:
+        """
+        断开实时追踪 并等待目标脚本结束
+
+        Args:
+            kill(bool):是否立即终止目标脚本
+        Returns:
+            exit_code(int):目标脚本的退出码
+        """
+        if self.process is None:
+            return None
+        if kill and self.process.poll() is None:
+            self.process.kill()
+        exit_code = self.process.wait()
+        if self.reader is not None:
+            self.reader.__exit__(None,None,None)
+            self.reader = None
+        return exit_code
+    def __enter__(self)->"LiveMonitor":
+        return self.start()
+    def __exit__(self,exc_type,exc_value,traceback)->None:
+        self.stop(kill=exc_type is not None)
+    def _render(self,
+                stats:dict
+                )->None:
+        """
+        在终端输出一次监控结果
+
+        Args:
+            stats(dict):poll() 的返回值
+        Returns:
+            None
+        """
+        growth = format_quantity(stats["growth_rate"],"peak_memory")
+        print_color(f"[{stats['elapsed']:.1f}s] heap {format_quantity(stats['heap'],'peak_memory')} "
+                    f"peak {format_quantity(stats['peak_heap'],'peak_memory')} "
+                    f"growth {'+' if stats['growth_rate'] >= 0 else ''}{growth}/s",
+                    fore_color="yellow" if stats["growth_rate"] > 0 else "green")
+        for site in stats["top_sites"]:
+            print(f"    {format_quantity(site['bytes'],'peak_memory'):>10} {site['count']:>8}  "
+                  f"{site['function']} {os.path.basename(site['file'])}:{site['line']}")
+    def watch(self,
+              refresh:float = 1.0,
+              kill_above:int = None,
+              quiet:bool = False
+              )->dict:
+        """
+        持续监控直到目标脚本结束 超过内存上限时提前终止
+
+        Args:
+            refresh(float):刷新间隔(秒)
+            kill_above(int):堆大小上限(字节) 超过时终止目标脚本,为None时不限制
+            quiet(bool):不在终端输出监控结果
+        Returns:
+            result(dict):{"exit_code","killed","stats"} stats 为最后一次 poll 的结果
+        """
+        killed = False
+        if self.reader is None:
+            self.start()
+        try:
+            while True:
+                stats = self.poll()
+                if not quiet:
+                    self._render(stats)
+                if kill_above is not None and stats["heap"] > kill_above:
+                    print_color(f"堆大小超过上限 {format_quantity(kill_above,'peak_memory')},终止目标脚本",
+                                fore_color="red")
+                    killed = True
+                    break
+                if not stats["running"]:
+                    break
+                time.sleep(refresh)
+        except BaseException:
+            self.stop(kill=True)
+            raise
+        #Ctrl+C 等中断时不留下孤儿进程
+        exit_code = self.stop(kill=killed)
+        return {
+            "exit_code": exit_code,
+            "killed": killed,
+            "stats": stats
+        }
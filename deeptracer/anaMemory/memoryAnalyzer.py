@@ -1,21 +1,48 @@
 import subprocess
+import sys
+import json
+import linecache
+import runpy
 from deeptracer import (
     DEEPTRACER_DEV_ROOT,
     print_color
     )
+from deeptracer.cache import ResultCache
+from deeptracer.utils import (
+    RunContext,
+    moduleTarget
+    )
+from deeptracer.anaMemory.memoryBackends import create_memory_backend
+from deeptracer.anaMemory import leakCheckpoint
 import os
 from pathlib import Path
 import platform
-import shutil
+
+RUNNER_FILES = {
+    "<frozen runpy>",
+    runpy.__file__,
+    moduleTarget.__file__,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)),"memrayRunner.py")
+}
+#泄漏调用栈中属于执行器的外层帧
 
 class  MemoryAnalyzer:
     """
-    memray内存分析入口
+    内存分析入口 默认以 memray 追踪,受限环境可选 tracemalloc 后端
     
     """
     def __init__(self,
                  input_path:str,
-                 output_dir:str="deeptracer/tools_report"
+                 output_dir:str="deeptracer/tools_report",
+                 cache:ResultCache=None,
+                 run_context:RunContext=None,
+                 memory_interval_ms:int=10,
+                 native_traces:bool=False,
+                 aggregated:bool=False,
+                 min_site_bytes:int=0,
+                 backend:str="memray",
+                 backend_options:dict=None,
+                 module_name:str=None
                  )->None:    
         """
         内存分析器初始化函数
@@ -23,22 +50,46 @@ class  MemoryAnalyzer:
         Args:
             input_path(str):输入文件路径
             output_fir(str):存储报告路径
+            cache(ResultCache):结果缓存,为None时不使用缓存
+            run_context(RunContext):运行上下文,指定时追踪文件与报告写入本次运行的独立目录
+            memory_interval_ms(int):堆大小与 RSS 快照的间隔(毫秒) 决定时间线的分辨率
+            native_traces(bool):是否记录 C/C++ 调用栈 火焰图中显示原生帧,捕获文件更大
+            aggregated(bool):以聚合格式写入捕获文件,只保存各调用栈在峰值时刻与结束时的存活内存,
+                文件大小与后处理时间只与不同调用栈的数量有关;不支持累计分配统计与分配位置时间线
+            min_site_bytes(int):摘要与泄漏报告中忽略字节数低于该阈值的分配位置
+            backend(str):内存后端 memray/tracemalloc/auto,tracemalloc 只支持摘要与时间线
+            backend_options(dict):tracemalloc 后端的参数 frames(调用栈深度)/interval(堆采样间隔,秒)/
+                budget(分配位置快照可占用的运行时间比例)
+            module_name(str):点分模块名 指定时以包内模块的身份执行目标,支持相对导入
         
         Returns:
             None
         """
+        self.cache = cache
+        if run_context is not None:
+            output_dir = run_context.run_dir
         
         root = Path(DEEPTRACER_DEV_ROOT)
         self.target_script = Path(input_path).absolute()
         self.output_dir = root / output_dir
         #存储到目标文件夹下
-        self.trace_bin = self.output_dir / "mem_trace.bin"
+        self.backend = create_memory_backend(backend,**(backend_options or {}))
+        if self.backend.name != "memray" and (native_traces or aggregated):
+            raise ValueError("native_traces 与 aggregated 只适用于 memray 后端")
+        self.trace_bin = self.output_dir / f"mem_trace.{self.backend.EXTENSION}"
         self.html_report = self.output_dir / "mem_report.html"
+        self.summary_json = self.output_dir / "mem_summary.json"
+        self.timeline_json = self.output_dir / "mem_timeline.json"
+        self.leaks_json = self.output_dir / "mem_leaks.json"
+        self.leaks_report = self.output_dir / "mem_leaks.html"
+        self.memory_interval_ms = memory_interval_ms
+        self.native_traces = native_traces
+        self.aggregated = aggregated
+        self.min_site_bytes = min_site_bytes
+        self.module_name = module_name
 
         self.os_type = platform.system()
         #获得操作系统的版本
-        self.memray_cmd = shutil.which('memray')
-        #检测memray是不是在系统变量中
 
         self._pre_check()
     def _pre_check(self):
@@ -57,35 +108,75 @@ class  MemoryAnalyzer:
         if self.target_script.suffix != ".py":
             raise ValueError(f"仅支持 .py 脚本，当前文件：{self.target_script}")
         #检测目标文件是不是python文件
-        if not self.memray_cmd:
-            raise RuntimeError(
-                "未检测到 Memray,请执行:pip install memray>=1.10.0"
-            )
-        #检测memray是不是正常安装
-    def _run_memray_tracer(self):
+        if not self.backend.available():
+            raise RuntimeError(self.backend.INSTALL_HINT)
+        #检测后端依赖是不是正常安装
+    def _require(self,
+                 feature:str
+                 )->None:
         """
-        运行memray命令拼接以及调用
-        
+        检验当前后端支持指定的分析
+
         Args:
+            feature(str):flamegraph/leaks/diff 等
+        Returns:
             None
+        """
+        if feature not in self.backend.FEATURES:
+            raise ValueError(f"内存后端 {self.backend.name} 不支持 {feature},请使用 memray 后端")
+    def _run_memray_tracer(self,
+                           trace_python_allocators:bool = False,
+                           checkpoints:bool = False):
+        """
+        在独立子进程中以 memray.Tracker 运行目标脚本
+        
+        Args:
+            trace_python_allocators(bool):是否逐个记录 pymalloc 分配
+            checkpoints(bool):是否只追踪目标脚本中前两个检查点之间的分配
         Returns:
             None
         """
-        cmd = [
-            self.memray_cmd,
-            "run",
-            "-o",
+        options = [
+            "--output",
             str(self.trace_bin),
+            "--memory-interval-ms",
+            str(self.memory_interval_ms),
         ]
+        if self.native_traces:
+            options.append("--native")
+        if self.aggregated:
+            options.append("--aggregated")
+        if trace_python_allocators:
+            options.append("--trace-python-allocators")
+        if checkpoints:
+            options.append("--checkpoints")
+        self._run_runner("deeptracer.anaMemory.memrayRunner",options)
+    def _run_runner(self,
+                    module:str,
+                    options:list):
+        """
+        在独立子进程中以追踪执行器运行目标脚本
+
+        Args:
+            module(str):执行器模块
+            options(list):执行器参数
+        Returns:
+            None
+        """
+        self.output_dir.mkdir(parents=True,exist_ok=True)
+        if self.module_name is not None:
+            options = options + ["--module",self.module_name]
+        cmd = [sys.executable,"-m",module] + options + [str(self.target_script)]
         #建立命令组建
-        
-        if self.os_type == "Windows":
-            cmd.append("--no-native-traces")
-            #如果是windows系统禁用c追踪
-        cmd.append(str(self.target_script))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [DEEPTRACER_DEV_ROOT] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+        )
+        #保证子进程能导入 deeptracer
         try:
             subprocess.run(
                 cmd,
+                env=env,
                 shell=(self.os_type == "Windows"), 
                 capture_output=True,
                 text=True,
@@ -115,32 +206,39 @@ class  MemoryAnalyzer:
             """
             print_color(f"已追踪 {self.target_script.name}的内存信息",
                         fore_color="green")
-        except Exception as e:
+        except subprocess.CalledProcessError as e:
             raise RuntimeError(
-                f"追踪失败"
-            )
-    def _generate_html_report(self):
+                f"追踪失败：{e.stderr[-2000:]}"
+            ) from e
+    def _generate_html_report(self,
+                              leaks:bool = False):
         """
         运行memray生成html文件实现可视化
         
         Args:
-            None
+            leaks(bool):只绘制追踪结束时仍未释放的分配
         Returns:
             None
         """
+        self._require("flamegraph")
         if not self.trace_bin.exists():
             raise FileNotFoundError("无追踪数据，请先执行内存追踪")
         #检验是不是已经分析产生分析文件
+        html_report = self.leaks_report if leaks else self.html_report
         cmd = [
-            self.memray_cmd,
+            sys.executable,
+            "-m",
+            "memray",
             "flamegraph",
             str(self.trace_bin),#指定读取bin文件路径
             "-o",
-            str(self.html_report),# 指定输出HTML路径
+            str(html_report),# 指定输出HTML路径
         ]
-        #拼接命令
-        if self.html_report.exists():
-            self.html_report.unlink()
+        if leaks:
+            cmd.append("--leaks")
+        #拼接命令 捕获文件包含原生调用栈时火焰图自动显示原生帧
+        if html_report.exists():
+            html_report.unlink()
         subprocess.run(
                 cmd,
                 shell=(self.os_type == "Windows"), 
@@ -153,6 +251,274 @@ class  MemoryAnalyzer:
         #运行
         print_color("HTML 报告生成完成",
                     fore_color="green")
+    def _allocation_sites(self,
+                          records
+                          )->tuple:
+        """
+        按分配位置(调用栈最内层的 Python 帧)聚合分配记录
+
+        先按调用栈编号聚合,每个不同的调用栈只解析一次源码位置
+
+        Args:
+            records(Iterable[AllocationRecord]):全部分配记录或峰值时刻的存活分配记录
+        Returns:
+            sites(list):[{"function","file","line","source","bytes","count"}]
+            total_bytes(int):记录的字节数之和
+            total_count(int):记录的分配次数之和
+        """
+        from memray import AllocatorType
+        deallocators = {AllocatorType.FREE,AllocatorType.MUNMAP,AllocatorType.PYMALLOC_FREE}
+        stacks = {}
+        for record in records:
+            if record.allocator in deallocators:
+                continue
+            entry = stacks.get(record.stack_id)
+            if entry is None:
+                stacks[record.stack_id] = [record.size,record.n_allocations,record]
+            else:
+                entry[0] += record.size
+                entry[1] += record.n_allocations
+        sites = {}
+        total_bytes = total_count = 0
+        for size,count,record in stacks.values():
+            total_bytes += size
+            total_count += count
+            frames = record.stack_trace(max_stacks=1)
+            location = tuple(frames[0]) if frames else ("<unknown>","",0)
+            #没有 Python 帧的分配(解释器启动等)归入 <unknown>
+            site = sites.get(location)
+            if site is None:
+                function,file_path,line = location
+                sites[location] = {
+                    "function": function,
+                    "file": file_path,
+                    "line": line,
+                    "source": linecache.getline(file_path,line).strip() if file_path else "",
+                    "bytes": size,
+                    "count": count
+                }
+            else:
+                site["bytes"] += size
+                site["count"] += count
+        return list(sites.values()),total_bytes,total_count
+    def _apply_threshold(self,
+                         entries:list
+                         )->tuple:
+        """
+        按 min_site_bytes 过滤分配位置
+
+        Args:
+            entries(list):包含 "bytes" 的分配位置或调用栈
+        Returns:
+            kept(list):字节数不低于阈值的条目
+            below_threshold(dict):{"sites","bytes"} 被忽略的条目数量与字节数
+        """
+        kept = [entry for entry in entries if entry["bytes"] >= self.min_site_bytes]
+        return kept,{"sites": len(entries) - len(kept),
+                     "bytes": sum(entry["bytes"] for entry in entries) - sum(entry["bytes"] for entry in kept)}
+    def summarize(self,
+                  top_n:int = 10
+                  )->dict:
+        """
+        读取捕获文件生成结构化的内存摘要并写入 JSON
+
+        Args:
+            top_n(int):按字节数与按次数分别保留的分配位置数量
+        Returns:
+            summary(dict):{"script","format","native_traces","duration","peak_heap","peak_rss","total_bytes",
+                "total_allocations","peak_allocations","sites_at","below_threshold","top_by_size","top_by_count"}
+                内存单位为字节;聚合格式下 total_bytes 与 total_allocations 为None,
+                分配位置统计峰值时刻的存活内存(sites_at 为 "peak"),否则统计全部分配(sites_at 为 "all");
+                tracemalloc 后端统计堆最大的一次快照(sites_at 为 "peak_snapshot"),function 为None
+        """
+        if not self.trace_bin.exists():
+            raise FileNotFoundError("无追踪数据，请先执行内存追踪")
+        summary = self.backend.summary(self,top_n=top_n)
+        with open(self.summary_json,"w",encoding="utf-8") as fp:
+            json.dump(summary,fp,indent=4,ensure_ascii=False)
+        print_color("内存摘要生成完成",
+                    fore_color="green")
+        return summary
+    def generate_timeline(self,
+                          points:int = 100,
+                          top_n:int = 5,
+                          high_watermark:bool = False
+                          )->dict:
+        """
+        读取捕获文件生成降采样的堆/RSS 时间线并写入 JSON
+
+        Args:
+            points(int):时间点数量上限
+            top_n(int):每个时间点保留的分配位置数量
+            high_watermark(bool):使用快照区间内的堆高水位,能捕获两次快照之间的瞬时峰值
+        Returns:
+            timeline(dict):{"script","start_time","interval_ms","mode","snapshots","points"}
+                聚合格式的捕获文件只包含堆与 RSS,top_sites 为空;tracemalloc 后端的 rss 为None
+        """
+        if not self.trace_bin.exists():
+            raise FileNotFoundError("无追踪数据，请先执行内存追踪")
+        timeline = self.backend.timeline(self,
+                                         points=points,
+                                         top_n=top_n,
+                                         high_watermark=high_watermark)
+        with open(self.timeline_json,"w",encoding="utf-8") as fp:
+            json.dump(timeline,fp,ensure_ascii=False)
+        print_color("内存时间线生成完成",
+                    fore_color="green")
+        return timeline
+    def find_leaks(self,
+                   top_n:int = 20,
+                   checkpoints:list = None
+                   )->dict:
+        """
+        读取捕获文件 按分配调用栈聚合追踪结束时仍未释放的分配并写入 JSON
+
+        Args:
+            top_n(int):保留的调用栈数量 按泄漏字节数降序
+            checkpoints(list):追踪区间两端的检查点名称 为None表示整个运行
+        Returns:
+            leaks(dict):{"script","window","checkpoints","leaked_bytes","leaked_allocations",
+                "below_threshold","stacks":[{"function","file","line","source","bytes","count","stack"}]}
+                stack 为由内向外的 [{"function","file","line"}]
+        """
+        self._require("leaks")
+        from memray import FileReader
+        if not self.trace_bin.exists():
+            raise FileNotFoundError("无追踪数据，请先执行内存追踪")
+        stacks = {}
+        leaked_bytes = leaked_count = 0
+        with FileReader(str(self.trace_bin)) as reader:
+            for record in reader.get_leaked_allocation_records(merge_threads=True):
+                frames = [tuple(frame) for frame in record.stack_trace()]
+                if any(frame[1] == leakCheckpoint.__file__ for frame in frames):
+                    continue
+                #检查点开始追踪时 memray 自身的分配
+                leaked_bytes += record.size
+                leaked_count += record.n_allocations
+                while frames and frames[-1][1] in RUNNER_FILES:
+                    frames.pop()
+                #去掉执行器与 runpy 的外层帧
+                key = tuple(frames)
+                entry = stacks.get(key)
+                if entry is None:
+                    stacks[key] = [record.size,record.n_allocations]
+                else:
+                    entry[0] += record.size
+                    entry[1] += record.n_allocations
+        ranked,below_threshold = self._apply_threshold(
+            [{"frames": frames,"bytes": size,"count": count} for frames,(size,count) in stacks.items()])
+        ranked = sorted(ranked,key=lambda item: item["bytes"],reverse=True)[:top_n]
+        leaks = {
+            "script": str(self.target_script),
+            "window": "checkpoints" if checkpoints is not None else "run",
+            "checkpoints": checkpoints,
+            "leaked_bytes": leaked_bytes,
+            "leaked_allocations": leaked_count,
+            "below_threshold": below_threshold,
+            "stacks": []
+        }
+        for item in ranked:
+            frames,size,count = item["frames"],item["bytes"],item["count"]
+            function,file_path,line = frames[0] if frames else ("<unknown>","",0)
+            leaks["stacks"].append({
+                "function": function,
+                "file": file_path,
+                "line": line,
+                "source": linecache.getline(file_path,line).strip() if file_path else "",
+                "bytes": size,
+                "count": count,
+                "stack": [{"function": frame[0],"file": frame[1],"line": frame[2]} for frame in frames]
+            })
+        with open(self.leaks_json,"w",encoding="utf-8") as fp:
+            json.dump(leaks,fp,indent=4,ensure_ascii=False)
+        print_color(f"泄漏报告生成完成：{leaked_bytes} 字节未释放",
+                    fore_color="green")
+        return leaks
+    def run_leak_analysis(self,
+                          checkpoints:bool = False,
+                          flamegraph:bool = False,
+                          top_n:int = 20,
+                          clean_temp:bool = True
+                          )->dict:
+        """
+        泄漏检测模式 开启 pymalloc 逐个记录,只报告追踪结束时仍未释放的分配
+
+        Args:
+            checkpoints(bool):只追踪目标脚本中前两个 checkpoint() 之间的分配,
+                未调用 checkpoint 时没有追踪数据
+            flamegraph(bool):是否同时生成只包含泄漏分配的 HTML 火焰图
+            top_n(int):保留的调用栈数量
+            clean_temp(bool):是否清理追踪文件
+        Returns:
+            result(dict):{"leaks_json","leaks","success"} 生成火焰图时包含 "leaks_report"
+        """
+        names_path = Path(f"{self.trace_bin}.checkpoints")
+        try:
+            self._require("leaks")
+            if self.trace_bin.exists():
+                self.trace_bin.unlink()
+            self._run_memray_tracer(trace_python_allocators=True,
+                                    checkpoints=checkpoints)
+            names = None
+            if checkpoints:
+                with open(names_path,"r",encoding="utf-8") as fp:
+                    names = json.load(fp)
+                if not self.trace_bin.exists():
+                    raise RuntimeError("目标脚本未调用 checkpoint(),没有追踪数据")
+                if len(names) < 2:
+                    print_color("目标脚本只到达一个检查点,追踪持续到脚本结束",
+                                fore_color="yellow")
+            leaks = self.find_leaks(top_n=top_n,checkpoints=names)
+            result = {
+                "leaks_json": str(self.leaks_json),
+                "leaks": leaks,
+                "success": True
+            }
+            if flamegraph:
+                self._generate_html_report(leaks=True)
+                result["leaks_report"] = str(self.leaks_report)
+            if clean_temp:
+                self._clean_temp_file()
+            return result
+        except Exception as e:
+            print(e)
+            return {
+                "error": str(e),
+                "success": False
+            }
+        finally:
+            if names_path.exists():
+                names_path.unlink()
+    def compare(self,
+                after:str,
+                **kwargs
+                )->dict:
+        """
+        对比当前脚本与另一个脚本或捕获文件的内存使用 生成 JSON 报告与差分火焰图
+
+        Args:
+            after(str):变化后的 .py 脚本或 memray 捕获文件
+            **kwargs:传给 MemoryDiff 的其余参数
+        Returns:
+            result(dict):{"json","html","diff","success"}
+        """
+        from deeptracer.anaMemory.memoryDiff import MemoryDiff
+        kwargs.setdefault("native_traces",self.native_traces)
+        kwargs.setdefault("aggregated",self.aggregated)
+        try:
+            self._require("diff")
+            diff = MemoryDiff(str(self.target_script),after,**kwargs)
+            return {
+                **diff.generate_report(),
+                "diff": diff.result,
+                "success": True
+            }
+        except Exception as e:
+            print(e)
+            return {
+                "error": str(e),
+                "success": False
+            }
     def _clean_temp_file(self):
         """
         清除中间文件
@@ -166,20 +532,119 @@ class  MemoryAnalyzer:
             self.trace_bin.unlink()
             print_color(f"已清理临时文件",
                         fore_color="green")
-    def run_full_analysis(self, 
-                          clean_temp: bool = True):
+    def _cache_key(self,
+                   options:dict
+                   )->str:
+        """
+        生成当前脚本与追踪参数对应的缓存键
+
+        Args:
+            options(dict):影响报告内容的分析参数
+        Returns:
+            key(str):缓存键
+        """
+        params = {**self.backend.options,
+                  "native_traces": self.native_traces,
+                  "aggregated": self.aggregated,
+                  "min_site_bytes": self.min_site_bytes,
+                  "memory_interval_ms": self.memory_interval_ms,
+                  **options}
+        if self.module_name is not None:
+            params["module_name"] = self.module_name
+        #按脚本执行时沿用原有的缓存键
+        return self.cache.make_key(str(self.target_script),
+                                   self.backend.name,
+                                   params)
+    def measure_peak_memory(self,
+                            clean_temp:bool = True
+                            )->int:
+        """
+        追踪目标脚本并读取峰值内存 不生成 HTML 报告
+
+        Args:
+            clean_temp(bool):是否清理追踪文件
+        Returns:
+            peak_memory(int):峰值内存(字节)
+        """
+        self.backend.trace(self)
+        try:
+            peak_memory = self.backend.peak_memory(self)
+        finally:
+            if clean_temp:
+                self._clean_temp_file()
+        return peak_memory
+    def run_full_analysis(self,
+                          clean_temp: bool = True,
+                          flamegraph: bool = True,
+                          top_n: int = 10,
+                          timeline: bool = False,
+                          timeline_points: int = 100,
+                          high_watermark: bool = False):
+        """
+        追踪目标脚本并生成内存摘要 按需渲染火焰图与时间线
+
+        Args:
+            clean_temp(bool):是否清理追踪文件
+            flamegraph(bool):是否生成 HTML 火焰图 关闭时省去一次子进程与 HTML 渲染
+            top_n(int):摘要中保留的分配位置数量
+            timeline(bool):是否生成堆/RSS 时间线
+            timeline_points(int):时间线的时间点数量上限
+            high_watermark(bool):时间线使用快照区间内的堆高水位
+        Returns:
+            result(dict):{"summary_json","summary","success"} 生成火焰图时包含 "html_report",
+                生成时间线时包含 "timeline_json"
+        """
+        if flamegraph and "flamegraph" not in self.backend.FEATURES:
+            print_color(f"内存后端 {self.backend.name} 不支持火焰图,只生成 JSON 摘要",
+                        fore_color="yellow")
+            flamegraph = False
+        reports = {"summary_json": self.summary_json}
+        if flamegraph:
+            reports["html_report"] = self.html_report
+        if timeline:
+            reports["timeline_json"] = self.timeline_json
+        if self.cache is not None:
+            cache_key = self._cache_key({"flamegraph": flamegraph,
+                                         "top_n": top_n,
+                                         "timeline": timeline,
+                                         "timeline_points": timeline_points,
+                                         "high_watermark": high_watermark})
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                for name,path in reports.items():
+                    self.cache.restore(entry,name,path)
+                print_color(f"命中缓存,跳过内存分析：{self.target_script.name}",
+                            fore_color="green")
+                return {
+                    **{name: str(path) for name,path in reports.items()},
+                    "summary": entry["summary"],
+                    "success": True,
+                    "cached": True
+                }
+        #命中缓存时直接还原报告
         try:
             # 1. 运行 py 脚本，追踪内存
-            self._run_memray_tracer()
-            # 2. 生成 HTML 报告（核心产物）
-            self._generate_html_report()
-            # 3. 清理临时文件
+            self.backend.trace(self)
+            # 2. 读取捕获文件生成结构化摘要（核心产物）
+            summary = self.summarize(top_n=top_n)
+            if timeline:
+                self.generate_timeline(points=timeline_points,
+                                       high_watermark=high_watermark)
+            # 3. 按需生成 HTML 火焰图
+            if flamegraph:
+                self._generate_html_report()
+            # 4. 清理临时文件
             if clean_temp:
                 self._clean_temp_file()
+            if self.cache is not None:
+                self.cache.put(cache_key,
+                               {name: str(path) for name,path in reports.items()},
+                               summary)
             
             # 返回结果（仅暴露最终产物）
             return {
-                "html_report": str(self.html_report),
+                **{name: str(path) for name,path in reports.items()},
+                "summary": summary,
                 "success": True
             }
         except Exception as e:
@@ -0,0 +1,431 @@
+"""
+内存分析后端
+
+MemoryAnalyzer 通过统一的后端接口追踪目标脚本并生成摘要与时间线,每次运行可选择:
+    memray       记录每一次分配,支持火焰图、泄漏检测、差分与实时监控;需要安装 memray
+    tracemalloc  标准库实现,按间隔获取快照,只保存按分配位置汇总的结果,开销低,
+                 适用于无法安装 memray 的受限容器与常驻的低成本监控
+    auto         已安装 memray 时使用 memray,否则使用 tracemalloc
+两个后端写出相同结构的 mem_summary.json 与 mem_timeline.json
+"""
+import os
+import json
+import runpy
+import threading
+import tracemalloc
+import importlib.util
+from abc import ABC, abstractmethod
+from deeptracer import print_color
+from deeptracer.utils import moduleTarget
+from deeptracer.anaMemory.memoryTimeline import (
+    build_timeline,
+    buckets
+    )
+
+
+IGNORED_FILES = (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)),"tracemallocRunner.py"),
+    threading.__file__,
+    tracemalloc.__file__,
+    moduleTarget.__file__,
+    runpy.__file__,
+    "<frozen runpy>",
+)
+#tracemalloc 执行器自身与快照线程的分配不计入目标脚本
+#执行器以 python -m 运行 不能被本模块导入,否则包初始化时会先以模块名执行一次
+
+
+class MemoryBackend(ABC):
+    """
+    内存分析后端接口
+
+    Attributes:
+        name(str):后端名称
+        EXTENSION(str):追踪文件扩展名
+        FEATURES(tuple):支持的分析 summary/timeline/flamegraph/leaks/diff
+        INSTALL_HINT(str):后端不可用时的提示
+        options(dict):影响报告内容的后端参数 写入缓存键
+
+    Methods:
+        available: 后端是否可用
+        trace: 在独立子进程中追踪目标脚本
+        summary: 由追踪文件生成摘要
+        timeline: 由追踪文件生成时间线
+        peak_memory: 读取峰值内存
+    """
+    name = None
+    EXTENSION = None
+    FEATURES = ()
+    INSTALL_HINT = ""
+    options = {}
+    @classmethod
+    @abstractmethod
+    def available(cls)->bool:
+        """
+        后端是否可用
+
+        Args:
+            None
+        Returns:
+            available(bool):依赖是否已安装
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def trace(self,
+              analyzer
+              )->None:
+        """
+        在独立子进程中追踪目标脚本 结果写入 analyzer.trace_bin
+
+        Args:
+            analyzer(MemoryAnalyzer):分析器
+        Returns:
+            None
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def summary(self,
+                analyzer,
+                top_n:int = 10
+                )->dict:
+        """
+        由追踪文件生成摘要
+
+        Args:
+            analyzer(MemoryAnalyzer):分析器
+            top_n(int):按字节数与按次数分别保留的分配位置数量
+        Returns:
+            summary(dict):见 MemoryAnalyzer.summarize
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def timeline(self,
+                 analyzer,
+                 points:int = 100,
+                 top_n:int = 5,
+                 high_watermark:bool = False
+                 )->dict:
+        """
+        由追踪文件生成时间线
+
+        Args:
+            analyzer(MemoryAnalyzer):分析器
+            points(int):时间点数量上限
+            top_n(int):每个时间点保留的分配位置数量
+            high_watermark(bool):使用区间内的堆高水位
+        Returns:
+            timeline(dict):见 MemoryAnalyzer.generate_timeline
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def peak_memory(self,
+                    analyzer
+                    )->int:
+        """
+        读取峰值内存
+
+        Args:
+            analyzer(MemoryAnalyzer):分析器
+        Returns:
+            peak_memory(int):峰值内存(字节)
+        """
+        raise NotImplementedError
+
+
+class MemrayBackend(MemoryBackend):
+    """
+    memray 后端 记录每一次分配
+    """
+    name = "memray"
+    EXTENSION = "bin"
+    FEATURES = ("summary","timeline","flamegraph","leaks","diff")
+    INSTALL_HINT = "未检测到 Memray,请执行:pip install memray>=1.10.0"
+    @classmethod
+    def available(cls)->bool:
+        return importlib.util.find_spec("memray") is not None
+    def trace(self,
+              analyzer
+              )->None:
+        analyzer._run_memray_tracer()
+    def summary(self,
+                analyzer,
+                top_n:int = 10
+                )->dict:
+        from memray import FileReader, FileFormat
+        with FileReader(str(analyzer.trace_bin)) as reader:
+            metadata = reader.metadata
+            aggregated = metadata.file_format == FileFormat.AGGREGATED_ALLOCATIONS
+            #以捕获文件实际格式为准
+            peak_sites,_,peak_allocations = analyzer._allocation_sites(
+                reader.get_high_watermark_allocation_records(merge_threads=True))
+            if aggregated:
+                sites,total_bytes,total_count = peak_sites,None,None
+                #聚合格式只保存各调用栈的汇总 没有逐次分配记录
+            else:
+                sites,total_bytes,total_count = analyzer._allocation_sites(reader.get_allocation_records())
+            peak_rss = max((snapshot.rss for snapshot in reader.get_memory_snapshots()),default=0)
+        sites,below_threshold = analyzer._apply_threshold(sites)
+        return {
+            "script": str(analyzer.target_script),
+            "format": "aggregated" if aggregated else "all_allocations",
+            "native_traces": metadata.has_native_traces,
+            "duration": (metadata.end_time - metadata.start_time).total_seconds(),
+            "peak_heap": metadata.peak_memory,
+            "peak_rss": peak_rss,
+            "total_bytes": total_bytes,
+            "total_allocations": total_count,
+            "peak_allocations": peak_allocations,
+            "sites_at": "peak" if aggregated else "all",
+            "below_threshold": below_threshold,
+            "top_by_size": sorted(sites,key=lambda site: site["bytes"],reverse=True)[:top_n],
+            "top_by_count": sorted(sites,key=lambda site: site["count"],reverse=True)[:top_n]
+        }
+    def timeline(self,
+                 analyzer,
+                 points:int = 100,
+                 top_n:int = 5,
+                 high_watermark:bool = False
+                 )->dict:
+        from memray import FileReader, FileFormat
+        with FileReader(str(analyzer.trace_bin)) as reader:
+            aggregated = reader.metadata.file_format == FileFormat.AGGREGATED_ALLOCATIONS
+            if aggregated:
+                print_color("聚合格式的捕获文件没有时间序列分配记录,时间线只包含堆与 RSS",
+                            fore_color="yellow")
+            return {
+                "script": str(analyzer.target_script),
+                "start_time": reader.metadata.start_time.isoformat(),
+                "interval_ms": analyzer.memory_interval_ms,
+                **build_timeline(reader,
+                                 points=points,
+                                 top_n=top_n,
+                                 high_watermark=high_watermark,
+                                 sites=not aggregated)
+            }
+    def peak_memory(self,
+                    analyzer
+                    )->int:
+        from memray import FileReader
+        with FileReader(str(analyzer.trace_bin)) as reader:
+            return reader.metadata.peak_memory
+
+
+class TracemallocBackend(MemoryBackend):
+    """
+    tracemalloc 轻量后端
+
+    子进程中以 tracemalloc 追踪,后台线程每隔 interval 秒记录一次堆大小(开销与存活块数无关);
+    按分配位置汇总的快照开销与存活块数成正比,只在预计耗时不超过运行时间的 budget 比例时获取,
+    存活块数很多时快照会变稀疏甚至被跳过;结束时的快照至少有 0.05 秒的预算,
+    短脚本的摘要也包含分配位置,追踪文件大小只与采样次数和分配位置数量有关;
+    tracemalloc 不记录函数名与累计分配,摘要中 function、total_bytes、total_allocations 为None;
+    分配位置取自堆最大的一次分配位置快照
+
+    Args:
+        frames(int):每个分配记录的调用栈深度 大于1时分配位置按调用栈区分
+        interval(float):堆采样间隔(秒)
+        budget(float):分配位置快照可占用的运行时间比例
+    """
+    name = "tracemalloc"
+    EXTENSION = "tracemalloc.json"
+    FEATURES = ("summary","timeline")
+    def __init__(self,
+                 frames:int = 1,
+                 interval:float = 0.1,
+                 budget:float = 0.05
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            frames(int):每个分配记录的调用栈深度
+            interval(float):堆采样间隔(秒)
+            budget(float):分配位置快照可占用的运行时间比例
+        Returns:
+            None
+        """
+        if frames < 1:
+            raise ValueError(f"frames 必须为正数：{frames}")
+        if interval <= 0:
+            raise ValueError(f"interval 必须为正数：{interval}")
+        if not 0 < budget <= 1:
+            raise ValueError(f"budget 必须在 (0, 1] 之间：{budget}")
+        self.frames = frames
+        self.interval = interval
+        self.budget = budget
+        self.options = {"frames": frames,"interval": interval,"budget": budget}
+    @classmethod
+    def available(cls)->bool:
+        return True
+    def trace(self,
+              analyzer
+              )->None:
+        analyzer._run_runner("deeptracer.anaMemory.tracemallocRunner",
+                             ["--output",str(analyzer.trace_bin),
+                              "--frames",str(self.frames),
+                              "--interval",str(self.interval),
+                              "--budget",str(self.budget)])
+    def _load(self,
+              analyzer
+              )->dict:
+        """
+        读取执行器写出的结果
+
+        Args:
+            analyzer(MemoryAnalyzer):分析器
+        Returns:
+            result(dict):tracemallocRunner 的输出
+        """
+        with open(analyzer.trace_bin,"r",encoding="utf-8") as fp:
+            return json.load(fp)
+    @staticmethod
+    def _stack(stack:list)->list:
+        """
+        去掉执行器与 runpy 的外层帧
+
+        Args:
+            stack(list):由外向内的 [文件, 行号]
+        Returns:
+            stack(list):由外向内的 (文件, 行号)
+        """
+        frames = [tuple(frame) for frame in stack]
+        while len(frames) > 1 and frames[0][0] in IGNORED_FILES:
+            frames.pop(0)
+        return frames
+    def summary(self,
+                analyzer,
+                top_n:int = 10
+                )->dict:
+        import linecache
+        result = self._load(analyzer)
+        if not result["snapshots"]:
+            print_color("分配位置快照的预计耗时超过预算,摘要不包含分配位置;可增大 budget",
+                        fore_color="yellow")
+        elif not result["final_snapshot"]:
+            print_color("结束时的分配位置快照预计耗时超过预算,分配位置取自运行期间堆最大的一次快照",
+                        fore_color="yellow")
+        sites = {}
+        for entry in result["peak_sites"]:
+            key = tuple(self._stack(entry["stack"]))
+            site = sites.get(key)
+            if site is None:
+                file_path,line = key[-1]
+                sites[key] = site = {
+                    "function": None,
+                    "file": file_path,
+                    "line": line,
+                    "source": linecache.getline(file_path,line).strip() if file_path else "",
+                    "bytes": 0,
+                    "count": 0
+                }
+                if self.frames > 1:
+                    site["stack"] = [{"file": frame[0],"line": frame[1]} for frame in reversed(key)]
+                    #由内向外
+            site["bytes"] += entry["bytes"]
+            site["count"] += entry["count"]
+        sites,below_threshold = analyzer._apply_threshold(list(sites.values()))
+        return {
+            "script": str(analyzer.target_script),
+            "format": "tracemalloc",
+            "native_traces": False,
+            "duration": result["duration"],
+            "peak_heap": result["peak_heap"],
+            "peak_rss": result["peak_rss"],
+            "total_bytes": None,
+            "total_allocations": None,
+            "peak_allocations": sum(entry["count"] for entry in result["peak_sites"]),
+            "sites_at": "peak_snapshot",
+            "below_threshold": below_threshold,
+            "top_by_size": sorted(sites,key=lambda site: site["bytes"],reverse=True)[:top_n],
+            "top_by_count": sorted(sites,key=lambda site: site["count"],reverse=True)[:top_n],
+            "frames": result["frames"],
+            "snapshot_interval": result["interval"],
+            "snapshots": len(result["samples"]),
+            "site_snapshots": len(result["snapshots"]),
+            "final_snapshot": result["final_snapshot"],
+            "snapshot_seconds": result["snapshot_seconds"]
+        }
+    def timeline(self,
+                 analyzer,
+                 points:int = 100,
+                 top_n:int = 5,
+                 high_watermark:bool = False
+                 )->dict:
+        result = self._load(analyzer)
+        samples = result["samples"]
+        site_snapshots = result["snapshots"]
+        key = "peak" if high_watermark else "heap"
+        ranges = buckets(len(samples),points) if samples else []
+        timeline = []
+        index = 0
+        for number,(first,last) in enumerate(ranges):
+            chosen = max(samples[first:last + 1],key=lambda sample: sample[key])
+            end = samples[last]["time"] if number < len(ranges) - 1 else float("inf")
+            #结束时的快照晚于最后一次采样 归入最后一个时间点
+            in_bucket = []
+            while index < len(site_snapshots) and site_snapshots[index]["time"] <= end:
+                in_bucket.append(site_snapshots[index])
+                index += 1
+            top_sites = []
+            if in_bucket:
+                for site in max(in_bucket,key=lambda snapshot: snapshot["heap"])["top_sites"][:top_n]:
+                    file_path,line = self._stack(site["stack"])[-1]
+                    top_sites.append({
+                        "function": None,
+                        "file": file_path,
+                        "line": line,
+                        "live_bytes": site["bytes"],
+                        "growth_bytes": site["growth_bytes"]
+                    })
+                    #growth_bytes 为相对上一次分配位置快照的变化
+            #区间内没有分配位置快照时 top_sites 为空
+            timeline.append({
+                "start": samples[first]["time"],
+                "end": samples[last]["time"],
+                "heap": chosen[key],
+                "rss": None,
+                "top_sites": top_sites
+            })
+        return {
+            "script": str(analyzer.target_script),
+            "start_time": result["start_time"],
+            "interval_ms": self.interval * 1000,
+            "mode": "high_watermark" if high_watermark else "snapshot",
+            "snapshots": len(samples),
+            "site_snapshots": len(site_snapshots),
+            "points": timeline
+        }
+    def peak_memory(self,
+                    analyzer
+                    )->int:
+        return self._load(analyzer)["peak_heap"]
+
+
+MEMORY_BACKENDS = {
+    MemrayBackend.name: MemrayBackend,
+    TracemallocBackend.name: TracemallocBackend,
+}
+
+
+def create_memory_backend(name:str,
+                          **options
+                          )->MemoryBackend:
+    """
+    按名称创建后端
+
+    Args:
+        name(str):后端名称 memray/tracemalloc/auto
+        **options:后端的初始化参数
+    Returns:
+        backend(MemoryBackend):后端
+    """
+    if name == "auto":
+        if MemrayBackend.available():
+            name,options = "memray",{}
+            #后端参数只用于 tracemalloc
+        else:
+            name = "tracemalloc"
+            print_color("未检测到 Memray,使用 tracemalloc 后端",fore_color="yellow")
+    if name not in MEMORY_BACKENDS:
+        raise ValueError(f"不支持的内存后端：{name},可选 {', '.join(MEMORY_BACKENDS)}, auto")
+    return MEMORY_BACKENDS[name](**options)
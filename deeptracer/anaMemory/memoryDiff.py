@@ -0,0 +1,316 @@
+"""
+内存差分
+
+对比两次 memray 追踪(两个脚本、同一脚本的两个提交,或智能体给出的优化版本),
+按归一化调用栈对齐分配位置,输出每个位置的字节数与分配次数变化、峰值内存变化、
+新增/消失的分配位置,并生成 JSON 报告与差分火焰图
+"""
+import os
+import json
+import tempfile
+import linecache
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+from deeptracer.utils.flameGraph import (
+    diff_node,
+    write_diff_flamegraph
+    )
+from deeptracer.utils.sourceVersions import SourceVersions
+from deeptracer.utils.quantity import format_quantity
+from deeptracer.anaMemory.memoryAnalyzer import (
+    MemoryAnalyzer,
+    RUNNER_FILES
+    )
+from deeptracer.anaMemory import leakCheckpoint
+
+
+def normalize_stack(frames:list,
+                    aliases:dict
+                    )->tuple:
+    """
+    获得跨版本对齐用的调用栈
+
+    不使用行号:代码修改后分配语句的行号通常会变化;去掉执行器与 runpy 的外层帧,
+    两个版本位于不同文件时通过别名映射到同一名称
+
+    Args:
+        frames(list):由内向外的 (函数名, 文件, 行号)
+        aliases(dict):文件路径 -> 统一名称
+    Returns:
+        stack(tuple):由外向内的 (函数名, 文件)
+    """
+    frames = list(frames)
+    while frames and frames[-1][1] in RUNNER_FILES:
+        frames.pop()
+    if not frames:
+        return (("<unknown>",""),)
+    return tuple((function,aliases.get(file_path,file_path)) for function,file_path,_ in reversed(frames))
+
+
+def _stack_label(frame:tuple)->str:
+    """
+    获得调用栈帧的可读名称
+
+    Args:
+        frame(tuple):(函数名, 文件)
+    Returns:
+        label(str):"函数名 (文件名)"
+    """
+    function,file_path = frame
+    return f"{function} ({os.path.basename(file_path)})" if file_path else function
+
+
+class MemoryDiff(SourceVersions):
+    """
+    两次内存追踪的差分
+
+    Args:
+        before(str):变化前的 .py 脚本或 memray 捕获文件
+        after(str):变化后的 .py 脚本或 memray 捕获文件
+    Attributes:
+        result(dict):最近一次 compare 的结果
+
+    Methods:
+        compare: 计算差分结果
+        generate_report: 生成 JSON 报告与差分火焰图
+        from_git: 对比同一脚本的两个提交
+        from_agent_reply: 对比脚本与智能体给出的优化版本
+    """
+    METRICS = ("peak","total")
+    def __init__(self,
+                 before:str,
+                 after:str,
+                 output_path:str = "deeptracer/tools_report/memoryDiff.json",
+                 aliases:dict = None,
+                 metric:str = "peak",
+                 top_n:int = 20,
+                 native_traces:bool = False,
+                 aggregated:bool = False
+                 )->None:
+        """
+        初始化函数 传入 .py 脚本时在独立子进程中以 memray 追踪
+
+        Args:
+            before(str):变化前的 .py 脚本或 memray 捕获文件
+            after(str):变化后的 .py 脚本或 memray 捕获文件
+            output_path(str):JSON 报告路径 差分火焰图使用同名 .html
+            aliases(dict):文件路径 -> 统一名称 用于对齐位于不同文件中的同一份代码
+            metric(str):"peak" 对比峰值时刻的存活内存,"total" 对比运行期间的累计分配
+            top_n(int):报告中保留的变化最大的分配位置数量
+            native_traces(bool):追踪脚本时是否记录 C/C++ 调用栈
+            aggregated(bool):追踪脚本时是否使用聚合捕获格式 只支持 "peak"
+        Returns:
+            None
+        """
+        if metric not in self.METRICS:
+            raise ValueError(f"不支持的对比指标：{metric},可选 {self.METRICS}")
+        if metric == "total" and aggregated:
+            raise ValueError("聚合捕获格式没有逐次分配记录,只能对比 peak")
+        self.output_path = os.path.join(DEEPTRACER_DEV_ROOT,output_path)
+        self.html_path = f"{os.path.splitext(self.output_path)[0]}.html"
+        os.makedirs(os.path.dirname(self.output_path),exist_ok=True)
+        self.metric = metric
+        self.top_n = top_n
+        self.native_traces = native_traces
+        self.aggregated = aggregated
+        self.aliases = {}
+        scripts = [source for source in (before,after) if str(source).endswith(".py")]
+        if len(scripts) == 2:
+            for script in scripts:
+                self.aliases[os.path.abspath(script)] = "<script>"
+        #两个脚本互为新旧版本 模块级代码对齐到同一名称
+        self.aliases.update({os.path.abspath(path):name for path,name in (aliases or {}).items()})
+        self.before = self._resolve(before)
+        self.after = self._resolve(after)
+        self.result = None
+    def _resolve(self,
+                 source:str
+                 )->dict:
+        """
+        读取一侧的分配 .py 脚本先在独立子进程中追踪,追踪文件读取后删除
+
+        Args:
+            source(str):.py 脚本或 memray 捕获文件
+        Returns:
+            capture(dict):{"target","format","peak_memory","stacks"}
+                stacks 为 归一化调用栈 -> [字节数, 分配次数, (函数名, 文件, 行号, 源码)]
+        """
+        source = str(source)
+        if not source.endswith(".py"):
+            path = os.path.abspath(source)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"捕获文件不存在：{path}")
+            return self._read_capture(path,path)
+        with tempfile.TemporaryDirectory(prefix="deeptracer-memdiff-") as output_dir:
+            analyzer = MemoryAnalyzer(source,
+                                      output_dir=output_dir,
+                                      native_traces=self.native_traces,
+                                      aggregated=self.aggregated)
+            print_color(f"开始追踪文件：{analyzer.target_script}",fore_color="blue")
+            analyzer._run_memray_tracer()
+            return self._read_capture(str(analyzer.trace_bin),str(analyzer.target_script))
+    def _read_capture(self,
+                      path:str,
+                      target:str
+                      )->dict:
+        """
+        按归一化调用栈聚合捕获文件中的分配
+
+        Args:
+            path(str):memray 捕获文件
+            target(str):被追踪的脚本或捕获文件 写入报告
+        Returns:
+            capture(dict):{"target","format","peak_memory","stacks"}
+        """
+        from memray import FileReader, FileFormat, AllocatorType
+        deallocators = {AllocatorType.FREE,AllocatorType.MUNMAP,AllocatorType.PYMALLOC_FREE}
+        stacks = {}
+        keys = {}
+        #调用栈编号 -> 归一化调用栈 每个调用栈只解析一次
+        with FileReader(path) as reader:
+            aggregated = reader.metadata.file_format == FileFormat.AGGREGATED_ALLOCATIONS
+            if self.metric == "total" and aggregated:
+                raise ValueError(f"聚合格式的捕获文件只能对比 peak：{path}")
+            if self.metric == "peak":
+                records = reader.get_high_watermark_allocation_records(merge_threads=True)
+            else:
+                records = reader.get_allocation_records()
+            for record in records:
+                if record.allocator in deallocators:
+                    continue
+                entry = keys.get(record.stack_id)
+                if entry is None:
+                    frames = [tuple(frame) for frame in record.stack_trace()]
+                    if any(frame[1] == leakCheckpoint.__file__ for frame in frames):
+                        keys[record.stack_id] = entry = (None,None)
+                    else:
+                        stack = normalize_stack(frames,self.aliases)
+                        function,file_path,line = frames[0] if stack[0][0] != "<unknown>" else ("<unknown>","",0)
+                        #只有执行器帧的分配归入 <unknown>
+                        source = linecache.getline(file_path,line).strip() if file_path else ""
+                        #临时文件在对比之前会被删除 读取时保存源码
+                        keys[record.stack_id] = entry = (stack,(function,file_path,line,source))
+                stack,innermost = entry
+                if stack is None:
+                    continue
+                #检查点开始追踪时 memray 自身的分配
+                site = stacks.setdefault(stack,[0,0,innermost])
+                site[0] += record.size
+                site[1] += record.n_allocations
+            peak_memory = reader.metadata.peak_memory
+        return {
+            "target": target,
+            "format": "aggregated" if aggregated else "all_allocations",
+            "peak_memory": peak_memory,
+            "stacks": stacks
+        }
+    def compare(self)->dict:
+        """
+        计算差分结果
+
+        Args:
+            None
+        Returns:
+            result(dict):{"metric","before","after","peak_delta","peak_ratio","delta_bytes",
+                "sites","new_sites","removed_sites"} 内存单位为字节,
+                分配位置为 {"function","file","line","source","status","before_bytes","after_bytes",
+                "delta_bytes","before_count","after_count","delta_count","stack"}
+        """
+        empty = [0,0,None]
+        sites = []
+        for stack in set(self.before["stacks"]) | set(self.after["stacks"]):
+            old = self.before["stacks"].get(stack,empty)
+            new = self.after["stacks"].get(stack,empty)
+            if stack not in self.before["stacks"]:
+                status = "new"
+            elif stack not in self.after["stacks"]:
+                status = "removed"
+            else:
+                status = "changed"
+            function,file_path,line,source = new[2] or old[2]
+            #行号取变化后的版本 便于定位修改后的代码
+            sites.append({
+                "function": function,
+                "file": self.aliases.get(file_path,file_path),
+                "line": line,
+                "source": source,
+                "status": status,
+                "before_bytes": old[0],
+                "after_bytes": new[0],
+                "delta_bytes": new[0] - old[0],
+                "before_count": old[1],
+                "after_count": new[1],
+                "delta_count": new[1] - old[1],
+                "stack": [{"function": frame[0],"file": frame[1]} for frame in reversed(stack)]
+            })
+        sites.sort(key=lambda site: abs(site["delta_bytes"]),reverse=True)
+        new_sites = sorted((site for site in sites if site["status"] == "new"),
+                           key=lambda site: site["after_bytes"],reverse=True)
+        removed_sites = sorted((site for site in sites if site["status"] == "removed"),
+                               key=lambda site: site["before_bytes"],reverse=True)
+        before_bytes = sum(entry[0] for entry in self.before["stacks"].values())
+        after_bytes = sum(entry[0] for entry in self.after["stacks"].values())
+        self.result = {
+            "metric": self.metric,
+            "before": {
+                "target": self.before["target"],
+                "format": self.before["format"],
+                "peak_memory": self.before["peak_memory"],
+                "bytes": before_bytes
+            },
+            "after": {
+                "target": self.after["target"],
+                "format": self.after["format"],
+                "peak_memory": self.after["peak_memory"],
+                "bytes": after_bytes
+            },
+            "peak_delta": self.after["peak_memory"] - self.before["peak_memory"],
+            "peak_ratio": self.after["peak_memory"] / (self.before["peak_memory"] or 1),
+            "delta_bytes": after_bytes - before_bytes,
+            "sites": sites[:self.top_n],
+            "new_sites": new_sites[:self.top_n],
+            "removed_sites": removed_sites[:self.top_n]
+        }
+        return self.result
+    def diff_tree(self)->dict:
+        """
+        构建对齐后的差分调用树
+
+        Args:
+            None
+        Returns:
+            root(dict):差分树根节点 节点字节数包含全部子节点
+        """
+        root = diff_node("all")
+        for side,capture in (("before",self.before),("after",self.after)):
+            for stack,(size,_,_) in capture["stacks"].items():
+                root[side] += size
+                node = root
+                for frame in stack:
+                    label = _stack_label(frame)
+                    node = node["children"].setdefault(label,diff_node(label))
+                    node[side] += size
+        return root
+    def generate_report(self)->dict:
+        """
+        生成 JSON 报告与差分火焰图
+
+        Args:
+            None
+        Returns:
+            report_paths(dict):{"json","html"}
+        """
+        result = self.compare()
+        with open(self.output_path,"w",encoding="utf-8") as fp:
+            json.dump(result,fp,indent=4,ensure_ascii=False)
+        before = format_quantity(result["before"]["peak_memory"],"peak_memory")
+        after = format_quantity(result["after"]["peak_memory"],"peak_memory")
+        write_diff_flamegraph(self.diff_tree(),
+                              self.html_path,
+                              f"Memory diff ({self.metric}): peak {before} -> {after}",
+                              unit="B")
+        print_color(f"内存差分报告已生成：{self.output_path}",fore_color="green")
+        return {"json": self.output_path,"html": self.html_path}
+
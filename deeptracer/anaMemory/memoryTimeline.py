@@ -0,0 +1,156 @@
+"""
+内存时间线
+
+memray 每隔 memory_interval_ms 记录一次堆大小与 RSS 快照,时间序列读取模式下
+每个分配位置给出若干区间 (allocated_before_snapshot, deallocated_before_snapshot, n_bytes):
+区间内的字节在快照 [allocated, deallocated) 期间存活。本模块将快照按时间均匀合并为
+有限个时间点,每个时间点记录区间内的峰值堆/RSS,以及峰值时刻存活字节最多的分配位置
+"""
+import heapq
+
+
+def buckets(count:int,
+            points:int
+            )->list:
+    """
+    将快照编号均匀划分为不超过 points 个连续区间
+
+    Args:
+        count(int):快照数量
+        points(int):时间点数量上限
+    Returns:
+        ranges(list):[(起始编号, 结束编号)] 均为闭区间
+    """
+    points = max(1,min(points,count))
+    bounds = [round(i * count / points) for i in range(points + 1)]
+    return [(bounds[i],bounds[i + 1] - 1) for i in range(points) if bounds[i + 1] > bounds[i]]
+
+
+def _site_intervals(records)->dict:
+    """
+    按分配位置(最内层 Python 帧)合并时间序列记录的区间
+
+    Args:
+        records(Iterable[TemporalAllocationRecord]):时间序列分配记录
+    Returns:
+        sites(dict):(函数名, 文件, 行号) -> [(分配快照, 释放快照|None, 字节数)]
+    """
+    sites = {}
+    for record in records:
+        frames = record.stack_trace(max_stacks=1)
+        location = tuple(frames[0]) if frames else ("<unknown>","",0)
+        intervals = sites.setdefault(location,[])
+        for interval in record.intervals:
+            if interval.n_bytes:
+                intervals.append((interval.allocated_before_snapshot,
+                                  interval.deallocated_before_snapshot,
+                                  interval.n_bytes))
+    return sites
+
+
+def _live_bytes(intervals:list,
+                indexes:list
+                )->list:
+    """
+    计算分配位置在各快照时刻的存活字节数
+
+    Args:
+        intervals(list):[(分配快照, 释放快照|None, 字节数)]
+        indexes(list):升序的快照编号
+    Returns:
+        live(list):与 indexes 一一对应的存活字节数
+    """
+    deltas = {}
+    for allocated,deallocated,size in intervals:
+        deltas[allocated] = deltas.get(allocated,0) + size
+        if deallocated is not None:
+            deltas[deallocated] = deltas.get(deallocated,0) - size
+    changes = sorted(deltas.items())
+    live = []
+    current = 0
+    position = 0
+    for index in indexes:
+        while position < len(changes) and changes[position][0] <= index:
+            current += changes[position][1]
+            position += 1
+        live.append(current)
+    return live
+
+
+def build_timeline(reader,
+                   points:int = 100,
+                   top_n:int = 5,
+                   high_watermark:bool = False,
+                   sites:bool = True
+                   )->dict:
+    """
+    由 memray 捕获文件生成降采样的内存时间线
+
+    Args:
+        reader(memray.FileReader):捕获文件读取器
+        points(int):时间点数量上限
+        top_n(int):每个时间点保留的分配位置数量
+        high_watermark(bool):使用各快照区间内的堆高水位(包含两次快照之间的瞬时峰值)
+            代替快照时刻的堆大小
+        sites(bool):是否统计各时间点的分配位置 聚合格式的捕获文件没有时间序列记录,只能关闭
+    Returns:
+        timeline(dict):{"mode","snapshots","points":[{"start","end","heap","rss","top_sites":
+            [{"function","file","line","live_bytes","growth_bytes"}]}]} 时间为相对第一个快照的秒数,
+            growth_bytes 为该位置相对上一个时间点的存活字节变化
+    """
+    snapshots = list(reader.get_memory_snapshots())
+    if not snapshots:
+        return {"mode": "high_watermark" if high_watermark else "snapshot","snapshots": 0,"points": []}
+    heaps = [snapshot.heap for snapshot in snapshots]
+    if not sites:
+        if high_watermark:
+            raise ValueError("堆高水位时间线需要时间序列分配记录")
+        records = []
+    elif high_watermark:
+        records,watermarks = reader.get_temporal_high_water_mark_allocation_records(merge_threads=True)
+        for index,watermark in enumerate(watermarks[:len(heaps)]):
+            heaps[index] = max(heaps[index],watermark)
+        #最后一次分配之后没有高水位记录 保持快照值
+    else:
+        records = reader.get_temporal_allocation_records(merge_threads=True)
+    intervals_by_site = _site_intervals(records)
+
+    ranges = buckets(len(snapshots),points)
+    peaks = [max(range(first,last + 1),key=lambda index: heaps[index]) for first,last in ranges]
+    #每个时间点取区间内堆最大的快照 统计该时刻各分配位置的存活字节
+    tops = [[] for _ in ranges]
+    for location,intervals in intervals_by_site.items():
+        if not intervals:
+            continue
+        live = _live_bytes(intervals,peaks)
+        for position in range(len(ranges)):
+            growth = live[position] - (live[position - 1] if position else 0)
+            if not live[position] and not growth:
+                continue
+            item = (live[position],growth,location)
+            if len(tops[position]) < top_n:
+                heapq.heappush(tops[position],item)
+            else:
+                heapq.heappushpop(tops[position],item)
+            #每个时间点只保留 top_n 个位置 内存与分配位置数量无关
+    origin = snapshots[0].time
+    timeline = []
+    for position,(first,last) in enumerate(ranges):
+        timeline.append({
+            "start": (snapshots[first].time - origin) / 1000,
+            "end": (snapshots[last].time - origin) / 1000,
+            "heap": heaps[peaks[position]],
+            "rss": max(snapshot.rss for snapshot in snapshots[first:last + 1]),
+            "top_sites": [{
+                "function": function,
+                "file": file_path,
+                "line": line,
+                "live_bytes": live,
+                "growth_bytes": growth
+            } for live,growth,(function,file_path,line) in sorted(tops[position],reverse=True)]
+        })
+    return {
+        "mode": "high_watermark" if high_watermark else "snapshot",
+        "snapshots": len(snapshots),
+        "points": timeline
+    }
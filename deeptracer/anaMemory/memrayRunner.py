@@ -0,0 +1,93 @@
+"""
+内存追踪执行器：在独立子进程中以 memray.Tracker 运行目标脚本
+
+由 MemoryAnalyzer 通过
+    python -m deeptracer.anaMemory.memrayRunner
+启动,追踪结果写入指定的 memray 捕获文件,由父进程以 FileReader 读取
+"""
+import sys
+import json
+import argparse
+import contextlib
+import traceback
+from memray import Tracker, FileDestination, SocketDestination, FileFormat
+from deeptracer.anaMemory import leakCheckpoint
+from deeptracer.utils import (
+    search_path,
+    run_target
+    )
+
+
+def main(argv:list = None)->int:
+    """
+    子进程入口
+
+    Args:
+        argv(list):命令行参数
+    Returns:
+        exit_code(int):目标脚本的退出码
+    """
+    parser = argparse.ArgumentParser(prog="memrayRunner")
+    parser.add_argument("--output",help="memray 捕获文件")
+    parser.add_argument("--live-port",type=int,default=None,
+                        help="实时追踪:在本地端口等待 SocketReader 连接,分配记录写入 socket 而不是文件")
+    parser.add_argument("--native",action="store_true",help="记录 C/C++ 调用栈")
+    parser.add_argument("--memory-interval-ms",type=int,default=10,help="堆大小与 RSS 快照间隔(毫秒)")
+    parser.add_argument("--trace-python-allocators",action="store_true",
+                        help="逐个记录 pymalloc 分配 泄漏检测需要开启")
+    parser.add_argument("--aggregated",action="store_true",
+                        help="以聚合格式写入捕获文件 大小只与不同调用栈的数量有关")
+    parser.add_argument("--checkpoints",action="store_true",
+                        help="只追踪目标脚本中前两个 checkpoint() 之间的分配")
+    parser.add_argument("--module",default=None,
+                        help="以包内模块的身份执行目标 值为点分模块名")
+    parser.add_argument("script")
+    parser.add_argument("script_args",nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    if (args.output is None) == (args.live_port is None):
+        parser.error("--output 与 --live-port 必须且只能指定一个")
+    if args.live_port is not None and (args.checkpoints or args.aggregated):
+        parser.error("实时追踪不支持 --checkpoints 与 --aggregated")
+
+    sys.argv = [args.script] + args.script_args
+    sys.path.insert(0,search_path(args.script,args.module))
+    #与直接运行脚本(或 python -m 运行模块)时的模块搜索路径保持一致
+
+    options = {
+        "native_traces": args.native,
+        "memory_interval_ms": args.memory_interval_ms,
+        "trace_python_allocators": args.trace_python_allocators,
+        "file_format": FileFormat.AGGREGATED_ALLOCATIONS if args.aggregated else FileFormat.ALL_ALLOCATIONS
+    }
+    if args.checkpoints:
+        leakCheckpoint.arm(args.output,**options)
+        tracker = contextlib.nullcontext()
+        #由目标脚本中的检查点开始与停止追踪
+    elif args.live_port is not None:
+        options.pop("file_format")
+        tracker = Tracker(destination=SocketDestination(server_port=args.live_port),**options)
+        #客户端连接之后才开始运行目标脚本
+    else:
+        tracker = Tracker(destination=FileDestination(args.output,overwrite=True),**options)
+
+    exit_code = 0
+    with tracker:
+        try:
+            run_target(args.script,args.module)
+        except SystemExit as e:
+            if isinstance(e.code,int):
+                exit_code = e.code
+            elif e.code is not None:
+                exit_code = 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+    #脚本异常退出时仍保留已追踪的分配
+    if args.checkpoints:
+        with open(f"{args.output}.checkpoints","w",encoding="utf-8") as fp:
+            json.dump(leakCheckpoint.finish(),fp,ensure_ascii=False)
+        #交回已到达的检查点名称
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
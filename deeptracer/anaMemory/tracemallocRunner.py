@@ -0,0 +1,267 @@
+"""
+轻量内存追踪执行器：在独立子进程中以 tracemalloc 运行目标脚本
+
+由 MemoryAnalyzer 的 tracemalloc 后端通过
+    python -m deeptracer.anaMemory.tracemallocRunner
+启动。后台线程每隔 interval 秒记录一次堆大小,并按开销自适应地获取分配位置快照,快照只保留
+按分配位置汇总的(字节数, 块数),与上一次快照相减得到各位置的增长;结果写入 JSON,
+由父进程生成摘要与时间线
+"""
+import sys
+import json
+import time
+import argparse
+import datetime
+import threading
+import traceback
+import tracemalloc
+from deeptracer.anaMemory.memoryBackends import IGNORED_FILES
+from deeptracer.utils import (
+    search_path,
+    run_target
+    )
+
+
+class SnapshotSampler:
+    """
+    周期采样
+
+    每次采样只读取 tracemalloc 的当前堆与区间高水位,开销与存活块数无关;按分配位置汇总的
+    快照需要复制全部存活的分配记录,开销与存活块数成正比,只在预计耗时不超过距上一次快照
+    时间的 budget 比例时获取,结束时在不超过总运行时间的 budget 比例(至少 FINAL_FLOOR 秒)时再获取一次,
+    很短的脚本也能得到分配位置。
+    预计耗时为上一次快照的 秒数/tracemalloc 自身内存 乘以当前的 tracemalloc 自身内存
+
+    Args:
+        frames(int):每个分配记录的调用栈深度
+        interval(float):堆采样间隔(秒)
+        top_n(int):每次快照保留的分配位置数量
+        budget(float):分配位置快照可占用的运行时间比例
+    """
+    SNAPSHOT_EVERY = 10
+    #两次分配位置快照之间至少间隔的采样次数
+    FINAL_FLOOR = 0.05
+    #结束时的快照总可以使用的秒数 不随运行时间缩小
+    def __init__(self,
+                 frames:int = 1,
+                 interval:float = 0.1,
+                 top_n:int = 10,
+                 budget:float = 0.05
+                 )->None:
+        self.frames = frames
+        self.interval = interval
+        self.top_n = top_n
+        self.budget = budget
+        self.key_type = "traceback" if frames > 1 else "lineno"
+        self.started = time.perf_counter()
+        self.samples = []
+        self.snapshots = []
+        self.previous = {}
+        self.peak_heap = 0
+        self.peak_sites = {}
+        #堆最大的一次分配位置快照
+        self.peak_sites_heap = -1
+        self.snapshot_seconds = 0.0
+        self.final_snapshot = False
+        self._last_snapshot = 0.0
+        self._cost_rate = None
+        #每字节 tracemalloc 自身内存对应的快照秒数
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run,name="deeptracer-tracemalloc",daemon=True)
+    def _sites(self)->dict:
+        """
+        获取一次快照并按分配位置汇总 不使用 filter_traces,避免同时持有两份分配记录
+
+        Args:
+            None
+        Returns:
+            sites(dict):((文件, 行号),...) 由外向内 -> (字节数, 块数)
+        """
+        sites = {}
+        for statistic in tracemalloc.take_snapshot().statistics(self.key_type):
+            if statistic.traceback[-1].filename in IGNORED_FILES:
+                continue
+            #按最内层帧过滤 与 tracemalloc.Filter 的默认行为一致
+            sites[tuple((frame.filename,frame.lineno) for frame in statistic.traceback)] = (
+                statistic.size,statistic.count)
+        return sites
+    def _expected_cost(self)->float:
+        """
+        预计下一次分配位置快照的耗时
+
+        Args:
+            None
+        Returns:
+            cost(float):秒数 尚未获取过快照时为0
+        """
+        if self._cost_rate is None:
+            return 0.0
+        return self._cost_rate * tracemalloc.get_tracemalloc_memory()
+    def _snapshot(self,
+                  now:float
+                  )->None:
+        """
+        记录一次分配位置快照 与上一次快照相减得到各位置的增长
+
+        Args:
+            now(float):相对开始的秒数
+        Returns:
+            None
+        """
+        traces_memory = tracemalloc.get_tracemalloc_memory()
+        begin = time.perf_counter()
+        sites = self._sites()
+        cost = time.perf_counter() - begin
+        self.snapshot_seconds += cost
+        self._cost_rate = cost / max(traces_memory,1)
+        self._last_snapshot = now + cost
+        heap = sum(size for size,_ in sites.values())
+        ranked = sorted(sites.items(),key=lambda item: item[1][0],reverse=True)[:self.top_n]
+        self.snapshots.append({
+            "time": now,
+            "heap": heap,
+            "top_sites": [{
+                "stack": [list(frame) for frame in key],
+                "bytes": size,
+                "count": count,
+                "growth_bytes": size - self.previous.get(key,(0,0))[0]
+            } for key,(size,count) in ranked]
+        })
+        if heap >= self.peak_sites_heap:
+            self.peak_sites_heap = heap
+            self.peak_sites = sites
+        self.previous = sites
+    def sample(self,
+               final:bool = False
+               )->None:
+        """
+        记录一次堆采样 到期且预计耗时在预算内时同时获取分配位置快照
+
+        Args:
+            final(bool):结束时的采样 预算按总运行时间计算,不低于 FINAL_FLOOR 秒
+        Returns:
+            None
+        """
+        with self._lock:
+            heap,interval_peak = tracemalloc.get_traced_memory()
+            #当前堆与上一次采样以来的堆高水位
+            now = time.perf_counter() - self.started
+            self.samples.append({"time": now,"heap": heap,"peak": max(interval_peak,heap)})
+            self.peak_heap = max(self.peak_heap,interval_peak,heap)
+            since = now - self._last_snapshot
+            if final:
+                if self._expected_cost() <= max(self.budget * now,self.FINAL_FLOOR):
+                    self._snapshot(now)
+                    self.final_snapshot = True
+            elif since >= self.interval * self.SNAPSHOT_EVERY and self._expected_cost() <= self.budget * since:
+                self._snapshot(now)
+            tracemalloc.reset_peak()
+            #快照自身的分配不计入下一个区间
+    def _run(self)->None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+    def start(self)->None:
+        begin = time.perf_counter()
+        self._sites()
+        self._cost_rate = (time.perf_counter() - begin) / max(tracemalloc.get_tracemalloc_memory(),1)
+        #目标脚本运行前以一次空快照估计快照开销
+        self._thread.start()
+    def stop(self)->None:
+        self._stop.set()
+        self._thread.join()
+        self.sample(final=True)
+        #结束时的快照 此时目标脚本的模块变量仍然存活
+
+
+def _peak_rss()->int:
+    """
+    获得本进程的 RSS 峰值
+
+    Args:
+        None
+    Returns:
+        peak_rss(int|None):字节数 平台不支持时为None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+    #Linux 以 KiB 为单位 macOS 以字节为单位
+
+
+def main(argv:list = None)->int:
+    """
+    子进程入口
+
+    Args:
+        argv(list):命令行参数
+    Returns:
+        exit_code(int):目标脚本的退出码
+    """
+    parser = argparse.ArgumentParser(prog="tracemallocRunner")
+    parser.add_argument("--output",required=True,help="结果 JSON 文件")
+    parser.add_argument("--frames",type=int,default=1,help="每个分配记录的调用栈深度")
+    parser.add_argument("--interval",type=float,default=0.1,help="堆采样间隔(秒)")
+    parser.add_argument("--budget",type=float,default=0.05,help="分配位置快照可占用的运行时间比例")
+    parser.add_argument("--top-n",type=int,default=10,help="每次快照保留的分配位置数量")
+    parser.add_argument("--module",default=None,
+                        help="以包内模块的身份执行目标 值为点分模块名")
+    parser.add_argument("script")
+    parser.add_argument("script_args",nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    sys.argv = [args.script] + args.script_args
+    sys.path.insert(0,search_path(args.script,args.module))
+    #与直接运行脚本(或 python -m 运行模块)时的模块搜索路径保持一致
+
+    start_time = datetime.datetime.now().isoformat()
+    tracemalloc.start(args.frames)
+    sampler = SnapshotSampler(frames=args.frames,
+                              interval=args.interval,
+                              top_n=args.top_n,
+                              budget=args.budget)
+    sampler.start()
+    exit_code = 0
+    module_globals = None
+    try:
+        module_globals = run_target(args.script,args.module)
+    except SystemExit as e:
+        if isinstance(e.code,int):
+            exit_code = e.code
+        elif e.code is not None:
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    duration = time.perf_counter() - sampler.started
+    sampler.stop()
+    tracemalloc.stop()
+    del module_globals
+
+    result = {
+        "start_time": start_time,
+        "frames": args.frames,
+        "interval": args.interval,
+        "budget": args.budget,
+        "duration": duration,
+        "peak_heap": sampler.peak_heap,
+        "peak_rss": _peak_rss(),
+        "samples": sampler.samples,
+        "snapshots": sampler.snapshots,
+        "snapshot_seconds": sampler.snapshot_seconds,
+        "final_snapshot": sampler.final_snapshot,
+        "peak_sites": [{
+            "stack": [list(frame) for frame in key],
+            "bytes": size,
+            "count": count
+        } for key,(size,count) in sampler.peak_sites.items()]
+    }
+    with open(args.output,"w",encoding="utf-8") as fp:
+        json.dump(result,fp,ensure_ascii=False)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ from deeptracer import (
     DEEPTRACER_DEV_ROOT,
     print_color
     )
+from deeptracer.cache import ResultCache
+from deeptracer.utils import RunContext
 import uuid
 
 class AstAnalyer:
@@ -41,7 +43,9 @@ class AstAnalyer:
                 'AsyncFunctionDef',
                 'Await', 
                 'AsyncFor'
-            )
+            ),
+                 cache:ResultCache=None,
+                 run_context:RunContext=None
                 )->None:
         """
         初始化函数
@@ -51,10 +55,14 @@ class AstAnalyer:
             save_path(str):检验结果存储路径
             open(bool):是不是开启ast过滤
             core_node_types(tuple):保留类别
+            cache(ResultCache):结果缓存,为None时不使用缓存
+            run_context(RunContext):运行上下文,指定时报告写入本次运行的独立目录
         Returns:
             None
         """
         self.pythonScript = pythonScript
+        if run_context is not None:
+            save_path = run_context.path(os.path.basename(save_path))
         self.save_path = os.path.join(DEEPTRACER_DEV_ROOT,save_path)
         if os.path.exists(self.save_path):
             os.remove(self.save_path)
@@ -65,6 +73,19 @@ class AstAnalyer:
         #如果选者开启过滤 只保留以上的语法节点
         self.graph = networkx.DiGraph()
         #建立网络对象
+        self.cache = cache
+        self._cache_entry = None
+        if self.cache is not None:
+            self._cache_key = self.cache.make_key(
+                self.pythonScript,
+                "ast",
+                {"open": self.open,
+                 "core_node_types": list(core_node_types) if self.open else None}
+            )
+            self._cache_entry = self.cache.get(self._cache_key)
+            if self._cache_entry is not None:
+                return
+        #命中缓存时跳过语法树解析
         root = self._get_ast()
         #获得Moudel对象是代码起始点
         self._traverse_ast(root)
@@ -225,6 +246,11 @@ class AstAnalyer:
         Returns:
             None
         """
+        if self._cache_entry is not None:
+            self.cache.restore(self._cache_entry,"html",self.save_path)
+            print_color(f"命中缓存,AST可视化已还原{self.save_path}",
+                        fore_color="green")
+            return
         # 初始化pyvis网络（设置尺寸、是否可交互）
         net = Network(
             height='800px',
@@ -259,6 +285,11 @@ class AstAnalyer:
         
         # 生成HTML文件
         net.write_html(self.save_path)
+        if self.cache is not None:
+            self.cache.put(self._cache_key,
+                           {"html": self.save_path},
+                           {"nodes": self.graph.number_of_nodes(),
+                            "edges": self.graph.number_of_edges()})
         print_color(f"AST可视化已生成{self.save_path}",
                     fore_color="green")
 
@@ -277,6 +308,8 @@ class CodeStructureAnalyzer(AstAnalyer):
         def __init__(self,
                     pythonScript:str = None,
                     save_path:str = "deeptracer/tools_report/codeStructure.html",
+                    cache:ResultCache = None,
+                    run_context:RunContext = None
                     )->None:
             """
             初始化函数
@@ -284,6 +317,8 @@ class CodeStructureAnalyzer(AstAnalyer):
             Args:
                 pythonScript(str):python源文件路径
                 save_path(str):检验结果存储路径
+                cache(ResultCache):结果缓存,为None时不使用缓存
+                run_context(RunContext):运行上下文,指定时报告写入本次运行的独立目录
 
             Returns:
                 None            
@@ -300,6 +335,8 @@ class CodeStructureAnalyzer(AstAnalyer):
             super().__init__(pythonScript=pythonScript,
                              save_path=save_path,
                              open=open,
-                             core_node_types=core_node
+                             core_node_types=core_node,
+                             cache=cache,
+                             run_context=run_context
                              )
             
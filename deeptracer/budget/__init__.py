@@ -0,0 +1,5 @@
+from .performanceBudget import PerformanceBudget
+
+__all__ = [
+    "PerformanceBudget"
+]
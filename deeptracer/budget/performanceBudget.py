@@ -0,0 +1,356 @@
+import os
+import json
+import statistics
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+from deeptracer.utils.quantity import (
+    SIZE_UNITS,
+    TIME_UNITS,
+    parse_quantity,
+    format_quantity
+    )
+
+
+class PerformanceBudget:
+    """
+    性能预算与回归门禁
+
+    预算文件(JSON)为每个目标(脚本或可调用对象)规定耗时与峰值内存上限,例如:
+        {
+            "tolerance": 0.1,
+            "runs": 3,
+            "targets": {
+                "scripts/job.py": {
+                    "duration": "2s",
+                    "peak_memory": "256MiB",
+                    "functions": {"slow_sum": {"self_time": "500ms"},
+                                  "Loader.parse": {"self_time": "100ms"},
+                                  "pkg/io.py:load": {"total_time": 1.2}}
+                },
+                "pkg.api:handle": {"args": [1000], "warmup": 1, "repeat": 5, "duration": "20ms"}
+            }
+        }
+    脚本路径相对预算文件所在目录;函数键为函数名、"类名.方法名" 或在其前加上 "文件路径后缀:",
+    没有匹配任何函数的键视为检查失败;
+    可调用对象的 duration 为单次调用的平均耗时。值为 null 的指标只与基线比较,
+    指定基线时每个指标不得超过 基线 * (1 + tolerance)
+
+    Args:
+        budget_path(str):预算文件路径
+    Attributes:
+        budget(dict):预算文件内容
+
+    Methods:
+        measure: 测量单个目标的指标
+        check: 测量全部目标并与预算/基线比较
+        save_baseline: 将测量结果保存为基线
+        format_result: 生成简洁的对比文本
+    """
+    def __init__(self,
+                 budget_path:str,
+                 baseline_path:str = None,
+                 tolerance:float = None,
+                 interval:float = 0.001,
+                 timeout:float = None,
+                 output_path:str = "deeptracer/tools_report/budgetCheck.json"
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            budget_path(str):预算文件路径
+            baseline_path(str):基线文件路径 None表示只检查绝对预算
+            tolerance(float):相对基线允许的增长比例 默认读取预算文件中的 tolerance(缺省0.1)
+            interval(float):采样间隔(秒)
+            timeout(float):单次运行脚本的墙钟时间上限(秒)
+            output_path(str):检查结果 JSON 的路径
+        Returns:
+            None
+        """
+        self.budget_path = os.path.abspath(budget_path)
+        with open(self.budget_path,"r",encoding="utf-8") as fp:
+            self.budget = json.load(fp)
+        if not isinstance(self.budget.get("targets"),dict) or not self.budget["targets"]:
+            raise ValueError(f"预算文件中没有 targets：{self.budget_path}")
+        self.base_dir = os.path.dirname(self.budget_path)
+        self.baseline_path = os.path.abspath(baseline_path) if baseline_path else None
+        self.tolerance = tolerance if tolerance is not None else self.budget.get("tolerance",0.1)
+        self.interval = interval
+        self.timeout = timeout
+        self.output_path = os.path.join(DEEPTRACER_DEV_ROOT,output_path)
+        os.makedirs(os.path.dirname(self.output_path),exist_ok=True)
+    def _is_script(self,
+                   target:str
+                   )->bool:
+        """
+        判断目标是否为脚本
+
+        Args:
+            target(str):目标
+        Returns:
+            is_script(bool):是否为 .py 脚本(而非可调用对象或 pytest 节点)
+        """
+        return target.endswith(".py") and "::" not in target
+    def _profile(self,
+                 target:str,
+                 spec:dict
+                 )->tuple:
+        """
+        分析一次目标 读取全部函数的耗时 可调用目标重复调用时均按单次调用计算
+
+        Args:
+            target(str):目标
+            spec(dict):目标的预算配置
+        Returns:
+            result(tuple):(目标耗时, 函数列表)
+        """
+        from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+        report_path = f"{os.path.splitext(self.output_path)[0]}.profile.html"
+        analyzer = PyInstrumentAnalyzer(default_report_path=report_path)
+        if self._is_script(target):
+            path = analyzer.generate_perf_report(os.path.join(self.base_dir,target),
+                                                 interval=self.interval,
+                                                 formats=("hotspots",),
+                                                 top_n=None,
+                                                 isolated=True,
+                                                 timeout=self.timeout)
+            repeat = 1
+        else:
+            repeat = spec.get("repeat",1)
+            path = analyzer.generate_callable_report(target,
+                                                     args=tuple(spec.get("args",())),
+                                                     kwargs=spec.get("kwargs"),
+                                                     warmup=spec.get("warmup",0),
+                                                     repeat=repeat,
+                                                     interval=self.interval,
+                                                     formats=("hotspots",),
+                                                     top_n=None,
+                                                     search_paths=(self.base_dir,))
+        with open(path,"r",encoding="utf-8") as fp:
+            report = json.load(fp)
+        os.remove(path)
+        hotspots = [{**entry,
+                     "self_time": entry["self_time"] / repeat,
+                     "total_time": entry["total_time"] / repeat}
+                    for entry in report["hotspots"]]
+        #函数预算与耗时预算一样不随 repeat 变化
+        return report["duration"] / repeat,hotspots
+    def _function_time(self,
+                       hotspots:list,
+                       key:str
+                       )->dict:
+        """
+        汇总与函数键匹配的函数耗时
+
+        Args:
+            hotspots(list):热点列表
+            key(str):函数名、"类名.方法名",可带 "文件路径后缀:" 前缀
+        Returns:
+            times(dict|None):{"self_time","total_time"} 没有匹配的函数时为None
+        """
+        file_suffix,_,qualname = key.rpartition(":")
+        file_suffix = file_suffix.replace("\\","/")
+        class_name,_,name = qualname.rpartition(".")
+        times = {"self_time": 0.0,"total_time": 0.0}
+        matched = False
+        for entry in hotspots:
+            if entry["function"] != name:
+                continue
+            if class_name and entry.get("class") != class_name:
+                continue
+            if file_suffix and not (entry["file"] or "").replace("\\","/").endswith(file_suffix):
+                continue
+            matched = True
+            times["self_time"] += entry["self_time"]
+            times["total_time"] += entry["total_time"]
+        return times if matched else None
+    def measure(self,
+                target:str,
+                spec:dict
+                )->dict:
+        """
+        测量单个目标的指标 多次运行时每个指标取中位数
+
+        Args:
+            target(str):目标
+            spec(dict):目标的预算配置
+        Returns:
+            metrics(dict):{"duration","peak_memory"(仅设置了内存预算的脚本),"functions":{函数键:{"self_time","total_time"}}}
+                任何一次运行都没有匹配到函数的键对应None
+        """
+        runs = max(1,int(spec.get("runs",self.budget.get("runs",1))))
+        durations = []
+        functions = {key:{"self_time": [],"total_time": []} for key in spec.get("functions",{})}
+        found = set()
+        for _ in range(runs):
+            duration,hotspots = self._profile(target,spec)
+            durations.append(duration)
+            for key,samples in functions.items():
+                times = self._function_time(hotspots,key)
+                if times is not None:
+                    found.add(key)
+                for metric,values in samples.items():
+                    values.append(times[metric] if times is not None else 0.0)
+        #只在部分运行中被采样到的函数 其余运行按0计
+        metrics = {
+            "duration": statistics.median(durations),
+            "functions": {key:{metric: statistics.median(values) for metric,values in samples.items()}
+                          if key in found else None
+                          for key,samples in functions.items()}
+        }
+        if "peak_memory" in spec:
+            if not self._is_script(target):
+                raise ValueError(f"峰值内存预算只支持脚本：{target}")
+            from deeptracer.anaMemory import MemoryAnalyzer
+            memory = MemoryAnalyzer(os.path.join(self.base_dir,target),
+                                    output_dir=os.path.dirname(self.output_path))
+            metrics["peak_memory"] = memory.measure_peak_memory()
+        return metrics
+    def _load_baseline(self)->dict:
+        """
+        读取基线 不存在时返回空基线
+
+        Args:
+            None
+        Returns:
+            baseline(dict):目标 -> 指标
+        """
+        if self.baseline_path is None or not os.path.exists(self.baseline_path):
+            return {}
+        with open(self.baseline_path,"r",encoding="utf-8") as fp:
+            return json.load(fp).get("targets",{})
+    def _compare(self,
+                 target:str,
+                 metric:str,
+                 measured:float,
+                 limit,
+                 baseline:float|None
+                 )->dict:
+        """
+        将一个指标与预算和基线比较
+
+        Args:
+            target(str):目标
+            metric(str):指标名 函数指标为 "函数键.self_time" 形式
+            measured(float):测量值
+            limit(int|float|str|None):预算值
+            baseline(float|None):基线值
+        Returns:
+            check(dict):{"target","metric","measured","limit","baseline","allowed","passed","reason"}
+        """
+        unit = "peak_memory" if metric == "peak_memory" else "time"
+        limit = parse_quantity(limit,SIZE_UNITS if unit == "peak_memory" else TIME_UNITS)
+        allowed = []
+        if limit is not None:
+            allowed.append((limit,"budget"))
+        if baseline is not None:
+            allowed.append((baseline * (1 + self.tolerance),"baseline"))
+        allowed_value,reason = min(allowed) if allowed else (None,None)
+        #同时有预算与基线时以更严格者为准
+        return {
+            "target": target,
+            "metric": metric,
+            "measured": measured,
+            "limit": limit,
+            "baseline": baseline,
+            "allowed": allowed_value,
+            "passed": allowed_value is None or measured <= allowed_value,
+            "reason": reason
+        }
+    def check(self)->dict:
+        """
+        测量全部目标并与预算/基线比较 结果写入 output_path
+
+        Args:
+            None
+        Returns:
+            result(dict):{"passed","tolerance","baseline","checks","violations","measurements"}
+        """
+        baseline = self._load_baseline()
+        checks = []
+        measurements = {}
+        for target,spec in self.budget["targets"].items():
+            print_color(f"检查性能预算：{target}",fore_color="blue")
+            metrics = measurements[target] = self.measure(target,spec)
+            base = baseline.get(target,{})
+            for metric in ("duration","peak_memory"):
+                if metric in spec:
+                    checks.append(self._compare(target,metric,metrics[metric],spec[metric],base.get(metric)))
+            for key,limits in spec.get("functions",{}).items():
+                for metric in ("self_time","total_time"):
+                    if metric not in limits:
+                        continue
+                    if metrics["functions"][key] is None:
+                        checks.append({
+                            "target": target,
+                            "metric": f"{key}.{metric}",
+                            "measured": None,
+                            "limit": parse_quantity(limits[metric],TIME_UNITS),
+                            "baseline": None,
+                            "allowed": None,
+                            "passed": False,
+                            "reason": "not_found"
+                        })
+                        continue
+                    #预算不能静默地不约束任何函数
+                    checks.append(self._compare(target,f"{key}.{metric}",
+                                                metrics["functions"][key][metric],limits[metric],
+                                                (base.get("functions",{}).get(key) or {}).get(metric)))
+        violations = [check for check in checks if not check["passed"]]
+        result = {
+            "passed": not violations,
+            "tolerance": self.tolerance,
+            "baseline": self.baseline_path,
+            "checks": checks,
+            "violations": violations,
+            "measurements": measurements
+        }
+        with open(self.output_path,"w",encoding="utf-8") as fp:
+            json.dump(result,fp,indent=4,ensure_ascii=False)
+        return result
+    def save_baseline(self,
+                      measurements:dict,
+                      baseline_path:str = None
+                      )->str:
+        """
+        将测量结果保存为基线
+
+        Args:
+            measurements(dict):check 返回的 measurements
+            baseline_path(str):基线文件路径 默认为初始化时指定的路径
+        Returns:
+            baseline_path(str):基线文件路径
+        """
+        baseline_path = os.path.abspath(baseline_path or self.baseline_path)
+        with open(baseline_path,"w",encoding="utf-8") as fp:
+            json.dump({"budget": self.budget_path,"targets": measurements},fp,indent=4,ensure_ascii=False)
+        return baseline_path
+    @staticmethod
+    def format_result(result:dict)->str:
+        """
+        生成简洁的对比文本 每个指标一行,超出预算的指标标记为 FAIL
+
+        Args:
+            result(dict):check 的返回值
+        Returns:
+            text(str):对比文本
+        """
+        lines = []
+        for check in result["checks"]:
+            if check["reason"] == "not_found":
+                lines.append(f"  FAIL {check['target']}  {check['metric']}  没有匹配的函数")
+                continue
+            measured = format_quantity(check["measured"],check["metric"])
+            if check["allowed"] is None:
+                lines.append(f"  --   {check['target']}  {check['metric']}  {measured} (无基线)")
+                continue
+            allowed = format_quantity(check["allowed"],check["metric"])
+            change = (check["measured"] / check["allowed"] - 1) if check["allowed"] else 0.0
+            status = "ok  " if check["passed"] else "FAIL"
+            relation = "<=" if check["passed"] else ">"
+            lines.append(f"  {status} {check['target']}  {check['metric']}  "
+                         f"{measured} {relation} {allowed} ({check['reason']},{change:+.1%})")
+        summary = "性能预算检查通过" if result["passed"] else f"性能预算检查失败：{len(result['violations'])} 项超出"
+        return "\n".join([summary] + lines)
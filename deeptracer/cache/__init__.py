@@ -0,0 +1,5 @@
+from .resultCache import ResultCache
+
+__all__ = [
+    "ResultCache"
+]
@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from importlib import metadata
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+
+
+class ResultCache:
+    """
+    分析结果的内容寻址缓存
+
+    缓存键由 脚本内容的SHA-256 + 分析器参数 + 工具版本 组成,
+    指定依赖时还包含脚本(直接或间接)导入的项目内模块的SHA-256,
+    命中时直接返回存储的报告与摘要,无需重新执行或解析脚本。
+    缓存总大小超出上限时按最近访问时间(LRU)淘汰。
+
+    Args:
+        cache_dir(str):缓存目录
+        max_bytes(int):缓存总大小上限
+        dependencies(dict):被分析脚本依赖的模块名 -> SHA-256
+    Attributes:
+        TOOL_PACKAGES(dict):分析工具 -> 影响结果的依赖包
+
+    Methods:
+        make_key: 生成缓存键
+        get: 查询缓存
+        put: 写入缓存
+        restore: 将缓存中的文件还原到指定路径
+    """
+    TOOL_PACKAGES = {
+        "pyinstrument": ("pyinstrument",),
+        "memray": ("memray",),
+        "ast": ("pyvis","networkx"),
+    }
+    META_NAME = "meta.json"
+    def __init__(self,
+                 cache_dir:str = "deeptracer/tools_report/cache",
+                 max_bytes:int = 512 * 1024 * 1024,
+                 dependencies:dict = None
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            cache_dir(str):缓存目录(相对路径基于项目根目录)
+            max_bytes(int):缓存总大小上限 默认512MB
+            dependencies(dict):被分析脚本依赖的模块名 -> SHA-256 依赖变化时缓存不命中
+        Returns:
+            None
+        """
+        self.cache_dir = os.path.join(DEEPTRACER_DEV_ROOT,cache_dir)
+        self.max_bytes = max_bytes
+        self.dependencies = dict(dependencies or {})
+        os.makedirs(self.cache_dir,exist_ok=True)
+    def _tool_versions(self,
+                       tool:str
+                       )->dict:
+        """
+        获得分析工具及python解释器的版本信息
+
+        Args:
+            tool(str):分析工具名称
+        Returns:
+            versions(dict):包名 -> 版本号
+        """
+        versions = {"python": sys.version.split()[0]}
+        for package in self.TOOL_PACKAGES.get(tool,()):
+            try:
+                versions[package] = metadata.version(package)
+            except metadata.PackageNotFoundError:
+                versions[package] = None
+        return versions
+    def make_key(self,
+                 py_path:str,
+                 tool:str,
+                 params:dict = None
+                 )->str:
+        """
+        生成缓存键
+
+        Args:
+            py_path(str):被分析的脚本路径
+            tool(str):分析工具名称
+            params(dict):影响分析结果的参数
+        Returns:
+            key(str):SHA-256十六进制字符串
+        """
+        digest = hashlib.sha256()
+        with open(py_path,"rb") as fp:
+            for chunk in iter(lambda: fp.read(1024 * 1024),b""):
+                digest.update(chunk)
+        #脚本内容哈希
+        identity = {
+            "source": digest.hexdigest(),
+            "tool": tool,
+            "params": params or {},
+            "versions": self._tool_versions(tool)
+        }
+        if self.dependencies:
+            identity["dependencies"] = self.dependencies
+        #没有依赖时沿用原有的缓存键
+        payload = json.dumps(identity,sort_keys=True,default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    def _entry_dir(self,
+                   key:str
+                   )->str:
+        """
+        获得缓存条目目录
+
+        Args:
+            key(str):缓存键
+        Returns:
+            entry_dir(str):条目目录
+        """
+        return os.path.join(self.cache_dir,key[:2],key)
+    def _write_meta(self,
+                    entry_dir:str,
+                    meta:dict
+                    )->None:
+        """
+        原子地写入条目元信息
+
+        Args:
+            entry_dir(str):条目目录
+            meta(dict):元信息
+        Returns:
+            None
+        """
+        tmp_path = os.path.join(entry_dir,f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path,"w",encoding="utf-8") as fp:
+            json.dump(meta,fp,ensure_ascii=False)
+        os.replace(tmp_path,os.path.join(entry_dir,self.META_NAME))
+    def get(self,
+            key:str
+            )->dict|None:
+        """
+        查询缓存 命中时刷新最近访问时间
+
+        Args:
+            key(str):缓存键
+        Returns:
+            entry(dict|None):{"files":{名称:缓存文件路径},"summary":摘要} 未命中返回None
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir,self.META_NAME),"r",encoding="utf-8") as fp:
+                meta = json.load(fp)
+        except (OSError,ValueError):
+            return None
+        files = {name:os.path.join(entry_dir,file_name)
+                 for name,file_name in meta["files"].items()}
+        if not all(os.path.exists(path) for path in files.values()):
+            return None
+        #条目不完整视为未命中
+        meta["last_access"] = time.time()
+        try:
+            self._write_meta(entry_dir,meta)
+        except OSError:
+            pass
+        #条目可能正在被并发淘汰 刷新失败不影响读取
+        return {
+            "files": files,
+            "summary": meta.get("summary")
+        }
+    def put(self,
+            key:str,
+            files:dict,
+            summary:dict = None
+            )->dict:
+        """
+        写入缓存 先写入临时目录再整体重命名,保证并发写入时条目完整
+
+        Args:
+            key(str):缓存键
+            files(dict):名称 -> 需要缓存的文件路径
+            summary(dict):可JSON序列化的分析摘要
+        Returns:
+            entry(dict):与 get 返回格式一致的条目
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = os.path.join(self.cache_dir,f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        stored = {}
+        size = 0
+        for name,path in files.items():
+            file_name = name + os.path.splitext(path)[1]
+            shutil.copyfile(path,os.path.join(tmp_dir,file_name))
+            stored[name] = file_name
+            size += os.path.getsize(path)
+        now = time.time()
+        self._write_meta(tmp_dir,{
+            "files": stored,
+            "summary": summary,
+            "size": size,
+            "created": now,
+            "last_access": now
+        })
+        os.makedirs(os.path.dirname(entry_dir),exist_ok=True)
+        try:
+            os.rename(tmp_dir,entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir,ignore_errors=True)
+        #其他进程已写入相同条目 内容一致直接丢弃
+        self._evict()
+        return {
+            "files": {name:os.path.join(entry_dir,file_name)
+                      for name,file_name in stored.items()},
+            "summary": summary
+        }
+    def restore(self,
+                entry:dict,
+                name:str,
+                dst_path:str
+                )->str:
+        """
+        将缓存中的文件复制到目标路径
+
+        Args:
+            entry(dict):get/put 返回的条目
+            name(str):文件名称
+            dst_path(str):目标路径
+        Returns:
+            dst_path(str):目标路径
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(dst_path)),exist_ok=True)
+        shutil.copyfile(entry["files"][name],dst_path)
+        return dst_path
+    def _evict(self)->None:
+        """
+        按最近访问时间淘汰条目 直到总大小不超过上限
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        entries = []
+        total = 0
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir,prefix)
+            if prefix.startswith(".") or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir,key)
+                try:
+                    with open(os.path.join(entry_dir,self.META_NAME),"r",encoding="utf-8") as fp:
+                        meta = json.load(fp)
+                except (OSError,ValueError):
+                    continue
+                entries.append((meta["last_access"],meta["size"],entry_dir))
+                total += meta["size"]
+        entries.sort()
+        #最久未访问的排在最前
+        for _,size,entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir,ignore_errors=True)
+            total -= size
+            print_color(f"缓存已淘汰：{os.path.basename(entry_dir)}",fore_color="yellow")
@@ -0,0 +1,735 @@
+"""
+deeptracer 命令行入口
+"""
+import argparse
+import json
+import sys
+
+
+def _cmd_analyze(args:argparse.Namespace)->int:
+    """
+    analyze 子命令：并发执行各分析阶段
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):全部阶段成功返回0
+    """
+    from deeptracer.pipeline import AnalysisOrchestrator
+    orchestrator = AnalysisOrchestrator(stages=tuple(args.stages),
+                                        with_flow=args.flow,
+                                        max_workers=args.workers,
+                                        output_dir=args.output_dir,
+                                        interval=args.interval,
+                                        profile_formats=tuple(args.profile_formats),
+                                        cache_dir=args.cache_dir,
+                                        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                                        keep_runs=args.keep_runs)
+    results = orchestrator.run(args.scripts)
+    print(json.dumps(results,indent=4,ensure_ascii=False))
+    success = all(stage["success"]
+                  for stages in results.values()
+                  for stage in stages.values())
+    return 0 if success else 1
+
+
+def _unsupported_profile_options(args:argparse.Namespace)->list:
+    """
+    profile 子命令中所选模式不支持的选项 这些选项会被忽略,需要在分析前报错
+
+    各模式(--runs/--lines/--stream-dir/--async-entry/--follow-children/--threads/--cpu-time)
+    已由互斥组保证只选其一;后端、隔离执行与资源上限只属于默认模式
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        options(list):不支持的选项
+    """
+    modes = {
+        "--runs": args.runs > 1,
+        "--lines": args.lines is not None,
+        "--stream-dir": args.stream_dir is not None,
+        "--async-entry": args.async_entry is not None,
+        "--follow-children": args.follow_children,
+        "--threads": args.threads,
+        "--cpu-time": args.cpu_time
+    }
+    mode = next((flag for flag,selected in modes.items() if selected),None)
+    default_mode = mode is None
+    viztracer = default_mode and args.backend == "viztracer"
+    isolated = default_mode and args.isolated
+    supported = {
+        "--workers": (args.workers != 1, mode == "--runs", "--runs"),
+        "--segment-seconds": (args.segment_seconds != 60.0, mode == "--stream-dir", "--stream-dir"),
+        "--max-segments": (args.max_segments is not None, mode == "--stream-dir", "--stream-dir"),
+        "--backend": (args.backend != "pyinstrument", default_mode, None),
+        "--tracer-entries": (args.tracer_entries != 1000000, viztracer, "--backend viztracer"),
+        "--min-duration": (args.min_duration != 0.0, viztracer, "--backend viztracer"),
+        "--log-sparse": (args.log_sparse, viztracer, "--backend viztracer"),
+        "--max-stack-depth": (args.max_stack_depth != -1, viztracer, "--backend viztracer"),
+        "--isolated": (args.isolated, default_mode, None),
+        "--timeout": (args.timeout is not None,
+                      isolated or mode in ("--runs","--follow-children"),
+                      "--isolated、--runs 或 --follow-children"),
+        "--cpu-time-limit": (args.cpu_time_limit is not None, isolated, "--isolated"),
+        "--memory-limit-mb": (args.memory_limit_mb is not None, isolated, "--isolated")
+    }
+    #选项 -> (是否指定, 当前模式是否支持, 默认模式下需要的选项)
+    return [f"{flag} 不能与 {mode} 同时使用" if mode else f"{flag} 需要 {required}"
+            for flag,(given,allowed,required) in supported.items() if given and not allowed]
+
+
+def _cmd_profile(args:argparse.Namespace)->int:
+    """
+    profile 子命令：对单个脚本执行性能分析
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):退出码
+    """
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    analyzer = PyInstrumentAnalyzer(default_report_path=args.output)
+    memory_limit = args.memory_limit_mb * 1024 * 1024 if args.memory_limit_mb else None
+    if args.runs > 1:
+        analyzer.generate_repeated_report(args.script,
+                                          runs=args.runs,
+                                          workers=args.workers,
+                                          interval=args.interval,
+                                          top_n=args.top_n,
+                                          formats=tuple(args.formats),
+                                          timeout=args.timeout)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #多次运行统计模式
+    if args.stream_dir:
+        analyzer.generate_streaming_report(args.script,
+                                           segment_dir=args.stream_dir,
+                                           interval=args.interval,
+                                           segment_seconds=args.segment_seconds,
+                                           max_segments=args.max_segments,
+                                           formats=tuple(args.formats),
+                                           top_n=args.top_n)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #长时间运行任务的流式分段模式
+    if args.async_entry:
+        analyzer.generate_async_report(args.script,
+                                       entry=args.async_entry,
+                                       interval=args.interval,
+                                       formats=tuple(args.formats),
+                                       top_n=args.top_n)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #asyncio 协程入口模式
+    if args.follow_children:
+        analyzer.generate_multiprocess_report(args.script,
+                                              interval=args.interval,
+                                              formats=tuple(args.formats),
+                                              top_n=args.top_n,
+                                              timeout=args.timeout)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #跟踪 multiprocessing/subprocess 子进程的多进程模式
+    if args.threads:
+        analyzer.generate_thread_report(args.script,
+                                        interval=args.interval,
+                                        formats=tuple(args.formats),
+                                        top_n=args.top_n)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #逐线程与 GIL 竞争模式
+    if args.cpu_time:
+        analyzer.generate_cputime_report(args.script,
+                                         interval=args.interval,
+                                         formats=tuple(args.formats),
+                                         top_n=args.top_n)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #墙钟/CPU 双重计时模式
+    if args.lines:
+        analyzer.generate_line_report(args.script,
+                                      top_n=args.lines,
+                                      interval=args.interval)
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #热点函数行级计时模式
+    backend_options = None
+    if args.backend == "viztracer":
+        backend_options = {"tracer_entries": args.tracer_entries,
+                           "min_duration": args.min_duration,
+                           "log_sparse": args.log_sparse,
+                           "max_stack_depth": args.max_stack_depth}
+    analyzer.generate_perf_report(args.script,
+                                  interval=args.interval,
+                                  formats=tuple(args.formats),
+                                  top_n=args.top_n,
+                                  isolated=args.isolated,
+                                  timeout=args.timeout,
+                                  cpu_time_limit=args.cpu_time_limit,
+                                  memory_limit=memory_limit,
+                                  backend=args.backend,
+                                  backend_options=backend_options)
+    print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+    return 0
+
+
+def _unsupported_memory_options(args:argparse.Namespace)->list:
+    """
+    memory 子命令中所选模式不支持的选项 这些选项会被忽略,需要在分析前报错
+
+    模式为默认(摘要、火焰图与时间线)、--leaks(泄漏检测)或 --live(实时监控)
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        options(list):不支持的选项
+    """
+    mode = "--live" if args.live else "--leaks" if args.leaks else None
+    traced = not args.live
+    #追踪后生成报告的模式 实时监控不写捕获文件与报告
+    leaks = traced and args.leaks
+    timeline = traced and args.timeline and not args.leaks
+    supported = {
+        "--leaks": (args.leaks, traced, None),
+        "--checkpoints": (args.checkpoints, leaks, "--leaks"),
+        "--timeline": (args.timeline, traced and not args.leaks, None),
+        "--timeline-points": (args.timeline_points != 100, timeline, "--timeline"),
+        "--high-watermark": (args.high_watermark, timeline, "--timeline"),
+        "--no-flamegraph": (args.no_flamegraph, traced, None),
+        "--output-dir": (args.output_dir != "deeptracer/tools_report", traced, None),
+        "--aggregated": (args.aggregated, traced, None),
+        "--min-site-bytes": (args.min_site_bytes != 0, traced, None),
+        "--frames": (args.frames != 1, traced, None),
+        "--snapshot-interval": (args.snapshot_interval != 0.1, traced, None),
+        "--snapshot-budget": (args.snapshot_budget != 0.05, traced, None),
+        "--refresh": (args.refresh != 1.0, args.live, "--live"),
+        "--kill-above-mb": (args.kill_above_mb is not None, args.live, "--live")
+    }
+    #选项 -> (是否指定, 当前模式是否支持, 默认模式下需要的选项)
+    return [f"{flag} 不能与 {mode} 同时使用" if mode else f"{flag} 需要 {required}"
+            for flag,(given,allowed,required) in supported.items() if given and not allowed]
+
+
+def _cmd_memory(args:argparse.Namespace)->int:
+    """
+    memory 子命令：对单个脚本执行 memray 内存分析
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):分析成功返回0
+    """
+    if args.live:
+        if args.backend == "tracemalloc":
+            raise SystemExit("实时监控需要 memray 后端")
+        from deeptracer.anaMemory import LiveMonitor
+        monitor = LiveMonitor(args.script,
+                              top_n=args.top_n,
+                              memory_interval_ms=args.memory_interval_ms,
+                              native_traces=args.native_traces)
+        result = monitor.watch(refresh=args.refresh,
+                               kill_above=args.kill_above_mb * 1024 * 1024 if args.kill_above_mb else None)
+        print(json.dumps(result,indent=4,ensure_ascii=False))
+        return 0 if result["exit_code"] == 0 and not result["killed"] else 1
+    #实时监控模式
+    from deeptracer.anaMemory import MemoryAnalyzer
+    analyzer = MemoryAnalyzer(args.script,
+                              output_dir=args.output_dir,
+                              memory_interval_ms=args.memory_interval_ms,
+                              native_traces=args.native_traces,
+                              aggregated=args.aggregated,
+                              min_site_bytes=args.min_site_bytes,
+                              backend=args.backend,
+                              backend_options={"frames": args.frames,
+                                               "interval": args.snapshot_interval,
+                                               "budget": args.snapshot_budget}
+                                              if args.backend != "memray" else None)
+    if args.leaks:
+        result = analyzer.run_leak_analysis(checkpoints=args.checkpoints,
+                                            flamegraph=not args.no_flamegraph,
+                                            top_n=args.top_n)
+        print(json.dumps(result,indent=4,ensure_ascii=False))
+        return 0 if result["success"] else 1
+    #泄漏检测模式
+    result = analyzer.run_full_analysis(flamegraph=not args.no_flamegraph,
+                                        top_n=args.top_n,
+                                        timeline=args.timeline,
+                                        timeline_points=args.timeline_points,
+                                        high_watermark=args.high_watermark)
+    print(json.dumps(result,indent=4,ensure_ascii=False))
+    return 0 if result["success"] else 1
+
+
+def _cmd_call(args:argparse.Namespace)->int:
+    """
+    call 子命令：分析可导入的函数或 pytest 节点
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):退出码
+    """
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    call_args = json.loads(args.args)
+    call_kwargs = json.loads(args.kwargs)
+    if not isinstance(call_args,list) or not isinstance(call_kwargs,dict):
+        raise SystemExit("--args 需要 JSON 数组,--kwargs 需要 JSON 对象")
+    analyzer = PyInstrumentAnalyzer(default_report_path=args.output)
+    if args.use_async:
+        analyzer.generate_async_report(args.target,
+                                       args=tuple(call_args),
+                                       kwargs=call_kwargs,
+                                       interval=args.interval,
+                                       formats=tuple(args.formats),
+                                       top_n=args.top_n,
+                                       search_paths=tuple(args.path))
+        print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+        return 0
+    #协程函数在受控的事件循环中运行
+    analyzer.generate_callable_report(args.target,
+                                      args=tuple(call_args),
+                                      kwargs=call_kwargs,
+                                      warmup=args.warmup,
+                                      repeat=args.repeat,
+                                      interval=args.interval,
+                                      formats=tuple(args.formats),
+                                      top_n=args.top_n,
+                                      search_paths=tuple(args.path))
+    print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+    return 0
+
+
+def _cmd_merge(args:argparse.Namespace)->int:
+    """
+    merge 子命令：合并流式分析的分段
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):退出码
+    """
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    analyzer = PyInstrumentAnalyzer(default_report_path=args.output)
+    analyzer.merge_segment_report(args.segment_dir,
+                                  start=args.start,
+                                  end=args.end,
+                                  formats=tuple(args.formats),
+                                  top_n=args.top_n)
+    print(json.dumps(analyzer.report_paths,indent=4,ensure_ascii=False))
+    return 0
+
+
+def _cmd_summarize(args:argparse.Namespace)->int:
+    """
+    summarize 子命令：流式汇总 Chrome Trace / VizTracer 追踪文件
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):退出码
+    """
+    from deeptracer.viztracerAnalyer.traceSummary import TraceSummarizer
+    summarizer = TraceSummarizer(args.trace,
+                                 chunk_spans=args.chunk_spans)
+    report_paths = summarizer.save(summary_path=args.output,
+                                   collapsed_path=args.collapsed,
+                                   top_n=args.top_n)
+    print(json.dumps(report_paths,indent=4,ensure_ascii=False))
+    return 0
+
+
+def _cmd_project(args:argparse.Namespace)->int:
+    """
+    project 子命令：对整个包执行增量分析
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):全部模块分析成功返回0
+    """
+    from deeptracer.project import ProjectAnalyzer
+    analyzer = ProjectAnalyzer(args.root,
+                               output_dir=args.output_dir,
+                               stages=tuple(args.stages),
+                               max_workers=args.workers,
+                               cache_dir=args.cache_dir)
+    report = analyzer.run(force=args.force)
+    print(json.dumps({key:report[key] for key in ("total","analyzed","failed")},
+                     indent=4,ensure_ascii=False))
+    return 0 if not report["failed"] else 1
+
+
+def _cmd_diff(args:argparse.Namespace)->int:
+    """
+    diff 子命令：对比两次性能分析
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):退出码
+    """
+    if args.memory:
+        from deeptracer.anaMemory import MemoryDiff as diff_class
+        options = {
+            "output_path": args.output or "deeptracer/tools_report/memoryDiff.json",
+            "metric": args.metric,
+            "top_n": args.top_n
+        }
+    else:
+        from deeptracer.viztracerAnalyer import ProfileDiff as diff_class
+        options = {
+            "output_path": args.output or "deeptracer/tools_report/profileDiff.json",
+            "hotspot_threshold": args.threshold,
+            "top_n": args.top_n,
+            "interval": args.interval,
+            "timeout": args.timeout
+        }
+    if args.git:
+        if len(args.targets) != 1:
+            raise SystemExit("--git 模式只接受一个脚本")
+        diff = diff_class.from_git(args.targets[0],args.git[0],args.git[1],**options)
+    elif args.agent_reply:
+        if len(args.targets) != 1:
+            raise SystemExit("--agent-reply 模式只接受一个脚本")
+        diff = diff_class.from_agent_reply(args.targets[0],args.agent_reply,**options)
+    else:
+        if len(args.targets) != 2:
+            raise SystemExit("需要指定变化前与变化后两个脚本或会话文件")
+        diff = diff_class(args.targets[0],args.targets[1],**options)
+    report_paths = diff.generate_report()
+    if args.memory:
+        print(json.dumps({
+            "peak_delta": diff.result["peak_delta"],
+            "peak_ratio": diff.result["peak_ratio"],
+            "new_sites": [f"{site['function']}:{site['line']}" for site in diff.result["new_sites"]],
+            "removed_sites": [f"{site['function']}:{site['line']}" for site in diff.result["removed_sites"]],
+            "report_paths": report_paths
+        },indent=4,ensure_ascii=False))
+        return 0
+    print(json.dumps({
+        "speedup": diff.result["speedup"],
+        "new_hotspots": [f"{entry['class']}.{entry['function']}" if entry["class"] else entry["function"]
+                         for entry in diff.result["new_hotspots"]],
+        "removed_hotspots": [f"{entry['class']}.{entry['function']}" if entry["class"] else entry["function"]
+                             for entry in diff.result["removed_hotspots"]],
+        "report_paths": report_paths
+    },indent=4,ensure_ascii=False))
+    return 0
+
+
+def _cmd_check(args:argparse.Namespace)->int:
+    """
+    check 子命令：按性能预算检查 超出预算或基线时返回非零退出码
+
+    Args:
+        args(argparse.Namespace):命令行参数
+    Returns:
+        exit_code(int):退出码 全部通过为0,否则为1
+    """
+    from deeptracer.budget import PerformanceBudget
+    budget = PerformanceBudget(args.budget,
+                               baseline_path=args.baseline,
+                               tolerance=args.tolerance,
+                               interval=args.interval,
+                               timeout=args.timeout,
+                               output_path=args.output)
+    result = budget.check()
+    print(PerformanceBudget.format_result(result))
+    if args.update_baseline:
+        budget.save_baseline(result["measurements"])
+        print(f"基线已更新：{budget.baseline_path}")
+        return 0
+    #更新基线时不作为门禁失败
+    return 0 if result["passed"] else 1
+
+
+def build_parser()->argparse.ArgumentParser:
+    """
+    构建命令行解析器
+
+    Args:
+        None
+    Returns:
+        parser(argparse.ArgumentParser):解析器
+    """
+    parser = argparse.ArgumentParser(prog="deeptracer",
+                                     description="Deeptracer 代码分析工具")
+    subparsers = parser.add_subparsers(dest="command",required=True)
+
+    analyze = subparsers.add_parser("analyze",
+                                    help="并发执行性能/内存/AST分析")
+    analyze.add_argument("scripts",nargs="+",help="待分析的 .py 文件")
+    analyze.add_argument("--stages",nargs="+",
+                         default=["profile","memory","ast"],
+                         choices=["profile","memory","ast"],
+                         help="需要执行的分析阶段")
+    analyze.add_argument("--flow",action="store_true",
+                         help="分析完成后调用云端智能体")
+    analyze.add_argument("--workers",type=int,default=None,
+                         help="进程池大小,默认为CPU核数")
+    analyze.add_argument("--output-dir",
+                         default="deeptracer/tools_report/orchestrator",
+                         help="报告输出根目录")
+    analyze.add_argument("--interval",type=float,default=0.001,
+                         help="性能分析采样间隔(秒)")
+    analyze.add_argument("--profile-formats",nargs="+",default=["html"],
+                         choices=["html","session","speedscope","collapsed","hotspots"],
+                         help="性能报告导出格式,第一个格式交给智能体")
+    analyze.add_argument("--cache-dir",default=None,
+                         help="结果缓存目录,未指定时不使用缓存")
+    analyze.add_argument("--cache-max-mb",type=int,default=512,
+                         help="结果缓存总大小上限(MB)")
+    analyze.add_argument("--keep-runs",type=int,default=None,
+                         help="保留的历史运行目录数量,默认不清理")
+    analyze.set_defaults(func=_cmd_analyze)
+
+    profile = subparsers.add_parser("profile",
+                                    help="对单个脚本执行性能分析")
+    profile.add_argument("script",help="待分析的 .py 文件")
+    profile.add_argument("--output",
+                         default="deeptracer/tools_report/VizPzInstrument.html",
+                         help="报告输出路径")
+    profile.add_argument("--interval",type=float,default=0.001,
+                         help="采样间隔(秒)")
+    profile.add_argument("--formats",nargs="+",default=["html"],
+                         choices=["html","session","speedscope","collapsed","hotspots","trace"],
+                         help="导出格式,未指定 html 时不渲染 HTML;viztracer 后端可选 html/trace")
+    profile.add_argument("--top-n",type=int,default=20,
+                         help="hotspots 格式保留的热点函数数量")
+    modes = profile.add_mutually_exclusive_group()
+    #各分析模式互斥 未指定时为默认模式(可选后端与隔离执行)
+    modes.add_argument("--runs",type=int,default=1,
+                       help="运行次数,大于1时输出合并会话与统计结果")
+    profile.add_argument("--workers",type=int,default=1,
+                         help="多次运行时并行的子进程数量")
+    modes.add_argument("--lines",type=int,default=None,metavar="TOP_N",
+                       help="对自身耗时最高的 TOP_N 个函数做行级计时")
+    modes.add_argument("--stream-dir",default=None,
+                       help="流式模式:样本聚合后定期写入该目录下的滚动分段")
+    profile.add_argument("--segment-seconds",type=float,default=60.0,
+                         help="流式模式下每个分段覆盖的时长(秒)")
+    profile.add_argument("--max-segments",type=int,default=None,
+                         help="流式模式下最多保留的分段数量")
+    modes.add_argument("--async-entry",default=None,metavar="COROUTINE",
+                       help="以异步感知模式运行脚本中的协程入口(不执行 __main__ 代码块)")
+    modes.add_argument("--follow-children",action="store_true",
+                       help="在隔离子进程中运行并分析其派生的 Python 子进程,输出按进程与合并两种视图")
+    modes.add_argument("--threads",action="store_true",
+                       help="对所有线程采样,输出按线程区分的调用树与 GIL/锁竞争汇总(建议 --interval 0.005)")
+    modes.add_argument("--cpu-time",action="store_true",
+                       help="同时记录每个样本的 CPU 时间,将热点拆分为计算与等待(I/O、sleep、锁)")
+    profile.add_argument("--backend",default="pyinstrument",choices=["pyinstrument","viztracer"],
+                         help="分析后端:pyinstrument 统计采样,viztracer 确定性追踪(输出完整时间线)")
+    profile.add_argument("--tracer-entries",type=int,default=1000000,
+                         help="viztracer 环形缓冲区大小(记录条数),超出后覆盖最早的记录")
+    profile.add_argument("--min-duration",type=float,default=0.0,
+                         help="viztracer 只记录耗时不低于该值的函数调用(秒)")
+    profile.add_argument("--log-sparse",action="store_true",
+                         help="viztracer 只记录被 @log_sparse 装饰的函数")
+    profile.add_argument("--max-stack-depth",type=int,default=-1,
+                         help="viztracer 最大记录栈深度,-1 表示不限制")
+    profile.add_argument("--isolated",action="store_true",
+                         help="在独立子进程中执行目标脚本")
+    profile.add_argument("--timeout",type=float,default=None,
+                         help="隔离模式下的墙钟时间上限(秒)")
+    profile.add_argument("--cpu-time-limit",type=int,default=None,
+                         help="隔离模式下的CPU时间上限(秒)")
+    profile.add_argument("--memory-limit-mb",type=int,default=None,
+                         help="隔离模式下的地址空间上限(MB)")
+    profile.set_defaults(func=_cmd_profile)
+
+    memory = subparsers.add_parser("memory",
+                                   help="对单个脚本执行内存分析,输出结构化摘要")
+    memory.add_argument("script",help="待分析的 .py 文件")
+    memory.add_argument("--output-dir",default="deeptracer/tools_report",
+                        help="报告输出目录")
+    memory.add_argument("--top-n",type=int,default=10,
+                        help="摘要中按字节数与次数分别保留的分配位置数量")
+    memory.add_argument("--no-flamegraph",action="store_true",
+                        help="只输出 JSON 摘要,不渲染 HTML 火焰图")
+    memory.add_argument("--timeline",action="store_true",
+                        help="输出降采样的堆/RSS 时间线及每个时间点占用最多的分配位置")
+    memory.add_argument("--timeline-points",type=int,default=100,
+                        help="时间线的时间点数量上限")
+    memory.add_argument("--high-watermark",action="store_true",
+                        help="时间线使用两次快照之间的堆高水位,捕获瞬时峰值")
+    memory.add_argument("--leaks",action="store_true",
+                        help="泄漏检测:只报告运行结束时仍未释放的分配,按调用栈聚合")
+    memory.add_argument("--checkpoints",action="store_true",
+                        help="泄漏检测只追踪脚本中前两个 deeptracer.anaMemory.checkpoint() 之间的分配")
+    memory.add_argument("--memory-interval-ms",type=int,default=10,
+                        help="堆大小与 RSS 快照间隔(毫秒)")
+    memory.add_argument("--aggregated",action="store_true",
+                        help="以聚合格式写入捕获文件,大小只与不同调用栈数量有关;摘要统计峰值时刻的存活内存")
+    memory.add_argument("--native-traces",action="store_true",
+                        help="记录 C/C++ 调用栈,火焰图中显示原生帧")
+    memory.add_argument("--min-site-bytes",type=int,default=0,
+                        help="摘要与泄漏报告中忽略字节数低于该值的分配位置")
+    memory.add_argument("--live",action="store_true",
+                        help="实时监控:运行期间持续输出当前堆大小、增长速度与占用最多的分配位置")
+    memory.add_argument("--refresh",type=float,default=1.0,
+                        help="实时监控的刷新间隔(秒)")
+    memory.add_argument("--kill-above-mb",type=int,default=None,
+                        help="实时监控中堆大小超过该值(MB)时终止目标脚本")
+    memory.add_argument("--backend",choices=["memray","tracemalloc","auto"],default="memray",
+                        help="内存后端:tracemalloc 只依赖标准库、开销低,只支持摘要与时间线;"
+                             "auto 在未安装 memray 时使用 tracemalloc")
+    memory.add_argument("--frames",type=int,default=1,
+                        help="tracemalloc 后端每个分配记录的调用栈深度")
+    memory.add_argument("--snapshot-interval",type=float,default=0.1,
+                        help="tracemalloc 后端的堆采样间隔(秒)")
+    memory.add_argument("--snapshot-budget",type=float,default=0.05,
+                        help="tracemalloc 后端按分配位置汇总的快照可占用的运行时间比例")
+    memory.set_defaults(func=_cmd_memory)
+
+    call = subparsers.add_parser("call",
+                                 help="分析可导入的函数或 pytest 节点")
+    call.add_argument("target",
+                      help="module.sub:function 或 pytest 节点 ID(path/test_x.py::test_name)")
+    call.add_argument("--args",default="[]",
+                      help="位置参数(JSON 数组)")
+    call.add_argument("--kwargs",default="{}",
+                      help="关键字参数(JSON 对象)")
+    call.add_argument("--warmup",type=int,default=0,
+                      help="预热调用次数,不计入分析")
+    call.add_argument("--repeat",type=int,default=1,
+                      help="计入分析的调用次数")
+    call.add_argument("--async",dest="use_async",action="store_true",
+                      help="目标为协程函数,以异步感知模式分析并统计每个任务的执行/等待时间")
+    call.add_argument("--path",nargs="+",default=[],
+                      help="额外加入模块搜索路径的目录")
+    call.add_argument("--output",
+                      default="deeptracer/tools_report/VizPzInstrument.html",
+                      help="报告输出路径")
+    call.add_argument("--interval",type=float,default=0.001,
+                      help="采样间隔(秒)")
+    call.add_argument("--formats",nargs="+",default=["html"],
+                      choices=["html","session","speedscope","collapsed","hotspots"],
+                      help="导出格式")
+    call.add_argument("--top-n",type=int,default=20,
+                      help="hotspots 格式保留的热点函数数量")
+    call.set_defaults(func=_cmd_call)
+
+    merge = subparsers.add_parser("merge",
+                                  help="合并流式分析中任意时间窗口的分段")
+    merge.add_argument("segment_dir",help="分段文件目录")
+    merge.add_argument("--start",type=float,default=None,
+                       help="窗口开始(相对第一个分段的秒数)")
+    merge.add_argument("--end",type=float,default=None,
+                       help="窗口结束(相对第一个分段的秒数)")
+    merge.add_argument("--output",
+                       default="deeptracer/tools_report/VizPzInstrument.html",
+                       help="报告输出路径")
+    merge.add_argument("--formats",nargs="+",default=["html"],
+                       choices=["html","session","speedscope","collapsed","hotspots"],
+                       help="导出格式")
+    merge.add_argument("--top-n",type=int,default=20,
+                       help="hotspots 格式保留的热点函数数量")
+    merge.set_defaults(func=_cmd_merge)
+
+    summarize = subparsers.add_parser("summarize",
+                                      help="以有界内存流式汇总大型 Chrome Trace / VizTracer 追踪文件")
+    summarize.add_argument("trace",help="追踪文件(.json)")
+    summarize.add_argument("--output",default=None,
+                           help="摘要 JSON 路径,默认为 <前缀>.summary.json")
+    summarize.add_argument("--collapsed",default=None,
+                           help="折叠栈路径,默认为 <前缀>.collapsed.txt")
+    summarize.add_argument("--top-n",type=int,default=20,
+                           help="摘要保留的热点函数数量")
+    summarize.add_argument("--chunk-spans",type=int,default=200000,
+                           help="内存中排序的区间数量,超出后写入临时分块")
+    summarize.set_defaults(func=_cmd_summarize)
+
+    project = subparsers.add_parser("project",
+                                    help="对整个包执行增量分析")
+    project.add_argument("root",help="项目(包)根目录")
+    project.add_argument("--stages",nargs="+",
+                         default=["profile","memory","ast"],
+                         choices=["profile","memory","ast"],
+                         help="每个模块需要执行的分析阶段")
+    project.add_argument("--workers",type=int,default=None,
+                         help="进程池大小,默认为CPU核数")
+    project.add_argument("--output-dir",
+                         default="deeptracer/tools_report/project",
+                         help="清单与项目报告的输出目录")
+    project.add_argument("--cache-dir",default=None,
+                         help="结果缓存目录,未指定时不使用缓存")
+    project.add_argument("--force",action="store_true",
+                         help="忽略清单,重新分析全部模块(包括上次失败且未变化的模块)")
+    project.set_defaults(func=_cmd_project)
+
+    diff = subparsers.add_parser("diff",
+                                 help="对比两次性能分析的差异")
+    diff.add_argument("targets",nargs="+",
+                      help="变化前与变化后的 .py 脚本或会话文件(--memory 时为 memray 捕获文件);"
+                           "--git/--agent-reply 模式下为单个脚本")
+    diff.add_argument("--git",nargs=2,metavar=("REV_BEFORE","REV_AFTER"),default=None,
+                      help="对比脚本在两个提交中的版本")
+    diff.add_argument("--agent-reply",nargs="?",default=None,
+                      const="deeptracer/tools_report/agentReply.json",
+                      help="对比脚本与智能体回复中的 full_optimized_code")
+    diff.add_argument("--output",default=None,
+                      help="JSON 报告路径,差分火焰图使用同名 .html;"
+                           "默认 deeptracer/tools_report/profileDiff.json(--memory 时为 memoryDiff.json)")
+    diff.add_argument("--memory",action="store_true",
+                      help="对比内存:按归一化调用栈对齐分配位置,输出字节数与次数变化及峰值内存变化")
+    diff.add_argument("--metric",choices=["peak","total"],default="peak",
+                      help="--memory 的对比指标:峰值时刻的存活内存或运行期间的累计分配")
+    diff.add_argument("--threshold",type=float,default=0.05,
+                      help="自身耗时占比达到该值的函数视为热点")
+    diff.add_argument("--top-n",type=int,default=20,
+                      help="报告中保留的变化最大的函数数量")
+    diff.add_argument("--interval",type=float,default=0.001,
+                      help="分析脚本时的采样间隔(秒)")
+    diff.add_argument("--timeout",type=float,default=None,
+                      help="分析脚本时的墙钟时间上限(秒)")
+    diff.set_defaults(func=_cmd_diff)
+
+    check = subparsers.add_parser("check",
+                                  help="按性能预算文件检查耗时与峰值内存,超出时返回非零退出码")
+    check.add_argument("budget",help="预算文件(JSON)")
+    check.add_argument("--baseline",default=None,
+                       help="基线文件,指定时每个指标不得超过 基线*(1+容差)")
+    check.add_argument("--tolerance",type=float,default=None,
+                       help="相对基线允许的增长比例,默认读取预算文件(缺省0.1)")
+    check.add_argument("--update-baseline",action="store_true",
+                       help="将本次测量结果写入 --baseline 指定的文件")
+    check.add_argument("--interval",type=float,default=0.001,
+                       help="采样间隔(秒)")
+    check.add_argument("--timeout",type=float,default=None,
+                       help="单次运行脚本的墙钟时间上限(秒)")
+    check.add_argument("--output",
+                       default="deeptracer/tools_report/budgetCheck.json",
+                       help="检查结果 JSON 的路径")
+    check.set_defaults(func=_cmd_check)
+    return parser
+
+
+def main(argv:list = None)->int:
+    """
+    命令行主函数
+
+    Args:
+        argv(list):命令行参数 默认读取 sys.argv
+    Returns:
+        exit_code(int):退出码
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args,"update_baseline",False) and not args.baseline:
+        parser.error("--update-baseline 需要同时指定 --baseline")
+    if args.func is _cmd_profile:
+        unsupported = _unsupported_profile_options(args)
+        if unsupported:
+            parser.error(";".join(unsupported))
+    if args.func is _cmd_memory:
+        unsupported = _unsupported_memory_options(args)
+        if unsupported:
+            parser.error(";".join(unsupported))
+    #在运行任何目标之前校验 避免检查完成后才报错
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+from .orchestrator import AnalysisOrchestrator
+
+__all__ = [
+    "AnalysisOrchestrator"
+]
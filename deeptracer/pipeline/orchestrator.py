@@ -0,0 +1,339 @@
+import os
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    FIRST_COMPLETED,
+    wait
+    )
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+from deeptracer.utils import RunContext
+
+
+def _stage_cache(options:dict,
+                 py_path:str = None):
+    """
+    根据编排参数在子进程中构建结果缓存
+
+    Args:
+        options(dict):编排器的公共参数
+        py_path(str):执行目标的阶段传入脚本路径 缓存键包含该脚本依赖的模块哈希
+    Returns:
+        cache(ResultCache|None):未配置缓存目录时返回None
+    """
+    if not options.get("cache_dir"):
+        return None
+    from deeptracer.cache import ResultCache
+    return ResultCache(cache_dir=options["cache_dir"],
+                       max_bytes=options["cache_max_bytes"],
+                       dependencies=options["dependencies"].get(py_path))
+
+
+def _run_profile_stage(py_path:str,
+                       run_context:RunContext,
+                       options:dict,
+                       inputs:dict
+                       )->str:
+    """
+    性能分析阶段(在子进程中执行)
+
+    Args:
+        py_path(str):待分析脚本的绝对路径
+        run_context(RunContext):当前脚本本次运行的上下文
+        options(dict):编排器的公共参数
+        inputs(dict):依赖阶段的输出(本阶段无依赖)
+    Returns:
+        report_path(str):第一个导出格式的性能报告路径(作为 Flow 的输入)
+    """
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    analyzer = PyInstrumentAnalyzer(
+        cache=_stage_cache(options,py_path),
+        run_context=run_context
+    )
+    return analyzer.generate_perf_report(py_path,
+                                         interval=options["interval"],
+                                         formats=options["profile_formats"],
+                                         module_name=options["modules"].get(py_path))
+
+
+def _run_memory_stage(py_path:str,
+                      run_context:RunContext,
+                      options:dict,
+                      inputs:dict
+                      )->str:
+    """
+    内存分析阶段(在子进程中执行)
+
+    Args:
+        py_path(str):待分析脚本的绝对路径
+        run_context(RunContext):当前脚本本次运行的上下文
+        options(dict):编排器的公共参数
+        inputs(dict):依赖阶段的输出(本阶段无依赖)
+    Returns:
+        html_report(str):内存报告路径
+    """
+    from deeptracer.anaMemory import MemoryAnalyzer
+    analyzer = MemoryAnalyzer(py_path,
+                              cache=_stage_cache(options,py_path),
+                              run_context=run_context,
+                              module_name=options["modules"].get(py_path))
+    result = analyzer.run_full_analysis()
+    if not result["success"]:
+        raise RuntimeError(f"内存分析失败：{result['error']}")
+    #失败时抛出异常 让依赖它的阶段被跳过
+    return result["html_report"]
+
+
+def _run_ast_stage(py_path:str,
+                   run_context:RunContext,
+                   options:dict,
+                   inputs:dict
+                   )->str:
+    """
+    AST结构分析阶段(在子进程中执行)
+
+    Args:
+        py_path(str):待分析脚本的绝对路径
+        run_context(RunContext):当前脚本本次运行的上下文
+        options(dict):编排器的公共参数
+        inputs(dict):依赖阶段的输出(本阶段无依赖)
+    Returns:
+        save_path(str):AST可视化报告路径
+    """
+    from deeptracer.astAnalyer import AstAnalyer
+    analyzer = AstAnalyer(py_path,
+                          open=options["ast_filter"],
+                          cache=_stage_cache(options),
+                          run_context=run_context)
+    analyzer.visualize()
+    return analyzer.save_path
+
+
+def _run_flow_stage(py_path:str,
+                    run_context:RunContext,
+                    options:dict,
+                    inputs:dict
+                    )->str:
+    """
+    智能体分析阶段 依赖 profile/memory/ast 三个阶段的产物
+
+    Args:
+        py_path(str):待分析脚本的绝对路径
+        run_context(RunContext):当前脚本本次运行的上下文
+        options(dict):编排器的公共参数
+        inputs(dict):依赖阶段的输出 {阶段名:产物路径}
+    Returns:
+        save_path(str):智能体回复的存储路径
+    """
+    from deeptracer.workflow import Flow
+    flow = Flow(pyPath=py_path,
+                jsonPath=inputs["profile"],
+                htmlPath=inputs["memory"],
+                txtPath=inputs["ast"],
+                open=True,
+                run_context=run_context)
+    flow.setMessage()
+    return flow.savePath
+
+
+class AnalysisOrchestrator:
+    """
+    分析编排器 将 性能/内存/AST/智能体 各阶段按依赖图调度到进程池中并发执行
+
+    互不依赖的阶段同时运行,Flow 阶段在其输入全部就绪后立即开始,
+    单个脚本的端到端耗时约等于最慢的一个阶段
+
+    Args:
+        stages(tuple):需要执行的分析阶段
+        with_flow(bool):是否在分析完成后调用智能体
+    Attributes:
+        STAGES(dict):阶段名 -> (执行函数, 依赖阶段)
+
+    Methods:
+        run: 执行编排并返回每个脚本各阶段的结果
+    """
+    STAGES = {
+        "profile": (_run_profile_stage, ()),
+        "memory": (_run_memory_stage, ()),
+        "ast": (_run_ast_stage, ()),
+        "flow": (_run_flow_stage, ("profile","memory","ast")),
+    }
+    def __init__(self,
+                 stages:tuple = ("profile","memory","ast"),
+                 with_flow:bool = False,
+                 max_workers:int = None,
+                 output_dir:str = "deeptracer/tools_report/orchestrator",
+                 interval:float = 0.001,
+                 profile_formats:tuple = ("html",),
+                 ast_filter:bool = True,
+                 cache_dir:str = None,
+                 cache_max_bytes:int = 512 * 1024 * 1024,
+                 keep_runs:int = None
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            stages(tuple):需要执行的分析阶段 可选 profile/memory/ast
+            with_flow(bool):是否追加智能体阶段(需要全部三个分析阶段)
+            max_workers(int):进程池大小 默认为CPU核数
+            output_dir(str):输出根目录 每个脚本的每次运行在其下拥有独立的运行目录
+            interval(float):性能分析采样间隔(秒)
+            profile_formats(tuple):性能报告导出格式 第一个格式交给 Flow 上传
+            ast_filter(bool):AST分析是否开启节点过滤
+            cache_dir(str):结果缓存目录 为None时不使用缓存
+            cache_max_bytes(int):结果缓存总大小上限
+            keep_runs(int):保留的历史运行目录数量 None表示不清理
+        Returns:
+            None
+        """
+        self.stages = list(stages)
+        for stage in self.stages:
+            if stage not in self.STAGES or stage == "flow":
+                raise ValueError(f"未知的分析阶段：{stage}")
+        if with_flow:
+            missing = [dep for dep in self.STAGES["flow"][1] if dep not in self.stages]
+            if missing:
+                raise ValueError(f"智能体阶段缺少依赖阶段：{missing}")
+            self.stages.append("flow")
+        self.max_workers = max_workers
+        self.output_dir = os.path.join(DEEPTRACER_DEV_ROOT,output_dir)
+        self.keep_runs = keep_runs
+        self.run_dirs = {}
+        self.options = {
+            "interval": interval,
+            "profile_formats": tuple(profile_formats),
+            "ast_filter": ast_filter,
+            "cache_dir": cache_dir,
+            "cache_max_bytes": cache_max_bytes
+        }
+    def _run_context(self,
+                     py_path:str
+                     )->RunContext:
+        """
+        为脚本的本次运行分配独立的运行目录 并发运行同一脚本时互不覆盖
+
+        Args:
+            py_path(str):脚本绝对路径
+        Returns:
+            run_context(RunContext):运行上下文
+        """
+        stem = os.path.splitext(os.path.basename(py_path))[0]
+        return RunContext(runs_root=self.output_dir,
+                          prefix=stem,
+                          keep_last=self.keep_runs,
+                          max_age=None)
+    def _build_graph(self,
+                     py_paths:list
+                     )->dict:
+        """
+        构建依赖图 节点为(脚本,阶段)
+
+        Args:
+            py_paths(list):脚本绝对路径列表
+        Returns:
+            graph(dict):节点 -> 依赖节点列表
+        """
+        graph = {}
+        for py_path in py_paths:
+            for stage in self.stages:
+                deps = self.STAGES[stage][1]
+                graph[(py_path,stage)] = [(py_path,dep) for dep in deps]
+        return graph
+    def run(self,
+            py_paths:list|str,
+            modules:dict = None,
+            dependencies:dict = None
+            )->dict:
+        """
+        执行编排
+
+        Args:
+            py_paths(list|str):单个或多个待分析的脚本路径
+            modules(dict):脚本路径 -> 点分模块名 其中的脚本以包内模块的身份执行(项目模式)
+            dependencies(dict):脚本路径 -> {依赖的模块名:SHA-256} 依赖变化时执行目标的阶段不命中缓存
+        Returns:
+            results(dict):{脚本路径:{阶段名:{"success","result"/"error","elapsed"}}}
+        """
+        if isinstance(py_paths,str):
+            py_paths = [py_paths]
+        py_paths = [os.path.abspath(path) for path in py_paths]
+        for py_path in py_paths:
+            if not os.path.exists(py_path):
+                raise FileNotFoundError(f"指定的 Python 文件不存在：{py_path}")
+        options = {
+            **self.options,
+            "modules": {os.path.abspath(path):name for path,name in (modules or {}).items()},
+            "dependencies": {os.path.abspath(path):deps for path,deps in (dependencies or {}).items()}
+        }
+        contexts = {py_path:self._run_context(py_path) for py_path in py_paths}
+        self.run_dirs = {py_path:context.run_dir for py_path,context in contexts.items()}
+        graph = self._build_graph(py_paths)
+
+        results = {py_path:{} for py_path in py_paths}
+        pending = dict(graph)
+        #尚未提交的节点
+        running = {}
+        #future -> (节点,提交时间)
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                while pending or running:
+                    for node in list(pending):
+                        py_path,stage = node
+                        deps = pending[node]
+                        dep_states = [results[dep[0]].get(dep[1]) for dep in deps]
+                        if any(state is None for state in dep_states):
+                            continue
+                        #依赖尚未全部完成
+                        del pending[node]
+                        if not all(state["success"] for state in dep_states):
+                            results[py_path][stage] = {
+                                "success": False,
+                                "error": "依赖阶段失败,已跳过",
+                                "elapsed": 0.0
+                            }
+                            continue
+                        #依赖失败时级联跳过
+                        inputs = {dep[1]:results[dep[0]][dep[1]]["result"] for dep in deps}
+                        func = self.STAGES[stage][0]
+                        future = pool.submit(func,
+                                             py_path,
+                                             contexts[py_path],
+                                             options,
+                                             inputs)
+                        running[future] = (node,time.perf_counter())
+                        print_color(f"已提交阶段 {stage}：{py_path}",fore_color="blue")
+                    if not running:
+                        continue
+                    #本轮只产生了跳过的节点 继续检查剩余节点
+                    done,_ = wait(running,return_when=FIRST_COMPLETED)
+                    for future in done:
+                        (py_path,stage),submitted = running.pop(future)
+                        elapsed = time.perf_counter() - submitted
+                        try:
+                            results[py_path][stage] = {
+                                "success": True,
+                                "result": future.result(),
+                                "elapsed": elapsed
+                            }
+                            print_color(f"阶段 {stage} 完成({elapsed:.2f}s)：{py_path}",
+                                        fore_color="green")
+                        except Exception as e:
+                            results[py_path][stage] = {
+                                "success": False,
+                                "error": str(e),
+                                "elapsed": elapsed
+                            }
+                            print_color(f"阶段 {stage} 失败：{e}",fore_color="red")
+        finally:
+            for run_context in contexts.values():
+                run_context.close(cleanup=False)
+            for run_context in contexts.values():
+                run_context.cleanup(exclude=self.run_dirs.values())
+        #运行结束后移除活动标记并执行保留策略 同名脚本共用前缀,本次的运行目录都保留
+        print_color(f"全部分析完成,总耗时 {time.perf_counter() - start:.2f}s",
+                    fore_color="green")
+        return results
@@ -0,0 +1,5 @@
+from .projectAnalyzer import ProjectAnalyzer
+
+__all__ = [
+    "ProjectAnalyzer"
+]
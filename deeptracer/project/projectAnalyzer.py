@@ -0,0 +1,349 @@
+import os
+import ast
+import json
+import uuid
+import hashlib
+from collections import deque
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+from deeptracer.pipeline import AnalysisOrchestrator
+
+
+class ProjectAnalyzer:
+    """
+    项目(包)级别的增量分析
+
+    遍历整个包,在清单(manifest)中记录每个模块的文件哈希与内部导入关系。
+    每次运行只重新分析内容发生变化的模块,以及直接或间接导入了变化模块的模块,
+    其余模块沿用上一次的结果,最终合并为一份项目报告。
+    每个模块以点分模块名从导入根目录执行,包内的相对导入与运行 python -m 时一致。
+
+    Args:
+        project_root(str):项目(包)根目录
+    Attributes:
+        EXCLUDE_DIRS(tuple):遍历时跳过的目录
+
+    Methods:
+        scan: 扫描项目得到模块信息
+        plan: 计算需要重新分析的模块
+        run: 执行增量分析并生成项目报告
+    """
+    EXCLUDE_DIRS = (
+        ".git",
+        "__pycache__",
+        ".venv",
+        "venv",
+        "build",
+        "dist",
+        ".tox",
+        ".nox"
+    )
+    def __init__(self,
+                 project_root:str,
+                 output_dir:str = "deeptracer/tools_report/project",
+                 stages:tuple = ("profile","memory","ast"),
+                 max_workers:int = None,
+                 cache_dir:str = None
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            project_root(str):项目(包)根目录
+            output_dir(str):输出目录 存放清单、项目报告以及各模块报告
+            stages(tuple):每个模块需要执行的分析阶段
+            max_workers(int):进程池大小 默认为CPU核数
+            cache_dir(str):结果缓存目录 为None时不使用缓存
+        Returns:
+            None
+        """
+        self.project_root = os.path.abspath(project_root)
+        if not os.path.isdir(self.project_root):
+            raise NotADirectoryError(f"项目目录不存在：{self.project_root}")
+        self.import_root = self.project_root
+        while os.path.exists(os.path.join(self.import_root,"__init__.py")):
+            self.import_root = os.path.dirname(self.import_root)
+        #根目录本身是包时 模块名需要带上包名前缀才能与绝对导入匹配
+        self.output_dir = os.path.join(DEEPTRACER_DEV_ROOT,output_dir)
+        os.makedirs(self.output_dir,exist_ok=True)
+        self.manifest_path = os.path.join(self.output_dir,"manifest.json")
+        self.report_path = os.path.join(self.output_dir,"project_report.json")
+        self.stages = tuple(stages)
+        self.orchestrator = AnalysisOrchestrator(stages=self.stages,
+                                                 max_workers=max_workers,
+                                                 output_dir=os.path.join(self.output_dir,"modules"),
+                                                 cache_dir=cache_dir)
+    def _module_name(self,
+                     py_path:str
+                     )->str:
+        """
+        将文件路径转换为点分模块名
+
+        Args:
+            py_path(str):模块文件绝对路径
+        Returns:
+            module_name(str):模块名 包的__init__.py对应包名
+        """
+        rel_path = os.path.relpath(py_path,self.import_root)
+        parts = list(os.path.splitext(rel_path)[0].split(os.sep))
+        if parts[-1] == "__init__" and len(parts) > 1:
+            parts.pop()
+        return ".".join(parts)
+    def _hash_file(self,
+                   py_path:str
+                   )->str:
+        """
+        计算文件内容的SHA-256
+
+        Args:
+            py_path(str):文件路径
+        Returns:
+            digest(str):十六进制哈希值
+        """
+        with open(py_path,"rb") as fp:
+            return hashlib.sha256(fp.read()).hexdigest()
+    def _resolve_import(self,
+                        name:str,
+                        modules:set
+                        )->str|None:
+        """
+        将导入名解析为项目内部模块 取最长的已存在前缀
+
+        Args:
+            name(str):导入的点分名称
+            modules(set):项目内全部模块名
+        Returns:
+            module_name(str|None):内部模块名 外部依赖返回None
+        """
+        parts = name.split(".")
+        while parts:
+            candidate = ".".join(parts)
+            if candidate in modules:
+                return candidate
+            parts.pop()
+        return None
+    def _parse_imports(self,
+                       py_path:str,
+                       module_name:str,
+                       modules:set
+                       )->list:
+        """
+        解析模块的内部导入关系(包含相对导入)
+
+        Args:
+            py_path(str):模块文件路径
+            module_name(str):当前模块名
+            modules(set):项目内全部模块名
+        Returns:
+            imports(list):被导入的内部模块名(排序去重)
+        """
+        with open(py_path,"r",encoding="utf-8") as fp:
+            try:
+                tree = ast.parse(fp.read())
+            except SyntaxError:
+                return []
+        #语法错误的模块不记录依赖 由分析阶段报告错误
+        is_package = os.path.basename(py_path) == "__init__.py"
+        package = module_name if is_package else module_name.rpartition(".")[0]
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node,ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node,ast.ImportFrom):
+                if node.level:
+                    base_parts = package.split(".") if package else []
+                    base_parts = base_parts[:len(base_parts) - (node.level - 1)]
+                    base = ".".join(base_parts + ([node.module] if node.module else []))
+                else:
+                    base = node.module or ""
+                for alias in node.names:
+                    names.append(f"{base}.{alias.name}" if base else alias.name)
+                    #from a import b 中 b 可能是子模块
+        imports = set()
+        for name in names:
+            resolved = self._resolve_import(name,modules)
+            if resolved and resolved != module_name:
+                imports.add(resolved)
+        return sorted(imports)
+    def scan(self)->dict:
+        """
+        扫描项目得到模块信息
+
+        Args:
+            None
+        Returns:
+            modules(dict):模块名 -> {"path","sha256","imports"}
+        """
+        paths = {}
+        for dirpath,dirnames,filenames in os.walk(self.project_root):
+            dirnames[:] = [name for name in dirnames
+                           if name not in self.EXCLUDE_DIRS and not name.endswith(".egg-info")]
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    py_path = os.path.join(dirpath,filename)
+                    paths[self._module_name(py_path)] = py_path
+        names = set(paths)
+        modules = {}
+        for name,py_path in sorted(paths.items()):
+            modules[name] = {
+                "path": py_path,
+                "sha256": self._hash_file(py_path),
+                "imports": self._parse_imports(py_path,name,names)
+            }
+        return modules
+    def _load_manifest(self)->dict:
+        """
+        读取上一次运行保存的清单
+
+        Args:
+            None
+        Returns:
+            manifest(dict):模块名 -> 模块信息及分析结果 不存在时返回空字典
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path,"r",encoding="utf-8") as fp:
+                manifest = json.load(fp)
+        except ValueError:
+            print_color("清单文件损坏,将执行全量分析",fore_color="yellow")
+            return {}
+        if manifest.get("stages") != list(self.stages):
+            return {}
+        #分析阶段变化时旧结果不可复用
+        return manifest.get("modules",{})
+    def plan(self,
+             modules:dict,
+             manifest:dict
+             )->set:
+        """
+        计算需要重新分析的模块
+
+        变化的模块包括:新增、内容变化、导入关系变化的模块,以及导入了已删除模块的模块;
+        再沿反向依赖传播到所有直接或间接导入者。上次分析失败但内容与导入关系都未变化的模块
+        沿用失败结果,需要重试时使用 force。
+
+        Args:
+            modules(dict):本次扫描结果
+            manifest(dict):上一次的清单
+        Returns:
+            targets(set):需要重新分析的模块名
+        """
+        changed = set()
+        for name,info in modules.items():
+            previous = manifest.get(name)
+            if (previous is None
+                    or previous.get("sha256") != info["sha256"]
+                    or previous.get("imports") != info["imports"]):
+                changed.add(name)
+        removed = set(manifest) - set(modules)
+        for name,previous in manifest.items():
+            if name in modules and removed.intersection(previous.get("imports",[])):
+                changed.add(name)
+        importers = {name:set() for name in modules}
+        for name,info in modules.items():
+            for imported in info["imports"]:
+                importers[imported].add(name)
+        #构建反向依赖图
+        targets = set(changed)
+        queue = deque(changed)
+        while queue:
+            for importer in importers[queue.popleft()]:
+                if importer not in targets:
+                    targets.add(importer)
+                    queue.append(importer)
+        return targets
+    def _dependencies(self,
+                      name:str,
+                      modules:dict
+                      )->dict:
+        """
+        获得模块直接或间接导入的全部内部模块的哈希
+
+        Args:
+            name(str):模块名
+            modules(dict):本次扫描结果
+        Returns:
+            dependencies(dict):模块名 -> SHA-256 不包含模块自身
+        """
+        dependencies = {}
+        queue = deque(modules[name]["imports"])
+        while queue:
+            imported = queue.popleft()
+            if imported in dependencies or imported == name:
+                continue
+            dependencies[imported] = modules[imported]["sha256"]
+            queue.extend(modules[imported]["imports"])
+        return dependencies
+    def _write_json(self,
+                    path:str,
+                    obj:dict
+                    )->None:
+        """
+        原子地写入JSON文件
+
+        Args:
+            path(str):目标路径
+            obj(dict):写入的对象
+        Returns:
+            None
+        """
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path,"w",encoding="utf-8") as fp:
+            json.dump(obj,fp,indent=4,ensure_ascii=False)
+        os.replace(tmp_path,path)
+    def run(self,
+            force:bool = False
+            )->dict:
+        """
+        执行增量分析并生成项目报告
+
+        Args:
+            force(bool):忽略清单 重新分析全部模块
+        Returns:
+            report(dict):合并后的项目报告
+        """
+        modules = self.scan()
+        manifest = {} if force else self._load_manifest()
+        targets = self.plan(modules,manifest)
+        print_color(f"共 {len(modules)} 个模块,需要重新分析 {len(targets)} 个",
+                    fore_color="blue")
+        results = {}
+        if targets:
+            results = self.orchestrator.run(
+                [modules[name]["path"] for name in sorted(targets)],
+                modules={modules[name]["path"]:name for name in targets},
+                dependencies={modules[name]["path"]:self._dependencies(name,modules) for name in targets})
+            #缓存键包含依赖的哈希 因依赖变化而重新分析的模块不会命中旧结果
+
+        new_manifest = {}
+        for name,info in modules.items():
+            if name in targets:
+                stages = results[os.path.abspath(info["path"])]
+                status = "analyzed"
+            else:
+                stages = manifest[name]["stages"]
+                status = "unchanged"
+            new_manifest[name] = {
+                **info,
+                "status": status,
+                "success": all(stage["success"] for stage in stages.values()),
+                "stages": stages
+            }
+        self._write_json(self.manifest_path,{
+            "project_root": self.project_root,
+            "stages": list(self.stages),
+            "modules": new_manifest
+        })
+        report = {
+            "project_root": self.project_root,
+            "total": len(modules),
+            "analyzed": sorted(targets),
+            "failed": sorted(name for name,info in new_manifest.items() if not info["success"]),
+            "modules": new_manifest
+        }
+        self._write_json(self.report_path,report)
+        print_color(f"项目报告已生成：{self.report_path}",fore_color="green")
+        return report
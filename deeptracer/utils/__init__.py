@@ -0,0 +1,29 @@
+from .runContext import RunContext
+from .flameGraph import (
+    diff_node,
+    render_diff_flamegraph,
+    write_diff_flamegraph
+    )
+from .sourceVersions import SourceVersions
+from .quantity import (
+    parse_quantity,
+    format_quantity
+    )
+from .moduleTarget import (
+    module_import_root,
+    search_path,
+    run_target
+    )
+
+__all__ = [
+    "RunContext",
+    "diff_node",
+    "render_diff_flamegraph",
+    "write_diff_flamegraph",
+    "SourceVersions",
+    "parse_quantity",
+    "format_quantity",
+    "module_import_root",
+    "search_path",
+    "run_target"
+]
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+差分火焰图
+
+将两次分析对齐后的调用树渲染为独立的 HTML 文件(不依赖外部脚本):
+节点宽度取前后两次中较大的耗时,颜色表示变化方向与幅度,
+红色表示变慢/新增,蓝色表示变快/消失,鼠标悬停显示具体数值
+"""
+import html
+
+
+def diff_node(name:str)->dict:
+    """
+    创建差分调用树节点
+
+    Args:
+        name(str):节点名称
+    Returns:
+        node(dict):{"name","before","after","children"} children 以名称为键
+    """
+    return {"name": name,"before": 0.0,"after": 0.0,"children": {}}
+
+
+def _node_color(before:float,
+                after:float
+                )->str:
+    """
+    根据前后耗时计算节点颜色
+
+    Args:
+        before(float):变化前耗时
+        after(float):变化后耗时
+    Returns:
+        color(str):CSS 颜色
+    """
+    if before <= 0:
+        return "rgb(200,40,40)"
+    #新增节点
+    if after <= 0:
+        return "rgb(40,80,200)"
+    #消失节点
+    ratio = max(-1.0,min(1.0,(after - before) / before))
+    fade = int(220 - 160 * abs(ratio))
+    if ratio >= 0:
+        return f"rgb(240,{fade},{fade})"
+    return f"rgb({fade},{fade},240)"
+
+
+def _format_value(value:float,
+                  unit:str
+                  )->str:
+    """
+    格式化节点数值
+
+    Args:
+        value(float):数值
+        unit(str):单位 "s" 按秒显示,"B" 按字节显示
+    Returns:
+        text(str):带单位的文本
+    """
+    if unit == "B":
+        for suffix in ("B","KiB","MiB","GiB"):
+            if abs(value) < 1024 or suffix == "GiB":
+                return f"{value:.1f}{suffix}"
+            value /= 1024
+    return f"{value:.4f}{unit}"
+
+
+def render_diff_flamegraph(root:dict,
+                           title:str,
+                           unit:str = "s",
+                           min_ratio:float = 0.001
+                           )->str:
+    """
+    渲染差分火焰图
+
+    Args:
+        root(dict):diff_node 构成的调用树根节点
+        title(str):页面标题
+        unit(str):数值单位
+        min_ratio(float):宽度占根节点比例低于该值的节点不渲染
+    Returns:
+        html(str):HTML 文本
+    """
+    total = max(root["before"],root["after"]) or 1e-12
+    parts = []
+    def render(node:dict,
+               width:float
+               )->None:
+        before,after = node["before"],node["after"]
+        delta = after - before
+        tip = (f"{node['name']}\n"
+               f"before: {_format_value(before,unit)}\n"
+               f"after: {_format_value(after,unit)}\n"
+               f"delta: {'+' if delta >= 0 else ''}{_format_value(delta,unit)}")
+        parts.append(f'<div class="node" style="width:{width:.4f}%">'
+                     f'<div class="bar" style="background:{_node_color(before,after)}" '
+                     f'title="{html.escape(tip)}">{html.escape(node["name"])}</div>'
+                     f'<div class="children">')
+        base = max(before,after) or 1e-12
+        children = sorted(node["children"].values(),
+                          key=lambda child: max(child["before"],child["after"]),
+                          reverse=True)
+        for child in children:
+            size = max(child["before"],child["after"])
+            if size / total >= min_ratio:
+                render(child,min(100.0,size / base * 100))
+        parts.append("</div></div>")
+    render(root,100.0)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: monospace; font-size: 11px; margin: 12px; }}
+.node {{ box-sizing: border-box; overflow: hidden; }}
+.bar {{ height: 16px; line-height: 16px; margin: 1px; padding: 0 3px;
+       white-space: nowrap; overflow: hidden; text-overflow: ellipsis; border-radius: 2px; }}
+.children {{ display: flex; }}
+.legend span {{ display: inline-block; padding: 2px 6px; margin-right: 6px; }}
+</style>
+</head>
+<body>
+<h3>{html.escape(title)}</h3>
+<div class="legend">
+<span style="background:rgb(200,40,40);color:white">新增</span>
+<span style="background:rgb(240,100,100)">变慢/增加</span>
+<span style="background:rgb(100,100,240)">变快/减少</span>
+<span style="background:rgb(40,80,200);color:white">消失</span>
+</div>
+<div class="graph">
+{''.join(parts)}
+</div>
+</body>
+</html>
+"""
+
+
+def write_diff_flamegraph(root:dict,
+                          path:str,
+                          title:str,
+                          unit:str = "s"
+                          )->str:
+    """
+    渲染差分火焰图并写入文件
+
+    Args:
+        root(dict):diff_node 构成的调用树根节点
+        path(str):输出路径
+        title(str):页面标题
+        unit(str):数值单位
+    Returns:
+        path(str):输出路径
+    """
+    with open(path,"w",encoding="utf-8") as fp:
+        fp.write(render_diff_flamegraph(root,title,unit=unit))
+    return path
@@ -0,0 +1,80 @@
+"""
+以包内模块的身份执行目标
+
+项目模式下被分析的文件是包的一部分,必须以点分模块名执行并设置 __package__,
+相对导入(from ..base import X)才能解析;导入根目录(最外层包的上一级)需要位于 sys.path 中。
+各执行器(进程内执行、隔离执行器、memray/tracemalloc 执行器)共用本模块
+"""
+import os
+import runpy
+
+
+def module_import_root(script:str,
+                       module_name:str
+                       )->str:
+    """
+    由文件路径与模块名推出导入根目录
+
+    Args:
+        script(str):模块文件绝对路径
+        module_name(str):点分模块名 包对应其 __init__.py
+    Returns:
+        import_root(str):导入根目录
+    """
+    depth = module_name.count(".") + 1
+    if os.path.basename(script) != "__init__.py":
+        depth -= 1
+    #包的 __init__.py 比同名模块多一级目录
+    import_root = os.path.dirname(os.path.abspath(script))
+    for _ in range(depth):
+        import_root = os.path.dirname(import_root)
+    return import_root
+
+
+def search_path(script:str,
+                module_name:str = None
+                )->str:
+    """
+    执行目标时需要加入 sys.path 的目录
+
+    Args:
+        script(str):目标文件路径
+        module_name(str):点分模块名 为None时按脚本执行
+    Returns:
+        path(str):脚本所在目录或导入根目录
+    """
+    if module_name is None:
+        return os.path.dirname(os.path.abspath(script))
+    return module_import_root(script,module_name)
+
+
+def run_target(script:str,
+               module_name:str = None,
+               run_name:str = "__main__"
+               )->dict:
+    """
+    执行目标 调用方负责把 search_path() 加入 sys.path
+
+    Args:
+        script(str):目标文件路径
+        module_name(str):点分模块名 为None时按脚本执行
+        run_name(str):执行时的 __name__
+    Returns:
+        globals(dict):执行后的全局命名空间
+    """
+    if module_name is None:
+        return runpy.run_path(script,run_name=run_name)
+    if os.path.basename(script) != "__init__.py":
+        return runpy.run_module(module_name,run_name=run_name,alter_sys=True)
+    with open(script,"r",encoding="utf-8") as fp:
+        code = compile(fp.read(),script,"exec")
+    exec_globals = {
+        "__name__": run_name,
+        "__file__": script,
+        "__package__": module_name,
+        "__path__": [os.path.dirname(script)],
+        "__cached__": None,
+    }
+    exec(code,exec_globals)
+    #runpy 不能直接执行包 以包的身份执行 __init__.py
+    return exec_globals
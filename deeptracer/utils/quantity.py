@@ -0,0 +1,68 @@
+"""
+带单位的数值
+
+解析预算文件中的 "200ms"、"1.5GiB" 等数值,并把秒数与字节数格式化为可读文本,
+供性能预算、内存差分与实时监控共用
+"""
+import re
+
+
+SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000 ** 2,
+    "gb": 1000 ** 3,
+    "kib": 1024,
+    "mib": 1024 ** 2,
+    "gib": 1024 ** 3,
+}
+TIME_UNITS = {
+    "": 1.0,
+    "s": 1.0,
+    "ms": 1e-3,
+    "us": 1e-6,
+}
+_QUANTITY = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([a-zA-Z]*)\s*$")
+
+
+def parse_quantity(value,
+                   units:dict
+                   )->float|None:
+    """
+    解析带单位的数值 如 "200ms"、"1.5GiB";数字直接返回,null 表示只与基线比较
+
+    Args:
+        value(int|float|str|None):预算值
+        units(dict):单位 -> 倍数
+    Returns:
+        quantity(float|None):以秒或字节为单位的数值
+    """
+    if value is None or isinstance(value,(int,float)):
+        return value
+    match = _QUANTITY.match(str(value))
+    if match is None or match.group(2).lower() not in units:
+        raise ValueError(f"无法解析的预算值：{value}")
+    return float(match.group(1)) * units[match.group(2).lower()]
+
+
+def format_quantity(value:float,
+                    metric:str
+                    )->str:
+    """
+    格式化指标值
+
+    Args:
+        value(float):指标值
+        metric(str):指标名
+    Returns:
+        text(str):可读的数值
+    """
+    if metric == "peak_memory":
+        for unit,size in (("GiB",1024 ** 3),("MiB",1024 ** 2),("KiB",1024)):
+            if abs(value) >= size:
+                return f"{value / size:.1f}{unit}"
+        return f"{value:.0f}B"
+    if abs(value) < 1e-3:
+        return f"{value * 1e6:.1f}us"
+    return f"{value * 1000:.1f}ms" if abs(value) < 1 else f"{value:.3f}s"
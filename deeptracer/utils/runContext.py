@@ -0,0 +1,190 @@
+import os
+import re
+import sys
+import time
+import shutil
+import tempfile
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+
+
+def _pid_exists(pid:int)->bool:
+    """
+    判断进程是否存活
+
+    Windows 上 os.kill(pid, 0) 会向进程发送 CTRL_C_EVENT 而不是探测,改用 OpenProcess 查询退出码
+
+    Args:
+        pid(int):进程号
+    Returns:
+        exists(bool):进程存活时返回True
+    """
+    if sys.platform.startswith("win"):
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32",use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        handle = kernel32.OpenProcess(0x1000,False,pid)
+        #PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5
+        #ERROR_ACCESS_DENIED 进程存在但属于其他用户
+        try:
+            exit_code = wintypes.DWORD()
+            if not kernel32.GetExitCodeProcess(handle,ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == 259
+            #STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid,0)
+    except ProcessLookupError:
+        return False
+    #进程已退出 标记失效
+    except PermissionError:
+        return True
+    return True
+
+
+class RunContext:
+    """
+    单次分析运行的上下文 为每次运行分配独立的输出目录
+
+    目录通过 tempfile.mkdtemp 原子创建,名称唯一,多个并发运行互不覆盖;
+    运行期间目录中存在活动标记文件,清理时不会删除仍在运行的目录。
+    关闭时按保留策略(保留最近N次/最长保留时间)清理同一前缀的历史运行目录。
+
+    Args:
+        runs_root(str):所有运行目录的根目录
+    Attributes:
+        run_dir(str):本次运行的输出目录
+
+    Methods:
+        path: 获得运行目录下的文件路径
+        close: 结束本次运行并执行保留策略
+        cleanup: 按保留策略清理历史运行目录
+    """
+    ACTIVE_MARK = ".active"
+    def __init__(self,
+                 runs_root:str = "deeptracer/tools_report/runs",
+                 prefix:str = "run",
+                 keep_last:int = 20,
+                 max_age:float = 7 * 24 * 3600
+                 )->None:
+        """
+        初始化函数 原子地创建本次运行的目录
+
+        Args:
+            runs_root(str):运行目录的根目录(相对路径基于项目根目录)
+            prefix(str):运行目录名前缀 保留策略只作用于同一前缀的运行目录
+            keep_last(int):同一前缀最多保留的运行目录数量 None表示不限制
+            max_age(float):运行目录最长保留时间(秒) None表示不限制
+        Returns:
+            None
+        """
+        self.runs_root = os.path.join(DEEPTRACER_DEV_ROOT,runs_root)
+        self.prefix = prefix
+        self.keep_last = keep_last
+        self.max_age = max_age
+        self._run_name = re.compile(rf"{re.escape(prefix)}-\d{{8}}-\d{{6}}-[a-z0-9_]+")
+        #前缀之后必须紧跟时间戳与 mkdtemp 的随机后缀 前缀 "test" 不会匹配 "test-fast-..." 的运行目录
+        os.makedirs(self.runs_root,exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.run_dir = tempfile.mkdtemp(prefix=f"{prefix}-{stamp}-",
+                                        dir=self.runs_root)
+        #mkdtemp 保证目录名唯一且创建是原子的
+        with open(os.path.join(self.run_dir,self.ACTIVE_MARK),"w") as fp:
+            fp.write(str(os.getpid()))
+        self.closed = False
+    def path(self,
+             name:str
+             )->str:
+        """
+        获得运行目录下的文件路径
+
+        Args:
+            name(str):文件或子目录名
+        Returns:
+            path(str):绝对路径
+        """
+        return os.path.join(self.run_dir,name)
+    def _is_active(self,
+                   run_dir:str
+                   )->bool:
+        """
+        判断运行目录是否仍有进程在使用
+
+        Args:
+            run_dir(str):运行目录
+        Returns:
+            active(bool):活动标记存在且对应进程存活时返回True
+        """
+        try:
+            with open(os.path.join(run_dir,self.ACTIVE_MARK),"r") as fp:
+                pid = int(fp.read().strip())
+        except (OSError,ValueError):
+            return False
+        return _pid_exists(pid)
+    def cleanup(self,
+                exclude:list = ()
+                )->list:
+        """
+        按保留策略清理同一前缀的历史运行目录 跳过仍在运行的目录
+
+        Args:
+            exclude(list):不删除的运行目录 仍计入保留数量
+        Returns:
+            removed(list):被删除的目录
+        """
+        exclude = {os.path.abspath(run_dir) for run_dir in exclude}
+        runs = []
+        for name in os.listdir(self.runs_root):
+            run_dir = os.path.join(self.runs_root,name)
+            if not self._run_name.fullmatch(name):
+                continue
+            #其他前缀的运行目录属于其他脚本
+            if os.path.isdir(run_dir) and not self._is_active(run_dir):
+                runs.append((os.path.getmtime(run_dir),run_dir))
+        runs.sort(reverse=True)
+        #最新的运行排在最前
+        now = time.time()
+        removed = []
+        for index,(mtime,run_dir) in enumerate(runs):
+            expired = self.max_age is not None and now - mtime > self.max_age
+            overflow = self.keep_last is not None and index >= self.keep_last
+            if (expired or overflow) and os.path.abspath(run_dir) not in exclude:
+                shutil.rmtree(run_dir,ignore_errors=True)
+                removed.append(run_dir)
+        if removed:
+            print_color(f"已清理 {len(removed)} 个历史运行目录",fore_color="green")
+        return removed
+    def close(self,
+              keep:bool = True,
+              cleanup:bool = True
+              )->None:
+        """
+        结束本次运行 移除活动标记并执行保留策略
+
+        Args:
+            keep(bool):是否保留本次运行的产物
+            cleanup(bool):是否执行保留策略 同时结束多个运行时可在全部关闭后再调用 cleanup
+        Returns:
+            None
+        """
+        if self.closed:
+            return
+        self.closed = True
+        mark = os.path.join(self.run_dir,self.ACTIVE_MARK)
+        if os.path.exists(mark):
+            os.remove(mark)
+        if not keep:
+            shutil.rmtree(self.run_dir,ignore_errors=True)
+        if cleanup:
+            self.cleanup()
+    def __enter__(self)->"RunContext":
+        return self
+    def __exit__(self,exc_type,exc_value,traceback)->None:
+        self.close()
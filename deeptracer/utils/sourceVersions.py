@@ -0,0 +1,116 @@
+"""
+同一脚本的两个版本
+
+差分分析(ProfileDiff、MemoryDiff)除了直接对比两个脚本,还可以对比同一脚本在两个提交中的版本,
+或脚本与智能体给出的优化版本。两份源码写入临时文件后交给差分类的构造函数,
+并把临时文件路径映射回原脚本,使两侧的调用栈能够对齐
+"""
+import os
+import json
+import subprocess
+import tempfile
+from deeptracer import DEEPTRACER_DEV_ROOT
+
+
+class SourceVersions:
+    """
+    为差分类提供 from_git 与 from_agent_reply 构造方法
+
+    差分类的构造函数需接受 (before, after, aliases=..., **kwargs),并在构造函数中完成分析
+    """
+    @classmethod
+    def _from_sources(cls,
+                      py_path:str,
+                      before_source:str,
+                      after_source:str,
+                      labels:tuple,
+                      **kwargs
+                      )->"SourceVersions":
+        """
+        将两份源码写入脚本所在目录的临时文件后分别分析
+
+        临时文件与原脚本位于同一目录,保证相对导入与数据文件路径一致
+
+        Args:
+            py_path(str):原脚本路径
+            before_source(str):变化前的源码
+            after_source(str):变化后的源码
+            labels(tuple):两份源码的标签 用于临时文件名
+        Returns:
+            diff(SourceVersions):差分对象
+        """
+        abs_py_path = os.path.abspath(py_path)
+        py_dir = os.path.dirname(abs_py_path)
+        stem = os.path.splitext(os.path.basename(abs_py_path))[0]
+        paths = []
+        try:
+            for label,source in zip(labels,(before_source,after_source)):
+                fd,path = tempfile.mkstemp(prefix=f".{stem}-{label}-",suffix=".py",dir=py_dir)
+                with os.fdopen(fd,"w",encoding="utf-8") as fp:
+                    fp.write(source)
+                paths.append(path)
+            aliases = {path:abs_py_path for path in paths}
+            aliases.update(kwargs.pop("aliases",None) or {})
+            return cls(paths[0],paths[1],aliases=aliases,**kwargs)
+        finally:
+            for path in paths:
+                os.remove(path)
+    @classmethod
+    def from_git(cls,
+                 py_path:str,
+                 rev_before:str,
+                 rev_after:str = "HEAD",
+                 **kwargs
+                 )->"SourceVersions":
+        """
+        对比同一脚本在两个提交中的版本
+
+        Args:
+            py_path(str):脚本路径(位于 git 仓库中)
+            rev_before(str):变化前的提交
+            rev_after(str):变化后的提交
+            **kwargs:传给构造函数的其余参数
+        Returns:
+            diff(SourceVersions):差分对象
+        """
+        abs_py_path = os.path.abspath(py_path)
+        py_dir = os.path.dirname(abs_py_path)
+        try:
+            top_level = subprocess.run(["git","rev-parse","--show-toplevel"],
+                                       cwd=py_dir,capture_output=True,text=True,check=True).stdout.strip()
+            rel_path = os.path.relpath(abs_py_path,top_level).replace(os.sep,"/")
+            sources = [subprocess.run(["git","show",f"{rev}:{rel_path}"],
+                                      cwd=py_dir,capture_output=True,text=True,check=True).stdout
+                       for rev in (rev_before,rev_after)]
+        except (OSError,subprocess.CalledProcessError) as e:
+            detail = getattr(e,"stderr",None) or str(e)
+            raise RuntimeError(f"读取提交中的脚本失败：{detail.strip()}") from e
+        labels = tuple(rev.replace("/","_").replace("~","_").replace("^","_")
+                       for rev in (rev_before,rev_after))
+        return cls._from_sources(abs_py_path,sources[0],sources[1],labels,**kwargs)
+    @classmethod
+    def from_agent_reply(cls,
+                         py_path:str,
+                         reply_path:str = "deeptracer/tools_report/agentReply.json",
+                         **kwargs
+                         )->"SourceVersions":
+        """
+        对比脚本与智能体回复中的 full_optimized_code
+
+        Args:
+            py_path(str):原脚本路径
+            reply_path(str):智能体回复文件(相对路径基于项目根目录)
+            **kwargs:传给构造函数的其余参数
+        Returns:
+            diff(SourceVersions):差分对象
+        """
+        reply_path = os.path.join(DEEPTRACER_DEV_ROOT,reply_path)
+        if not os.path.exists(reply_path):
+            raise FileNotFoundError(f"智能体回复文件不存在：{reply_path}")
+        with open(reply_path,"r",encoding="utf-8") as fp:
+            optimized = json.load(fp).get("full_optimized_code")
+        if not optimized:
+            raise ValueError(f"智能体回复中没有 full_optimized_code：{reply_path}")
+        with open(os.path.abspath(py_path),"r",encoding="utf-8") as fp:
+            original = fp.read()
+        return cls._from_sources(py_path,original,optimized,("original","optimized"),**kwargs)
@@ -1,27 +1,98 @@
 import os
 import sys
+import json
+import uuid
+import asyncio
+import subprocess
+from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from pyinstrument import Profiler
-from pyinstrument.renderers import HTMLRenderer
+from pyinstrument.session import Session
+from pyinstrument.renderers import (
+    HTMLRenderer,
+    SessionRenderer,
+    SpeedscopeRenderer
+    )
 from deeptracer import (
     DEEPTRACER_DEV_ROOT,
     print_color)
+from deeptracer.cache import ResultCache
+from deeptracer.utils import (
+    RunContext,
+    search_path,
+    run_target
+    )
+from deeptracer.viztracerAnalyer.renderers import (
+    CollapsedStackRenderer,
+    HotspotRenderer,
+    session_functions
+    )
+from deeptracer.viztracerAnalyer.profileStats import (
+    summarize,
+    function_statistics
+    )
+from deeptracer.viztracerAnalyer.lineProfiler import (
+    LineProfiler,
+    select_targets
+    )
+from deeptracer.viztracerAnalyer.asyncProfiler import run_coroutine
+from deeptracer.viztracerAnalyer.threadProfiler import ThreadSampler
+from deeptracer.viztracerAnalyer.cpuTimeProfiler import CpuTimeProfiler
+from deeptracer.viztracerAnalyer.childProfiler import (
+    load_process_sessions,
+    merge_process_sessions,
+    process_label
+    )
+from deeptracer.viztracerAnalyer.streamingProfiler import (
+    StreamingProfiler,
+    merge_segments
+    )
+from deeptracer.viztracerAnalyer.backends import (
+    BACKENDS,
+    VizTracerBackend,
+    create_backend
+    )
+from deeptracer.viztracerAnalyer.traceSummary import TraceSummarizer
+from deeptracer.viztracerAnalyer.callableTarget import (
+    is_pytest_node,
+    resolve_callable,
+    profile_callable,
+    profile_pytest_node
+    )
 class PyInstrumentAnalyzer:
     """
     PyInstrument 性能分析
 
     """
+    RENDERERS = {
+        "html": HTMLRenderer,
+        "session": SessionRenderer,
+        "speedscope": SpeedscopeRenderer,
+        "collapsed": CollapsedStackRenderer,
+        "hotspots": HotspotRenderer,
+    }
+    #可选的导出格式 -> pyinstrument 渲染器
 
     def __init__(self,
-                 default_report_path: str = "deeptracer/tools_report/VizPzInstrument.html"
+                 default_report_path: str = "deeptracer/tools_report/VizPzInstrument.html",
+                 cache: Optional[ResultCache] = None,
+                 run_context: Optional[RunContext] = None
                  )->None:
         """
         初始化分析器
 
         Args:
             default_report_path(str): 默认报告生成路径
+            cache(ResultCache): 结果缓存,为 None 时不使用缓存
+            run_context(RunContext): 运行上下文,指定时报告写入本次运行的独立目录
         """
+        if run_context is not None:
+            default_report_path = run_context.path(os.path.basename(default_report_path))
         self.default_report_path = os.path.join(DEEPTRACER_DEV_ROOT,default_report_path)
+        self.cache = cache
+        self.summary = None
+        self.report_paths = {}
         # 创建默认报告目录
         if os.path.exists(self.default_report_path):
            os.remove(self.default_report_path) 
@@ -51,16 +122,44 @@ class PyInstrumentAnalyzer:
 
         return abs_py_path
 
+    def _check_formats(self,
+                       formats,
+                       allowed = None) -> tuple:
+        """
+        校验导出格式
+        Args:
+            param formats: 导出格式列表
+            param allowed: 支持的导出格式 默认为 RENDERERS 中的格式
+        Returns:
+            导出格式元组
+        """
+        formats = tuple(formats)
+        allowed = self.RENDERERS if allowed is None else allowed
+        unknown = [fmt for fmt in formats if fmt not in allowed]
+        if not formats or unknown:
+            raise ValueError(f"不支持的导出格式：{unknown or formats}")
+        return formats
+
     def _execute_py_file(self,
-                         py_file_path: str
-                         )->None:
+                         py_file_path: str,
+                         run_name: str = "__main__",
+                         module_name: Optional[str] = None
+                         )->dict:
         """
         通用执行 py 文件的方法
         Args:
             py_file_path: 规范化的 py 文件绝对路径
+            run_name: 执行时的 __name__,不为 "__main__" 时脚本的入口代码块不会执行
+            module_name: 点分模块名,指定时以包内模块的身份执行,支持相对导入
         Returns:
-            None
+            脚本执行后的全局命名空间
         """
+        if module_name is not None:
+            sys.path.insert(0, search_path(py_file_path, module_name))
+            try:
+                return run_target(py_file_path, module_name, run_name=run_name)
+            finally:
+                sys.path.pop(0)
         py_dir = os.path.dirname(py_file_path)
         sys.path.insert(0, py_dir)
 
@@ -71,55 +170,725 @@ class PyInstrumentAnalyzer:
         # 构建执行环境
         exec_globals = {
             "__file__": py_file_path,
-            "__name__": "__main__",
+            "__name__": run_name,
             "__package__": None,
             "__cached__": None,
         }
-        # 执行代码
-        exec(py_code, exec_globals)
+        # 执行代码(以真实文件名编译,使调用栈中的帧能定位到源文件)
+        exec(compile(py_code, py_file_path, "exec"), exec_globals)
 
         # 移除临时加入的路径
         sys.path.pop(0)
+        return exec_globals
         
+    def _execute_py_file_isolated(self,
+                                  py_file_path: str,
+                                  interval: float,
+                                  timeout: Optional[float] = None,
+                                  cpu_time_limit: Optional[int] = None,
+                                  memory_limit: Optional[int] = None,
+                                  children_dir: Optional[str] = None,
+                                  module_name: Optional[str] = None
+                                  )->Session:
+        """
+        在独立子进程中执行并分析 py 文件,不修改当前进程的 sys.path 与模块缓存
+        Args:
+            py_file_path: 规范化的 py 文件绝对路径
+            interval: 采样间隔（秒）
+            timeout: 墙钟时间上限（秒），超时后终止子进程
+            cpu_time_limit: CPU 时间上限（秒），仅类 Unix 系统
+            memory_limit: 地址空间上限（字节），仅类 Unix 系统
+            children_dir: 指定时跟踪目标脚本派生的 Python 子进程,各进程会话写入该目录
+            module_name: 点分模块名,指定时以包内模块的身份执行
+        Returns:
+            子进程交回的 pyinstrument session
+        """
+        if (cpu_time_limit is not None or memory_limit is not None) and sys.platform.startswith("win"):
+            raise ValueError("Windows 不支持 CPU 时间与内存上限")
+        session_path = os.path.join(os.path.dirname(self.default_report_path),
+                                    f".session-{uuid.uuid4().hex}.json")
+        cmd = [
+            sys.executable,
+            "-m",
+            "deeptracer.viztracerAnalyer.isolatedRunner",
+            "--output",
+            session_path,
+            "--interval",
+            str(interval),
+        ]
+        if cpu_time_limit is not None:
+            cmd += ["--cpu-time-limit",str(int(cpu_time_limit))]
+        if memory_limit is not None:
+            cmd += ["--memory-limit",str(int(memory_limit))]
+        if children_dir is not None:
+            cmd += ["--follow-children",children_dir]
+        if module_name is not None:
+            cmd += ["--module",module_name]
+        cmd.append(py_file_path)
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [DEEPTRACER_DEV_ROOT] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+        )
+        #保证子进程能导入 deeptracer
+        try:
+            result = subprocess.run(cmd,
+                                    env=env,
+                                    cwd=os.path.dirname(py_file_path),
+                                    stderr=subprocess.PIPE,
+                                    text=True,
+                                    timeout=timeout)
+            if result.returncode < 0:
+                raise RuntimeError(f"子进程被信号 {-result.returncode} 终止(可能超出资源上限)")
+            if not os.path.exists(session_path):
+                raise RuntimeError(f"子进程未交回分析结果：{result.stderr[-2000:]}")
+            if result.returncode != 0:
+                print_color(f"目标脚本退出码 {result.returncode}：{result.stderr[-2000:]}",
+                            fore_color="yellow")
+            #脚本异常退出时仍使用已采集的部分结果
+            return Session.load(session_path)
+        except subprocess.TimeoutExpired as e:
+            raise TimeoutError(f"分析超时({timeout}s)：{py_file_path}") from e
+        finally:
+            if os.path.exists(session_path):
+                os.remove(session_path)
+    def _report_path(self,
+                     report_format: str
+                     )->str:
+        """
+        获得指定导出格式的报告路径 HTML 使用默认报告路径,其余格式共享同一文件名前缀
+        Args:
+            report_format: 导出格式
+        Returns:
+            报告路径
+        """
+        if report_format == "html":
+            return self.default_report_path
+        if report_format in self.RENDERERS:
+            extension = self.RENDERERS[report_format].output_file_extension
+        else:
+            extension = VizTracerBackend.EXTENSIONS[report_format]
+        return f"{os.path.splitext(self.default_report_path)[0]}.{extension}"
+    def export_session(self,
+                       session: Session,
+                       formats: tuple = ("html",),
+                       top_n: int = 20
+                       )->dict:
+        """
+        按需渲染并保存会话 未请求的格式(包括 HTML)不会被渲染
+        Args:
+            session: pyinstrument 会话
+            formats: 导出格式 可选 html/session/speedscope/collapsed/hotspots
+            top_n: hotspots 格式保留的热点函数数量
+        Returns:
+            导出格式 -> 报告路径
+        """
+        report_paths = {}
+        for report_format in formats:
+            if report_format == "hotspots":
+                renderer = HotspotRenderer(top_n=top_n)
+            else:
+                renderer = self.RENDERERS[report_format]()
+            content = renderer.render(session)
+            report_path = self._report_path(report_format)
+            with open(report_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            report_paths[report_format] = report_path
+        return report_paths
     def generate_perf_report(
         self,
         py_file_path: str,
-        interval: float = 0.001
+        interval: float = 0.001,
+        formats: tuple = ("html",),
+        top_n: int = 20,
+        isolated: bool = False,
+        timeout: Optional[float] = None,
+        cpu_time_limit: Optional[int] = None,
+        memory_limit: Optional[int] = None,
+        backend: str = "pyinstrument",
+        backend_options: Optional[dict] = None,
+        module_name: Optional[str] = None
     ) -> str:
         """
-        核心方法：执行 py 文件并生成 HTML 性能报告
+        核心方法：执行 py 文件并生成性能报告
         Args:
             py_file_path: 待分析的 Python 文件路径（相对/绝对）
             interval: 采样间隔（秒），越小精度越高，默认 1ms
+            formats: 导出格式 pyinstrument 后端可选 html/session/speedscope/collapsed/hotspots,
+                viztracer 后端可选 html/trace,
+                第一个格式的路径作为返回值,全部路径保存在 report_paths 中
+            top_n: hotspots 格式保留的热点函数数量
+            isolated: 是否在独立子进程中执行目标脚本 仅 pyinstrument 后端
+            timeout: 隔离模式下的墙钟时间上限（秒）
+            cpu_time_limit: 隔离模式下的 CPU 时间上限（秒）
+            memory_limit: 隔离模式下的地址空间上限（字节）
+            backend: 分析后端 pyinstrument(统计采样)/viztracer(确定性追踪)
+            backend_options: viztracer 后端的参数 tracer_entries/min_duration/log_sparse/max_stack_depth 等
+            module_name: 点分模块名,指定时以包内模块的身份执行目标(项目模式),支持相对导入
         Returns:
-            最终生成的 HTML 报告路径
+            第一个导出格式的报告路径
         """
         abs_py_path = self._validate_py_file(py_file_path)
+        if backend not in BACKENDS:
+            raise ValueError(f"不支持的分析后端：{backend},可选 {', '.join(BACKENDS)}")
+        formats = self._check_formats(formats,allowed=BACKENDS[backend].FORMATS)
+        if isolated and backend != "pyinstrument":
+            raise ValueError("隔离模式仅支持 pyinstrument 后端")
+        backend_options = dict(backend_options or {})
+        cache_params = {"interval": interval,
+                        "formats": formats,
+                        "top_n": top_n}
+        if backend == "pyinstrument":
+            backend_options["interval"] = interval
+        else:
+            cache_params["backend_options"] = backend_options
+        #pyinstrument 后端沿用原有的缓存键
+        if module_name is not None:
+            cache_params["module_name"] = module_name
 
-        
-        # 3. 初始化 PyInstrument 分析器
-        profiler = Profiler(
-            interval=interval
-        )
-
+        if self.cache is not None:
+            cache_key = self.cache.make_key(abs_py_path,
+                                            backend,
+                                            cache_params)
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                self.report_paths = {
+                    fmt:self.cache.restore(entry,fmt,self._report_path(fmt))
+                    for fmt in formats
+                }
+                self.summary = entry["summary"]
+                print_color(f"命中缓存,跳过分析：{abs_py_path}",fore_color="green")
+                return self.report_paths[formats[0]]
+        #命中缓存时直接还原报告
         try:
-            # 4. 开始追踪并执行目标 py 文件
             print_color(f"开始分析文件：{abs_py_path}",fore_color="blue")
-            profiler.start()
-            # 执行 py 文件
-            self._execute_py_file(abs_py_path)
-            profiler.stop()
-            print_color("分析完成，开始生成 HTML 报告...",fore_color="green")
+            if isolated:
+                # 3. 在子进程中追踪并执行目标 py 文件
+                session = self._execute_py_file_isolated(abs_py_path,
+                                                         interval,
+                                                         timeout=timeout,
+                                                         cpu_time_limit=cpu_time_limit,
+                                                         memory_limit=memory_limit,
+                                                         module_name=module_name)
+                print_color(f"分析完成，开始生成报告：{', '.join(formats)}",fore_color="green")
+                self.report_paths = self.export_session(session,formats,top_n=top_n)
+                self.summary = {
+                    "duration": session.duration,
+                    "sample_count": session.sample_count
+                }
+            else:
+                # 3. 初始化所选后端
+                profiler = create_backend(backend,**backend_options)
+                # 4. 开始追踪并执行目标 py 文件
+                profiler.start()
+                try:
+                    self._execute_py_file(abs_py_path, module_name=module_name)
+                finally:
+                    profiler.stop()
+                print_color(f"分析完成，开始生成报告：{', '.join(formats)}",fore_color="green")
 
-            # 5. 生成 HTML 报告并保存
-            renderer = HTMLRenderer()
-            html_content = renderer.render(profiler.last_session)
+                # 5. 按需渲染报告并保存
+                self.report_paths = profiler.export(self,formats,top_n=top_n)
+                if "trace" in self.report_paths:
+                    self.report_paths.update(
+                        TraceSummarizer(self.report_paths["trace"]).save(top_n=top_n))
+                #追踪文件可能很大 同时输出流式汇总的摘要与折叠栈供后续模块读取
+                self.summary = profiler.summary()
+                if self.summary.get("overflow"):
+                    print_color(f"追踪记录超出环形缓冲区({self.summary['tracer_entries']} 条),"
+                                f"最早的记录已被覆盖,可增大 tracer_entries 或设置 min_duration",
+                                fore_color="yellow")
+            print_color("性能报告已生成",fore_color="green")
+            if self.cache is not None:
+                self.cache.put(cache_key,
+                               self.report_paths,
+                               self.summary)
+            return self.report_paths[formats[0]]
 
-            with open(self.default_report_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
-
-            print_color(f"HTML 性能报告已生成",fore_color="green")
-            return self.default_report_path
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+    def generate_callable_report(
+        self,
+        target: str,
+        args: tuple = (),
+        kwargs: Optional[dict] = None,
+        warmup: int = 0,
+        repeat: int = 1,
+        interval: float = 0.001,
+        formats: tuple = ("html",),
+        top_n: int = 20,
+        search_paths: tuple = ()
+    ) -> str:
+        """
+        分析可导入的函数或 pytest 节点 只分析调用本身,不包含导入与初始化
+        Args:
+            target: "module.sub:function" 或 pytest 节点 ID(path/test_x.py::test_name)
+            args: 位置参数(pytest 节点不使用)
+            kwargs: 关键字参数(pytest 节点不使用)
+            warmup: 预热调用次数,不计入分析
+            repeat: 计入分析的调用次数
+            interval: 采样间隔（秒）
+            formats: 导出格式 可选 html/session/speedscope/collapsed/hotspots
+            top_n: hotspots 格式保留的热点函数数量
+            search_paths: 额外加入模块搜索路径的目录
+        Returns:
+            第一个导出格式的报告路径
+        """
+        formats = self._check_formats(formats)
+        if warmup < 0 or repeat < 1:
+            raise ValueError(f"预热次数不能小于0且调用次数必须大于0：{warmup}/{repeat}")
+        profiler = Profiler(interval=interval)
+        try:
+            if is_pytest_node(target):
+                if args or kwargs:
+                    raise ValueError("pytest 节点不接受 args/kwargs")
+                print_color(f"开始分析测试：{target}",fore_color="blue")
+                exit_code = profile_pytest_node(target,profiler,warmup=warmup,repeat=repeat)
+                if exit_code != 0:
+                    print_color(f"测试未全部通过(退出码 {exit_code}),报告仍包含已执行的调用",
+                                fore_color="yellow")
+            else:
+                func = resolve_callable(target,search_paths)
+                print_color(f"开始分析调用：{target}",fore_color="blue")
+                profile_callable(func,profiler,args=args,kwargs=kwargs,warmup=warmup,repeat=repeat)
+            session = profiler.last_session
+            self.report_paths = self.export_session(session,formats,top_n=top_n)
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count
+        }
+        print_color("性能报告已生成",fore_color="green")
+        return self.report_paths[formats[0]]
+    def generate_async_report(
+        self,
+        target: str,
+        entry: str = "main",
+        args: tuple = (),
+        kwargs: Optional[dict] = None,
+        interval: float = 0.001,
+        formats: tuple = ("html",),
+        top_n: int = 20,
+        search_paths: tuple = ()
+    ) -> str:
+        """
+        异步感知分析：在受控的事件循环中运行协程入口,以 async_mode 采样并统计每个任务的执行/等待时间
+        Args:
+            target: .py 文件路径(不执行其 __main__ 代码块)或 "module.sub:coroutine_function"
+            entry: target 为 .py 文件时的协程入口函数名
+            args: 入口的位置参数
+            kwargs: 入口的关键字参数
+            interval: 采样间隔（秒）
+            formats: 导出格式 可选 html/session/speedscope/collapsed/hotspots
+            top_n: hotspots 格式保留的热点函数数量
+            search_paths: 额外加入模块搜索路径的目录
+        Returns:
+            第一个导出格式的报告路径,任务统计 JSON 的路径保存在 report_paths["tasks"] 中
+        """
+        formats = self._check_formats(formats)
+        try:
+            if target.endswith(".py"):
+                abs_py_path = self._validate_py_file(target)
+                exec_globals = self._execute_py_file(abs_py_path,run_name="__deeptracer_async__")
+                func = exec_globals.get(entry)
+                if func is None:
+                    raise AttributeError(f"{abs_py_path} 中不存在入口函数 {entry}")
+                description = f"{abs_py_path}:{entry}"
+            else:
+                func = resolve_callable(target,search_paths)
+                description = target
+            if not asyncio.iscoroutinefunction(func):
+                raise TypeError(f"入口不是协程函数：{description}")
+            print_color(f"开始异步分析：{description}",fore_color="blue")
+            profiler = Profiler(interval=interval,async_mode="enabled")
+            _,tasks,loop_stats = run_coroutine(func,profiler,args=args,kwargs=kwargs,
+                                               entry_name=description)
+            session = profiler.last_session
+            self.report_paths = self.export_session(session,formats,top_n=top_n)
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+        tasks_path = f"{os.path.splitext(self.default_report_path)[0]}.tasks.json"
+        with open(tasks_path,"w",encoding="utf-8") as f:
+            json.dump({
+                "target": description,
+                "loop": loop_stats,
+                "tasks": tasks
+            },f,indent=4,ensure_ascii=False)
+        self.report_paths["tasks"] = tasks_path
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count
+        }
+        print_color("异步性能报告已生成",fore_color="green")
+        return self.report_paths[formats[0]]
+    def generate_cputime_report(
+        self,
+        py_file_path: str,
+        interval: float = 0.001,
+        formats: tuple = ("html",),
+        top_n: int = 20
+    ) -> str:
+        """
+        墙钟/CPU 双重计时：每个样本同时记录线程 CPU 时间,将热点拆分为计算与等待(I/O、sleep、锁)
+        Args:
+            py_file_path: 待分析的 Python 文件路径（相对/绝对）
+            interval: 采样间隔（秒）
+            formats: 墙钟时间会话的导出格式,包含 html 时另外生成只含 CPU 时间的 <stem>.cpu.html
+            top_n: hotspots 格式与拆分结果中保留的热点函数数量
+        Returns:
+            第一个导出格式的报告路径,拆分结果 JSON 的路径保存在 report_paths["cputime"] 中
+        """
+        abs_py_path = self._validate_py_file(py_file_path)
+        formats = self._check_formats(formats)
+        stem = os.path.splitext(self.default_report_path)[0]
+        try:
+            print_color(f"开始墙钟/CPU 双重计时分析：{abs_py_path}",fore_color="blue")
+            profiler = CpuTimeProfiler(interval=interval)
+            profiler.start()
+            try:
+                self._execute_py_file(abs_py_path)
+            finally:
+                session = profiler.stop()
+            self.report_paths = self.export_session(session,formats,top_n=top_n)
+            if "html" in formats:
+                cpu_html = f"{stem}.cpu.html"
+                with open(cpu_html,"w",encoding="utf-8") as f:
+                    f.write(HTMLRenderer().render(profiler.cpu_session(session)))
+                self.report_paths["cpu_html"] = cpu_html
+            breakdown = profiler.breakdown(session,top_n=top_n)
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+        cputime_path = f"{stem}.cputime.json"
+        with open(cputime_path,"w",encoding="utf-8") as f:
+            json.dump({"target": abs_py_path,**breakdown},f,indent=4,ensure_ascii=False)
+        self.report_paths["cputime"] = cputime_path
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count,
+            "compute_ratio": breakdown["compute_ratio"]
+        }
+        print_color(f"双重计时报告已生成,计算占比 {breakdown['compute_ratio']:.1%}",fore_color="green")
+        return self.report_paths[formats[0]]
+    def generate_thread_report(
+        self,
+        py_file_path: str,
+        interval: float = 0.005,
+        formats: tuple = ("html",),
+        top_n: int = 20
+    ) -> str:
+        """
+        逐线程分析：对所有线程采样,按线程区分调用树,并统计每个线程等待 GIL 与等待锁的时间
+        Args:
+            py_file_path: 待分析的 Python 文件路径（相对/绝对）
+            interval: 采样间隔（秒）,采样线程本身也需要 GIL,默认 5ms
+            formats: 导出格式,调用树根节点的子节点为各线程,等待 GIL/锁的时间显示为
+                [GIL wait]/[lock wait] 帧
+            top_n: hotspots 格式与竞争汇总中保留的条目数量
+        Returns:
+            第一个导出格式的报告路径,竞争汇总 JSON 的路径保存在 report_paths["threads"] 中
+        """
+        abs_py_path = self._validate_py_file(py_file_path)
+        formats = self._check_formats(formats)
+        try:
+            print_color(f"开始逐线程分析文件：{abs_py_path}",fore_color="blue")
+            sampler = ThreadSampler(interval=interval)
+            sampler.start()
+            try:
+                self._execute_py_file(abs_py_path)
+            finally:
+                sampler.stop()
+            session = sampler.session()
+            self.report_paths = self.export_session(session,formats,top_n=top_n)
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+        contention = sampler.contention(top_n=top_n)
+        threads_path = f"{os.path.splitext(self.default_report_path)[0]}.threads.json"
+        with open(threads_path,"w",encoding="utf-8") as f:
+            json.dump({"target": abs_py_path,**contention},f,indent=4,ensure_ascii=False)
+        self.report_paths["threads"] = threads_path
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count,
+            "contention_ratio": contention["contention_ratio"]
+        }
+        print_color(f"逐线程报告已生成,共 {len(contention['threads'])} 个线程,"
+                    f"GIL/锁等待占比 {contention['contention_ratio']:.1%}",fore_color="green")
+        return self.report_paths[formats[0]]
+    def generate_multiprocess_report(
+        self,
+        py_file_path: str,
+        interval: float = 0.001,
+        formats: tuple = ("html",),
+        top_n: int = 20,
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        多进程分析：在隔离子进程中运行脚本,并跟踪其通过 multiprocessing/subprocess 派生的 Python 子进程
+        Args:
+            py_file_path: 待分析的 Python 文件路径（相对/绝对）
+            interval: 采样间隔（秒）,父子进程相同
+            formats: 合并视图的导出格式
+            top_n: hotspots 格式与进程统计中保留的热点函数数量
+            timeout: 墙钟时间上限（秒）
+        Returns:
+            第一个导出格式的报告路径(全部进程合并视图),
+            按进程区分的 HTML 与进程统计 JSON 的路径保存在 report_paths["processes_html"]/["processes"] 中
+        """
+        abs_py_path = self._validate_py_file(py_file_path)
+        formats = self._check_formats(formats)
+        stem = os.path.splitext(self.default_report_path)[0]
+        children_dir = os.path.join(os.path.dirname(self.default_report_path),
+                                    f".processes-{uuid.uuid4().hex}")
+        try:
+            print_color(f"开始多进程分析文件：{abs_py_path}",fore_color="blue")
+            self._execute_py_file_isolated(abs_py_path,
+                                           interval,
+                                           timeout=timeout,
+                                           children_dir=children_dir)
+            processes = load_process_sessions(children_dir)
+            processes.sort(key=lambda process: process["role"] != "main")
+            #主进程在前 作为合并会话的起点
+            session = merge_process_sessions(processes)
+            self.report_paths = self.export_session(session,formats,top_n=top_n)
+            processes_html = f"{stem}.processes.html"
+            with open(processes_html,"w",encoding="utf-8") as f:
+                f.write(HTMLRenderer().render(merge_process_sessions(processes,per_process=True)))
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+        finally:
+            if os.path.isdir(children_dir):
+                for name in os.listdir(children_dir):
+                    os.remove(os.path.join(children_dir,name))
+                os.rmdir(children_dir)
+        summary = []
+        for process in processes:
+            process_session = process["session"]
+            functions = sorted(session_functions(process_session).values(),
+                               key=lambda entry: entry["self_time"],reverse=True)
+            summary.append({
+                "label": process_label(process),
+                "pid": process["pid"],
+                "ppid": process["ppid"],
+                "role": process["role"],
+                "name": process["name"],
+                "duration": process_session.duration,
+                "cpu_time": process_session.cpu_time,
+                "sample_count": process_session.sample_count,
+                "hotspots": [{
+                    "function": entry["function"],
+                    "file": entry["file"],
+                    "line": entry["line"],
+                    "self_time": entry["self_time"]
+                } for entry in functions[:top_n]]
+            })
+        processes_path = f"{stem}.processes.json"
+        with open(processes_path,"w",encoding="utf-8") as f:
+            json.dump({
+                "target": abs_py_path,
+                "duration": session.duration,
+                "cpu_time": session.cpu_time,
+                "processes": summary
+            },f,indent=4,ensure_ascii=False)
+        self.report_paths["processes"] = processes_path
+        self.report_paths["processes_html"] = processes_html
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count,
+            "processes": len(processes)
+        }
+        print_color(f"多进程性能报告已生成,共 {len(processes)} 个进程",fore_color="green")
+        return self.report_paths[formats[0]]
+    def generate_streaming_report(
+        self,
+        py_file_path: str,
+        segment_dir: Optional[str] = None,
+        interval: float = 0.001,
+        segment_seconds: float = 60.0,
+        max_segments: Optional[int] = None,
+        formats: tuple = ("html",),
+        top_n: int = 20
+    ) -> str:
+        """
+        流式分析长时间运行的脚本：样本按调用栈聚合并定期写入滚动分段,内存占用不随运行时间增长
+        Args:
+            py_file_path: 待分析的 Python 文件路径（相对/绝对）
+            segment_dir: 分段文件目录,默认为报告路径旁的 <stem>.segments 目录
+            interval: 采样间隔（秒）
+            segment_seconds: 每个分段覆盖的时长（秒）
+            max_segments: 最多保留的分段数量,None 表示不限制
+            formats: 合并会话的导出格式
+            top_n: hotspots 格式保留的热点函数数量
+        Returns:
+            第一个导出格式的报告路径
+        """
+        abs_py_path = self._validate_py_file(py_file_path)
+        formats = self._check_formats(formats)
+        if segment_dir is None:
+            segment_dir = f"{os.path.splitext(self.default_report_path)[0]}.segments"
+        try:
+            print_color(f"开始流式分析文件：{abs_py_path}",fore_color="blue")
+            profiler = StreamingProfiler(segment_dir,
+                                         interval=interval,
+                                         segment_seconds=segment_seconds,
+                                         max_segments=max_segments)
+            profiler.start()
+            try:
+                self._execute_py_file(abs_py_path)
+            finally:
+                session = profiler.stop()
+            #脚本异常时已写出的分段仍然保留
+            self.report_paths = self.export_session(session,formats,top_n=top_n)
+        except Exception as e:
+            raise RuntimeError(f"生成报告失败：{str(e)}") from e
+        self.report_paths["segments"] = profiler.output_dir
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count
+        }
+        print_color(f"流式分析完成,共 {len(profiler.segments)} 个分段：{profiler.output_dir}",
+                    fore_color="green")
+        return self.report_paths[formats[0]]
+    def merge_segment_report(
+        self,
+        segment_dir: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        formats: tuple = ("html",),
+        top_n: int = 20
+    ) -> str:
+        """
+        合并流式分析中指定时间窗口的分段并导出报告
+        Args:
+            segment_dir: 分段文件目录
+            start: 窗口开始,相对第一个分段开始的秒数
+            end: 窗口结束,相对第一个分段开始的秒数
+            formats: 导出格式
+            top_n: hotspots 格式保留的热点函数数量
+        Returns:
+            第一个导出格式的报告路径
+        """
+        formats = self._check_formats(formats)
+        session = merge_segments(os.path.abspath(segment_dir),start=start,end=end)
+        self.report_paths = self.export_session(session,formats,top_n=top_n)
+        self.summary = {
+            "duration": session.duration,
+            "sample_count": session.sample_count
+        }
+        print_color("分段合并报告已生成",fore_color="green")
+        return self.report_paths[formats[0]]
+    def generate_repeated_report(
+        self,
+        py_file_path: str,
+        runs: int = 10,
+        workers: int = 1,
+        interval: float = 0.001,
+        confidence: float = 0.95,
+        top_n: int = 20,
+        formats: tuple = ("html",),
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        多次运行同一脚本并合并会话,输出每个函数耗时的统计量与置信区间
+        每次运行都在独立子进程中进行,避免模块缓存等状态影响后续运行
+        Args:
+            py_file_path: 待分析的 Python 文件路径（相对/绝对）
+            runs: 运行次数
+            workers: 并行子进程数量,大于1时并行运行会相互争用CPU,适合多核空闲的机器
+            interval: 采样间隔（秒）
+            confidence: 置信区间的置信度
+            top_n: 统计结果保留的函数数量(按平均自身耗时排序)
+            formats: 合并后会话的导出格式
+            timeout: 单次运行的墙钟时间上限（秒）
+        Returns:
+            统计结果 JSON 的路径,合并会话的各格式路径保存在 report_paths 中
+        """
+        if runs < 1:
+            raise ValueError(f"运行次数必须大于0：{runs}")
+        abs_py_path = self._validate_py_file(py_file_path)
+        print_color(f"开始重复分析文件({runs}次)：{abs_py_path}",fore_color="blue")
+        try:
+            with ThreadPoolExecutor(max_workers=max(1,workers)) as pool:
+                sessions = list(pool.map(
+                    lambda _: self._execute_py_file_isolated(abs_py_path,
+                                                             interval,
+                                                             timeout=timeout),
+                    range(runs)
+                ))
+            #每个线程只负责等待一个子进程 实际并行发生在子进程中
+        except Exception as e:
+            raise RuntimeError(f"重复分析失败：{str(e)}") from e
 
+        per_run = [session_functions(session) for session in sessions]
+        stats = {
+            "target": abs_py_path,
+            "runs": runs,
+            "interval": interval,
+            "confidence": confidence,
+            "duration": summarize([session.duration for session in sessions],confidence),
+            "cpu_time": summarize([session.cpu_time for session in sessions],confidence),
+            "functions": function_statistics(per_run,confidence,top_n=top_n)
+        }
+        merged = reduce(Session.combine,sessions)
+        self.report_paths = self.export_session(merged,formats,top_n=top_n)
+        stats_path = f"{os.path.splitext(self.default_report_path)[0]}.stats.json"
+        with open(stats_path,"w",encoding="utf-8") as f:
+            json.dump(stats,f,indent=4,ensure_ascii=False)
+        self.report_paths["stats"] = stats_path
+        self.summary = {
+            "duration": stats["duration"]["mean"],
+            "sample_count": merged.sample_count
+        }
+        print_color(f"统计报告已生成：{stats_path}",fore_color="green")
+        return stats_path
+    def generate_line_report(
+        self,
+        py_file_path: str,
+        top_n: int = 10,
+        interval: float = 0.001,
+        targets: Optional[list] = None,
+        include_libraries: bool = False
+    ) -> str:
+        """
+        两阶段行级分析：先采样找到自身耗时最高的 top_n 个函数,再次执行脚本时只对这些函数逐行计时
+        Args:
+            py_file_path: 待分析的 Python 文件路径（相对/绝对）
+            top_n: 行级计时的函数数量
+            interval: 第一阶段的采样间隔（秒）
+            targets: 直接指定目标函数 [(文件路径, 定义行号, 函数名)],指定时跳过第一阶段
+            include_libraries: 是否允许选择标准库与第三方库中的函数
+        Returns:
+            行级结果 JSON 的路径
+        """
+        abs_py_path = self._validate_py_file(py_file_path)
+        try:
+            if targets is None:
+                print_color(f"开始采样定位热点函数：{abs_py_path}",fore_color="blue")
+                profiler = Profiler(interval=interval)
+                profiler.start()
+                try:
+                    self._execute_py_file(abs_py_path)
+                finally:
+                    session = profiler.stop()
+                targets = select_targets(session,top_n=top_n,include_libraries=include_libraries)
+            if not targets:
+                raise ValueError("没有可用于行级计时的热点函数")
+            print_color(f"开始行级计时({len(targets)}个函数)",fore_color="blue")
+            line_profiler = LineProfiler(targets)
+            line_profiler.start()
+            try:
+                self._execute_py_file(abs_py_path)
+            finally:
+                line_profiler.stop()
         except Exception as e:
-            raise RuntimeError(f"生成报告失败：{str(e)}") from e
\ No newline at end of file
+            raise RuntimeError(f"行级分析失败：{str(e)}") from e
+        lines_path = f"{os.path.splitext(self.default_report_path)[0]}.lines.json"
+        with open(lines_path,"w",encoding="utf-8") as f:
+            json.dump({
+                "target": abs_py_path,
+                "backend": line_profiler.backend,
+                "functions": line_profiler.results()
+            },f,indent=4,ensure_ascii=False)
+        self.report_paths["lines"] = lines_path
+        print_color(f"行级报告已生成：{lines_path}",fore_color="green")
+        return lines_path
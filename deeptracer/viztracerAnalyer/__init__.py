@@ -1,5 +1,7 @@
 from deeptracer.viztracerAnalyer.ViztracerAnalyer import *
+from deeptracer.viztracerAnalyer.profileDiff import ProfileDiff
 
 __all__ = [
-    "PyInstrumentAnalyzer"
-]
+    "PyInstrumentAnalyzer",
+    "ProfileDiff"
+]
\ No newline at end of file
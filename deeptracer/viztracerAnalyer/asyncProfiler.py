@@ -0,0 +1,294 @@
+"""
+asyncio 目标的异步感知分析
+
+在受控的事件循环中运行协程入口,pyinstrument 以 async_mode 运行,
+等待时间记为 <await> 而不是事件循环内部的耗时;同时通过任务工厂为每个任务计时,
+区分任务实际执行(占用事件循环)的时间与等待的时间,并记录单次执行最长的一步,
+用于找出真正阻塞事件循环的协程
+"""
+import os
+import time
+import asyncio
+import collections.abc
+
+
+_INTERNAL_DIRS = (os.path.dirname(asyncio.__file__),)
+_INTERNAL_FILES = (os.path.abspath(__file__),)
+#asyncio 与本模块的帧不作为协程位置
+
+
+def _location(coro)->str|None:
+    """
+    获得协程当前所在位置 沿 cr_await 找到最内层的用户代码协程
+
+    Args:
+        coro(Coroutine):协程
+    Returns:
+        location(str|None):"文件名:行号" 协程已结束时返回None
+    """
+    frame = None
+    while coro is not None:
+        inner_frame = getattr(coro,"cr_frame",None) or getattr(coro,"gi_frame",None)
+        if inner_frame is None:
+            break
+        filename = os.path.abspath(inner_frame.f_code.co_filename)
+        if not filename.startswith(_INTERNAL_DIRS) and filename not in _INTERNAL_FILES:
+            frame = inner_frame
+        coro = getattr(coro,"cr_await",None) or getattr(coro,"gi_yieldfrom",None)
+    if frame is None:
+        return None
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+class TimedCoroutine(collections.abc.Coroutine):
+    """
+    为协程的每一步(send/throw)计时的包装 事件循环每次恢复任务都对应一步
+
+    Args:
+        coro(Coroutine):被包装的协程
+        timing(dict):计时结果 由 TaskTimer 创建
+    """
+    def __init__(self,
+                 coro:collections.abc.Coroutine,
+                 timing:dict
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            coro(Coroutine):被包装的协程
+            timing(dict):计时结果
+        Returns:
+            None
+        """
+        self._coro = coro
+        self._timing = timing
+        self.__name__ = getattr(coro,"__name__",type(coro).__name__)
+        self.__qualname__ = getattr(coro,"__qualname__",self.__name__)
+    def _step(self,
+              method:callable,
+              *args
+              )->object:
+        """
+        执行一步并累加执行时间
+
+        Args:
+            method(callable):被包装协程的 send 或 throw
+            *args:传给 method 的参数
+        Returns:
+            value(object):协程产出的值
+        """
+        resume_at = _location(self._coro)
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            timing = self._timing
+            timing["running"] += elapsed
+            timing["steps"] += 1
+            if elapsed > timing["max_step"]:
+                timing["max_step"] = elapsed
+                timing["max_step_span"] = [resume_at,_location(self._coro)]
+            #最长一步从哪里恢复执行、在哪里再次挂起
+    def send(self,value):
+        return self._step(self._coro.send,value)
+    def throw(self,*args):
+        return self._step(self._coro.throw,*args)
+    def close(self):
+        return self._coro.close()
+    def __await__(self):
+        return self._coro.__await__()
+    @property
+    def cr_frame(self):
+        return getattr(self._coro,"cr_frame",None)
+    @property
+    def cr_running(self):
+        return getattr(self._coro,"cr_running",False)
+    @property
+    def cr_await(self):
+        return getattr(self._coro,"cr_await",None)
+    @property
+    def cr_code(self):
+        return getattr(self._coro,"cr_code",None)
+
+
+class TaskTimer:
+    """
+    事件循环的任务工厂 为每个新任务包装计时协程
+
+    Attributes:
+        timings(list):每个任务的计时结果
+
+    Methods:
+        report: 获得整理后的任务计时
+    """
+    def __init__(self)->None:
+        """
+        初始化函数
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self.timings = []
+    def __call__(self,
+                 loop:asyncio.AbstractEventLoop,
+                 coro:collections.abc.Coroutine,
+                 **kwargs
+                 )->asyncio.Task:
+        """
+        创建任务
+
+        Args:
+            loop(AbstractEventLoop):事件循环
+            coro(Coroutine):任务的协程
+            **kwargs:create_task 传入的 name/context 等参数
+        Returns:
+            task(Task):任务
+        """
+        timing = {
+            "name": None,
+            "coroutine": getattr(coro,"__qualname__",type(coro).__name__),
+            "created": time.perf_counter(),
+            "finished": None,
+            "running": 0.0,
+            "steps": 0,
+            "max_step": 0.0,
+            "max_step_span": None,
+            "state": "pending"
+        }
+        code = getattr(coro,"cr_code",None)
+        timing["file"] = code.co_filename if code is not None else None
+        task = asyncio.Task(TimedCoroutine(coro,timing),loop=loop,**kwargs)
+        timing["task"] = task
+        task.add_done_callback(lambda done: self._finish(done,timing))
+        self.timings.append(timing)
+        return task
+    def _finish(self,
+                task:asyncio.Task,
+                timing:dict
+                )->None:
+        """
+        任务结束回调 记录结束时间与状态,并释放对任务的引用
+
+        Args:
+            task(Task):结束的任务
+            timing(dict):该任务的计时结果
+        Returns:
+            None
+        """
+        timing["finished"] = time.perf_counter()
+        if task.cancelled():
+            timing["state"] = "cancelled"
+        else:
+            timing["state"] = "error" if task.exception() is not None else "done"
+        timing["name"] = task.get_name()
+        timing["task"] = None
+    def report(self)->list:
+        """
+        获得整理后的任务计时 按执行时间降序
+
+        Args:
+            None
+        Returns:
+            tasks(list):[{"name","coroutine","file","state","lifetime","running","awaiting","steps","max_step","max_step_span"}]
+        """
+        now = time.perf_counter()
+        tasks = []
+        for timing in self.timings:
+            lifetime = (timing["finished"] or now) - timing["created"]
+            tasks.append({
+                "name": timing["name"] or timing["task"].get_name(),
+                "coroutine": timing["coroutine"],
+                "file": timing["file"],
+                "state": timing["state"],
+                "lifetime": lifetime,
+                "running": timing["running"],
+                "awaiting": max(0.0,lifetime - timing["running"]),
+                "steps": timing["steps"],
+                "max_step": timing["max_step"],
+                "max_step_span": timing["max_step_span"]
+            })
+        tasks.sort(key=lambda entry: entry["running"],reverse=True)
+        return tasks
+
+
+def _cancel_pending(loop:asyncio.AbstractEventLoop)->None:
+    """
+    取消事件循环中剩余的任务并等待其结束(与 asyncio.run 的收尾一致)
+
+    Args:
+        loop(AbstractEventLoop):事件循环
+    Returns:
+        None
+    """
+    pending = asyncio.all_tasks(loop)
+    if not pending:
+        return
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending,return_exceptions=True))
+
+
+def run_coroutine(entry:callable,
+                  profiler,
+                  args:tuple = (),
+                  kwargs:dict = None,
+                  entry_name:str = "entry"
+                  )->tuple:
+    """
+    在受控的事件循环中运行协程入口 分析器只在入口任务内部启动
+
+    Args:
+        entry(callable):协程函数
+        profiler(Profiler):以 async_mode 创建的 pyinstrument 分析器
+        args(tuple):位置参数
+        kwargs(dict):关键字参数
+        entry_name(str):入口任务名称
+    Returns:
+        result(tuple):(入口返回值, 任务计时, 事件循环统计)
+    """
+    kwargs = kwargs or {}
+    timer = TaskTimer()
+    loop = asyncio.new_event_loop()
+    loop.set_task_factory(timer)
+
+    async def profiled():
+        profiler.start()
+        try:
+            return await entry(*args,**kwargs)
+        finally:
+            profiler.stop()
+    #分析器在任务内部启动 pyinstrument 才能跟踪该任务的异步上下文
+
+    started = time.perf_counter()
+    try:
+        asyncio.set_event_loop(loop)
+        task = loop.create_task(profiled(),name=entry_name)
+        result = loop.run_until_complete(task)
+        wall = time.perf_counter() - started
+    finally:
+        loop.set_task_factory(None)
+        #收尾阶段创建的任务不计时
+        try:
+            _cancel_pending(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+    tasks = timer.report()
+    for entry_task in tasks:
+        if entry_task["name"] == entry_name:
+            entry_task["coroutine"] = getattr(entry,"__qualname__",entry_name)
+    #入口任务运行的是内部包装协程 显示为真正的入口函数
+    busy = sum(entry_task["running"] for entry_task in tasks)
+    loop_stats = {
+        "wall": wall,
+        "busy": busy,
+        "idle": max(0.0,wall - busy),
+        "tasks": len(tasks)
+    }
+    return result,tasks,loop_stats
@@ -0,0 +1,238 @@
+"""
+性能分析后端
+
+PyInstrumentAnalyzer 通过统一的后端接口执行分析,每次运行可选择:
+    pyinstrument  统计采样,开销低,输出调用树/热点
+    viztracer     确定性追踪,输出完整的 Chrome Trace 时间线;
+                  以环形缓冲区(tracer_entries)限制追踪大小,以 min_duration/max_stack_depth/log_sparse 控制开销
+viztracer 为可选依赖(pip install deeptracer[viztracer]),只在选择该后端时导入
+"""
+import sys
+import time
+from abc import ABC, abstractmethod
+from pyinstrument import Profiler
+
+
+class ProfilerBackend(ABC):
+    """
+    性能分析后端接口
+
+    Attributes:
+        name(str):后端名称
+        FORMATS(tuple):支持的导出格式
+
+    Methods:
+        start: 开始分析
+        stop: 停止分析
+        export: 按格式导出报告
+        summary: 获得本次运行的摘要
+    """
+    name = None
+    FORMATS = ()
+    @abstractmethod
+    def start(self,
+              caller_frame = None
+              )->None:
+        """
+        开始分析
+
+        Args:
+            caller_frame(FrameType):视为分析起点的帧 默认为调用者
+        Returns:
+            None
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def stop(self)->None:
+        """
+        停止分析
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def export(self,
+               analyzer,
+               formats:tuple,
+               top_n:int = 20
+               )->dict:
+        """
+        按格式导出报告 报告路径由分析器的默认报告路径决定
+
+        Args:
+            analyzer(PyInstrumentAnalyzer):分析器
+            formats(tuple):导出格式
+            top_n(int):热点格式保留的函数数量
+        Returns:
+            report_paths(dict):导出格式 -> 报告路径
+        """
+        raise NotImplementedError
+    @abstractmethod
+    def summary(self)->dict:
+        """
+        获得本次运行的摘要
+
+        Args:
+            None
+        Returns:
+            summary(dict):至少包含 duration 与 sample_count
+        """
+        raise NotImplementedError
+
+
+class PyInstrumentBackend(ProfilerBackend):
+    """
+    pyinstrument 统计采样后端
+
+    Args:
+        interval(float):采样间隔(秒)
+    """
+    name = "pyinstrument"
+    FORMATS = ("html","session","speedscope","collapsed","hotspots")
+    def __init__(self,
+                 interval:float = 0.001
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            interval(float):采样间隔(秒)
+        Returns:
+            None
+        """
+        self.profiler = Profiler(interval=interval)
+        self.session = None
+    def start(self,
+              caller_frame = None
+              )->None:
+        self.profiler.start(caller_frame=caller_frame or sys._getframe(1))
+    def stop(self)->None:
+        self.session = self.profiler.stop()
+    def export(self,
+               analyzer,
+               formats:tuple,
+               top_n:int = 20
+               )->dict:
+        return analyzer.export_session(self.session,formats,top_n=top_n)
+    def summary(self)->dict:
+        return {
+            "duration": self.session.duration,
+            "sample_count": self.session.sample_count
+        }
+
+
+class VizTracerBackend(ProfilerBackend):
+    """
+    VizTracer 确定性追踪后端
+
+    追踪记录保存在固定大小的环形缓冲区中,超出 tracer_entries 时最早的记录被覆盖,
+    追踪文件大小与内存占用因此有上限
+
+    Args:
+        tracer_entries(int):环形缓冲区大小(记录条数)
+        min_duration(float):只保留耗时不低于该值的函数调用(秒) 0表示全部保留
+        log_sparse(bool):只记录被 viztracer.log_sparse 装饰的函数
+        max_stack_depth(int):最大记录栈深度 -1表示不限制
+        ignore_c_function(bool):是否忽略 C 函数调用
+        include_files(list):只追踪这些路径下的文件
+        exclude_files(list):不追踪这些路径下的文件
+    """
+    name = "viztracer"
+    FORMATS = ("html","trace")
+    EXTENSIONS = {"trace": "trace.json"}
+    def __init__(self,
+                 tracer_entries:int = 1000000,
+                 min_duration:float = 0.0,
+                 log_sparse:bool = False,
+                 max_stack_depth:int = -1,
+                 ignore_c_function:bool = False,
+                 include_files:list = None,
+                 exclude_files:list = None
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            tracer_entries(int):环形缓冲区大小(记录条数)
+            min_duration(float):最短记录耗时(秒)
+            log_sparse(bool):是否只记录被 log_sparse 装饰的函数
+            max_stack_depth(int):最大记录栈深度
+            ignore_c_function(bool):是否忽略 C 函数调用
+            include_files(list):只追踪这些路径下的文件
+            exclude_files(list):不追踪这些路径下的文件
+        Returns:
+            None
+        """
+        try:
+            from viztracer import VizTracer
+        except ImportError as e:
+            raise ImportError("VizTracer 后端需要安装 viztracer：pip install deeptracer[viztracer]") from e
+        if tracer_entries <= 0:
+            raise ValueError(f"tracer_entries 必须为正数：{tracer_entries}")
+        self.tracer = VizTracer(tracer_entries=tracer_entries,
+                                min_duration=min_duration * 1e6,
+                                log_sparse=log_sparse,
+                                max_stack_depth=max_stack_depth,
+                                ignore_c_function=ignore_c_function,
+                                include_files=include_files,
+                                exclude_files=exclude_files,
+                                verbose=0)
+        #viztracer 的 min_duration 以微秒为单位
+        self.tracer_entries = tracer_entries
+        self.duration = 0.0
+        self._started = None
+    def start(self,
+              caller_frame = None
+              )->None:
+        self._started = time.perf_counter()
+        self.tracer.start()
+    def stop(self)->None:
+        self.tracer.stop()
+        self.duration = time.perf_counter() - self._started
+        self.tracer.parse()
+    def export(self,
+               analyzer,
+               formats:tuple,
+               top_n:int = 20
+               )->dict:
+        report_paths = {}
+        for report_format in formats:
+            report_path = analyzer._report_path(report_format)
+            self.tracer.save(report_path)
+            #viztracer 按扩展名决定保存为 Chrome Trace JSON 还是 HTML
+            report_paths[report_format] = report_path
+        return report_paths
+    def summary(self)->dict:
+        metadata = self.tracer.data.get("viztracer_metadata",{})
+        return {
+            "duration": self.duration,
+            "sample_count": self.tracer.total_entries,
+            "tracer_entries": self.tracer_entries,
+            "overflow": bool(metadata.get("overflow",False))
+        }
+
+
+BACKENDS = {
+    PyInstrumentBackend.name: PyInstrumentBackend,
+    VizTracerBackend.name: VizTracerBackend,
+}
+
+
+def create_backend(name:str,
+                   **options
+                   )->ProfilerBackend:
+    """
+    按名称创建后端
+
+    Args:
+        name(str):后端名称 pyinstrument/viztracer
+        **options:后端的初始化参数
+    Returns:
+        backend(ProfilerBackend):后端
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的分析后端：{name},可选 {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
@@ -0,0 +1,142 @@
+"""
+可调用对象分析目标
+
+支持两种目标描述:
+    module.sub:function / module.sub:Class.method  导入模块后取出可调用对象
+    path/to/test_x.py::TestCase::test_name         pytest 节点,夹具准备完成后只分析测试函数本身
+导入与初始化只发生一次,预热调用不计入分析结果
+"""
+import os
+import sys
+import importlib
+from pyinstrument import Profiler
+
+
+def is_pytest_node(target:str)->bool:
+    """
+    判断目标是否为 pytest 节点 ID
+
+    Args:
+        target(str):目标描述
+    Returns:
+        is_node(bool):是否为 pytest 节点
+    """
+    return "::" in target or target.split("[")[0].endswith(".py")
+
+
+def resolve_callable(target:str,
+                     search_paths:tuple = ()
+                     )->callable:
+    """
+    导入模块并取出可调用对象
+
+    Args:
+        target(str):"module.sub:function" 或 "module.sub:Class.method"
+        search_paths(tuple):额外加入模块搜索路径的目录 当前目录总是可导入
+    Returns:
+        func(callable):可调用对象
+    """
+    module_name,sep,attr_path = target.partition(":")
+    if not sep or not module_name or not attr_path:
+        raise ValueError(f"目标格式应为 module.sub:function：{target}")
+    for path in reversed((os.getcwd(),) + tuple(search_paths)):
+        path = os.path.abspath(path)
+        if path not in sys.path:
+            sys.path.insert(0,path)
+    #与 python -m 一致 当前目录中的模块可以直接导入
+    try:
+        obj = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"无法导入模块 {module_name}：{e}") from e
+    for name in attr_path.split("."):
+        try:
+            obj = getattr(obj,name)
+        except AttributeError as e:
+            raise AttributeError(f"{module_name} 中不存在 {attr_path}") from e
+    if not callable(obj):
+        raise TypeError(f"目标不可调用：{target}")
+    return obj
+
+
+def profile_callable(func:callable,
+                     profiler:Profiler,
+                     args:tuple = (),
+                     kwargs:dict = None,
+                     warmup:int = 0,
+                     repeat:int = 1
+                     )->object:
+    """
+    预热后在分析器中调用目标
+
+    Args:
+        func(callable):可调用对象
+        profiler(Profiler):pyinstrument 分析器
+        args(tuple):位置参数
+        kwargs(dict):关键字参数
+        warmup(int):预热调用次数 不计入分析
+        repeat(int):计入分析的调用次数
+    Returns:
+        result(object):最后一次调用的返回值
+    """
+    kwargs = kwargs or {}
+    for _ in range(warmup):
+        func(*args,**kwargs)
+    result = None
+    profiler.start()
+    try:
+        for _ in range(repeat):
+            result = func(*args,**kwargs)
+    finally:
+        profiler.stop()
+    return result
+
+
+def profile_pytest_node(node_id:str,
+                        profiler:Profiler,
+                        warmup:int = 0,
+                        repeat:int = 1,
+                        pytest_args:tuple = ()
+                        )->int:
+    """
+    运行 pytest 节点 只在测试函数调用阶段开启分析
+
+    收集、导入与夹具准备(setup/teardown)都不计入分析;
+    节点匹配多个测试时,各测试的调用阶段累加到同一会话中
+
+    Args:
+        node_id(str):pytest 节点 ID
+        profiler(Profiler):pyinstrument 分析器
+        warmup(int):每个测试的预热调用次数
+        repeat(int):每个测试计入分析的调用次数
+        pytest_args(tuple):额外的 pytest 参数
+    Returns:
+        exit_code(int):pytest 退出码
+    """
+    try:
+        import pytest
+    except ImportError as e:
+        raise ImportError("分析 pytest 节点需要安装 pytest") from e
+
+    class ProfilePlugin:
+        def __init__(self)->None:
+            self.profiled = 0
+        @pytest.hookimpl(hookwrapper=True)
+        def pytest_runtest_call(self,item):
+            for _ in range(warmup):
+                item.runtest()
+            profiler.start()
+            try:
+                for _ in range(repeat - 1):
+                    item.runtest()
+                yield
+                #pytest 自身执行的最后一次调用
+            finally:
+                profiler.stop()
+                self.profiled += 1
+
+    plugin = ProfilePlugin()
+    exit_code = pytest.main([node_id,"-q","-p","no:cacheprovider",*pytest_args],
+                            plugins=[plugin])
+    if plugin.profiled == 0:
+        raise ValueError(f"pytest 节点没有执行任何测试(退出码 {int(exit_code)})：{node_id}")
+    return int(exit_code)
@@ -0,0 +1,42 @@
+"""
+子进程跟踪的启动钩子
+
+PyInstrumentAnalyzer 跟踪子进程时把本目录加入 PYTHONPATH,
+此后启动的每个 Python 解释器在 site 初始化阶段导入本模块并开启分析。
+本目录遮蔽了环境中原有的 sitecustomize,先加载原有模块以保持其行为
+"""
+import os
+import sys
+import importlib.util
+from importlib.machinery import PathFinder
+
+
+def _load_shadowed()->None:
+    """
+    加载被本目录遮蔽的 sitecustomize
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = [path for path in sys.path if os.path.abspath(path or os.getcwd()) != here]
+    spec = PathFinder.find_spec("sitecustomize",paths)
+    if spec is None or spec.loader is None:
+        return
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["_deeptracer_shadowed_sitecustomize"] = module
+    spec.loader.exec_module(module)
+
+
+try:
+    _load_shadowed()
+except Exception as e:
+    sys.stderr.write(f"deeptracer: 原有 sitecustomize 加载失败：{e}\n")
+
+try:
+    from deeptracer.viztracerAnalyer.childProfiler import bootstrap
+    bootstrap()
+except Exception as e:
+    sys.stderr.write(f"deeptracer: 子进程分析未开启：{e}\n")
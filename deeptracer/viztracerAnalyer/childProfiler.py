@@ -0,0 +1,366 @@
+"""
+跟踪并分析目标脚本派生的 Python 子进程
+
+multiprocessing.Pool / ProcessPoolExecutor 把计算分发到子进程时,父进程的会话里只有等待时间。
+开启跟踪后:
+    multiprocessing 子进程(fork/spawn/forkserver)在 BaseProcess._bootstrap 中各自启动分析器;
+    spawn 出的新解释器与 subprocess 启动的 Python 脚本通过 childBootstrap 目录中的
+    sitecustomize(由 PYTHONPATH 注入)自动开启分析。
+每个进程结束时把会话连同 pid/父进程/角色写入同一目录,由父进程合并为按进程区分与合并两种视图
+"""
+import os
+import sys
+import json
+import uuid
+import atexit
+import signal
+import functools
+import multiprocessing.process
+from pyinstrument import Profiler
+from pyinstrument.session import Session
+from pyinstrument.stack_sampler import get_stack_sampler
+
+
+ENV_SESSION_DIR = "DEEPTRACER_CHILD_SESSION_DIR"
+ENV_INTERVAL = "DEEPTRACER_CHILD_INTERVAL"
+BOOTSTRAP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),"childBootstrap")
+SESSION_PREFIX = "process-"
+THREAD_FILE = "<thread>"
+PROCESS_FILE = "<process>"
+
+_profilers = []
+#当前进程中正在运行的分析器 fork 出的子进程需要与之脱离
+_installed = False
+
+
+def enable(session_dir:str,
+           interval:float = 0.001
+           )->None:
+    """
+    在当前进程中开启子进程跟踪 环境变量由之后启动的所有子进程继承
+
+    Args:
+        session_dir(str):各进程会话的写入目录
+        interval(float):子进程的采样间隔(秒)
+    Returns:
+        None
+    """
+    session_dir = os.path.abspath(session_dir)
+    os.makedirs(session_dir,exist_ok=True)
+    os.environ[ENV_SESSION_DIR] = session_dir
+    os.environ[ENV_INTERVAL] = str(interval)
+    paths = [path for path in os.environ.get("PYTHONPATH","").split(os.pathsep) if path]
+    if BOOTSTRAP_DIR not in paths:
+        os.environ["PYTHONPATH"] = os.pathsep.join([BOOTSTRAP_DIR] + paths)
+    #只影响之后启动的解释器 当前进程不会再加载 sitecustomize
+    install()
+
+
+def install()->None:
+    """
+    补丁 multiprocessing 子进程入口 并注册 fork 后的清理(重复调用无副作用)
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    global _installed
+    if _installed:
+        return
+    process_class = multiprocessing.process.BaseProcess
+    process_class._bootstrap = _profiled_bootstrap(process_class._bootstrap)
+    if hasattr(os,"register_at_fork"):
+        os.register_at_fork(after_in_child=_detach_inherited)
+    _installed = True
+
+
+def track(profiler:Profiler)->None:
+    """
+    登记在当前进程中运行的分析器 fork 出的子进程会与之脱离
+
+    Args:
+        profiler(Profiler):正在运行的分析器
+    Returns:
+        None
+    """
+    _profilers.append(profiler)
+
+
+def bootstrap()->None:
+    """
+    sitecustomize 入口 在新启动的解释器中开启跟踪
+
+    multiprocessing 的子进程与辅助进程(forkserver/resource_tracker)只安装补丁,
+    由 _bootstrap 负责分析真正的子进程;其余 Python 进程从启动起整体分析,退出时写出会话
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    if not os.environ.get(ENV_SESSION_DIR):
+        return
+    install()
+    argv = getattr(sys,"orig_argv",sys.argv)
+    if "--multiprocessing-fork" in argv or any(arg.startswith("from multiprocessing") for arg in argv):
+        return
+    profiler = _start_profiler(sys._getframe(1))
+    _handle_sigterm()
+    name = os.path.basename(argv[-1]) if len(argv) > 1 else os.path.basename(sys.executable)
+    atexit.register(_stop_and_save,profiler,"subprocess",name)
+
+
+def _start_profiler(caller_frame = None)->Profiler:
+    """
+    按环境变量中的采样间隔启动分析器并登记
+
+    Args:
+        caller_frame(FrameType):视为分析起点的帧
+    Returns:
+        profiler(Profiler):已启动的分析器
+    """
+    profiler = Profiler(interval=float(os.environ.get(ENV_INTERVAL,0.001)))
+    profiler.start(caller_frame=caller_frame or sys._getframe(1))
+    track(profiler)
+    return profiler
+
+
+def _stop_and_save(profiler:Profiler,
+                   role:str,
+                   name:str
+                   )->None:
+    """
+    停止分析器并写出带进程标签的会话 fork 后不再属于本进程的分析器直接忽略
+
+    Args:
+        profiler(Profiler):分析器
+        role(str):进程角色 main/multiprocessing/subprocess
+        name(str):进程名称
+    Returns:
+        None
+    """
+    if not profiler.is_running or profiler not in _profilers:
+        return
+    _ignore_sigterm()
+    _profilers.remove(profiler)
+    session = profiler.stop()
+    session_dir = os.environ.get(ENV_SESSION_DIR)
+    if session_dir:
+        save_process_session(session,session_dir,role,name)
+
+
+def _detach_inherited()->None:
+    """
+    fork 后在子进程中执行 取消从父进程继承的分析器的订阅,避免父进程的样本在子进程中继续增长
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    for profiler in _profilers:
+        try:
+            get_stack_sampler().unsubscribe(profiler._sampler_saw_call_stack)
+        except Exception:
+            pass
+        #从其他线程 fork 时当前线程没有订阅
+        profiler._active_session = None
+    _profilers.clear()
+
+
+def _terminate(signum:int,
+               frame
+               )->None:
+    """
+    SIGTERM 处理函数 转为 SystemExit,使 finally/atexit 能写出会话
+
+    Pool.terminate() 与 with Pool() 的退出都通过 SIGTERM 结束工作进程
+    """
+    raise SystemExit(128 + signum)
+
+
+def _handle_sigterm()->None:
+    """
+    在 SIGTERM 仍为默认处理时接管 目标脚本自己的处理函数保持不变
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    if hasattr(signal,"SIGTERM") and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM,_terminate)
+
+
+def _ignore_sigterm()->None:
+    """
+    写出会话前忽略 SIGTERM 进程已在退出
+
+    工作进程收到结束标记正常退出、正在写出会话时,Pool.terminate() 仍会向其发送 SIGTERM,
+    _terminate 抛出的 SystemExit 会中断写出;目标脚本自己的处理函数保持不变
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    if hasattr(signal,"SIGTERM") and signal.getsignal(signal.SIGTERM) is _terminate:
+        try:
+            signal.signal(signal.SIGTERM,signal.SIG_IGN)
+        except ValueError:
+            pass
+        #只能在主线程中设置信号处理函数
+
+
+def _profiled_bootstrap(original:callable)->callable:
+    """
+    包装 BaseProcess._bootstrap 子进程执行目标期间开启分析
+
+    fork 启动的子进程执行完 _bootstrap 后直接 os._exit,atexit 不会运行,因此在 finally 中写出会话
+
+    Args:
+        original(callable):原始的 _bootstrap
+    Returns:
+        wrapper(callable):包装后的 _bootstrap
+    """
+    @functools.wraps(original)
+    def _bootstrap(self,*args,**kwargs):
+        if not os.environ.get(ENV_SESSION_DIR):
+            return original(self,*args,**kwargs)
+        _handle_sigterm()
+        profiler = _start_profiler()
+        try:
+            return original(self,*args,**kwargs)
+        finally:
+            _stop_and_save(profiler,"multiprocessing",self.name)
+    return _bootstrap
+
+
+def save_process_session(session:Session,
+                         session_dir:str,
+                         role:str,
+                         name:str
+                         )->str:
+    """
+    原子地写出带进程标签的会话
+
+    Args:
+        session(Session):pyinstrument 会话
+        session_dir(str):写入目录
+        role(str):进程角色
+        name(str):进程名称
+    Returns:
+        path(str):会话文件路径
+    """
+    pid = os.getpid()
+    data = {
+        "pid": pid,
+        "ppid": os.getppid(),
+        "role": role,
+        "name": name,
+        "session": session.to_json()
+    }
+    path = os.path.join(session_dir,f"{SESSION_PREFIX}{pid}-{uuid.uuid4().hex[:8]}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path,"w",encoding="utf-8") as fp:
+        json.dump(data,fp,ensure_ascii=False)
+    os.replace(tmp_path,path)
+    return path
+
+
+def load_process_sessions(session_dir:str)->list:
+    """
+    读取目录中所有进程的会话 按开始时间排序
+
+    Args:
+        session_dir(str):会话目录
+    Returns:
+        processes(list):[{"pid","ppid","role","name","session"}] 其中 session 为 Session
+    """
+    processes = []
+    for name in sorted(os.listdir(session_dir)):
+        if not (name.startswith(SESSION_PREFIX) and name.endswith(".json")):
+            continue
+        with open(os.path.join(session_dir,name),"r",encoding="utf-8") as fp:
+            data = json.load(fp)
+        data["session"] = Session.from_json(data["session"])
+        processes.append(data)
+    processes.sort(key=lambda process: process["session"].start_time)
+    return processes
+
+
+def _normalize_thread(identifier:str)->str:
+    """
+    去掉线程伪帧中的线程ID 使不同进程的同名线程在合并视图中合并
+
+    Args:
+        identifier(str):帧标识
+    Returns:
+        identifier(str):处理后的帧标识
+    """
+    parts = identifier.split("\x00")
+    if len(parts) == 3 and parts[1] == THREAD_FILE:
+        return f"{parts[0]}\x00{THREAD_FILE}\x000"
+    return identifier
+
+
+def process_label(process:dict)->str:
+    """
+    获得进程在按进程视图中的名称
+
+    Args:
+        process(dict):load_process_sessions 返回的进程
+    Returns:
+        label(str):"角色 名称 [pid]"
+    """
+    return f"{process['role']} {process['name']} [pid {process['pid']}]"
+
+
+def merge_process_sessions(processes:list,
+                           per_process:bool = False
+                           )->Session:
+    """
+    合并各进程的会话
+
+    Args:
+        processes(list):load_process_sessions 返回的进程 第一个视为主进程
+        per_process(bool):为True时每个进程的调用栈挂在以进程命名的根帧下,否则相同调用栈跨进程合并
+    Returns:
+        session(Session):合并后的会话 耗时为各进程之和,duration 为整体墙钟时间
+    """
+    if not processes:
+        raise ValueError("没有可合并的进程会话")
+    records = []
+    for process in processes:
+        session = process["session"]
+        if per_process:
+            prefix = [f"{process_label(process)}\x00{PROCESS_FILE}\x00{process['pid']}"]
+            records += [(prefix + list(stack),elapsed) for stack,elapsed in session.frame_records]
+        else:
+            records += [([_normalize_thread(identifier) for identifier in stack],elapsed)
+                        for stack,elapsed in session.frame_records]
+    records.sort(key=lambda record: record[0])
+    #pyinstrument 按相邻记录的公共前缀构建调用树 排序后相同前缀的记录相邻
+    main = processes[0]["session"]
+    sessions = [process["session"] for process in processes]
+    start = min(session.start_time for session in sessions)
+    end = max(session.start_time + session.duration for session in sessions)
+    if per_process:
+        start_call_stack = records[0][0][:1]
+    else:
+        start_call_stack = [_normalize_thread(identifier) for identifier in main.start_call_stack]
+    sys_path = []
+    for session in sessions:
+        sys_path += [path for path in session.sys_path if path not in sys_path]
+    return Session(frame_records=records,
+                   start_time=start,
+                   duration=end - start,
+                   min_interval=min(session.min_interval for session in sessions),
+                   max_interval=max(session.max_interval for session in sessions),
+                   sample_count=sum(session.sample_count for session in sessions),
+                   start_call_stack=start_call_stack,
+                   target_description=f"{main.target_description} ({len(processes)} processes)",
+                   cpu_time=sum(session.cpu_time for session in sessions),
+                   sys_path=sys_path,
+                   sys_prefixes=sorted({prefix for session in sessions for prefix in session.sys_prefixes}))
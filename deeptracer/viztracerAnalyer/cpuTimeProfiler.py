@@ -0,0 +1,212 @@
+"""
+墙钟时间与 CPU 时间双重计时
+
+pyinstrument 每个样本只记录距上次采样的墙钟时间。本模块在采样回调中同时读取目标线程的 CPU 时间,
+每个样本拆分为计算(CPU 时间)与等待(墙钟时间 - CPU 时间)两部分,
+等待按调用栈末端的内置函数归类为 sleep/lock/io,用于判断慢函数需要优化算法还是批量化 I/O
+"""
+import sys
+import time
+from pyinstrument import Profiler
+from pyinstrument.session import Session
+from deeptracer.viztracerAnalyer.renderers import session_functions
+
+
+WAIT_KINDS = ("io","sleep","lock","other")
+SLEEP_CALLS = {"sleep"}
+LOCK_CALLS = {"acquire","wait","join","result","lock.acquire","RLock.acquire"}
+IO_FILES = ("<built-in>",)
+COMPUTE_RATIO = 0.8
+#计算时间占比不低于该值的函数视为计算密集,不高于 1 - 该值视为等待密集
+
+
+def wait_kind(identifier:str)->str:
+    """
+    按调用栈末端的帧判断等待类型
+
+    Args:
+        identifier(str):pyinstrument 帧标识 "函数名\\x00文件\\x00行号"
+    Returns:
+        kind(str):sleep/lock/io/other 末端为 Python 函数时为 other(如等待 GIL)
+    """
+    function,_,rest = identifier.partition("\x00")
+    file_path = rest.partition("\x00")[0]
+    if file_path not in IO_FILES:
+        return "other"
+    name = function.rpartition(".")[2]
+    if function in SLEEP_CALLS or name in SLEEP_CALLS:
+        return "sleep"
+    if function in LOCK_CALLS or name in LOCK_CALLS:
+        return "lock"
+    return "io"
+    #其余释放 GIL 的内置调用(read/recv/select/open 等)
+
+
+class CpuTimeProfiler(Profiler):
+    """
+    记录每个样本 CPU 时间的 pyinstrument 分析器
+
+    采样回调运行在目标线程中,使用 time.thread_time() 读取该线程的 CPU 时间
+
+    Attributes:
+        cpu_times(list):与会话 frame_records 一一对应的 CPU 时间
+
+    Methods:
+        start: 开始采样
+        stop: 停止采样
+        breakdown: 获得按函数拆分的计算/等待时间
+    """
+    def __init__(self,
+                 interval:float = 0.001
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            interval(float):采样间隔(秒)
+        Returns:
+            None
+        """
+        super().__init__(interval=interval)
+        self.cpu_times = []
+        self._last_cpu = None
+    def start(self,
+              caller_frame = None,
+              target_description:str = None
+              )->None:
+        """
+        开始采样
+
+        Args:
+            caller_frame(FrameType):视为分析起点的帧 默认为调用者
+            target_description(str):分析目标描述
+        Returns:
+            None
+        """
+        if caller_frame is None:
+            caller_frame = sys._getframe(1)
+        self._last_cpu = time.thread_time()
+        super().start(caller_frame=caller_frame,target_description=target_description)
+    def _sampler_saw_call_stack(self,
+                                call_stack:list,
+                                time_since_last_sample:float,
+                                async_state
+                                )->None:
+        """
+        采样回调 在 pyinstrument 记录样本的同时记录该间隔内的 CPU 时间
+
+        Args:
+            call_stack(list):调用栈
+            time_since_last_sample(float):距上次采样的墙钟时间
+            async_state(AsyncState):异步状态
+        Returns:
+            None
+        """
+        now = time.thread_time()
+        cpu = min(max(now - self._last_cpu,0.0),time_since_last_sample)
+        self._last_cpu = now
+        super()._sampler_saw_call_stack(call_stack,time_since_last_sample,async_state)
+        self.cpu_times.append(cpu)
+    def _view(self,
+              session:Session,
+              records:list
+              )->Session:
+        """
+        以相同的会话信息与新的样本构建会话
+
+        Args:
+            session(Session):墙钟时间会话
+            records(list):样本
+        Returns:
+            session(Session):新会话
+        """
+        return Session(frame_records=records,
+                       start_time=session.start_time,
+                       duration=session.duration,
+                       min_interval=session.min_interval,
+                       max_interval=session.max_interval,
+                       sample_count=session.sample_count,
+                       start_call_stack=session.start_call_stack,
+                       target_description=session.target_description,
+                       cpu_time=session.cpu_time,
+                       sys_path=session.sys_path,
+                       sys_prefixes=session.sys_prefixes)
+    def cpu_session(self,
+                    session:Session
+                    )->Session:
+        """
+        获得只含 CPU 时间的会话 调用树与墙钟时间会话相同
+
+        Args:
+            session(Session):stop() 返回的墙钟时间会话
+        Returns:
+            session(Session):CPU 时间会话
+        """
+        records = [(stack,cpu) for (stack,_),cpu in zip(session.frame_records,self.cpu_times) if cpu > 0]
+        return self._view(session,records)
+    def breakdown(self,
+                  session:Session,
+                  top_n:int = 20
+                  )->dict:
+        """
+        按函数拆分计算与等待时间
+
+        Args:
+            session(Session):stop() 返回的墙钟时间会话
+            top_n(int):保留的函数数量 按自身墙钟时间降序
+        Returns:
+            result(dict):{"wall","cpu","wait","wait_kinds":{类型:耗时},"compute_ratio",
+                "hotspots":[{"function","file","line","self_wall","self_cpu","self_wait","total_wall","total_cpu",
+                "total_wait","wait_kinds","compute_ratio","bound"}]}
+        """
+        if len(self.cpu_times) != len(session.frame_records):
+            raise ValueError("会话样本与 CPU 时间数量不一致,会话需来自本分析器的 stop()")
+        kind_records = {kind: [] for kind in WAIT_KINDS}
+        wall_total = cpu_total = 0.0
+        for (stack,wall),cpu in zip(session.frame_records,self.cpu_times):
+            wall_total += wall
+            cpu_total += cpu
+            if wall - cpu > 0:
+                kind_records[wait_kind(stack[-1])].append((stack,wall - cpu))
+        wall_functions = session_functions(session)
+        cpu_functions = session_functions(self.cpu_session(session))
+        kind_functions = {kind: session_functions(self._view(session,records))
+                          for kind,records in kind_records.items() if records}
+        hotspots = []
+        for key,entry in wall_functions.items():
+            cpu_entry = cpu_functions.get(key,{"self_time": 0.0,"total_time": 0.0})
+            self_cpu = min(cpu_entry["self_time"],entry["self_time"])
+            total_cpu = min(cpu_entry["total_time"],entry["total_time"])
+            kinds = {kind: functions[key]["total_time"]
+                     for kind,functions in kind_functions.items() if key in functions}
+            compute_ratio = total_cpu / entry["total_time"] if entry["total_time"] else 0.0
+            if compute_ratio >= COMPUTE_RATIO:
+                bound = "compute"
+            elif compute_ratio <= 1 - COMPUTE_RATIO:
+                bound = "wait"
+            else:
+                bound = "mixed"
+            hotspots.append({
+                "function": entry["function"],
+                "file": entry["file"],
+                "line": entry["line"],
+                "self_wall": entry["self_time"],
+                "self_cpu": self_cpu,
+                "self_wait": entry["self_time"] - self_cpu,
+                "total_wall": entry["total_time"],
+                "total_cpu": total_cpu,
+                "total_wait": entry["total_time"] - total_cpu,
+                "wait_kinds": kinds,
+                "compute_ratio": compute_ratio,
+                "bound": bound
+            })
+        hotspots.sort(key=lambda entry: entry["self_wall"],reverse=True)
+        return {
+            "wall": wall_total,
+            "cpu": cpu_total,
+            "wait": wall_total - cpu_total,
+            "wait_kinds": {kind: sum(elapsed for _,elapsed in records)
+                           for kind,records in kind_records.items()},
+            "compute_ratio": cpu_total / wall_total if wall_total else 0.0,
+            "hotspots": hotspots[:top_n]
+        }
@@ -0,0 +1,96 @@
+"""
+隔离执行器：在独立子进程中对目标脚本进行 PyInstrument 性能分析
+
+由 PyInstrumentAnalyzer 的隔离模式通过
+    python -m deeptracer.viztracerAnalyer.isolatedRunner
+启动,分析结束后将 session 写入指定文件交回父进程
+"""
+import os
+import sys
+import argparse
+import traceback
+from pyinstrument import Profiler
+from deeptracer.viztracerAnalyer import childProfiler
+from deeptracer.utils import (
+    search_path,
+    run_target
+    )
+
+
+def _apply_limits(cpu_time_limit:int = None,
+                  memory_limit:int = None
+                  )->None:
+    """
+    为当前进程设置资源上限(仅类 Unix 系统)
+
+    Args:
+        cpu_time_limit(int):CPU时间上限(秒) 超出后进程收到 SIGXCPU
+        memory_limit(int):地址空间上限(字节) 超出后分配内存抛出 MemoryError
+    Returns:
+        None
+    """
+    if cpu_time_limit is None and memory_limit is None:
+        return
+    import resource
+    if cpu_time_limit is not None:
+        resource.setrlimit(resource.RLIMIT_CPU,(cpu_time_limit,cpu_time_limit))
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS,(memory_limit,memory_limit))
+
+
+def main(argv:list = None)->int:
+    """
+    子进程入口
+
+    Args:
+        argv(list):命令行参数
+    Returns:
+        exit_code(int):目标脚本的退出码
+    """
+    parser = argparse.ArgumentParser(prog="isolatedRunner")
+    parser.add_argument("--output",required=True,help="session 输出文件")
+    parser.add_argument("--interval",type=float,default=0.001)
+    parser.add_argument("--cpu-time-limit",type=int,default=None)
+    parser.add_argument("--memory-limit",type=int,default=None)
+    parser.add_argument("--follow-children",default=None,help="跟踪子进程 各进程会话写入该目录")
+    parser.add_argument("--module",default=None,
+                        help="以包内模块的身份执行目标 值为点分模块名")
+    parser.add_argument("script")
+    parser.add_argument("script_args",nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    _apply_limits(args.cpu_time_limit,args.memory_limit)
+    sys.argv = [args.script] + args.script_args
+    sys.path.insert(0,search_path(args.script,args.module))
+    #与直接运行脚本(或 python -m 运行模块)时的模块搜索路径保持一致
+
+    if args.follow_children:
+        childProfiler.enable(args.follow_children,args.interval)
+    #在启动目标脚本前开启 之后派生的子进程都会继承
+
+    exit_code = 0
+    profiler = Profiler(interval=args.interval)
+    profiler.start()
+    childProfiler.track(profiler)
+    try:
+        run_target(args.script,args.module)
+    except SystemExit as e:
+        if isinstance(e.code,int):
+            exit_code = e.code
+        elif e.code is not None:
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        session = profiler.stop()
+        session.save(args.output)
+        if args.follow_children:
+            childProfiler.save_process_session(session,args.follow_children,"main",
+                                               os.path.basename(args.script))
+        #无论脚本是否异常都交回已采集的 session
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""
+热点函数的行级计时
+
+在采样分析找到热点函数之后,只对这些函数的代码对象做逐行插桩,统计每行的命中次数与耗时,
+其余代码不产生行事件,保持接近原速运行。
+Python 3.12+ 使用 PEP 669 sys.monitoring:非目标函数在第一次 PY_START 时即被禁用;
+更低版本退化为 sys.settrace,只为目标函数的帧返回局部追踪函数。
+"""
+import os
+import sys
+import time
+import linecache
+import sysconfig
+import threading
+from pyinstrument.session import Session
+from deeptracer.viztracerAnalyer.renderers import session_functions
+
+
+def code_key(code)->tuple:
+    """
+    获得代码对象的身份 与 pyinstrument 帧的 (文件, 定义行号, 函数名) 一致
+
+    Args:
+        code(CodeType):代码对象
+    Returns:
+        key(tuple):(文件路径, 定义行号, 函数名)
+    """
+    return (code.co_filename,code.co_firstlineno,code.co_name)
+
+
+def select_targets(session:Session,
+                   top_n:int = 10,
+                   include_libraries:bool = False
+                   )->list:
+    """
+    从采样结果中选出需要行级计时的热点函数
+
+    Args:
+        session(Session):pyinstrument 会话
+        top_n(int):选取的函数数量
+        include_libraries(bool):是否包含标准库与第三方库中的函数
+    Returns:
+        targets(list):按自身耗时降序的 (文件路径, 定义行号, 函数名)
+    """
+    excluded = (os.path.dirname(os.path.dirname(os.path.abspath(__file__))),)
+    #deeptracer 自身的代码不作为目标
+    if not include_libraries:
+        paths = sysconfig.get_paths()
+        excluded += tuple({paths["stdlib"],paths["purelib"],paths["platlib"]})
+    candidates = []
+    for entry in session_functions(session).values():
+        file_path = entry["file"]
+        if entry["self_time"] <= 0 or not file_path or not os.path.isfile(file_path):
+            continue
+        #内置函数与动态生成的代码没有源码行 只做调度的函数行级计时意义不大
+        if os.path.abspath(file_path).startswith(excluded):
+            continue
+        candidates.append(entry)
+    candidates.sort(key=lambda entry: entry["self_time"],reverse=True)
+    return [(entry["file"],entry["line"],entry["function"]) for entry in candidates[:top_n]]
+
+
+class LineProfiler:
+    """
+    只对目标函数插桩的行级计时器
+
+    每行耗时为执行到该行到执行到下一行(或函数返回/挂起)之间的墙钟时间,
+    因此包含该行调用的其他函数的耗时
+
+    Args:
+        targets(list):目标函数的 (文件路径, 定义行号, 函数名)
+    Attributes:
+        backend(str):最近一次使用的实现 "monitoring" 或 "settrace"
+        stats(dict):(文件路径, 定义行号, 函数名) -> {行号: [命中次数, 耗时]}
+
+    Methods:
+        start: 开始计时
+        stop: 停止计时
+        results: 获得整理后的行级结果
+    """
+    TOOL_NAME = "deeptracer-lines"
+    def __init__(self,
+                 targets:list
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            targets(list):目标函数的 (文件路径, 定义行号, 函数名)
+        Returns:
+            None
+        """
+        self.targets = {(os.path.abspath(file_path),line,name) for file_path,line,name in targets}
+        self.stats = {}
+        self.backend = None
+        self._active = False
+        self._tool_id = None
+        self._instrumented = set()
+        self._stacks = {}
+        self._is_target = {}
+        self._previous_trace = (None,None)
+        #开始前已安装的 sys/threading 追踪函数 停止时恢复
+    def _target(self,
+                code
+                )->bool:
+        """
+        判断代码对象是否为目标函数 结果按代码对象缓存
+
+        Args:
+            code(CodeType):代码对象
+        Returns:
+            is_target(bool):是否为目标函数
+        """
+        is_target = self._is_target.get(code)
+        if is_target is None:
+            filename,line,name = code_key(code)
+            is_target = (os.path.abspath(filename),line,name) in self.targets
+            self._is_target[code] = is_target
+        return is_target
+    def _record(self,
+                code,
+                line:int,
+                elapsed:float
+                )->None:
+        """
+        累加某一行的耗时
+
+        Args:
+            code(CodeType):代码对象
+            line(int):行号
+            elapsed(float):耗时(秒)
+        Returns:
+            None
+        """
+        lines = self.stats.setdefault(code_key(code),{})
+        lines.setdefault(line,[0,0.0])[1] += elapsed
+    def _hit(self,
+             code,
+             line:int
+             )->None:
+        """
+        累加某一行的命中次数
+
+        Args:
+            code(CodeType):代码对象
+            line(int):行号
+        Returns:
+            None
+        """
+        lines = self.stats.setdefault(code_key(code),{})
+        lines.setdefault(line,[0,0.0])[0] += 1
+    def start(self)->None:
+        """
+        开始计时 优先使用 sys.monitoring
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        if self._active:
+            raise RuntimeError("行级计时已经开始")
+        if hasattr(sys,"monitoring") and self._start_monitoring():
+            self.backend = "monitoring"
+        else:
+            self._start_settrace()
+            self.backend = "settrace"
+        self._active = True
+    def stop(self)->None:
+        """
+        停止计时并移除全部插桩
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        if not self._active:
+            return
+        if self.backend == "monitoring":
+            self._stop_monitoring()
+        else:
+            sys_trace,thread_trace = self._previous_trace
+            sys.settrace(sys_trace)
+            threading.settrace(thread_trace)
+            self._previous_trace = (None,None)
+        self._active = False
+    def __enter__(self)->"LineProfiler":
+        self.start()
+        return self
+    def __exit__(self,exc_type,exc_value,traceback)->None:
+        self.stop()
+
+    def _stack(self)->list:
+        """
+        获得当前线程的目标帧栈 元素为 [代码对象, 上一行号, 上一行开始时间]
+
+        Args:
+            None
+        Returns:
+            stack(list):当前线程的栈
+        """
+        ident = threading.get_ident()
+        stack = self._stacks.get(ident)
+        if stack is None:
+            stack = self._stacks[ident] = []
+        return stack
+    def _start_monitoring(self)->bool:
+        """
+        注册 sys.monitoring 工具 全局只监听 PY_START 与 PY_UNWIND
+
+        Args:
+            None
+        Returns:
+            success(bool):没有可用的工具ID时返回False
+        """
+        monitoring = sys.monitoring
+        for tool_id in (monitoring.PROFILER_ID,3,4,5):
+            try:
+                monitoring.use_tool_id(tool_id,self.TOOL_NAME)
+            except ValueError:
+                continue
+            #工具ID已被其他工具(如覆盖率统计)占用
+            self._tool_id = tool_id
+            break
+        else:
+            return False
+        events = monitoring.events
+        callbacks = {
+            events.PY_START: self._on_start,
+            events.PY_RESUME: self._on_start,
+            events.LINE: self._on_line,
+            events.PY_RETURN: self._on_leave,
+            events.PY_YIELD: self._on_leave,
+            events.PY_UNWIND: self._on_leave,
+        }
+        for event,callback in callbacks.items():
+            monitoring.register_callback(self._tool_id,event,callback)
+        monitoring.set_events(self._tool_id,events.PY_START | events.PY_UNWIND)
+        return True
+    def _stop_monitoring(self)->None:
+        """
+        注销 sys.monitoring 工具并恢复被禁用的事件
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        monitoring = sys.monitoring
+        monitoring.set_events(self._tool_id,0)
+        for code in self._instrumented:
+            monitoring.set_local_events(self._tool_id,code,0)
+        events = monitoring.events
+        for event in (events.PY_START,events.PY_RESUME,events.LINE,
+                      events.PY_RETURN,events.PY_YIELD,events.PY_UNWIND):
+            monitoring.register_callback(self._tool_id,event,None)
+        monitoring.free_tool_id(self._tool_id)
+        monitoring.restart_events()
+        #重新启用本次返回 DISABLE 的位置 不影响后续运行
+        self._instrumented.clear()
+        self._tool_id = None
+    def _on_start(self,
+                  code,
+                  instruction_offset:int
+                  ):
+        """
+        PY_START/PY_RESUME 回调 非目标函数返回 DISABLE 此后不再产生任何事件
+
+        Args:
+            code(CodeType):代码对象
+            instruction_offset(int):指令偏移
+        Returns:
+            DISABLE 或 None
+        """
+        if not self._target(code):
+            return sys.monitoring.DISABLE
+        if code not in self._instrumented:
+            events = sys.monitoring.events
+            sys.monitoring.set_local_events(self._tool_id,code,
+                                            events.LINE | events.PY_RESUME
+                                            | events.PY_RETURN | events.PY_YIELD)
+            self._instrumented.add(code)
+        self._stack().append([code,None,time.perf_counter()])
+        return None
+    def _on_line(self,
+                 code,
+                 line_number:int
+                 )->None:
+        """
+        LINE 回调 结算上一行的耗时
+
+        Args:
+            code(CodeType):代码对象
+            line_number(int):行号
+        Returns:
+            None
+        """
+        now = time.perf_counter()
+        stack = self._stack()
+        if not stack or stack[-1][0] is not code:
+            stack.append([code,None,now])
+        #插桩在函数执行中途生效时补上栈帧
+        state = stack[-1]
+        if state[1] is not None:
+            self._record(code,state[1],now - state[2])
+        self._hit(code,line_number)
+        state[1] = line_number
+        state[2] = time.perf_counter()
+    def _on_leave(self,
+                  code,
+                  instruction_offset:int,
+                  value
+                  )->None:
+        """
+        PY_RETURN/PY_YIELD/PY_UNWIND 回调 结算最后一行并出栈
+
+        Args:
+            code(CodeType):代码对象
+            instruction_offset(int):指令偏移
+            value(object):返回值/产出值/异常
+        Returns:
+            None
+        """
+        stack = self._stacks.get(threading.get_ident())
+        if not stack or stack[-1][0] is not code:
+            return
+        #PY_UNWIND 是全局事件 非目标函数直接忽略
+        now = time.perf_counter()
+        _,line,started = stack.pop()
+        if line is not None:
+            self._record(code,line,now - started)
+
+    def _start_settrace(self)->None:
+        """
+        使用 sys.settrace 计时 只为目标函数的帧开启行事件
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._previous_trace = (sys.gettrace(),threading.gettrace())
+        #覆盖率统计与调试器的追踪函数 停止时恢复
+        sys.settrace(self._trace_call)
+        threading.settrace(self._trace_call)
+    def _trace_call(self,
+                    frame,
+                    event:str,
+                    arg
+                    ):
+        """
+        全局追踪函数 非目标函数返回 None 不产生行事件
+
+        Args:
+            frame(FrameType):新的帧
+            event(str):事件
+            arg(object):事件参数
+        Returns:
+            local_trace(callable|None):目标函数的局部追踪函数
+        """
+        if event != "call" or not self._target(frame.f_code):
+            return None
+        code = frame.f_code
+        state = [None,0.0]
+        #[上一行号, 上一行开始时间] 每个帧(生成器每次恢复)独立
+        def local_trace(frame,event,arg):
+            now = time.perf_counter()
+            if state[0] is not None:
+                self._record(code,state[0],now - state[1])
+            if event == "line":
+                self._hit(code,frame.f_lineno)
+                state[0] = frame.f_lineno
+            elif event == "return":
+                state[0] = None
+            state[1] = time.perf_counter()
+            return local_trace
+        return local_trace
+
+    def results(self)->list:
+        """
+        获得整理后的行级结果
+
+        Args:
+            None
+        Returns:
+            functions(list):[{"function","file","line","total_time","lines":[{"line","hits","time","per_hit","ratio","source"}]}]
+                按函数总耗时降序
+        """
+        functions = []
+        for (file_path,first_line,name),lines in self.stats.items():
+            total = sum(elapsed for _,elapsed in lines.values())
+            functions.append({
+                "function": name,
+                "file": file_path,
+                "line": first_line,
+                "total_time": total,
+                "lines": [{
+                    "line": line,
+                    "hits": hits,
+                    "time": elapsed,
+                    "per_hit": elapsed / hits if hits else 0.0,
+                    "ratio": elapsed / total if total else 0.0,
+                    "source": linecache.getline(file_path,line).rstrip()
+                } for line,(hits,elapsed) in sorted(lines.items())]
+            })
+        functions.sort(key=lambda entry: entry["total_time"],reverse=True)
+        return functions
@@ -0,0 +1,315 @@
+"""
+性能分析差分
+
+对比两次 pyinstrument 会话(两个脚本、同一脚本的两个提交,或智能体给出的优化版本),
+按函数身份对齐调用树,输出每个函数的耗时变化、新增/消失的热点与整体加速比,
+并生成 JSON 报告与差分火焰图
+"""
+import os
+import json
+from typing import Optional
+from pyinstrument.frame import Frame
+from pyinstrument.session import Session
+from deeptracer import (
+    DEEPTRACER_DEV_ROOT,
+    print_color
+    )
+from deeptracer.utils.flameGraph import (
+    diff_node,
+    write_diff_flamegraph
+    )
+from deeptracer.utils.sourceVersions import SourceVersions
+from deeptracer.viztracerAnalyer.ViztracerAnalyer import PyInstrumentAnalyzer
+from deeptracer.viztracerAnalyer.renderers import (
+    HotspotRenderer,
+    session_functions
+    )
+
+
+def function_identity(function:str,
+                      file_path:str,
+                      aliases:dict,
+                      class_name:str = None
+                      )->tuple:
+    """
+    获得跨版本对齐用的函数身份
+
+    不使用行号:代码修改后函数的定义行号通常会变化,因此用类名区分同一文件中的同名方法;
+    两个版本位于不同文件时,通过别名映射到同一名称
+
+    Args:
+        function(str):函数名
+        file_path(str):文件路径
+        aliases(dict):文件路径 -> 统一名称
+        class_name(str):方法所属的类名 普通函数为None
+    Returns:
+        identity(tuple):(函数名, 类名, 文件)
+    """
+    file_path = file_path or ""
+    return (function,class_name or "",aliases.get(file_path,file_path))
+
+
+def _identity_label(identity:tuple)->str:
+    """
+    获得函数身份的可读名称
+
+    Args:
+        identity(tuple):(函数名, 类名, 文件)
+    Returns:
+        label(str):"类名.函数名 (文件名)"
+    """
+    function,class_name,file_path = identity
+    name = f"{class_name}.{function}" if class_name else function
+    return f"{name} ({os.path.basename(file_path)})" if file_path else name
+
+
+def _add_tree(node:dict,
+              frame:Optional[Frame],
+              side:str,
+              aliases:dict
+              )->None:
+    """
+    将一侧的调用树累加到差分树中 相同路径上相同身份的帧合并
+
+    Args:
+        node(dict):差分树根节点
+        frame(Frame):预处理后的根帧
+        side(str):"before" 或 "after"
+        aliases(dict):文件路径 -> 统一名称
+    Returns:
+        None
+    """
+    if frame is None:
+        return
+    pending = [(node,frame)]
+    while pending:
+        parent,frame = pending.pop()
+        if frame.is_synthetic:
+            continue
+        label = _identity_label(function_identity(frame.function,frame.file_path,aliases,frame.class_name))
+        child = parent["children"].setdefault(label,diff_node(label))
+        child[side] += frame.time
+        for grandchild in frame.children:
+            pending.append((child,grandchild))
+
+
+def _load_session(source:"Session|str")->Session:
+    """
+    获得会话 支持会话对象与 pyinstrument 会话文件
+
+    Args:
+        source(Session|str):会话或会话文件路径
+    Returns:
+        session(Session):会话
+    """
+    if isinstance(source,Session):
+        return source
+    path = os.path.abspath(source)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"会话文件不存在：{path}")
+    try:
+        return Session.load(path)
+    except (ValueError,KeyError) as e:
+        raise ValueError(f"无法解析会话文件：{path}") from e
+
+
+class ProfileDiff(SourceVersions):
+    """
+    两次性能分析会话的差分
+
+    Args:
+        before(Session|str):变化前的会话、会话文件或 .py 脚本
+        after(Session|str):变化后的会话、会话文件或 .py 脚本
+    Attributes:
+        result(dict):最近一次 compare 的结果
+
+    Methods:
+        compare: 计算差分结果
+        generate_report: 生成 JSON 报告与差分火焰图
+        from_git: 对比同一脚本的两个提交
+        from_agent_reply: 对比脚本与智能体给出的优化版本
+    """
+    def __init__(self,
+                 before:"Session|str",
+                 after:"Session|str",
+                 output_path:str = "deeptracer/tools_report/profileDiff.json",
+                 aliases:Optional[dict] = None,
+                 hotspot_threshold:float = 0.05,
+                 top_n:int = 20,
+                 interval:float = 0.001,
+                 timeout:Optional[float] = None
+                 )->None:
+        """
+        初始化函数 传入 .py 脚本时在独立子进程中执行分析
+
+        Args:
+            before(Session|str):变化前的会话、会话文件或 .py 脚本
+            after(Session|str):变化后的会话、会话文件或 .py 脚本
+            output_path(str):JSON 报告路径 差分火焰图使用同名 .html
+            aliases(dict):文件路径 -> 统一名称 用于对齐位于不同文件中的同一份代码
+            hotspot_threshold(float):自身耗时占比达到该值的函数视为热点
+            top_n(int):报告中保留的变化最大的函数数量
+            interval(float):分析脚本时的采样间隔(秒)
+            timeout(float):分析脚本时的墙钟时间上限(秒)
+        Returns:
+            None
+        """
+        self.output_path = os.path.join(DEEPTRACER_DEV_ROOT,output_path)
+        self.html_path = f"{os.path.splitext(self.output_path)[0]}.html"
+        os.makedirs(os.path.dirname(self.output_path),exist_ok=True)
+        self.aliases = {}
+        self.hotspot_threshold = hotspot_threshold
+        self.top_n = top_n
+        self.interval = interval
+        self.timeout = timeout
+        scripts = [source for source in (before,after)
+                   if isinstance(source,str) and source.endswith(".py")]
+        if len(scripts) == 2:
+            for script in scripts:
+                self.aliases[os.path.abspath(script)] = "<script>"
+        #两个脚本互为新旧版本 模块级代码对齐到同一名称
+        self.aliases.update({os.path.abspath(path):name for path,name in (aliases or {}).items()})
+        self.before = self._resolve(before)
+        self.after = self._resolve(after)
+        self.result = None
+    def _resolve(self,
+                 source:"Session|str"
+                 )->Session:
+        """
+        获得会话 .py 脚本在独立子进程中执行分析
+
+        Args:
+            source(Session|str):会话、会话文件或 .py 脚本
+        Returns:
+            session(Session):会话
+        """
+        if isinstance(source,str) and source.endswith(".py"):
+            analyzer = PyInstrumentAnalyzer(default_report_path=self.html_path)
+            abs_py_path = analyzer._validate_py_file(source)
+            print_color(f"开始分析文件：{abs_py_path}",fore_color="blue")
+            return analyzer._execute_py_file_isolated(abs_py_path,
+                                                      self.interval,
+                                                      timeout=self.timeout)
+        return _load_session(source)
+    def _functions(self,
+                   session:Session
+                   )->dict:
+        """
+        按跨版本身份聚合会话中的函数耗时
+
+        Args:
+            session(Session):会话
+        Returns:
+            functions(dict):身份 -> {"self_time","total_time"}
+        """
+        functions = {}
+        for entry in session_functions(session).values():
+            identity = function_identity(entry["function"],entry["file"],self.aliases,entry["class"])
+            merged = functions.setdefault(identity,{"self_time": 0.0,"total_time": 0.0})
+            merged["self_time"] += entry["self_time"]
+            merged["total_time"] += entry["total_time"]
+        #同名函数在新版本中可能移动了位置 按身份合并
+        return functions
+    def compare(self)->dict:
+        """
+        计算差分结果
+
+        Args:
+            None
+        Returns:
+            result(dict):{"before","after","speedup","functions","new_hotspots","removed_hotspots"}
+        """
+        before_functions = self._functions(self.before)
+        after_functions = self._functions(self.after)
+        before_duration = self.before.duration or 1e-12
+        after_duration = self.after.duration or 1e-12
+        empty = {"self_time": 0.0,"total_time": 0.0}
+        functions = []
+        new_hotspots = []
+        removed_hotspots = []
+        for identity in set(before_functions) | set(after_functions):
+            old = before_functions.get(identity,empty)
+            new = after_functions.get(identity,empty)
+            if identity not in before_functions:
+                status = "new"
+            elif identity not in after_functions:
+                status = "removed"
+            else:
+                status = "changed"
+            entry = {
+                "function": identity[0],
+                "class": identity[1] or None,
+                "file": identity[2],
+                "status": status,
+                "before_self": old["self_time"],
+                "after_self": new["self_time"],
+                "delta_self": new["self_time"] - old["self_time"],
+                "before_total": old["total_time"],
+                "after_total": new["total_time"],
+                "delta_total": new["total_time"] - old["total_time"],
+                "before_self_ratio": old["self_time"] / before_duration,
+                "after_self_ratio": new["self_time"] / after_duration
+            }
+            functions.append(entry)
+            was_hot = entry["before_self_ratio"] >= self.hotspot_threshold
+            is_hot = entry["after_self_ratio"] >= self.hotspot_threshold
+            if is_hot and not was_hot:
+                new_hotspots.append(entry)
+            elif was_hot and not is_hot:
+                removed_hotspots.append(entry)
+        functions.sort(key=lambda entry: abs(entry["delta_self"]),reverse=True)
+        new_hotspots.sort(key=lambda entry: entry["after_self"],reverse=True)
+        removed_hotspots.sort(key=lambda entry: entry["before_self"],reverse=True)
+        self.result = {
+            "before": {
+                "target": self.before.target_description,
+                "duration": self.before.duration,
+                "cpu_time": self.before.cpu_time,
+                "sample_count": self.before.sample_count
+            },
+            "after": {
+                "target": self.after.target_description,
+                "duration": self.after.duration,
+                "cpu_time": self.after.cpu_time,
+                "sample_count": self.after.sample_count
+            },
+            "speedup": before_duration / after_duration,
+            "hotspot_threshold": self.hotspot_threshold,
+            "functions": functions[:self.top_n],
+            "new_hotspots": new_hotspots,
+            "removed_hotspots": removed_hotspots
+        }
+        return self.result
+    def diff_tree(self)->dict:
+        """
+        构建对齐后的差分调用树
+
+        Args:
+            None
+        Returns:
+            root(dict):差分树根节点 节点耗时为总耗时
+        """
+        renderer = HotspotRenderer()
+        root = diff_node("all")
+        _add_tree(root,renderer.preprocess(self.before.root_frame()),"before",self.aliases)
+        _add_tree(root,renderer.preprocess(self.after.root_frame()),"after",self.aliases)
+        root["before"] = sum(child["before"] for child in root["children"].values())
+        root["after"] = sum(child["after"] for child in root["children"].values())
+        return root
+    def generate_report(self)->dict:
+        """
+        生成 JSON 报告与差分火焰图
+
+        Args:
+            None
+        Returns:
+            report_paths(dict):{"json","html"}
+        """
+        result = self.compare()
+        with open(self.output_path,"w",encoding="utf-8") as fp:
+            json.dump(result,fp,indent=4,ensure_ascii=False)
+        write_diff_flamegraph(self.diff_tree(),
+                              self.html_path,
+                              f"Profile diff: speedup x{result['speedup']:.2f}")
+        print_color(f"差分报告已生成：{self.output_path}",fore_color="green")
+        return {"json": self.output_path,"html": self.html_path}
@@ -0,0 +1,122 @@
+"""
+多次运行的性能统计
+
+对同一脚本多次采样得到的函数耗时计算 均值/中位数/p95/置信区间,
+使重构前后的热点对比具有统计意义
+"""
+import math
+import statistics
+
+_T_TABLE = {
+    0.90: (6.314,2.920,2.353,2.132,2.015,1.943,1.895,1.860,1.833,1.812,
+           1.796,1.782,1.771,1.761,1.753,1.746,1.740,1.734,1.729,1.725,
+           1.721,1.717,1.714,1.711,1.708,1.706,1.703,1.701,1.699,1.697),
+    0.95: (12.706,4.303,3.182,2.776,2.571,2.447,2.365,2.306,2.262,2.228,
+           2.201,2.179,2.160,2.145,2.131,2.120,2.110,2.101,2.093,2.086,
+           2.080,2.074,2.069,2.064,2.060,2.056,2.052,2.048,2.045,2.042),
+    0.99: (63.657,9.925,5.841,4.604,4.032,3.707,3.499,3.355,3.250,3.169,
+           3.106,3.055,3.012,2.977,2.947,2.921,2.898,2.878,2.861,2.845,
+           2.831,2.819,2.807,2.797,2.787,2.779,2.771,2.763,2.756,2.750),
+}
+#双侧 Student-t 临界值 自由度 1~30
+
+
+def t_critical(df:int,
+               confidence:float = 0.95
+               )->float:
+    """
+    获得双侧 Student-t 分布的临界值 自由度超过30或置信度不在表中时使用正态近似
+
+    Args:
+        df(int):自由度
+        confidence(float):置信度
+    Returns:
+        critical(float):临界值
+    """
+    table = _T_TABLE.get(round(confidence,2))
+    if table is not None and 1 <= df <= len(table):
+        return table[df - 1]
+    return statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def percentile(values:list,
+               q:float
+               )->float:
+    """
+    线性插值百分位数
+
+    Args:
+        values(list):样本
+        q(float):百分位 0~100
+    Returns:
+        value(float):百分位数
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values:list,
+              confidence:float = 0.95
+              )->dict:
+    """
+    计算样本的描述统计量与均值的置信区间
+
+    Args:
+        values(list):样本
+        confidence(float):置信度
+    Returns:
+        summary(dict):{"mean","median","p95","stdev","ci_low","ci_high"}
+    """
+    n = len(values)
+    mean = statistics.fmean(values) if n else 0.0
+    stdev = statistics.stdev(values) if n > 1 else 0.0
+    half_width = t_critical(n - 1,confidence) * stdev / math.sqrt(n) if n > 1 else 0.0
+    return {
+        "mean": mean,
+        "median": statistics.median(values) if n else 0.0,
+        "p95": percentile(values,95),
+        "stdev": stdev,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width
+    }
+
+
+def function_statistics(runs:list,
+                        confidence:float = 0.95,
+                        top_n:int = 20
+                        )->list:
+    """
+    汇总多次运行中每个函数的自身耗时与总耗时
+
+    某次运行中未被采样到的函数按 0 计入,避免高估偶发热点
+
+    Args:
+        runs(list):每次运行的 aggregate_functions 结果
+        confidence(float):置信度
+        top_n(int):按平均自身耗时保留的函数数量
+    Returns:
+        functions(list):[{"function","file","line","runs_seen","self_time","total_time"}]
+    """
+    keys = {}
+    for functions in runs:
+        for key,entry in functions.items():
+            keys.setdefault(key,entry)
+    results = []
+    for key,entry in keys.items():
+        self_times = [functions[key]["self_time"] if key in functions else 0.0 for functions in runs]
+        total_times = [functions[key]["total_time"] if key in functions else 0.0 for functions in runs]
+        results.append({
+            "function": entry["function"],
+            "file": entry["file"],
+            "line": entry["line"],
+            "runs_seen": sum(1 for functions in runs if key in functions),
+            "self_time": summarize(self_times,confidence),
+            "total_time": summarize(total_times,confidence)
+        })
+    results.sort(key=lambda item: item["self_time"]["mean"],reverse=True)
+    return results[:top_n]
@@ -0,0 +1,195 @@
+"""
+面向机器读取的性能分析导出格式
+
+在 pyinstrument 自带的 HTML/session/speedscope 渲染器之外,
+补充 Brendan Gregg 折叠栈格式与精简的 top-N 热点 JSON
+"""
+import json
+from pyinstrument import processors
+from pyinstrument.frame import Frame
+from pyinstrument.renderers import FrameRenderer
+from pyinstrument.session import Session
+
+
+def frame_key(frame:Frame)->tuple:
+    """
+    获得函数的身份标识 用于跨调用路径、跨会话聚合同一函数
+
+    Args:
+        frame(Frame):pyinstrument 帧
+    Returns:
+        key(tuple):(函数名, 文件路径, 定义行号)
+    """
+    return (frame.function,frame.file_path,frame.line_no)
+
+
+def frame_label(frame:Frame)->str:
+    """
+    获得帧的可读名称 折叠栈格式中的分号会被替换
+
+    Args:
+        frame(Frame):pyinstrument 帧
+    Returns:
+        label(str):"函数名 (文件:行号)"
+    """
+    label = f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+    return label.replace(";",":")
+
+
+def frame_self_time(frame:Frame)->float:
+    """
+    计算帧的自身耗时(总耗时减去非合成子帧的耗时)
+
+    Args:
+        frame(Frame):pyinstrument 帧
+    Returns:
+        self_time(float):自身耗时(秒)
+    """
+    return frame.time - sum(child.time for child in frame.children if not child.is_synthetic)
+
+
+def aggregate_functions(root_frame:Frame)->dict:
+    """
+    按函数身份聚合调用树 递归调用的总耗时只在最外层计入一次
+
+    Args:
+        root_frame(Frame):预处理后的根帧
+    Returns:
+        functions(dict):frame_key -> {"function","class","file","line","self_time","total_time"}
+            class 为方法所属的类名 普通函数为None
+    """
+    functions = {}
+    if root_frame is None:
+        return functions
+    stack = [(root_frame,frozenset())]
+    while stack:
+        frame,active = stack.pop()
+        if frame.is_synthetic:
+            continue
+        key = frame_key(frame)
+        entry = functions.setdefault(key,{
+            "function": frame.function,
+            "class": frame.class_name,
+            "file": frame.file_path,
+            "line": frame.line_no,
+            "self_time": 0.0,
+            "total_time": 0.0
+        })
+        entry["self_time"] += frame_self_time(frame)
+        if key not in active:
+            entry["total_time"] += frame.time
+        #同一路径上已经计入的函数(递归)不重复累加总耗时
+        for child in frame.children:
+            stack.append((child,active | {key}))
+    return functions
+
+
+class CollapsedStackRenderer(FrameRenderer):
+    """
+    Brendan Gregg 折叠栈格式 每行 "帧1;帧2;...;帧N 自身耗时(微秒)"
+
+    可直接输入 flamegraph.pl / speedscope / inferno 等工具
+    """
+    output_file_extension = "collapsed.txt"
+    def default_processors(self)->list:
+        return [
+            processors.remove_importlib,
+            processors.remove_tracebackhide,
+            processors.merge_consecutive_self_time,
+            processors.remove_unnecessary_self_time_nodes,
+            processors.remove_first_pyinstrument_frames_processor,
+        ]
+    def render(self,
+               session:Session
+               )->str:
+        """
+        渲染折叠栈
+
+        Args:
+            session(Session):pyinstrument 会话
+        Returns:
+            collapsed(str):折叠栈文本
+        """
+        root_frame = self.preprocess(session.root_frame())
+        stacks = {}
+        pending = [(root_frame,())] if root_frame is not None else []
+        while pending:
+            frame,path = pending.pop()
+            if frame.is_synthetic:
+                continue
+            path = path + (frame_label(frame),)
+            weight = int(round(frame_self_time(frame) * 1e6))
+            if weight > 0:
+                stacks[path] = stacks.get(path,0) + weight
+            for child in frame.children:
+                pending.append((child,path))
+        lines = [f"{';'.join(path)} {weight}" for path,weight in sorted(stacks.items())]
+        return "\n".join(lines) + "\n"
+
+
+class HotspotRenderer(FrameRenderer):
+    """
+    精简的 top-N 热点 JSON 按自身耗时排序,同时给出总耗时与占比
+    """
+    output_file_extension = "hotspots.json"
+    def __init__(self,
+                 top_n:int = 20,
+                 **kwargs
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            top_n(int):保留的热点函数数量
+        Returns:
+            None
+        """
+        super().__init__(**kwargs)
+        self.top_n = top_n
+    def default_processors(self)->list:
+        return [
+            processors.remove_importlib,
+            processors.remove_tracebackhide,
+            processors.merge_consecutive_self_time,
+            processors.remove_unnecessary_self_time_nodes,
+            processors.remove_first_pyinstrument_frames_processor,
+        ]
+    def render(self,
+               session:Session
+               )->str:
+        """
+        渲染热点 JSON
+
+        Args:
+            session(Session):pyinstrument 会话
+        Returns:
+            hotspots(str):JSON 文本
+        """
+        functions = aggregate_functions(self.preprocess(session.root_frame()))
+        duration = session.duration or 1e-12
+        hotspots = sorted(functions.values(),
+                          key=lambda entry: entry["self_time"],
+                          reverse=True)[:self.top_n]
+        for entry in hotspots:
+            entry["self_ratio"] = entry["self_time"] / duration
+            entry["total_ratio"] = entry["total_time"] / duration
+        return json.dumps({
+            "target": session.target_description,
+            "duration": session.duration,
+            "cpu_time": session.cpu_time,
+            "sample_count": session.sample_count,
+            "hotspots": hotspots
+        },ensure_ascii=False) + "\n"
+
+
+def session_functions(session:Session)->dict:
+    """
+    使用与热点渲染相同的预处理流程 聚合会话中每个函数的耗时
+
+    Args:
+        session(Session):pyinstrument 会话
+    Returns:
+        functions(dict):与 aggregate_functions 的返回值相同
+    """
+    renderer = HotspotRenderer()
+    return aggregate_functions(renderer.preprocess(session.root_frame()))
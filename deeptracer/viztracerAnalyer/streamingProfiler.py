@@ -0,0 +1,318 @@
+"""
+长时间运行任务的流式性能分析
+
+pyinstrument 在 stop() 之前把每个样本追加到内存中的 frame_records 列表,运行越久占用越大。
+流式模式把该列表替换为按调用栈聚合的分段缓冲:相同调用栈只累加耗时,
+每隔固定时间把聚合结果写成一个分段文件并清空,内存占用只与不同调用栈的数量有关。
+分段按数量滚动删除,事后可合并任意时间窗口的分段为 pyinstrument 会话
+"""
+import os
+import sys
+import json
+import time
+import uuid
+from pyinstrument import Profiler
+from pyinstrument.session import Session
+
+
+SEGMENT_PREFIX = "segment-"
+
+
+class SegmentBuffer:
+    """
+    替代 pyinstrument 活动会话中 frame_records 列表的分段缓冲
+
+    采样回调通过 append 写入样本,相同调用栈合并;分段到期时交给写出函数并清空
+
+    Args:
+        flush(callable):写出函数 flush(stacks, start, end, sample_count, cpu_time)
+        segment_seconds(float):每个分段覆盖的时长(秒)
+    """
+    def __init__(self,
+                 flush:callable,
+                 segment_seconds:float
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            flush(callable):写出函数
+            segment_seconds(float):每个分段覆盖的时长(秒)
+        Returns:
+            None
+        """
+        self._flush = flush
+        self.segment_seconds = segment_seconds
+        self.total_samples = 0
+        self._reset(time.time(),time.process_time())
+    def _reset(self,
+               start:float,
+               cpu_start:float
+               )->None:
+        """
+        开始新的分段
+
+        Args:
+            start(float):分段开始时间(时间戳)
+            cpu_start(float):分段开始时的进程 CPU 时间
+        Returns:
+            None
+        """
+        self.stacks = {}
+        self.sample_count = 0
+        self.start = start
+        self.cpu_start = cpu_start
+    def append(self,
+               record:tuple
+               )->None:
+        """
+        写入一个样本
+
+        Args:
+            record(tuple):(调用栈, 距上次采样的时间)
+        Returns:
+            None
+        """
+        call_stack,elapsed = record
+        key = tuple(call_stack)
+        self.stacks[key] = self.stacks.get(key,0.0) + elapsed
+        self.sample_count += 1
+        self.total_samples += 1
+        if time.time() - self.start >= self.segment_seconds:
+            self.flush()
+    def flush(self,
+              force:bool = False
+              )->None:
+        """
+        写出当前分段并开始新的分段
+
+        Args:
+            force(bool):没有样本时是否也写出
+        Returns:
+            None
+        """
+        now,cpu_now = time.time(),time.process_time()
+        if self.sample_count or force:
+            self._flush(self.stacks,self.start,now,self.sample_count,cpu_now - self.cpu_start)
+        self._reset(now,cpu_now)
+    def __len__(self)->int:
+        return self.sample_count
+    def __iter__(self):
+        for stack,elapsed in self.stacks.items():
+            yield (list(stack),elapsed)
+
+
+class StreamingProfiler(Profiler):
+    """
+    分段落盘、内存有界的 pyinstrument 分析器
+
+    采样仍由 pyinstrument 在目标线程中完成,只替换样本的存放方式
+
+    Args:
+        output_dir(str):分段文件目录
+    Attributes:
+        segments(list):本次运行写出且仍保留的分段文件
+
+    Methods:
+        start: 开始采样
+        stop: 停止采样,写出最后一个分段并返回本次运行的合并会话
+    """
+    def __init__(self,
+                 output_dir:str,
+                 interval:float = 0.001,
+                 segment_seconds:float = 60.0,
+                 max_segments:int = None,
+                 async_mode:str = "disabled"
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            output_dir(str):分段文件目录
+            interval(float):采样间隔(秒)
+            segment_seconds(float):每个分段覆盖的时长(秒)
+            max_segments(int):最多保留的分段数量 None表示不限制
+            async_mode(str):pyinstrument 的 async_mode
+        Returns:
+            None
+        """
+        super().__init__(interval=interval,async_mode=async_mode)
+        self.output_dir = os.path.abspath(output_dir)
+        os.makedirs(self.output_dir,exist_ok=True)
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.segments = []
+        self._buffer = None
+        self._start_call_stack = []
+        self._target_description = ""
+        existing = list_segments(self.output_dir)
+        self._index = _segment_index(existing[-1]) + 1 if existing else 0
+        #同一目录中继续运行时分段编号接续
+    def start(self,
+              caller_frame = None,
+              target_description:str = None
+              )->None:
+        """
+        开始采样 并把活动会话的样本列表替换为分段缓冲
+
+        Args:
+            caller_frame(FrameType):视为分析起点的帧 默认为调用者
+            target_description(str):分析目标描述
+        Returns:
+            None
+        """
+        if caller_frame is None:
+            caller_frame = sys._getframe(1)
+        super().start(caller_frame=caller_frame,target_description=target_description)
+        self._start_call_stack = self._active_session.start_call_stack
+        self._target_description = self._active_session.target_description
+        self._buffer = SegmentBuffer(self._write_segment,self.segment_seconds)
+        self._active_session.frame_records = self._buffer
+    def stop(self)->Session:
+        """
+        停止采样 写出最后一个分段
+
+        Args:
+            None
+        Returns:
+            session(Session):本次运行仍保留的分段合并后的会话
+        """
+        super().stop()
+        self._buffer.flush(force=not self.segments)
+        self._last_session = None
+        #不在内存中保留完整会话
+        return merge_segments(self.output_dir,paths=self.segments)
+    def _write_segment(self,
+                       stacks:dict,
+                       start:float,
+                       end:float,
+                       sample_count:int,
+                       cpu_time:float
+                       )->None:
+        """
+        原子地写出一个分段并执行滚动删除
+
+        Args:
+            stacks(dict):调用栈 -> 耗时
+            start(float):分段开始时间(时间戳)
+            end(float):分段结束时间(时间戳)
+            sample_count(int):采样次数
+            cpu_time(float):分段内进程 CPU 时间
+        Returns:
+            None
+        """
+        frames = {}
+        records = []
+        for stack,elapsed in stacks.items():
+            records.append([[frames.setdefault(identifier,len(frames)) for identifier in stack],elapsed])
+        #帧标识去重后以下标引用 分段文件大小与不同帧的数量相关
+        segment = {
+            "start": start,
+            "end": end,
+            "interval": self.interval,
+            "sample_count": sample_count,
+            "cpu_time": cpu_time,
+            "start_call_stack": self._start_call_stack,
+            "target_description": self._target_description,
+            "sys_path": sys.path,
+            "sys_prefixes": Session.current_sys_prefixes(),
+            "frames": list(frames),
+            "stacks": records
+        }
+        path = os.path.join(self.output_dir,f"{SEGMENT_PREFIX}{self._index:06d}.json")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path,"w",encoding="utf-8") as fp:
+            json.dump(segment,fp,ensure_ascii=False)
+        os.replace(tmp_path,path)
+        self._index += 1
+        self.segments.append(path)
+        if self.max_segments is not None:
+            existing = list_segments(self.output_dir)
+            for old_path in existing[:max(0,len(existing) - self.max_segments)]:
+                os.remove(old_path)
+                if old_path in self.segments:
+                    self.segments.remove(old_path)
+
+
+def _segment_index(path:str)->int:
+    """
+    获得分段文件的编号
+
+    Args:
+        path(str):分段文件路径
+    Returns:
+        index(int):编号
+    """
+    return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(".json")])
+
+
+def list_segments(segment_dir:str)->list:
+    """
+    获得目录中的分段文件(按编号排序)
+
+    Args:
+        segment_dir(str):分段文件目录
+    Returns:
+        segments(list):分段文件路径
+    """
+    if not os.path.isdir(segment_dir):
+        return []
+    paths = [os.path.join(segment_dir,name) for name in os.listdir(segment_dir)
+             if name.startswith(SEGMENT_PREFIX) and name.endswith(".json")
+             and name[len(SEGMENT_PREFIX):-len(".json")].isdigit()]
+    return sorted(paths,key=_segment_index)
+
+
+def merge_segments(segment_dir:str,
+                   start:float = None,
+                   end:float = None,
+                   relative:bool = True,
+                   paths:list = None
+                   )->Session:
+    """
+    合并时间窗口内的分段为 pyinstrument 会话 与窗口有重叠的分段整体计入
+
+    Args:
+        segment_dir(str):分段文件目录
+        start(float):窗口开始 None表示不限制
+        end(float):窗口结束 None表示不限制
+        relative(bool):为True时 start/end 为相对第一个分段开始的秒数,否则为时间戳
+        paths(list):只合并指定的分段文件 默认为目录中全部分段
+    Returns:
+        session(Session):合并后的会话
+    """
+    paths = list_segments(segment_dir) if paths is None else list(paths)
+    if not paths:
+        raise FileNotFoundError(f"目录中没有分段文件：{segment_dir}")
+    segments = []
+    for path in paths:
+        with open(path,"r",encoding="utf-8") as fp:
+            segments.append(json.load(fp))
+    origin = segments[0]["start"] if relative else 0.0
+    window_start = origin + start if start is not None else float("-inf")
+    window_end = origin + end if end is not None else float("inf")
+    selected = [segment for segment in segments
+                if segment["end"] >= window_start and segment["start"] <= window_end]
+    if not selected:
+        raise ValueError(f"时间窗口内没有分段：{start}~{end}")
+    totals = {}
+    for segment in selected:
+        frames = segment["frames"]
+        for indexes,elapsed in segment["stacks"]:
+            stack = tuple(frames[index] for index in indexes)
+            totals[stack] = totals.get(stack,0.0) + elapsed
+    #相同调用栈跨分段合并 会话大小与不同调用栈的数量相关
+    records = [(list(stack),elapsed) for stack,elapsed in sorted(totals.items())]
+    #pyinstrument 按相邻记录的公共前缀构建调用树 排序后相同前缀的记录相邻
+    first,last = selected[0],selected[-1]
+    return Session(frame_records=records,
+                   start_time=first["start"],
+                   duration=last["end"] - first["start"],
+                   min_interval=min(segment["interval"] for segment in selected),
+                   max_interval=max(segment["interval"] for segment in selected),
+                   sample_count=sum(segment["sample_count"] for segment in selected),
+                   start_call_stack=last["start_call_stack"],
+                   target_description=f"{last['target_description']} ({len(selected)} segments)",
+                   cpu_time=sum(segment["cpu_time"] for segment in selected),
+                   sys_path=last["sys_path"],
+                   sys_prefixes=last["sys_prefixes"])
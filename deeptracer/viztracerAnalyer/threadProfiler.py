@@ -0,0 +1,364 @@
+"""
+多线程目标的逐线程分析与 GIL 竞争视图
+
+pyinstrument 只采样启动它的线程。本模块由后台线程定期读取 sys._current_frames(),
+对所有线程采样并按线程归属耗时。采样线程运行时持有 GIL,此刻其他线程要么阻塞在释放 GIL 的调用中,
+要么正在等待 GIL;结合每个线程在采样间隔内的 CPU 时间(pthread_getcpuclockid)区分:
+    running  采样间隔内实际获得的 CPU 时间
+    gil      可运行(未阻塞在锁或 I/O 上)但没有获得 CPU 的时间,即等待 GIL
+    lock     阻塞在获取锁(lock.acquire / with lock)上的时间
+    wait     阻塞在 sleep、I/O、条件变量、队列、join 等调用上的时间
+判断是否阻塞依据线程最内层 Python 帧正在执行的指令与源码行,属于启发式
+"""
+import os
+import re
+import sys
+import dis
+import time
+import linecache
+import threading
+from pyinstrument.session import Session
+
+
+STATES = ("running","gil","lock","wait")
+CONTENTION_FILE = "<contention>"
+STATE_FRAMES = {
+    "gil": f"[GIL wait]\x00{CONTENTION_FILE}\x000",
+    "lock": f"[lock wait]\x00{CONTENTION_FILE}\x000",
+}
+#等待 GIL 与等待锁的时间以合成帧挂在调用栈末尾 在火焰图中可见
+LOCK_CALLS = {"acquire"}
+WAIT_CALLS = {
+    "sleep","wait","join","get","result","recv","recv_into","recvfrom","recvmsg",
+    "read","readline","readinto","accept","connect","select","poll","send","sendall",
+    "write","communicate","urlopen","getaddrinfo","as_completed"
+}
+SYNC_FILES = tuple(os.path.abspath(module.__file__) for module in (threading,)) \
+    + (os.path.join(os.path.dirname(os.path.abspath(threading.__file__)),"queue.py"),)
+#跨过 threading/queue 内部帧 按用户代码调用的接口判断阻塞类型
+_CALL_NAME = re.compile(r"(\w+)\s*\(")
+
+
+def _thread_cpu_time(thread:threading.Thread|None)->float|None:
+    """
+    获得线程已使用的 CPU 时间 不支持或线程已结束时返回None
+
+    只查询仍在 threading.enumerate() 中且存活的线程:对已结束的 pthread 调用
+    pthread_getcpuclockid 在 glibc 上是未定义行为
+
+    Args:
+        thread(threading.Thread|None):线程 不在 threading.enumerate() 中时为None
+    Returns:
+        cpu_time(float|None):CPU 时间(秒)
+    """
+    if thread is None or not thread.is_alive():
+        return None
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+    except (AttributeError,OSError,OverflowError,ValueError):
+        return None
+
+
+class ThreadSampler:
+    """
+    对所有线程采样的分析器
+
+    Args:
+        interval(float):采样间隔(秒) 采样线程需要获得 GIL,竞争激烈时实际间隔会变长,
+            每个样本按该线程距上次采样的实际时间计入
+        cpu_threshold(float):未知阻塞类型时,CPU 时间占比不低于该值的间隔视为全部在运行
+    Attributes:
+        threads(dict):(线程ID, 系统线程ID) -> {"name","native_id","wall","cpu","samples", 各状态耗时, "records", "sites"}
+
+    Methods:
+        start: 开始采样
+        stop: 停止采样
+        session: 获得按线程区分的 pyinstrument 会话
+        contention: 获得 GIL/锁竞争汇总
+    """
+    def __init__(self,
+                 interval:float = 0.005,
+                 cpu_threshold:float = 0.9
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            interval(float):采样间隔(秒)
+            cpu_threshold(float):视为全部在运行的 CPU 时间占比
+        Returns:
+            None
+        """
+        self.interval = interval
+        self.cpu_threshold = cpu_threshold
+        self.threads = {}
+        self.start_time = None
+        self.duration = 0.0
+        self.sample_count = 0
+        self.cpu_time = 0.0
+        self._cpu_start = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._blocking = {}
+        self._last = {}
+    def start(self)->None:
+        """
+        启动后台采样线程
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        if self._thread is not None:
+            raise RuntimeError("线程采样已经开始")
+        self.start_time = time.time()
+        self._cpu_start = time.process_time()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run,name="deeptracer-thread-sampler",daemon=True)
+        self._thread.start()
+    def stop(self)->None:
+        """
+        停止采样并等待采样线程退出
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.time() - self.start_time
+        self.cpu_time = time.process_time() - self._cpu_start
+    def __enter__(self)->"ThreadSampler":
+        self.start()
+        return self
+    def __exit__(self,exc_type,exc_value,traceback)->None:
+        self.stop()
+
+    def _run(self)->None:
+        """
+        采样线程主循环
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self._sample(own)
+        self._sample(own)
+        #停止前补一次采样 结算最后一个间隔
+    def _sample(self,
+                own:int
+                )->None:
+        """
+        对当前所有线程采样一次
+
+        Args:
+            own(int):采样线程自身的线程ID
+        Returns:
+            None
+        """
+        now = time.perf_counter()
+        frames = sys._current_frames()
+        names = {thread.ident: thread for thread in threading.enumerate()}
+        self.sample_count += 1
+        seen = set()
+        for ident,frame in frames.items():
+            if ident == own:
+                continue
+            thread = names.get(ident)
+            key = (ident,getattr(thread,"native_id",None))
+            #线程结束后线程ID会被新线程复用 以 (线程ID, 系统线程ID) 区分
+            seen.add(key)
+            cpu = _thread_cpu_time(thread)
+            last = self._last.get(key)
+            self._last[key] = (now,cpu)
+            if last is None:
+                continue
+            #第一次见到的线程只记录起点
+            elapsed = now - last[0]
+            cpu_delta = cpu - last[1] if cpu is not None and last[1] is not None else None
+            stats = self.threads.get(key)
+            if stats is None:
+                stats = self.threads[key] = {
+                    "name": thread.name if thread is not None else f"Thread-{ident}",
+                    "native_id": key[1],
+                    "wall": 0.0,
+                    "cpu": 0.0,
+                    "samples": 0,
+                    **{state: 0.0 for state in STATES},
+                    "records": {},
+                    "sites": {}
+                }
+            self._record(stats,ident,frame,elapsed,cpu_delta)
+        for key in set(self._last) - seen:
+            del self._last[key]
+        #已结束的线程
+    def _record(self,
+                stats:dict,
+                ident:int,
+                frame,
+                elapsed:float,
+                cpu_delta:float|None
+                )->None:
+        """
+        把一个样本的耗时按状态拆分计入线程统计
+
+        Args:
+            stats(dict):线程统计
+            ident(int):线程ID
+            frame(FrameType):线程最内层帧
+            elapsed(float):距该线程上次采样的墙钟时间
+            cpu_delta(float|None):间隔内该线程的 CPU 时间 不支持时为None
+        Returns:
+            None
+        """
+        stack = []
+        current = frame
+        while current is not None:
+            code = current.f_code
+            stack.append(f"{code.co_name}\x00{code.co_filename}\x00{code.co_firstlineno}"
+                         f"\x01l{current.f_lineno}")
+            current = current.f_back
+        stack.append(f"{stats['name']}\x00<thread>\x00{stats['native_id'] or ident}")
+        stack = tuple(reversed(stack))
+        blocking,site = self._blocking_state(frame)
+        if cpu_delta is None:
+            running = 0.0 if blocking else elapsed
+        else:
+            running = min(max(cpu_delta,0.0),elapsed)
+            if not blocking and running >= elapsed * self.cpu_threshold:
+                running = elapsed
+        state = blocking or "gil"
+        waiting = elapsed - running
+        stats["wall"] += elapsed
+        stats["cpu"] += cpu_delta or 0.0
+        stats["samples"] += 1
+        stats["running"] += running
+        stats[state] += waiting
+        records = stats["records"]
+        if running > 0:
+            records[stack] = records.get(stack,0.0) + running
+        if waiting > 0:
+            waiting_stack = stack + (STATE_FRAMES[state],) if state in STATE_FRAMES else stack
+            records[waiting_stack] = records.get(waiting_stack,0.0) + waiting
+            if state in STATE_FRAMES:
+                key = (state,) + site
+                stats["sites"][key] = stats["sites"].get(key,0.0) + waiting
+    def _blocking_state(self,
+                        frame
+                        )->tuple:
+        """
+        判断线程是否阻塞在锁或其他等待调用上
+
+        Args:
+            frame(FrameType):线程最内层帧
+        Returns:
+            result(tuple):(状态 "lock"/"wait"/None, (函数名, 文件, 行号))
+        """
+        inner = frame
+        while frame.f_back is not None and os.path.abspath(frame.f_code.co_filename) in SYNC_FILES:
+            frame = frame.f_back
+        #线程阻塞在 threading/queue 内部时 以调用它们的用户代码为准
+        code = frame.f_code
+        site = (code.co_name,code.co_filename,frame.f_lineno)
+        key = (code,frame.f_lasti,frame.f_lineno)
+        state = self._blocking.get(key,False)
+        if state is False:
+            state = None
+            opname = dis.opname[code.co_code[frame.f_lasti]] if 0 <= frame.f_lasti < len(code.co_code) else ""
+            if opname in ("BEFORE_WITH","SETUP_WITH"):
+                state = "lock"
+            elif opname.startswith(("CALL","PRECALL")):
+                names = set(_CALL_NAME.findall(linecache.getline(code.co_filename,frame.f_lineno)))
+                if names & LOCK_CALLS:
+                    state = "lock"
+                elif names & WAIT_CALLS:
+                    state = "wait"
+            if state is None and inner is not frame:
+                state = "wait"
+            #threading/queue 内部的其他阻塞(条件变量、Event)
+            self._blocking[key] = state
+        return state,site
+
+    def session(self)->Session:
+        """
+        获得按线程区分的 pyinstrument 会话 根节点的子节点为各线程
+
+        Args:
+            None
+        Returns:
+            session(Session):会话
+        """
+        totals = {}
+        for stats in self.threads.values():
+            for stack,elapsed in stats["records"].items():
+                totals[stack] = totals.get(stack,0.0) + elapsed
+        if not totals:
+            raise ValueError("没有采集到任何线程样本")
+        records = [(list(stack),elapsed) for stack,elapsed in sorted(totals.items())]
+        #pyinstrument 按相邻记录的公共前缀构建调用树 排序后相同前缀的记录相邻
+        return Session(frame_records=records,
+                       start_time=self.start_time,
+                       duration=self.duration,
+                       min_interval=self.interval,
+                       max_interval=self.interval,
+                       sample_count=self.sample_count,
+                       start_call_stack=records[0][0][:1],
+                       target_description=f"{len(self.threads)} threads",
+                       cpu_time=self.cpu_time,
+                       sys_path=sys.path,
+                       sys_prefixes=Session.current_sys_prefixes())
+    def contention(self,
+                   top_n:int = 10
+                   )->dict:
+        """
+        获得 GIL/锁竞争汇总
+
+        Args:
+            top_n(int):每个线程及全局保留的竞争位置数量
+        Returns:
+            summary(dict):{"duration","totals":{各状态耗时},"contention_ratio",
+                "threads":[{"ident","name","native_id","wall","cpu","samples",各状态耗时,"contention_ratio","sites"}],
+                "sites":[{"state","function","file","line","time"}]}
+                线程按竞争时间(gil+lock)降序
+        """
+        def sites_of(sites:dict)->list:
+            ordered = sorted(sites.items(),key=lambda item: item[1],reverse=True)[:top_n]
+            return [{"state": state,"function": function,"file": file_path,"line": line,"time": elapsed}
+                    for (state,function,file_path,line),elapsed in ordered]
+        threads = []
+        all_sites = {}
+        totals = {state: 0.0 for state in STATES}
+        for (ident,_),stats in self.threads.items():
+            for key,elapsed in stats["sites"].items():
+                all_sites[key] = all_sites.get(key,0.0) + elapsed
+            for state in STATES:
+                totals[state] += stats[state]
+            contended = stats["gil"] + stats["lock"]
+            threads.append({
+                "ident": ident,
+                "name": stats["name"],
+                "native_id": stats["native_id"],
+                "wall": stats["wall"],
+                "cpu": stats["cpu"],
+                "samples": stats["samples"],
+                **{state: stats[state] for state in STATES},
+                "contention_ratio": contended / stats["wall"] if stats["wall"] else 0.0,
+                "sites": sites_of(stats["sites"])
+            })
+        threads.sort(key=lambda entry: entry["gil"] + entry["lock"],reverse=True)
+        wall = sum(totals.values())
+        return {
+            "duration": self.duration,
+            "totals": totals,
+            "contention_ratio": (totals["gil"] + totals["lock"]) / wall if wall else 0.0,
+            "threads": threads,
+            "sites": sites_of(all_sites)
+        }
@@ -0,0 +1,397 @@
+"""
+Chrome Trace / VizTracer 追踪文件的流式汇总
+
+追踪后端输出的 JSON 可达数 GB,无法整体 json.load。本模块逐个解码 traceEvents 中的事件,
+内存占用只与单个事件、排序分块大小与调用栈深度有关:
+    1. 流式解码事件,"X" 完整事件与成对的 "B"/"E" 事件转换为 (pid, tid, 开始, 耗时, 名称) 区间
+    2. 区间按线程与开始时间外部归并排序(viztracer 按函数退出顺序写入,子调用先于父调用)
+    3. 按开始顺序以栈重建调用关系,累计每个函数的总耗时/自身耗时/调用次数与折叠栈
+汇总结果与 hotspots 格式字段一致,供 Flow 等模块代替原始追踪文件读取
+"""
+import os
+import re
+import sys
+import json
+import heapq
+import tempfile
+from collections import Counter
+
+CHUNK_SIZE = 1 << 20
+#每次读取的字符数
+CHUNK_SPANS = 200000
+#内存中排序的区间数量 超出后写入临时分块
+_EVENTS_KEY = re.compile(r'"traceEvents"\s*:\s*\[')
+_SEPARATOR = re.compile(r'[\s,]*')
+_FRAME_NAME = re.compile(r'^(?P<function>.*) \((?P<file>.*):(?P<line>\d+)\)$')
+
+
+def iter_trace_events(trace_path:str,
+                      chunk_size:int = CHUNK_SIZE
+                      ):
+    """
+    逐个解码追踪文件中的事件 支持 {"traceEvents":[...]} 与顶层数组两种格式
+
+    Args:
+        trace_path(str):追踪文件路径
+        chunk_size(int):每次读取的字符数
+    Returns:
+        events(Iterator[dict]):追踪事件
+    """
+    decoder = json.JSONDecoder()
+    with open(trace_path,"r",encoding="utf-8") as fp:
+        buffer = fp.read(chunk_size)
+        eof = not buffer
+        pos = None
+        while pos is None:
+            stripped = buffer.lstrip()
+            if stripped.startswith("["):
+                pos = len(buffer) - len(stripped) + 1
+                break
+            match = _EVENTS_KEY.search(buffer)
+            if match:
+                pos = match.end()
+                break
+            if eof:
+                raise ValueError(f"未找到 traceEvents,不是 Chrome Trace 文件：{trace_path}")
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[-64:] + chunk
+            #只保留可能被截断的键名 查找过程内存有界
+        while True:
+            pos = _SEPARATOR.match(buffer,pos).end()
+            if pos >= len(buffer) or buffer[pos] != "]":
+                try:
+                    if pos >= len(buffer):
+                        raise json.JSONDecodeError("缓冲区已耗尽",buffer,pos)
+                    event,pos = decoder.raw_decode(buffer,pos)
+                except json.JSONDecodeError as e:
+                    chunk = fp.read(chunk_size)
+                    if not chunk:
+                        raise ValueError(f"追踪文件不完整或已损坏：{trace_path}") from e
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    continue
+                    #事件跨越了读取边界 读取更多内容后重新解码
+                yield event
+                if pos > chunk_size:
+                    buffer = buffer[pos:]
+                    pos = 0
+            else:
+                return
+
+
+def parse_frame_name(name:str)->tuple:
+    """
+    拆分 viztracer 的事件名称 "函数名 (文件:行号)"
+
+    Args:
+        name(str):事件名称
+    Returns:
+        identity(tuple):(函数名, 文件路径, 行号) 内置函数等无法拆分时文件为空、行号为0
+    """
+    match = _FRAME_NAME.match(name)
+    if match is None:
+        return (name,"",0)
+    return (match.group("function"),match.group("file"),int(match.group("line")))
+
+
+def _span_key(span:tuple)->tuple:
+    """
+    区间的排序键 同一线程内按开始时间排序,同时开始的区间外层(耗时长)在前
+
+    Args:
+        span(tuple):(pid, tid, 开始(ns), 耗时(ns), 名称)
+    Returns:
+        key(tuple):排序键
+    """
+    return (span[0],span[1],span[2],-span[3])
+
+
+def _read_run(run_path:str):
+    """
+    读取已排序的临时分块
+
+    Args:
+        run_path(str):分块路径
+    Returns:
+        spans(Iterator[tuple]):区间
+    """
+    with open(run_path,"r",encoding="utf-8") as fp:
+        for line in fp:
+            yield tuple(json.loads(line))
+
+
+class TraceSummarizer:
+    """
+    追踪文件流式汇总
+
+    Args:
+        trace_path(str):Chrome Trace / VizTracer JSON 路径
+        chunk_spans(int):内存中排序的区间数量
+        temp_dir(str):排序分块的临时目录 默认为追踪文件所在目录
+
+    Methods:
+        summarize: 汇总追踪文件
+        save: 汇总并写入摘要 JSON 与折叠栈
+    """
+    def __init__(self,
+                 trace_path:str,
+                 chunk_spans:int = CHUNK_SPANS,
+                 temp_dir:str = None
+                 )->None:
+        """
+        初始化函数
+
+        Args:
+            trace_path(str):追踪文件路径
+            chunk_spans(int):内存中排序的区间数量
+            temp_dir(str):排序分块的临时目录
+        Returns:
+            None
+        """
+        self.trace_path = os.path.abspath(trace_path)
+        if not os.path.exists(self.trace_path):
+            raise FileNotFoundError(f"追踪文件不存在：{self.trace_path}")
+        self.chunk_spans = chunk_spans
+        self.temp_dir = temp_dir or os.path.dirname(self.trace_path)
+        self.event_count = 0
+        self.thread_names = {}
+        self.functions = {}
+        self.collapsed = {}
+        self.threads = {}
+    def _spans(self):
+        """
+        将追踪事件转换为区间 时间统一为整数纳秒
+
+        Args:
+            None
+        Returns:
+            spans(Iterator[tuple]):(pid, tid, 开始(ns), 耗时(ns), 名称)
+        """
+        open_spans = {}
+        #线程 -> 未结束的 "B" 事件栈
+        for event in iter_trace_events(self.trace_path):
+            self.event_count += 1
+            phase = event.get("ph")
+            thread = (str(event.get("pid","")),str(event.get("tid","")))
+            if phase == "X":
+                if "ts" not in event or "dur" not in event:
+                    continue
+                yield thread + (round(event["ts"] * 1000),
+                                round(event["dur"] * 1000),
+                                sys.intern(event.get("name","")))
+            elif phase == "B":
+                open_spans.setdefault(thread,[]).append((round(event["ts"] * 1000),
+                                                         sys.intern(event.get("name",""))))
+            elif phase == "E":
+                stack = open_spans.get(thread)
+                if stack:
+                    start,name = stack.pop()
+                    yield thread + (start,round(event["ts"] * 1000) - start,name)
+            elif phase == "M" and event.get("name") == "thread_name":
+                self.thread_names[thread] = event.get("args",{}).get("name","")
+    def _sorted_spans(self,
+                      temp_dir:str
+                      ):
+        """
+        外部归并排序区间 未超过分块大小时直接在内存中排序
+
+        Args:
+            temp_dir(str):临时分块目录
+        Returns:
+            spans(Iterator[tuple]):按线程与开始时间排序的区间
+        """
+        runs = []
+        chunk = []
+        for span in self._spans():
+            chunk.append(span)
+            if len(chunk) >= self.chunk_spans:
+                chunk.sort(key=_span_key)
+                run_path = os.path.join(temp_dir,f"run-{len(runs)}.jsonl")
+                with open(run_path,"w",encoding="utf-8") as fp:
+                    for item in chunk:
+                        fp.write(json.dumps(item,ensure_ascii=False) + "\n")
+                runs.append(run_path)
+                chunk = []
+        chunk.sort(key=_span_key)
+        if not runs:
+            return iter(chunk)
+        return heapq.merge(*(_read_run(run_path) for run_path in runs),
+                           iter(chunk),
+                           key=_span_key)
+    def _finish(self,
+                stack:list,
+                active:Counter,
+                thread:tuple
+                )->None:
+        """
+        结束栈顶调用 计入其自身耗时并把耗时累加到父调用
+
+        Args:
+            stack(list):调用栈 元素为 [名称, 结束, 耗时, 子调用耗时, 折叠路径]
+            active(Counter):栈上各函数的层数 用于递归时只计一次总耗时
+            thread(tuple):(pid, tid)
+        Returns:
+            None
+        """
+        name,_,duration,children,path = stack.pop()
+        self_time = max(duration - children,0)
+        self.functions[name]["self_time"] += self_time
+        self.collapsed[path] = self.collapsed.get(path,0) + self_time
+        active[name] -= 1
+        if stack:
+            stack[-1][3] += duration
+        else:
+            self.threads[thread]["busy"] += duration
+    def _walk(self,
+              spans
+              )->tuple:
+        """
+        按开始顺序重建调用栈并累计各项统计
+
+        Args:
+            spans(Iterator[tuple]):已排序的区间
+        Returns:
+            bounds(tuple):(最早开始, 最晚结束) 纳秒 无区间时为 (0, 0)
+        """
+        first = last = None
+        thread = None
+        stack = []
+        active = Counter()
+        for pid,tid,start,duration,name in spans:
+            end = start + duration
+            first = start if first is None else min(first,start)
+            last = end if last is None else max(last,end)
+            if (pid,tid) != thread:
+                while stack:
+                    self._finish(stack,active,thread)
+                thread = (pid,tid)
+                self.threads.setdefault(thread,{"spans": 0,"busy": 0})
+            while stack and stack[-1][1] <= start:
+                self._finish(stack,active,thread)
+            entry = self.functions.get(name)
+            if entry is None:
+                entry = self.functions[name] = {"calls": 0,"self_time": 0,"total_time": 0}
+            entry["calls"] += 1
+            if not active[name]:
+                entry["total_time"] += duration
+            #递归调用的总耗时只在最外层计入一次
+            active[name] += 1
+            label = name.replace(";",":")
+            path = (stack[-1][4] + (label,)) if stack else (label,)
+            stack.append([name,end,duration,0,path])
+            self.threads[thread]["spans"] += 1
+        while stack:
+            self._finish(stack,active,thread)
+        return (first or 0,last or 0)
+    def summarize(self,
+                  top_n:int = 20
+                  )->dict:
+        """
+        汇总追踪文件
+
+        Args:
+            top_n(int):保留的热点函数数量 None表示全部保留
+        Returns:
+            summary(dict):{"target","duration","cpu_time","sample_count","event_count","threads",
+                "hotspots":[{"function","file","line","calls","self_time","total_time","self_ratio","total_ratio"}]}
+                时间单位为秒
+        """
+        self.event_count = 0
+        self.functions = {}
+        self.collapsed = {}
+        self.threads = {}
+        with tempfile.TemporaryDirectory(prefix=".trace-sort-",dir=self.temp_dir) as temp_dir:
+            first,last = self._walk(self._sorted_spans(temp_dir))
+        duration = (last - first) / 1e9
+        hotspots = []
+        for name,entry in self.functions.items():
+            function,file_path,line = parse_frame_name(name)
+            hotspots.append({
+                "function": function,
+                "file": file_path,
+                "line": line,
+                "calls": entry["calls"],
+                "self_time": entry["self_time"] / 1e9,
+                "total_time": entry["total_time"] / 1e9,
+                "self_ratio": entry["self_time"] / 1e9 / (duration or 1e-12),
+                "total_ratio": entry["total_time"] / 1e9 / (duration or 1e-12)
+            })
+        hotspots.sort(key=lambda entry: entry["self_time"],reverse=True)
+        threads = [{
+            "pid": pid,
+            "tid": tid,
+            "name": self.thread_names.get((pid,tid),""),
+            "spans": entry["spans"],
+            "busy": entry["busy"] / 1e9
+        } for (pid,tid),entry in self.threads.items()]
+        return {
+            "target": self.trace_path,
+            "duration": duration,
+            "cpu_time": None,
+            "sample_count": sum(thread["spans"] for thread in threads),
+            "event_count": self.event_count,
+            "threads": threads,
+            "hotspots": hotspots if top_n is None else hotspots[:top_n]
+        }
+    def render_collapsed(self)->str:
+        """
+        将最近一次汇总的折叠栈渲染为 "帧1;帧2;...;帧N 自身耗时(微秒)"
+
+        Args:
+            None
+        Returns:
+            collapsed(str):折叠栈文本
+        """
+        lines = []
+        for path,weight in sorted(self.collapsed.items()):
+            weight = int(round(weight / 1000))
+            if weight > 0:
+                lines.append(f"{';'.join(path)} {weight}")
+        return "\n".join(lines) + "\n"
+    def save(self,
+             summary_path:str = None,
+             collapsed_path:str = None,
+             top_n:int = 20
+             )->dict:
+        """
+        汇总并写入摘要 JSON 与折叠栈 默认与追踪文件同名前缀
+
+        Args:
+            summary_path(str):摘要 JSON 路径 默认为 <前缀>.summary.json
+            collapsed_path(str):折叠栈路径 默认为 <前缀>.collapsed.txt
+            top_n(int):摘要保留的热点函数数量
+        Returns:
+            report_paths(dict):{"summary","collapsed"}
+        """
+        stem = self.trace_path
+        for suffix in (".json",".trace"):
+            if stem.endswith(suffix):
+                stem = stem[:-len(suffix)]
+        summary_path = summary_path or f"{stem}.summary.json"
+        collapsed_path = collapsed_path or f"{stem}.collapsed.txt"
+        summary = self.summarize(top_n=top_n)
+        summary["collapsed"] = collapsed_path
+        with open(summary_path,"w",encoding="utf-8") as fp:
+            json.dump(summary,fp,indent=4,ensure_ascii=False)
+        with open(collapsed_path,"w",encoding="utf-8") as fp:
+            fp.write(self.render_collapsed())
+        return {"summary": summary_path,"collapsed": collapsed_path}
+
+
+def is_trace_file(path:str)->bool:
+    """
+    判断文件是否为 Chrome Trace 追踪文件 只读取文件开头
+
+    Args:
+        path(str):文件路径
+    Returns:
+        is_trace(bool):是否为追踪文件
+    """
+    if not path or not path.endswith(".json") or not os.path.exists(path):
+        return False
+    with open(path,"r",encoding="utf-8",errors="ignore") as fp:
+        head = fp.read(4096)
+    if _EVENTS_KEY.search(head):
+        return True
+    return head.lstrip().startswith("[") and '"ph"' in head
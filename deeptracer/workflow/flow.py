@@ -15,6 +15,11 @@ from typing import Optional
 import re
 import time
 from deeptracer import print_color
+from deeptracer.utils import RunContext
+from deeptracer.viztracerAnalyer.traceSummary import (
+    TraceSummarizer,
+    is_trace_file
+    )
 from dotenv import load_dotenv
 import shutil
 import tempfile
@@ -293,7 +298,8 @@ class Flow():
                  open:bool=False,
                  configPath:str = "deeptracer/workflow/.env.local",
                  cachePath:str = "deeptracer/workflow/activityFilesTXT",
-                 save_path:str = "deeptracer/tools_report/agentReply.json"
+                 save_path:str = "deeptracer/tools_report/agentReply.json",
+                 run_context:RunContext = None
                  )->None:
         """
         初始化函数,实现对象的基本参数逻辑的定义
@@ -303,15 +309,23 @@ class Flow():
             htmlPath(str) : memray逻辑生成的活动文件的路径
             pyPath(str) : 检测源文件的路径地址 
             txtPath(str) : Ast树的存储文件位置
+            run_context(RunContext) : 运行上下文,指定时缓存与回复写入本次运行的独立目录
         Returns:
             None
         """
+        if run_context is not None:
+            cachePath = run_context.path("activityFilesTXT")
+            save_path = run_context.path(os.path.basename(save_path))
+        #缓存目录归属于本次运行 清理时不会影响其他并发运行
         self.savePath = os.path.join(DEEPTRACER_DEV_ROOT,save_path)
         self.open = open
         self._REQUEST_DONE = False
         config_Path = os.path.join(DEEPTRACER_DEV_ROOT,configPath)
         load_dotenv(config_Path)#配置环境变量
         if self.open:
+            if jsonPath and is_trace_file(os.path.join(DEEPTRACER_DEV_ROOT,jsonPath)):
+                jsonPath = TraceSummarizer(os.path.join(DEEPTRACER_DEV_ROOT,jsonPath)).save()["summary"]
+            #追踪文件可能达数 GB 上传流式汇总后的摘要代替原始追踪
             fileF = _fileChange()
             self.files_paths = {
                 "json":fileF._toTxt(jsonPath,cachePath),
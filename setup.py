@@ -16,5 +16,10 @@ setup(
         "pyvis>=0.3.2",
         "networkx>=3.4.2"
     ],
+    entry_points = {
+        "console_scripts": [
+            "deeptracer = deeptracer.cli:main"
+        ]
+    },
     test_suite = "test"
 )
\ No newline at end of file
@@ -0,0 +1,62 @@
+from unittest.mock import Mock, patch
+
+def test_leakCheckpoint_structure():
+    """测试模块leakCheckpoint的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'anaMemory', 'leakCheckpoint.py')
+    assert os.path.exists(file_path), f"leakCheckpoint文件不存在: {file_path}"
+
+def test_checkpoint_noop_when_not_armed():
+    """测试未在泄漏检测下运行时检查点不做任何事"""
+    from deeptracer.anaMemory import leakCheckpoint, checkpoint
+    checkpoint("start")
+    checkpoint("end")
+    assert leakCheckpoint.finish() == []
+
+def _write_leaky(path):
+    path.write_text("from deeptracer.anaMemory import checkpoint\n"
+                    "cache = []\n"
+                    "def handle():\n"
+                    "    tmp = [bytearray(1000) for _ in range(10)]\n"
+                    "    cache.append(bytearray(4096))\n"
+                    "    return len(tmp)\n"
+                    "for _ in range(50):\n"
+                    "    handle()\n"
+                    "checkpoint('warm')\n"
+                    "for _ in range(200):\n"
+                    "    handle()\n"
+                    "checkpoint('done')\n"
+                    "for _ in range(400):\n"
+                    "    handle()\n",
+                    encoding="utf-8")
+
+def test_main_function(tmp_path):
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "leaky.py"
+    _write_leaky(script)
+    memoryAnalyzer = MemoryAnalyzer(str(script), output_dir=str(tmp_path / "report"))
+    result = memoryAnalyzer.run_leak_analysis(top_n=5)
+    assert result["success"]
+    leaks = result["leaks"]
+    assert leaks["window"] == "run"
+    leaked = sum(stack["bytes"] for stack in leaks["stacks"] if stack["line"] == 5)
+    assert 650 * 4096 <= leaked < 651 * 4096 * 1.1
+    assert all(stack["line"] != 4 or stack["bytes"] < 1000 for stack in leaks["stacks"])
+    #临时列表在函数返回时已释放
+    top = leaks["stacks"][0]
+    assert "cache.append" in top["source"]
+    assert top["stack"][0]["function"] == "handle"
+    assert all("runpy" not in frame["file"] for frame in top["stack"])
+
+    result = memoryAnalyzer.run_leak_analysis(checkpoints=True, flamegraph=True, top_n=5)
+    assert result["success"]
+    leaks = result["leaks"]
+    assert leaks["checkpoints"] == ["warm", "done"]
+    assert leaks["stacks"][0]["line"] == 5
+    assert 200 * 4096 <= leaks["stacks"][0]["bytes"] < 400 * 4096
+    assert (tmp_path / "report" / "mem_leaks.html").exists()
+    assert not memoryAnalyzer.trace_bin.exists()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,64 @@
+from unittest.mock import Mock, patch
+
+def test_liveMonitor_structure():
+    """测试模块liveMonitor的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'anaMemory', 'liveMonitor.py')
+    assert os.path.exists(file_path), f"liveMonitor文件不存在: {file_path}"
+
+def test_poll_before_start():
+    """测试未启动时poll报错"""
+    import pytest
+    from deeptracer.anaMemory import LiveMonitor
+    monitor = LiveMonitor("test/test_sources/test_mem.py")
+    with pytest.raises(RuntimeError):
+        monitor.poll()
+    assert not monitor.running
+    assert monitor.stop() is None
+
+def _write_growing(path, steps):
+    path.write_text("import time\n"
+                    "data = []\n"
+                    f"for _ in range({steps}):\n"
+                    "    data.append(bytearray(1000000))\n"
+                    "    time.sleep(0.02)\n",
+                    encoding="utf-8")
+
+def test_poll_api(tmp_path):
+    """测试轮询接口汇总当前堆与增长速度"""
+    import time
+    from deeptracer.anaMemory import LiveMonitor
+    script = tmp_path / "grow.py"
+    _write_growing(script, 40)
+    samples = []
+    with LiveMonitor(str(script), top_n=3) as monitor:
+        while monitor.running:
+            samples.append(monitor.poll())
+            time.sleep(0.1)
+        last = monitor.poll()
+    assert not last["running"]
+    #脚本结束时模块变量已释放 峰值保留运行期间的最大值
+    assert last["peak_heap"] >= max(sample["heap"] for sample in samples) >= 20 * 1000000
+    growing = [sample for sample in samples if sample["heap"] >= 10 * 1000000]
+    assert growing and all(sample["growth_rate"] > 0 for sample in growing)
+    top = growing[-1]["top_sites"][0]
+    assert top["line"] == 4 and top["count"] >= 10
+    assert len(growing[-1]["top_sites"]) <= 3
+    assert monitor.process.returncode == 0
+
+def test_main_function(tmp_path):
+    from deeptracer.anaMemory import LiveMonitor
+    script = tmp_path / "grow.py"
+    _write_growing(script, 1000)
+    result = LiveMonitor(str(script)).watch(refresh=0.1,
+                                            kill_above=30 * 1000000,
+                                            quiet=True)
+    assert result["killed"]
+    assert result["exit_code"] != 0
+    assert result["stats"]["heap"] > 30 * 1000000
+    #在脚本分配完 1GB 之前终止
+    assert result["stats"]["heap"] < 500 * 1000000
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
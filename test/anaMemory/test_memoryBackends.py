@@ -0,0 +1,152 @@
+from unittest.mock import Mock, patch
+import json
+
+def test_memoryBackends_structure():
+    """测试模块memoryBackends的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'anaMemory', 'memoryBackends.py')
+    assert os.path.exists(file_path), f"memoryBackends文件不存在: {file_path}"
+
+def test_create_memory_backend():
+    """测试按名称创建后端"""
+    import pytest
+    from deeptracer.anaMemory.memoryBackends import (
+        create_memory_backend,
+        MemrayBackend,
+        TracemallocBackend
+    )
+    backend = create_memory_backend("tracemalloc", frames=4, interval=0.5)
+    assert isinstance(backend, TracemallocBackend)
+    assert backend.options == {"frames": 4, "interval": 0.5, "budget": 0.05}
+    with pytest.raises(ValueError):
+        create_memory_backend("valgrind")
+    with pytest.raises(ValueError):
+        create_memory_backend("tracemalloc", frames=0)
+    with pytest.raises(ValueError):
+        create_memory_backend("tracemalloc", budget=0)
+    with patch.object(MemrayBackend, "available", return_value=False):
+        assert create_memory_backend("auto", frames=2).name == "tracemalloc"
+    with patch.object(MemrayBackend, "available", return_value=True):
+        assert create_memory_backend("auto", frames=2).name == "memray"
+
+def test_incomplete_backend():
+    """测试未实现全部接口的后端不能实例化"""
+    import pytest
+    from deeptracer.anaMemory.memoryBackends import MemoryBackend
+    class TraceOnly(MemoryBackend):
+        @classmethod
+        def available(cls):
+            return True
+        def trace(self, analyzer):
+            pass
+    with pytest.raises(TypeError):
+        TraceOnly()
+
+def test_runner_runs_once(tmp_path):
+    """测试执行器以 python -m 启动时不会被包初始化重复导入"""
+    import sys
+    import subprocess
+    script = tmp_path / "noop.py"
+    script.write_text("x = 1\n", encoding="utf-8")
+    completed = subprocess.run([sys.executable, "-m", "deeptracer.anaMemory.tracemallocRunner",
+                                "--output", str(tmp_path / "out.json"), str(script)],
+                               capture_output=True, text=True)
+    assert completed.returncode == 0
+    assert "found in sys.modules" not in completed.stderr
+
+def test_memray_only_features(tmp_path):
+    """测试tracemalloc后端不支持的分析"""
+    import pytest
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "noop.py"
+    script.write_text("x = 1\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        MemoryAnalyzer(str(script), backend="tracemalloc", aggregated=True)
+    memoryAnalyzer = MemoryAnalyzer(str(script),
+                                    output_dir=str(tmp_path / "report"),
+                                    backend="tracemalloc")
+    assert memoryAnalyzer.trace_bin.name == "mem_trace.tracemalloc.json"
+    result = memoryAnalyzer.run_leak_analysis()
+    assert not result["success"] and "tracemalloc" in result["error"]
+    assert not memoryAnalyzer.compare(str(script))["success"]
+
+def test_main_function(tmp_path):
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "grow.py"
+    script.write_text("import time\n"
+                      "def build():\n"
+                      "    return [bytearray(100000) for _ in range(10)]\n"
+                      "data = []\n"
+                      "for _ in range(20):\n"
+                      "    data.append(build())\n"
+                      "    time.sleep(0.02)\n",
+                      encoding="utf-8")
+    memoryAnalyzer = MemoryAnalyzer(str(script),
+                                    output_dir=str(tmp_path / "report"),
+                                    backend="tracemalloc",
+                                    backend_options={"frames": 2, "interval": 0.05})
+    result = memoryAnalyzer.run_full_analysis(top_n=3, timeline=True, timeline_points=4)
+    assert result["success"]
+    assert "html_report" not in result
+    assert not memoryAnalyzer.trace_bin.exists()
+    summary = result["summary"]
+    assert summary["format"] == "tracemalloc" and summary["frames"] == 2
+    assert summary["peak_heap"] >= 200 * 100000
+    assert summary["total_bytes"] is None
+    assert summary["snapshots"] >= 2 and summary["site_snapshots"] >= 1
+    top = summary["top_by_size"][0]
+    assert top["line"] == 3 and top["bytes"] >= 200 * 100000 and top["count"] >= 200
+    assert "bytearray(100000)" in top["source"]
+    assert len(top["stack"]) == 2 and top["stack"][0]["line"] == 3
+    #调用栈深度为2 由内向外
+    with open(result["timeline_json"], "r", encoding="utf-8") as fp:
+        timeline = json.load(fp)
+    assert 1 <= len(timeline["points"]) <= 4
+    assert timeline["interval_ms"] == 50
+    heaps = [point["heap"] for point in timeline["points"]]
+    assert heaps == sorted(heaps)
+    assert any(site["growth_bytes"] > 0 for point in timeline["points"] for site in point["top_sites"])
+
+def test_short_script_sites(tmp_path):
+    """测试很短的脚本在默认预算下摘要仍包含分配位置"""
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "short.py"
+    script.write_text("data = [bytearray(10000) for _ in range(100)]\n", encoding="utf-8")
+    memoryAnalyzer = MemoryAnalyzer(str(script),
+                                    output_dir=str(tmp_path / "report"),
+                                    backend="tracemalloc")
+    result = memoryAnalyzer.run_full_analysis()
+    assert result["success"]
+    summary = result["summary"]
+    assert summary["final_snapshot"] and summary["site_snapshots"] == 1
+    assert summary["top_by_size"] and summary["top_by_count"]
+    assert summary["top_by_size"][0]["line"] == 1
+
+def test_runner_overhead(tmp_path):
+    """测试存活块数很多时分配位置快照的开销受预算限制 堆采样不受影响"""
+    import sys
+    import subprocess
+    script = tmp_path / "blocks.py"
+    script.write_text("import time\n"
+                      "data = [str(i) for i in range(300000)]\n"
+                      "deadline = time.perf_counter() + 1.0\n"
+                      "while time.perf_counter() < deadline:\n"
+                      "    data[0] = str(time.perf_counter())\n"
+                      "    time.sleep(0.005)\n",
+                      encoding="utf-8")
+    output = tmp_path / "out.json"
+    completed = subprocess.run([sys.executable, "-m", "deeptracer.anaMemory.tracemallocRunner",
+                                "--output", str(output), "--interval", "0.01", str(script)],
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    with open(output, "r", encoding="utf-8") as fp:
+        result = json.load(fp)
+    assert result["snapshot_seconds"] <= result["budget"] * result["duration"] + 0.1
+    #每次快照约需复制 30 万条分配记录 按采样间隔获取时开销是运行时间的数十倍
+    assert result["duration"] < 10
+    assert len(result["samples"]) >= 20
+    assert max(sample["heap"] for sample in result["samples"]) >= 300000 * 40
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
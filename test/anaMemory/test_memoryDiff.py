@@ -0,0 +1,78 @@
+from unittest.mock import Mock, patch
+import json
+
+def test_memoryDiff_structure():
+    """测试模块memoryDiff的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'anaMemory', 'memoryDiff.py')
+    assert os.path.exists(file_path), f"memoryDiff文件不存在: {file_path}"
+
+def test_normalize_stack_ignores_line_and_runner_frames():
+    """测试归一化调用栈忽略行号与执行器帧"""
+    import runpy
+    from deeptracer.anaMemory.memoryDiff import normalize_stack
+    frames = [("build", "/tmp/a.py", 3), ("<module>", "/tmp/a.py", 10), ("_run_code", runpy.__file__, 86)]
+    moved = [("build", "/tmp/b.py", 7), ("<module>", "/tmp/b.py", 12)]
+    aliases = {"/tmp/a.py": "<script>", "/tmp/b.py": "<script>"}
+    assert normalize_stack(frames, aliases) == normalize_stack(moved, aliases)
+    assert normalize_stack(frames, aliases)[0] == ("<module>", "<script>")
+    assert normalize_stack([("_run_code", runpy.__file__, 86)], aliases) == (("<unknown>", ""),)
+
+def test_invalid_metric(tmp_path):
+    """测试不支持的对比指标"""
+    import pytest
+    from deeptracer.anaMemory import MemoryDiff
+    with pytest.raises(ValueError):
+        MemoryDiff("a.py", "b.py", metric="rss")
+    with pytest.raises(ValueError):
+        MemoryDiff("a.py", "b.py", metric="total", aggregated=True)
+
+ORIGINAL = ("def total():\n"
+            "    values = [bytearray(1000) for _ in range(5000)]\n"
+            "    return sum(len(value) for value in values)\n"
+            "print(total())\n")
+OPTIMIZED = ("import os\n"
+             "def total():\n"
+             "    return sum(len(bytearray(1000)) for _ in range(5000))\n"
+             "print(total())\n")
+
+def test_main_function(tmp_path):
+    from deeptracer.anaMemory import MemoryAnalyzer, MemoryDiff
+    before = tmp_path / "before.py"
+    after = tmp_path / "after.py"
+    before.write_text(ORIGINAL, encoding="utf-8")
+    after.write_text(OPTIMIZED, encoding="utf-8")
+    result = MemoryAnalyzer(str(before)).compare(str(after),
+                                                 output_path=str(tmp_path / "memoryDiff.json"),
+                                                 top_n=5)
+    assert result["success"]
+    diff = result["diff"]
+    assert diff["metric"] == "peak"
+    assert diff["peak_delta"] < -4000 * 1000 and diff["peak_ratio"] < 0.5
+    shrunk = diff["sites"][0]
+    assert shrunk["delta_bytes"] <= -5000 * 1000 and shrunk["before_count"] >= 5000
+    assert "bytearray(1000)" in shrunk["source"]
+    assert [frame["function"] for frame in shrunk["stack"]][-2:] == ["total", "<module>"]
+    assert all(site["status"] == "new" and site["before_bytes"] == 0 for site in diff["new_sites"])
+    assert len(diff["sites"]) <= 5
+    with open(result["json"], "r", encoding="utf-8") as fp:
+        assert json.load(fp)["peak_delta"] == diff["peak_delta"]
+    with open(result["html"], "r", encoding="utf-8") as fp:
+        assert "Memory diff (peak)" in fp.read()
+
+    reply = tmp_path / "agentReply.json"
+    reply.write_text(json.dumps({"full_optimized_code": OPTIMIZED}), encoding="utf-8")
+    diff = MemoryDiff.from_agent_reply(str(before),
+                                       str(reply),
+                                       output_path=str(tmp_path / "agentDiff.json"),
+                                       metric="total")
+    result = diff.compare()
+    total = [site for site in result["sites"] if site["function"] == "total"]
+    assert result["after"]["bytes"] > 0
+    assert all(site["file"] == str(before) for site in total)
+    #临时文件映射回原脚本
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(".before-")]
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,49 @@
+from unittest.mock import Mock, patch
+
+def test_memoryTimeline_structure():
+    """测试模块memoryTimeline的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'anaMemory', 'memoryTimeline.py')
+    assert os.path.exists(file_path), f"memoryTimeline文件不存在: {file_path}"
+
+def test_buckets_and_live_bytes():
+    """测试快照分组与存活字节计算"""
+    from deeptracer.anaMemory.memoryTimeline import buckets, _live_bytes
+    assert buckets(10, 3) == [(0, 2), (3, 6), (7, 9)]
+    assert buckets(2, 100) == [(0, 0), (1, 1)]
+    intervals = [(1, 3, 100), (2, None, 50)]
+    assert _live_bytes(intervals, [0, 1, 2, 3, 9]) == [0, 100, 150, 50, 50]
+
+def test_main_function(tmp_path):
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "phases.py"
+    script.write_text("import time\n"
+                      "def load():\n"
+                      "    return [bytearray(10000) for _ in range(2000)]\n"
+                      "def transform():\n"
+                      "    return [bytearray(50000) for _ in range(1000)]\n"
+                      "data = load()\n"
+                      "time.sleep(0.1)\n"
+                      "del data\n"
+                      "data = transform()\n"
+                      "time.sleep(0.1)\n",
+                      encoding="utf-8")
+    memoryAnalyzer = MemoryAnalyzer(str(script), output_dir=str(tmp_path / "report"))
+    result = memoryAnalyzer.run_full_analysis(flamegraph=False, timeline=True, timeline_points=10)
+    assert result["success"]
+    import json
+    with open(result["timeline_json"], encoding="utf-8") as fp:
+        timeline = json.load(fp)
+    points = timeline["points"]
+    assert 0 < len(points) <= 10
+    assert points == sorted(points, key=lambda point: point["start"])
+    tops = [point["top_sites"][0]["line"] for point in points if point["top_sites"]]
+    assert 3 in tops and 5 in tops
+    assert tops.index(3) < tops.index(5)
+    peak = max(points, key=lambda point: point["heap"])
+    assert peak["heap"] >= 50 * 1000 * 1000
+    assert peak["top_sites"][0]["line"] == 5
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -1,4 +1,5 @@
 from unittest.mock import Mock, patch
+import json
 
 def test_MemoryAnalyer_import():
     """测试能否正常导入MemoryAnalyzer类"""
@@ -23,5 +24,88 @@ def test_main_function():
     )
     memoryAnalyzer.run_full_analysis()
 
+def test_cli_rejects_ignored_memory_options():
+    """测试 memory 子命令中所选模式会忽略的选项在分析之前报错"""
+    import pytest
+    from deeptracer.cli import main
+    from deeptracer.anaMemory import MemoryAnalyzer, LiveMonitor
+    for argv in (["--checkpoints"],
+                 ["--leaks", "--timeline"],
+                 ["--leaks", "--high-watermark"],
+                 ["--timeline-points", "10"],
+                 ["--refresh", "2"],
+                 ["--kill-above-mb", "10"],
+                 ["--live", "--aggregated"],
+                 ["--live", "--min-site-bytes", "1024"],
+                 ["--live", "--frames", "3"],
+                 ["--live", "--snapshot-interval", "0.5"],
+                 ["--live", "--snapshot-budget", "0.2"]):
+        with patch.object(MemoryAnalyzer, "run_full_analysis") as full, \
+                patch.object(MemoryAnalyzer, "run_leak_analysis") as leaks, \
+                patch.object(LiveMonitor, "watch") as watch:
+            with pytest.raises(SystemExit) as error:
+                main(["memory", "test/test_sources/test_fast.py"] + argv)
+        assert error.value.code == 2, argv
+        full.assert_not_called()
+        leaks.assert_not_called()
+        watch.assert_not_called()
+
+def test_summary_without_flamegraph(tmp_path):
+    """测试结构化摘要与关闭火焰图"""
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "alloc.py"
+    script.write_text("import os\n"
+                      "def grow():\n"
+                      "    return [os.urandom(4096) for _ in range(2000)]\n"
+                      "data = grow()\n",
+                      encoding="utf-8")
+    memoryAnalyzer = MemoryAnalyzer(str(script), output_dir=str(tmp_path / "report"))
+    result = memoryAnalyzer.run_full_analysis(flamegraph=False, top_n=5)
+    assert result["success"]
+    assert "html_report" not in result
+    assert not memoryAnalyzer.html_report.exists()
+    assert not memoryAnalyzer.trace_bin.exists()
+    summary = result["summary"]
+    assert summary["peak_heap"] >= 2000 * 4096
+    assert summary["peak_rss"] >= summary["peak_heap"]
+    assert summary["total_allocations"] >= 2000
+    assert summary["peak_allocations"] > 0
+    top = summary["top_by_size"][0]
+    assert top["line"] == 3 and "os.urandom" in top["source"]
+    assert len(summary["top_by_count"]) <= 5
+    assert (tmp_path / "report" / "mem_summary.json").exists()
+
+def test_aggregated_capture(tmp_path):
+    """测试聚合捕获格式与分配位置阈值"""
+    from deeptracer.anaMemory import MemoryAnalyzer
+    script = tmp_path / "churn.py"
+    script.write_text("def churn():\n"
+                      "    for _ in range(20000):\n"
+                      "        bytearray(1000)\n"
+                      "def keep():\n"
+                      "    return [bytearray(100000) for _ in range(50)]\n"
+                      "small = bytearray(64)\n"
+                      "churn()\n"
+                      "data = keep()\n",
+                      encoding="utf-8")
+    memoryAnalyzer = MemoryAnalyzer(str(script),
+                                    output_dir=str(tmp_path / "report"),
+                                    aggregated=True,
+                                    min_site_bytes=1024)
+    result = memoryAnalyzer.run_full_analysis(flamegraph=False, timeline=True, clean_temp=False)
+    assert result["success"]
+    assert memoryAnalyzer.trace_bin.stat().st_size < 200000
+    #两万次分配只留下各调用栈的汇总
+    summary = result["summary"]
+    assert summary["format"] == "aggregated" and summary["sites_at"] == "peak"
+    assert summary["total_bytes"] is None and summary["total_allocations"] is None
+    top = summary["top_by_size"][0]
+    assert top["line"] == 5 and top["bytes"] >= 50 * 100000
+    assert all(site["bytes"] >= 1024 for site in summary["top_by_size"])
+    assert summary["below_threshold"]["sites"] > 0
+    with open(result["timeline_json"], "r", encoding="utf-8") as fp:
+        timeline = json.load(fp)
+    assert timeline["points"] and all(not point["top_sites"] for point in timeline["points"])
+
 if __name__ == "__main__":
     test_main_function()
@@ -0,0 +1,114 @@
+from unittest.mock import Mock, patch
+
+def test_PerformanceBudget_import():
+    """测试能否正常导入PerformanceBudget类"""
+    with patch('builtins.__import__'):
+        try:
+            from deeptracer.budget import PerformanceBudget
+            assert PerformanceBudget is not None
+        except ImportError as e:
+            assert str(e) != ""
+
+def test_performanceBudget_structure():
+    """测试模块performanceBudget的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'budget', 'performanceBudget.py')
+    assert os.path.exists(file_path), f"performanceBudget文件不存在: {file_path}"
+
+def test_update_baseline_requires_baseline(tmp_path):
+    """测试 --update-baseline 缺少 --baseline 时在测量之前报错"""
+    import pytest
+    from deeptracer.cli import main
+    from deeptracer.budget import PerformanceBudget
+    with patch.object(PerformanceBudget, "check") as check:
+        with pytest.raises(SystemExit) as error:
+            main(["check", str(tmp_path / "budget.json"), "--update-baseline"])
+    assert error.value.code == 2
+    check.assert_not_called()
+
+def test_callable_function_budget_per_call(tmp_path):
+    """测试可调用目标重复调用时函数耗时与总耗时一样按单次调用计算"""
+    import json
+    from deeptracer.budget import PerformanceBudget
+    (tmp_path / "budget_work.py").write_text("import time\n"
+                                             "def work():\n"
+                                             "    time.sleep(0.01)\n")
+    budget_path = tmp_path / "budget.json"
+    budget_path.write_text(json.dumps({"targets": {
+        "budget_work:work": {
+            "repeat": 10,
+            "duration": "50ms",
+            "functions": {"work": {"total_time": "50ms"}}
+        }
+    }}))
+    budget = PerformanceBudget(str(budget_path), output_path=str(tmp_path / "check.json"))
+    result = budget.check()
+    assert result["passed"], result["violations"]
+    metrics = result["measurements"]["budget_work:work"]
+    assert 0.005 < metrics["functions"]["work"]["total_time"] < 0.05
+    assert metrics["functions"]["work"]["total_time"] <= metrics["duration"] * 1.5
+
+def test_method_and_unknown_function_keys(tmp_path):
+    """测试 "类名.方法名" 键按类匹配 没有匹配任何函数的键视为失败"""
+    import json
+    from deeptracer.budget import PerformanceBudget
+    (tmp_path / "methods.py").write_text("import time\n"
+                                         "class K:\n"
+                                         "    def slow(self):\n"
+                                         "        end = time.perf_counter() + 0.05\n"
+                                         "        while time.perf_counter() < end:\n"
+                                         "            pass\n"
+                                         "K().slow()\n")
+    budget_path = tmp_path / "budget.json"
+    budget_path.write_text(json.dumps({"targets": {
+        "methods.py": {"functions": {"K.slow": {"self_time": "1ms"},
+                                     "Other.slow": {"self_time": "1ms"},
+                                     "slwo": {"total_time": "1ms"}}}
+    }}))
+    budget = PerformanceBudget(str(budget_path), output_path=str(tmp_path / "check.json"))
+    result = budget.check()
+    violations = {check["metric"]: check for check in result["violations"]}
+    assert set(violations) == {"K.slow.self_time", "Other.slow.self_time", "slwo.total_time"}
+    assert violations["K.slow.self_time"]["reason"] == "budget"
+    assert violations["K.slow.self_time"]["measured"] > 0.01
+    assert violations["slwo.total_time"]["reason"] == "not_found"
+    assert violations["Other.slow.self_time"]["reason"] == "not_found"
+    assert result["measurements"]["methods.py"]["functions"]["slwo"] is None
+    assert "没有匹配的函数" in PerformanceBudget.format_result(result)
+
+def test_main_function(tmp_path):
+    import json
+    import shutil
+    from deeptracer.cli import main
+    from deeptracer.budget import PerformanceBudget
+    shutil.copy("test/test_sources/test_fast.py", tmp_path / "test_fast.py")
+    budget_path = tmp_path / "budget.json"
+    budget_path.write_text(json.dumps({"targets": {
+        "test_fast.py": {
+            "duration": "30s",
+            "peak_memory": "1GiB",
+            "functions": {"slow_sum": {"self_time": "10us"}, "test_fast.py:wait_io": {"total_time": None}}
+        }
+    }}))
+    output = str(tmp_path / "check.json")
+    budget = PerformanceBudget(str(budget_path), output_path=output)
+    result = budget.check()
+    assert not result["passed"]
+    assert [check["metric"] for check in result["violations"]] == ["slow_sum.self_time"]
+    assert result["measurements"]["test_fast.py"]["functions"]["test_fast.py:wait_io"]["total_time"] > 0.04
+    assert "FAIL" in PerformanceBudget.format_result(result)
+    baseline = tmp_path / "baseline.json"
+    assert main(["check", str(budget_path), "--baseline", str(baseline),
+                 "--update-baseline", "--output", output]) == 0
+    saved = json.loads(baseline.read_text())
+    saved["targets"]["test_fast.py"]["functions"]["test_fast.py:wait_io"]["total_time"] = 0.001
+    baseline.write_text(json.dumps(saved))
+    budget = PerformanceBudget(str(budget_path), baseline_path=str(baseline), tolerance=0.5,
+                               output_path=output)
+    result = budget.check()
+    metrics = {check["metric"]: check for check in result["violations"]}
+    assert metrics["test_fast.py:wait_io.total_time"]["reason"] == "baseline"
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
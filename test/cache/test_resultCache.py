@@ -0,0 +1,63 @@
+from unittest.mock import Mock, patch
+
+def test_ResultCache_import():
+    """测试能否正常导入ResultCache类"""
+    with patch('builtins.__import__'):
+        try:
+            from deeptracer.cache import ResultCache
+            assert ResultCache is not None
+        except ImportError as e:
+            assert str(e) != ""
+
+def test_resultCache_structure():
+    """测试模块resultCache的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'cache', 'resultCache.py')
+    assert os.path.exists(file_path), f"resultCache文件不存在: {file_path}"
+
+def test_key_changes_with_params(tmp_path):
+    """测试缓存键随参数与源码变化"""
+    from deeptracer.cache import ResultCache
+    script = tmp_path / "demo.py"
+    script.write_text("x = 1\n")
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    key = cache.make_key(str(script), "pyinstrument", {"interval": 0.001})
+    assert key == cache.make_key(str(script), "pyinstrument", {"interval": 0.001})
+    assert key != cache.make_key(str(script), "pyinstrument", {"interval": 0.01})
+    script.write_text("x = 2\n")
+    assert key != cache.make_key(str(script), "pyinstrument", {"interval": 0.001})
+
+def test_lru_eviction(tmp_path):
+    """测试超过容量时淘汰最久未访问的条目"""
+    import time
+    from deeptracer.cache import ResultCache
+    report = tmp_path / "report.html"
+    report.write_text("x" * 100)
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"), max_bytes=250)
+    cache.put("a" * 64, {"report": str(report)}, {"n": 1})
+    time.sleep(0.01)
+    cache.put("b" * 64, {"report": str(report)}, {"n": 2})
+    time.sleep(0.01)
+    assert cache.get("a" * 64)["summary"] == {"n": 1}
+    #访问a之后b成为最久未访问
+    time.sleep(0.01)
+    cache.put("c" * 64, {"report": str(report)}, {"n": 3})
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) is not None
+    assert cache.get("c" * 64) is not None
+
+def test_main_function(tmp_path):
+    from deeptracer.cache import ResultCache
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    report_path = str(tmp_path / "report.html")
+    Analyzer = PyInstrumentAnalyzer(default_report_path=report_path, cache=cache)
+    Analyzer.generate_perf_report("test/test_sources/test_fast.py")
+    with patch.object(PyInstrumentAnalyzer, "_execute_py_file") as execute:
+        Analyzer = PyInstrumentAnalyzer(default_report_path=report_path, cache=cache)
+        Analyzer.generate_perf_report("test/test_sources/test_fast.py")
+        execute.assert_not_called()
+    assert Analyzer.summary["sample_count"] > 0
+
+if __name__ == "__main__":
+    test_main_function()
@@ -0,0 +1,37 @@
+from unittest.mock import Mock, patch
+
+def test_AnalysisOrchestrator_import():
+    """测试能否正常导入AnalysisOrchestrator类"""
+    with patch('builtins.__import__'):
+        try:
+            from deeptracer.pipeline import AnalysisOrchestrator
+            assert AnalysisOrchestrator is not None
+        except ImportError as e:
+            assert str(e) != ""
+
+def test_orchestrator_structure():
+    """测试模块orchestrator的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'pipeline', 'orchestrator.py')
+    assert os.path.exists(file_path), f"orchestrator文件不存在: {file_path}"
+
+def test_flow_requires_all_stages():
+    """测试智能体阶段缺少依赖时报错"""
+    import pytest
+    from deeptracer.pipeline import AnalysisOrchestrator
+    with pytest.raises(ValueError):
+        AnalysisOrchestrator(stages=("profile",), with_flow=True)
+
+def test_main_function(tmp_path):
+    from deeptracer.pipeline import AnalysisOrchestrator
+    orchestrator = AnalysisOrchestrator(
+        stages=("profile", "ast"),
+        output_dir=str(tmp_path)
+    )
+    results = orchestrator.run("test/test_sources/test_fast.py")
+    stages = list(results.values())[0]
+    assert stages["profile"]["success"], stages["profile"]
+    assert stages["ast"]["success"], stages["ast"]
+
+if __name__ == "__main__":
+    test_main_function()
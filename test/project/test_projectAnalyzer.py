@@ -0,0 +1,96 @@
+from unittest.mock import Mock, patch
+
+def test_ProjectAnalyzer_import():
+    """测试能否正常导入ProjectAnalyzer类"""
+    with patch('builtins.__import__'):
+        try:
+            from deeptracer.project import ProjectAnalyzer
+            assert ProjectAnalyzer is not None
+        except ImportError as e:
+            assert str(e) != ""
+
+def test_projectAnalyzer_structure():
+    """测试模块projectAnalyzer的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'project', 'projectAnalyzer.py')
+    assert os.path.exists(file_path), f"projectAnalyzer文件不存在: {file_path}"
+
+def _make_package(root):
+    pkg = root / "pkg"
+    (pkg / "sub").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "sub" / "__init__.py").write_text("")
+    (pkg / "base.py").write_text("VALUE = 1\n")
+    (pkg / "sub" / "user.py").write_text("from ..base import VALUE\n")
+    (pkg / "top.py").write_text("import pkg.sub.user\n")
+    (pkg / "alone.py").write_text("import os\n")
+    return pkg
+
+def test_scan_resolves_imports(tmp_path):
+    """测试相对导入与绝对导入的解析"""
+    from deeptracer.project import ProjectAnalyzer
+    pkg = _make_package(tmp_path)
+    analyzer = ProjectAnalyzer(str(pkg), output_dir=str(tmp_path / "out"))
+    modules = analyzer.scan()
+    assert modules["pkg.sub.user"]["imports"] == ["pkg.base"]
+    assert modules["pkg.top"]["imports"] == ["pkg.sub.user"]
+    assert modules["pkg.alone"]["imports"] == []
+
+def test_main_function(tmp_path):
+    from deeptracer.project import ProjectAnalyzer
+    pkg = _make_package(tmp_path)
+    analyzer = ProjectAnalyzer(str(pkg), output_dir=str(tmp_path / "out"), stages=("ast",))
+    report = analyzer.run()
+    assert len(report["analyzed"]) == report["total"] == 6
+    assert not report["failed"]
+    assert analyzer.run()["analyzed"] == []
+    (pkg / "base.py").write_text("VALUE = 2\n")
+    report = analyzer.run()
+    assert report["analyzed"] == ["pkg.base", "pkg.sub.user", "pkg.top"]
+    assert report["modules"]["pkg.alone"]["status"] == "unchanged"
+
+def test_failed_module_not_replanned(tmp_path):
+    """测试内容与导入关系未变化的失败模块不会被重新分析"""
+    from deeptracer.project import ProjectAnalyzer
+    pkg = _make_package(tmp_path)
+    analyzer = ProjectAnalyzer(str(pkg), output_dir=str(tmp_path / "out"), stages=("ast",))
+    modules = analyzer.scan()
+    manifest = {name: {**info, "success": name != "pkg.base"} for name, info in modules.items()}
+    assert analyzer.plan(modules, manifest) == set()
+    (pkg / "base.py").write_text("VALUE = 2\n")
+    assert analyzer.plan(analyzer.scan(), manifest) == {"pkg.base", "pkg.sub.user", "pkg.top"}
+
+def test_relative_import_modules_run(tmp_path):
+    """测试使用相对导入的模块以包内模块的身份执行"""
+    import pytest
+    pytest.importorskip("pyinstrument")
+    from deeptracer.project import ProjectAnalyzer
+    pkg = _make_package(tmp_path)
+    (pkg / "sub" / "user.py").write_text("from ..base import VALUE\n"
+                                         "if __name__ == '__main__':\n"
+                                         "    assert VALUE == 1\n")
+    analyzer = ProjectAnalyzer(str(pkg), output_dir=str(tmp_path / "out"), stages=("profile",))
+    report = analyzer.run()
+    assert not report["failed"], report["failed"]
+    assert analyzer.run()["analyzed"] == []
+
+def test_dependency_change_misses_cache(tmp_path, capfd):
+    """测试依赖变化后 导入者的执行阶段不会命中旧的缓存结果"""
+    import os
+    import pytest
+    pytest.importorskip("pyinstrument")
+    from deeptracer.project import ProjectAnalyzer
+    pkg = _make_package(tmp_path)
+    analyzer = ProjectAnalyzer(str(pkg), output_dir=str(tmp_path / "out"), stages=("profile",),
+                               cache_dir=str(tmp_path / "cache"))
+    analyzer.run()
+    analyzer.run(force=True)
+    assert os.path.join("pkg", "top.py") in "".join(line for line in capfd.readouterr().out.splitlines()
+                                   if "命中缓存" in line)
+    (pkg / "base.py").write_text("VALUE = 2\n")
+    report = analyzer.run()
+    assert report["analyzed"] == ["pkg.base", "pkg.sub.user", "pkg.top"]
+    assert "命中缓存" not in capfd.readouterr().out
+
+if __name__ == "__main__":
+    test_main_function()
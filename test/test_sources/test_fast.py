@@ -0,0 +1,32 @@
+# test_fast.py
+# 轻量级测试脚本：运行时间短,用于分析器的功能测试
+import time
+
+
+def slow_sum(n):
+    # 纯python循环 用于产生可观测的热点
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def fast_sum(n):
+    return sum(i * i for i in range(n))
+
+
+def wait_io():
+    # 模拟I/O等待
+    time.sleep(0.05)
+
+
+def main():
+    data = [str(i) for i in range(50_000)]
+    slow_sum(300_000)
+    fast_sum(300_000)
+    wait_io()
+    return len(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from unittest.mock import Mock, patch
+
+def test_flameGraph_structure():
+    """测试模块flameGraph的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'utils', 'flameGraph.py')
+    assert os.path.exists(file_path), f"flameGraph文件不存在: {file_path}"
+
+def test_render_colors_and_pruning():
+    """测试节点颜色与过窄节点的裁剪"""
+    from deeptracer.utils import diff_node, render_diff_flamegraph
+    root = diff_node("all")
+    root["before"], root["after"] = 10.0, 10.0
+    for name, before, after in (("added", 0.0, 4.0), ("gone", 4.0, 0.0), ("tiny", 0.0, 0.00001)):
+        child = root["children"].setdefault(name, diff_node(name))
+        child["before"], child["after"] = before, after
+    content = render_diff_flamegraph(root, "<title>")
+    assert "rgb(200,40,40)" in content and "rgb(40,80,200)" in content
+    assert "tiny" not in content
+    assert "&lt;title&gt;" in content
+
+def test_main_function(tmp_path):
+    from deeptracer.utils import diff_node, write_diff_flamegraph
+    root = diff_node("all")
+    root["before"], root["after"] = 1024.0, 2048.0
+    path = write_diff_flamegraph(root, str(tmp_path / "diff.html"), "memory", unit="B")
+    with open(path, encoding="utf-8") as fp:
+        assert "2.0KiB" in fp.read()
+
+if __name__ == "__main__":
+    test_main_function()
@@ -0,0 +1,48 @@
+from unittest.mock import Mock, patch
+
+def test_moduleTarget_structure():
+    """测试模块moduleTarget的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'utils', 'moduleTarget.py')
+    assert os.path.exists(file_path), f"moduleTarget文件不存在: {file_path}"
+
+def _make_package(root):
+    pkg = root / "relpkg"
+    (pkg / "sub").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "sub" / "__init__.py").write_text("from .. import base\n")
+    (pkg / "base.py").write_text("VALUE = 1\n")
+    (pkg / "sub" / "user.py").write_text(
+        "from ..base import VALUE\n"
+        "if __name__ == '__main__':\n"
+        "    RESULT = VALUE + 1\n")
+    return pkg
+
+def test_module_import_root(tmp_path):
+    """测试由模块名推出导入根目录"""
+    from deeptracer.utils import module_import_root, search_path
+    pkg = _make_package(tmp_path)
+    user = str(pkg / "sub" / "user.py")
+    assert module_import_root(user, "relpkg.sub.user") == str(tmp_path)
+    assert module_import_root(str(pkg / "sub" / "__init__.py"), "relpkg.sub") == str(tmp_path)
+    assert search_path(user) == str(pkg / "sub")
+
+def test_run_target_relative_import(tmp_path):
+    """测试以模块身份执行时相对导入可以解析"""
+    import sys
+    from deeptracer.utils import run_target, search_path
+    pkg = _make_package(tmp_path)
+    user = str(pkg / "sub" / "user.py")
+    init = str(pkg / "sub" / "__init__.py")
+    sys.path.insert(0, search_path(user, "relpkg.sub.user"))
+    try:
+        assert run_target(user, "relpkg.sub.user")["RESULT"] == 2
+        assert run_target(init, "relpkg.sub")["base"].VALUE == 1
+    finally:
+        sys.path.pop(0)
+        for name in [name for name in sys.modules if name.split(".")[0] == "relpkg"]:
+            del sys.modules[name]
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,32 @@
+from unittest.mock import Mock, patch
+
+def test_quantity_structure():
+    """测试模块quantity的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'utils', 'quantity.py')
+    assert os.path.exists(file_path), f"quantity文件不存在: {file_path}"
+
+def test_parse_quantity():
+    """测试带单位预算值的解析"""
+    from deeptracer.utils.quantity import parse_quantity, SIZE_UNITS, TIME_UNITS
+    assert parse_quantity("200ms", TIME_UNITS) == 0.2
+    assert parse_quantity(1.5, TIME_UNITS) == 1.5
+    assert parse_quantity("2MiB", SIZE_UNITS) == 2 * 1024 ** 2
+    assert parse_quantity(None, SIZE_UNITS) is None
+    try:
+        parse_quantity("3 parsecs", TIME_UNITS)
+        assert False
+    except ValueError:
+        pass
+
+def test_format_quantity():
+    """测试指标值的格式化"""
+    from deeptracer.utils import format_quantity
+    assert format_quantity(3 * 1024 ** 2, "peak_memory") == "3.0MiB"
+    assert format_quantity(-2048, "peak_memory") == "-2.0KiB"
+    assert format_quantity(0.2, "duration") == "200.0ms"
+    assert format_quantity(2.5, "duration") == "2.500s"
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+from unittest.mock import Mock, patch
+
+def test_RunContext_import():
+    """测试能否正常导入RunContext类"""
+    with patch('builtins.__import__'):
+        try:
+            from deeptracer.utils import RunContext
+            assert RunContext is not None
+        except ImportError as e:
+            assert str(e) != ""
+
+def test_runContext_structure():
+    """测试模块runContext的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'utils', 'runContext.py')
+    assert os.path.exists(file_path), f"runContext文件不存在: {file_path}"
+
+def test_unique_run_dirs(tmp_path):
+    """测试并发创建的运行目录互不相同"""
+    from deeptracer.utils import RunContext
+    contexts = [RunContext(runs_root=str(tmp_path)) for _ in range(5)]
+    assert len({context.run_dir for context in contexts}) == 5
+    for context in contexts:
+        context.close()
+
+def test_retention_skips_active_runs(tmp_path):
+    """测试保留策略只清理已结束的运行"""
+    import os
+    from deeptracer.utils import RunContext
+    finished = []
+    for _ in range(3):
+        with RunContext(runs_root=str(tmp_path), keep_last=None) as context:
+            finished.append(context.run_dir)
+    active = RunContext(runs_root=str(tmp_path), keep_last=1)
+    active.cleanup()
+    remaining = [path for path in finished if os.path.exists(path)]
+    assert len(remaining) == 1
+    assert os.path.exists(active.run_dir)
+    active.close()
+
+def test_retention_per_prefix(tmp_path):
+    """测试保留策略只作用于同一前缀 同时结束的运行可一起保留"""
+    import os
+    from deeptracer.utils import RunContext
+    a = RunContext(runs_root=str(tmp_path), prefix="a", keep_last=1)
+    b = RunContext(runs_root=str(tmp_path), prefix="b", keep_last=1)
+    a.close()
+    b.close()
+    assert os.path.exists(a.run_dir) and os.path.exists(b.run_dir)
+    first = RunContext(runs_root=str(tmp_path), prefix="main", keep_last=1)
+    second = RunContext(runs_root=str(tmp_path), prefix="main", keep_last=1)
+    for context in (first, second):
+        context.close(cleanup=False)
+    first.cleanup(exclude=[first.run_dir, second.run_dir])
+    assert os.path.exists(first.run_dir) and os.path.exists(second.run_dir)
+    with RunContext(runs_root=str(tmp_path), prefix="main", keep_last=1) as latest:
+        pass
+    assert os.path.exists(latest.run_dir)
+    assert not os.path.exists(first.run_dir) and not os.path.exists(second.run_dir)
+
+def test_retention_prefix_is_exact(tmp_path):
+    """测试前缀互为前缀时 保留策略不会删除其他前缀的运行目录"""
+    import os
+    from deeptracer.utils import RunContext
+    with RunContext(runs_root=str(tmp_path), prefix="test-fast", keep_last=None) as other:
+        pass
+    with RunContext(runs_root=str(tmp_path), prefix="test", keep_last=0) as context:
+        pass
+    assert os.path.exists(other.run_dir)
+    assert not os.path.exists(context.run_dir)
+
+def test_pid_exists():
+    """测试进程存活判断"""
+    import os
+    import sys
+    import subprocess
+    from deeptracer.utils.runContext import _pid_exists
+    assert _pid_exists(os.getpid())
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    assert not _pid_exists(process.pid)
+
+def test_main_function(tmp_path):
+    import os
+    from deeptracer.utils import RunContext
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    with RunContext(runs_root=str(tmp_path)) as context:
+        Analyzer = PyInstrumentAnalyzer(run_context=context)
+        report = Analyzer.generate_perf_report("test/test_sources/test_fast.py")
+        assert os.path.dirname(report) == context.run_dir
+
+if __name__ == "__main__":
+    test_main_function()
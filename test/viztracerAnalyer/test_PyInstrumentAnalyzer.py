@@ -16,6 +16,25 @@ def test_viztracerAnalyer_structure():
     file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'ViztracerAnalyer.py')
     assert os.path.exists(file_path), f"viztracerAnalyer文件不存在: {file_path}"
 
+def test_cli_rejects_ignored_profile_options():
+    """测试 profile 子命令中所选模式会忽略的选项在分析之前报错"""
+    import pytest
+    from deeptracer.cli import main
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    for argv in (["--runs", "3", "--threads"],
+                 ["--follow-children", "--cpu-time-limit", "3"],
+                 ["--backend", "viztracer", "--cpu-time"],
+                 ["--workers", "2"],
+                 ["--cpu-time-limit", "3"]):
+        with patch.object(PyInstrumentAnalyzer, "generate_perf_report") as generate:
+            with pytest.raises(SystemExit) as error:
+                main(["profile", "test/test_sources/test_fast.py"] + argv)
+        assert error.value.code == 2, argv
+        generate.assert_not_called()
+    with patch.object(PyInstrumentAnalyzer, "generate_repeated_report") as generate:
+        assert main(["profile", "test/test_sources/test_fast.py", "--runs", "2", "--timeout", "5"]) == 0
+    assert generate.call_args.kwargs["timeout"] == 5
+
 def test_main_function():
     from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
     Analyzer = PyInstrumentAnalyzer()
@@ -0,0 +1,72 @@
+from unittest.mock import Mock, patch
+
+def test_asyncProfiler_structure():
+    """测试模块asyncProfiler的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'asyncProfiler.py')
+    assert os.path.exists(file_path), f"asyncProfiler文件不存在: {file_path}"
+
+def test_run_coroutine_task_timing():
+    """测试任务执行时间与等待时间的区分"""
+    import time
+    import asyncio
+    from pyinstrument import Profiler
+    from deeptracer.viztracerAnalyer.asyncProfiler import run_coroutine
+
+    async def waiter():
+        await asyncio.sleep(0.1)
+
+    async def blocker():
+        await asyncio.sleep(0)
+        time.sleep(0.1)
+
+    async def entry(value):
+        await asyncio.gather(waiter(), blocker())
+        return value
+
+    result, tasks, loop_stats = run_coroutine(entry, Profiler(async_mode="enabled"), args=(3,))
+    assert result == 3
+    by_name = {task["coroutine"].split(".")[-1]: task for task in tasks}
+    assert by_name["blocker"]["running"] >= 0.09
+    assert by_name["blocker"]["max_step"] >= 0.09
+    assert by_name["waiter"]["running"] < 0.05
+    assert by_name["waiter"]["awaiting"] >= 0.09
+    assert all(task["state"] == "done" for task in tasks)
+    assert loop_stats["tasks"] == 3
+
+def test_non_coroutine_entry(tmp_path):
+    """测试入口不是协程函数时报错"""
+    import pytest
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    script = tmp_path / "sync_script.py"
+    script.write_text("def main():\n    return 1\n", encoding="utf-8")
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    with pytest.raises(RuntimeError):
+        Analyzer.generate_async_report(str(script))
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    script = tmp_path / "service.py"
+    script.write_text(
+        "import asyncio\n"
+        "import time\n"
+        "async def handler():\n"
+        "    await asyncio.sleep(0.01)\n"
+        "    time.sleep(0.05)\n"
+        "async def main(n):\n"
+        "    await asyncio.gather(*(handler() for _ in range(n)))\n"
+        "if __name__ == '__main__':\n"
+        "    raise SystemExit('entry block must not run')\n",
+        encoding="utf-8")
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    Analyzer.generate_async_report(str(script), kwargs={"n": 2}, formats=("hotspots",))
+    with open(Analyzer.report_paths["tasks"], encoding="utf-8") as fp:
+        report = json.load(fp)
+    handlers = [task for task in report["tasks"] if task["coroutine"] == "handler"]
+    assert len(handlers) == 2
+    assert handlers[0]["max_step_span"] == ["service.py:4", None]
+    assert report["loop"]["busy"] >= 0.1
+
+if __name__ == "__main__":
+    test_main_function()
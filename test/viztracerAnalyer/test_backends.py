@@ -0,0 +1,79 @@
+from unittest.mock import Mock, patch
+
+def test_backends_structure():
+    """测试模块backends的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'backends.py')
+    assert os.path.exists(file_path), f"backends文件不存在: {file_path}"
+
+def test_create_backend():
+    """测试按名称创建后端"""
+    import pytest
+    from deeptracer.viztracerAnalyer.backends import create_backend, PyInstrumentBackend
+    assert isinstance(create_backend("pyinstrument", interval=0.002), PyInstrumentBackend)
+    with pytest.raises(ValueError):
+        create_backend("perf")
+
+def test_incomplete_backend():
+    """测试未实现全部接口的后端不能实例化"""
+    import pytest
+    from deeptracer.viztracerAnalyer.backends import ProfilerBackend
+    class StartOnly(ProfilerBackend):
+        def start(self, caller_frame=None):
+            pass
+    with pytest.raises(TypeError):
+        StartOnly()
+
+def test_viztracer_ring_buffer_and_min_duration():
+    """测试环形缓冲区溢出标记与最短耗时过滤"""
+    import time
+    import pytest
+    pytest.importorskip("viztracer")
+    from deeptracer.viztracerAnalyer.backends import VizTracerBackend
+    def tiny():
+        return 1
+    def slow():
+        time.sleep(0.01)
+    backend = VizTracerBackend(tracer_entries=100)
+    backend.start()
+    for _ in range(500):
+        tiny()
+    backend.stop()
+    summary = backend.summary()
+    assert summary["overflow"] is True
+    assert summary["sample_count"] == 100
+
+    backend = VizTracerBackend(min_duration=0.005)
+    backend.start()
+    for _ in range(50):
+        tiny()
+    slow()
+    backend.stop()
+    names = {event.get("name", "") for event in backend.tracer.data["traceEvents"]}
+    assert any("slow" in name for name in names)
+    assert not any(name.startswith("tiny") for name in names)
+    assert backend.summary()["overflow"] is False
+
+def test_main_function(tmp_path):
+    import json
+    import pytest
+    pytest.importorskip("viztracer")
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_perf_report("test/test_sources/test_fast.py",
+                                         formats=("trace",),
+                                         backend="viztracer",
+                                         backend_options={"max_stack_depth": 20})
+    assert path.endswith("report.trace.json")
+    with open(path, encoding="utf-8") as fp:
+        trace = json.load(fp)
+    assert any("slow_sum" in event.get("name", "") for event in trace["traceEvents"])
+    assert Analyzer.summary["sample_count"] > 0
+    with pytest.raises(ValueError):
+        Analyzer.generate_perf_report("test/test_sources/test_fast.py",
+                                      formats=("hotspots",),
+                                      backend="viztracer")
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+from unittest.mock import Mock, patch
+
+def test_callableTarget_structure():
+    """测试模块callableTarget的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'callableTarget.py')
+    assert os.path.exists(file_path), f"callableTarget文件不存在: {file_path}"
+
+def test_is_pytest_node():
+    """测试目标类型识别"""
+    from deeptracer.viztracerAnalyer.callableTarget import is_pytest_node
+    assert is_pytest_node("test/test_x.py::test_a[1]")
+    assert is_pytest_node("test/test_x.py")
+    assert not is_pytest_node("pkg.mod:func")
+
+def test_resolve_callable_errors():
+    """测试目标格式与导入错误"""
+    import pytest
+    from deeptracer.viztracerAnalyer.callableTarget import resolve_callable
+    with pytest.raises(ValueError):
+        resolve_callable("os.path.join")
+    with pytest.raises(AttributeError):
+        resolve_callable("os.path:not_exists")
+    assert resolve_callable("os.path:join") is __import__("os").path.join
+
+def test_warmup_excluded():
+    """测试预热调用不计入分析"""
+    from pyinstrument import Profiler
+    from deeptracer.viztracerAnalyer.callableTarget import profile_callable
+    calls = []
+    def target(value):
+        calls.append(value)
+        return value
+    profiler = Profiler()
+    calls_during = []
+    original_start = profiler.start
+    def start():
+        calls_during.append(len(calls))
+        original_start()
+    profiler.start = start
+    assert profile_callable(target, profiler, args=(7,), warmup=2, repeat=3) == 7
+    assert len(calls) == 5
+    assert calls_during == [2]
+
+def test_pytest_node(tmp_path):
+    """测试 pytest 节点只分析调用阶段"""
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    test_file = tmp_path / "test_target.py"
+    test_file.write_text(
+        "import time\n"
+        "import pytest\n"
+        "@pytest.fixture\n"
+        "def slow_fixture():\n"
+        "    time.sleep(0.2)\n"
+        "def busy():\n"
+        "    return sum(range(200_000))\n"
+        "def test_busy(slow_fixture):\n"
+        "    assert busy() > 0\n",
+        encoding="utf-8")
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_callable_report(f"{test_file}::test_busy", warmup=1, formats=("hotspots",))
+    with open(path, encoding="utf-8") as fp:
+        report = json.load(fp)
+    assert report["duration"] < 0.2
+    assert "busy" in [entry["function"] for entry in report["hotspots"]]
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_callable_report("test_fast:slow_sum",
+                                             args=(200_000,),
+                                             warmup=1,
+                                             repeat=2,
+                                             formats=("hotspots",),
+                                             search_paths=("test/test_sources",))
+    with open(path, encoding="utf-8") as fp:
+        report = json.load(fp)
+    assert report["hotspots"][0]["function"] == "slow_sum"
+    assert "main" not in [entry["function"] for entry in report["hotspots"]]
+
+if __name__ == "__main__":
+    test_main_function()
@@ -0,0 +1,77 @@
+from unittest.mock import Mock, patch
+
+def test_childProfiler_structure():
+    """测试模块childProfiler的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'childProfiler.py')
+    assert os.path.exists(file_path), f"childProfiler文件不存在: {file_path}"
+    bootstrap_path = os.path.join('deeptracer', 'viztracerAnalyer', 'childBootstrap', 'sitecustomize.py')
+    assert os.path.exists(bootstrap_path), f"sitecustomize文件不存在: {bootstrap_path}"
+
+def test_merge_process_sessions():
+    """测试合并视图跨进程合并调用栈 按进程视图以进程区分"""
+    from pyinstrument.session import Session
+    from deeptracer.viztracerAnalyer.childProfiler import merge_process_sessions
+    def make(pid, role, start, thread_id):
+        thread = f"MainThread\x00<thread>\x00{thread_id}"
+        session = Session(frame_records=[([thread, "work\x00w.py\x001"], 1.0)],
+                          start_time=start, duration=1.0, min_interval=0.001,
+                          max_interval=0.001, sample_count=1, start_call_stack=[thread],
+                          target_description=role, cpu_time=1.0, sys_path=[], sys_prefixes=[])
+        return {"pid": pid, "ppid": 1, "role": role, "name": role, "session": session}
+    processes = [make(10, "main", 0.0, 111), make(11, "multiprocessing", 0.5, 222)]
+    combined = merge_process_sessions(processes)
+    assert combined.duration == 1.5 and combined.cpu_time == 2.0
+    root = combined.root_frame()
+    assert root.identifier.endswith("<thread>\x000")
+    assert abs(root.time - 2.0) < 1e-9
+    per_process = merge_process_sessions(processes, per_process=True)
+    labels = sorted(frame.function for frame in per_process.root_frame().children)
+    assert labels == ["main main [pid 10]", "multiprocessing multiprocessing [pid 11]"]
+
+def test_main_function(tmp_path):
+    import json
+    import textwrap
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    (tmp_path / "worker.py").write_text(textwrap.dedent("""
+        def crunch(n):
+            total = 0
+            for i in range(n):
+                total += i * i
+            return total
+        if __name__ == "__main__":
+            crunch(300_000)
+    """))
+    (tmp_path / "job.py").write_text(textwrap.dedent("""
+        import sys
+        import subprocess
+        import multiprocessing
+        from worker import crunch
+        if __name__ == "__main__":
+            with multiprocessing.Pool(2) as pool:
+                pool.map(crunch, [300_000] * 4)
+            subprocess.run([sys.executable, "worker.py"], check=True)
+    """))
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_multiprocess_report(str(tmp_path / "job.py"),
+                                                 formats=("hotspots",),
+                                                 timeout=120)
+    with open(Analyzer.report_paths["processes"], encoding="utf-8") as fp:
+        processes = json.load(fp)["processes"]
+    roles = sorted(process["role"] for process in processes)
+    assert roles == ["main", "multiprocessing", "multiprocessing", "subprocess"]
+    main_pid = processes[0]["pid"]
+    assert all(process["ppid"] == main_pid for process in processes[1:])
+    busiest = {process["role"] for process in processes[1:]
+               if process["hotspots"] and process["hotspots"][0]["function"] == "crunch"}
+    assert busiest == {"multiprocessing", "subprocess"}
+    #任务可能全部分给同一个工作进程
+    with open(path, encoding="utf-8") as fp:
+        report = json.load(fp)
+    assert "crunch" in [entry["function"] for entry in report["hotspots"]]
+    assert (tmp_path / "report.processes.html").exists()
+    assert not [name for name in (tmp_path).iterdir() if name.name.startswith(".processes-")]
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,55 @@
+from unittest.mock import Mock, patch
+
+def test_cpuTimeProfiler_structure():
+    """测试模块cpuTimeProfiler的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'cpuTimeProfiler.py')
+    assert os.path.exists(file_path), f"cpuTimeProfiler文件不存在: {file_path}"
+
+def test_wait_kind():
+    """测试按末端帧归类等待类型"""
+    from deeptracer.viztracerAnalyer.cpuTimeProfiler import wait_kind
+    assert wait_kind("sleep\x00<built-in>\x000") == "sleep"
+    assert wait_kind("lock.acquire\x00<built-in>\x000") == "lock"
+    assert wait_kind("socket.recv\x00<built-in>\x000") == "io"
+    assert wait_kind("work\x00/tmp/w.py\x003") == "other"
+
+def test_breakdown_splits_compute_and_wait():
+    """测试计算密集与 sleep 函数分别归类"""
+    import time
+    from deeptracer.viztracerAnalyer.cpuTimeProfiler import CpuTimeProfiler
+    def crunch():
+        return sum(i * i for i in range(500_000))
+    def nap():
+        time.sleep(0.1)
+    profiler = CpuTimeProfiler()
+    profiler.start()
+    crunch()
+    nap()
+    session = profiler.stop()
+    assert len(profiler.cpu_times) == len(session.frame_records)
+    result = profiler.breakdown(session, top_n=50)
+    by_name = {entry["function"]: entry for entry in result["hotspots"]}
+    assert by_name["crunch"]["bound"] == "compute"
+    assert by_name["nap"]["bound"] == "wait"
+    assert by_name["nap"]["wait_kinds"]["sleep"] > 0.08
+    assert result["wait_kinds"]["sleep"] > 0.08
+    assert 0 < result["compute_ratio"] < 1
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_cputime_report("test/test_sources/test_fast.py",
+                                            formats=("html", "hotspots"))
+    assert path.endswith("report.html")
+    assert (tmp_path / "report.cpu.html").exists()
+    with open(Analyzer.report_paths["cputime"], encoding="utf-8") as fp:
+        report = json.load(fp)
+    by_name = {entry["function"]: entry for entry in report["hotspots"]}
+    assert by_name["slow_sum"]["bound"] == "compute"
+    assert by_name["sleep"]["bound"] == "wait"
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
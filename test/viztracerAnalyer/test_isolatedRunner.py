@@ -0,0 +1,42 @@
+from unittest.mock import Mock, patch
+
+def test_isolatedRunner_structure():
+    """测试模块isolatedRunner的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'isolatedRunner.py')
+    assert os.path.exists(file_path), f"isolatedRunner文件不存在: {file_path}"
+
+def test_isolated_does_not_touch_sys_path(tmp_path):
+    """测试隔离模式不修改当前进程的sys.path与模块缓存"""
+    import sys
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    script = tmp_path / "isolated_target.py"
+    script.write_text("import json\nVALUE = sum(range(1000))\n")
+    before = list(sys.path)
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    Analyzer.generate_perf_report(str(script), isolated=True)
+    assert sys.path == before
+    assert "isolated_target" not in sys.modules
+
+def test_isolated_timeout(tmp_path):
+    """测试超时后终止子进程"""
+    import pytest
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    script = tmp_path / "sleepy.py"
+    script.write_text("import time\ntime.sleep(30)\n")
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    with pytest.raises(RuntimeError) as info:
+        Analyzer.generate_perf_report(str(script), isolated=True, timeout=1)
+    assert isinstance(info.value.__cause__, TimeoutError)
+
+def test_main_function(tmp_path):
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    Analyzer.generate_perf_report("test/test_sources/test_fast.py",
+                                  isolated=True,
+                                  timeout=60,
+                                  cpu_time_limit=60)
+    assert Analyzer.summary["sample_count"] > 0
+
+if __name__ == "__main__":
+    test_main_function()
@@ -0,0 +1,92 @@
+from unittest.mock import Mock, patch
+
+def _hot(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+def _gen(n):
+    for i in range(n):
+        yield i
+
+def _other(n):
+    return sum(range(n))
+
+def test_lineProfiler_structure():
+    """测试模块lineProfiler的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'lineProfiler.py')
+    assert os.path.exists(file_path), f"lineProfiler文件不存在: {file_path}"
+
+def test_only_targets_are_instrumented():
+    """测试只统计目标函数的行 生成器的每次恢复都计入"""
+    from deeptracer.viztracerAnalyer.lineProfiler import LineProfiler, code_key
+    profiler = LineProfiler([code_key(_hot.__code__), code_key(_gen.__code__)])
+    with profiler:
+        _hot(1000)
+        list(_gen(10))
+        _other(10)
+    assert set(profiler.stats) == {code_key(_hot.__code__), code_key(_gen.__code__)}
+    hot_lines = profiler.stats[code_key(_hot.__code__)]
+    assert hot_lines[_hot.__code__.co_firstlineno + 3][0] == 1000
+    gen_lines = profiler.stats[code_key(_gen.__code__)]
+    assert gen_lines[_gen.__code__.co_firstlineno + 2][0] == 10
+    results = profiler.results()
+    assert results[0]["lines"][0]["source"].strip() == "total = 0"
+
+def test_stop_restores_tracing():
+    """测试停止后不再计时 并恢复开始前的追踪函数"""
+    import sys
+    import threading
+    from deeptracer.viztracerAnalyer.lineProfiler import LineProfiler, code_key
+    profiler = LineProfiler([code_key(_hot.__code__)])
+    profiler.start()
+    profiler.stop()
+    _hot(10)
+    assert profiler.stats == {}
+
+    def tracer(frame, event, arg):
+        return None
+    original = (sys.gettrace(), threading.gettrace())
+    sys.settrace(tracer)
+    threading.settrace(tracer)
+    try:
+        with patch.object(LineProfiler, "_start_monitoring", return_value=False):
+            profiler = LineProfiler([code_key(_hot.__code__)])
+            profiler.start()
+            _hot(10)
+            profiler.stop()
+        assert profiler.backend == "settrace"
+        assert sys.gettrace() is tracer and threading.gettrace() is tracer
+    finally:
+        sys.settrace(original[0])
+        threading.settrace(original[1])
+
+def test_sampler_stops_when_script_raises(tmp_path):
+    """测试第一阶段目标脚本抛出异常时采样器被停止"""
+    import pytest
+    from pyinstrument.stack_sampler import get_stack_sampler
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    script = tmp_path / "boom.py"
+    script.write_text("raise ValueError('boom')\n", encoding="utf-8")
+    analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    with pytest.raises(RuntimeError, match="boom"):
+        analyzer.generate_line_report(str(script))
+    assert get_stack_sampler().subscribers == []
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    lines_path = Analyzer.generate_line_report("test/test_sources/test_fast.py", top_n=3)
+    with open(lines_path, encoding="utf-8") as fp:
+        report = json.load(fp)
+    functions = {entry["function"]: entry for entry in report["functions"]}
+    assert "slow_sum" in functions
+    hits = {line["source"].strip(): line["hits"] for line in functions["slow_sum"]["lines"]}
+    assert hits["total += i * i"] == 300_000
+    assert "main" not in functions
+
+if __name__ == "__main__":
+    test_main_function()
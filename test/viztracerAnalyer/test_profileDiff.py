@@ -0,0 +1,73 @@
+from unittest.mock import Mock, patch
+
+def test_profileDiff_structure():
+    """测试模块profileDiff的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'profileDiff.py')
+    assert os.path.exists(file_path), f"profileDiff文件不存在: {file_path}"
+
+def test_function_identity_ignores_line_and_aliases_file():
+    """测试函数身份不含行号 且别名文件对齐到同一名称"""
+    from deeptracer.viztracerAnalyer.profileDiff import function_identity
+    aliases = {"/tmp/after.py": "/tmp/before.py"}
+    assert function_identity("f", "/tmp/after.py", aliases) == function_identity("f", "/tmp/before.py", aliases)
+    assert function_identity("f", None, {}) == ("f", "", "")
+    assert function_identity("run", "/tmp/a.py", {}, "A") != function_identity("run", "/tmp/a.py", {}, "B")
+
+def test_methods_of_different_classes_stay_apart(tmp_path):
+    """测试同一文件中不同类的同名方法不合并"""
+    from pyinstrument.session import Session
+    from deeptracer.viztracerAnalyer import ProfileDiff
+    def make(a_time, b_time):
+        thread = "MainThread\x00<thread>\x00111"
+        module = "<module>\x00job.py\x001"
+        records = [([thread, module, "run\x00job.py\x003\x01cA"], a_time),
+                   ([thread, module, "run\x00job.py\x007\x01cB"], b_time)]
+        return Session(frame_records=records, start_time=0.0, duration=a_time + b_time,
+                       min_interval=0.001, max_interval=0.001, sample_count=2,
+                       start_call_stack=[thread], target_description="job.py", cpu_time=0.0,
+                       sys_path=[], sys_prefixes=[])
+    diff = ProfileDiff(make(1.0, 1.0), make(0.1, 1.9), output_path=str(tmp_path / "diff.json"))
+    deltas = {entry["class"]: entry["delta_self"] for entry in diff.compare()["functions"]
+              if entry["function"] == "run"}
+    assert abs(deltas["A"] + 0.9) < 1e-9 and abs(deltas["B"] - 0.9) < 1e-9
+    labels = set()
+    pending = [diff.diff_tree()]
+    while pending:
+        node = pending.pop()
+        labels |= set(node["children"])
+        pending += node["children"].values()
+    assert {"A.run (job.py)", "B.run (job.py)"} <= labels
+
+def test_missing_session_file():
+    """测试会话文件不存在时报错"""
+    import pytest
+    from deeptracer.viztracerAnalyer import ProfileDiff
+    with pytest.raises(FileNotFoundError):
+        ProfileDiff("not_exists.pyisession", "not_exists.pyisession")
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import ProfileDiff
+    with open("test/test_sources/test_fast.py", encoding="utf-8") as fp:
+        source = fp.read()
+    before = tmp_path / "before.py"
+    after = tmp_path / "after.py"
+    before.write_text(source.replace("slow_sum(300_000)", "slow_sum(3_000_000)"), encoding="utf-8")
+    after.write_text(source.replace("    slow_sum(300_000)\n", "").replace("    wait_io()\n", ""),
+                     encoding="utf-8")
+    diff = ProfileDiff(str(before), str(after), output_path=str(tmp_path / "diff.json"))
+    report_paths = diff.generate_report()
+    with open(report_paths["json"], encoding="utf-8") as fp:
+        result = json.load(fp)
+    assert result["speedup"] > 1
+    statuses = {entry["function"]: entry["status"] for entry in result["functions"]}
+    assert statuses.get("slow_sum") == "removed"
+    assert statuses.get("main") == "changed"
+    #两个脚本的模块级代码对齐为同一函数
+    assert "slow_sum" in [entry["function"] for entry in result["removed_hotspots"]]
+    with open(report_paths["html"], encoding="utf-8") as fp:
+        assert "slow_sum" in fp.read()
+
+if __name__ == "__main__":
+    test_main_function()
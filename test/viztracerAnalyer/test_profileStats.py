@@ -0,0 +1,45 @@
+from unittest.mock import Mock, patch
+
+def test_profileStats_structure():
+    """测试模块profileStats的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'profileStats.py')
+    assert os.path.exists(file_path), f"profileStats文件不存在: {file_path}"
+
+def test_summarize():
+    """测试统计量与t分布置信区间"""
+    import pytest
+    from deeptracer.viztracerAnalyer.profileStats import summarize, percentile
+    summary = summarize([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert summary["mean"] == 3.0
+    assert summary["median"] == 3.0
+    assert summary["p95"] == pytest.approx(4.8)
+    #t(0.975, 4)=2.776, s=1.5811
+    assert summary["ci_high"] - summary["mean"] == pytest.approx(2.776 * 1.5811 / 5 ** 0.5, rel=1e-3)
+    assert percentile([], 50) == 0.0
+
+def test_missing_functions_count_as_zero():
+    """测试未被采样到的函数按0计入"""
+    from deeptracer.viztracerAnalyer.profileStats import function_statistics
+    entry = {"function": "f", "file": "a.py", "line": 1, "self_time": 2.0, "total_time": 2.0}
+    stats = function_statistics([{("f", "a.py", 1): entry}, {}])
+    assert stats[0]["runs_seen"] == 1
+    assert stats[0]["self_time"]["mean"] == 1.0
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    stats_path = Analyzer.generate_repeated_report("test/test_sources/test_fast.py",
+                                                   runs=3,
+                                                   workers=3,
+                                                   formats=("hotspots",))
+    with open(stats_path, encoding="utf-8") as fp:
+        stats = json.load(fp)
+    assert stats["runs"] == 3
+    names = [entry["function"] for entry in stats["functions"]]
+    assert "slow_sum" in names
+    assert "hotspots" in Analyzer.report_paths
+
+if __name__ == "__main__":
+    test_main_function()
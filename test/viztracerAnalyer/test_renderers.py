@@ -0,0 +1,39 @@
+from unittest.mock import Mock, patch
+
+def test_renderers_structure():
+    """测试模块renderers的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'renderers.py')
+    assert os.path.exists(file_path), f"renderers文件不存在: {file_path}"
+
+def test_html_skipped_unless_requested(tmp_path):
+    """测试未请求HTML时不渲染HTML"""
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    report_path = tmp_path / "report.html"
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(report_path))
+    with patch("deeptracer.viztracerAnalyer.ViztracerAnalyer.HTMLRenderer") as renderer:
+        Analyzer.generate_perf_report("test/test_sources/test_fast.py",
+                                      formats=("hotspots",))
+        renderer.assert_not_called()
+    assert not report_path.exists()
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    first = Analyzer.generate_perf_report("test/test_sources/test_fast.py",
+                                          formats=("hotspots", "collapsed", "speedscope", "session"),
+                                          top_n=5)
+    assert first == Analyzer.report_paths["hotspots"]
+    with open(Analyzer.report_paths["hotspots"], encoding="utf-8") as fp:
+        hotspots = json.load(fp)["hotspots"]
+    assert 0 < len(hotspots) <= 5
+    assert any(entry["function"] == "slow_sum" for entry in hotspots)
+    with open(Analyzer.report_paths["collapsed"], encoding="utf-8") as fp:
+        lines = fp.read().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    with open(Analyzer.report_paths["speedscope"], encoding="utf-8") as fp:
+        assert "speedscope" in json.load(fp)["$schema"]
+
+if __name__ == "__main__":
+    test_main_function()
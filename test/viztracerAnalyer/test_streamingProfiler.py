@@ -0,0 +1,65 @@
+from unittest.mock import Mock, patch
+
+def test_streamingProfiler_structure():
+    """测试模块streamingProfiler的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'streamingProfiler.py')
+    assert os.path.exists(file_path), f"streamingProfiler文件不存在: {file_path}"
+
+def test_segment_buffer_aggregates():
+    """测试相同调用栈合并且到期时写出分段"""
+    from deeptracer.viztracerAnalyer.streamingProfiler import SegmentBuffer
+    flushed = []
+    buffer = SegmentBuffer(lambda stacks, *rest: flushed.append(dict(stacks)), segment_seconds=3600)
+    for _ in range(1000):
+        buffer.append((["a", "b"], 0.001))
+    buffer.append((["a", "c"], 0.002))
+    assert len(buffer.stacks) == 2 and len(buffer) == 1001
+    buffer.flush()
+    assert abs(flushed[0][("a", "b")] - 1.0) < 1e-9
+    assert len(buffer) == 0
+    buffer.flush()
+    assert len(flushed) == 1
+
+def test_rotation_and_window(tmp_path):
+    """测试分段滚动删除、编号接续与时间窗口合并"""
+    import time
+    from deeptracer.viztracerAnalyer.streamingProfiler import (
+        StreamingProfiler, list_segments, merge_segments
+    )
+    def busy():
+        end = time.perf_counter() + 0.02
+        while time.perf_counter() < end:
+            pass
+    profiler = StreamingProfiler(str(tmp_path), segment_seconds=0.01, max_segments=3)
+    profiler.start()
+    for _ in range(10):
+        busy()
+    session = profiler.stop()
+    segments = list_segments(str(tmp_path))
+    assert len(segments) == 3
+    assert session.sample_count > 0
+    first_index = int(segments[0][-11:-5])
+    assert first_index > 0
+    resumed = StreamingProfiler(str(tmp_path))
+    assert resumed._index == int(segments[-1][-11:-5]) + 1
+    window = merge_segments(str(tmp_path), start=0, end=0.001)
+    assert window.duration < session.duration
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_streaming_report("test/test_sources/test_fast.py",
+                                              segment_seconds=0.05,
+                                              formats=("hotspots",))
+    with open(path, encoding="utf-8") as fp:
+        report = json.load(fp)
+    names = [entry["function"] for entry in report["hotspots"]]
+    assert "slow_sum" in names and "sleep" in names
+    merged = Analyzer.merge_segment_report(Analyzer.report_paths["segments"], formats=("collapsed",))
+    with open(merged, encoding="utf-8") as fp:
+        assert "slow_sum" in fp.read()
+
+if __name__ == "__main__":
+    test_main_function()
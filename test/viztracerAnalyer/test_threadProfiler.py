@@ -0,0 +1,73 @@
+from unittest.mock import Mock, patch
+
+def test_threadProfiler_structure():
+    """测试模块threadProfiler的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'threadProfiler.py')
+    assert os.path.exists(file_path), f"threadProfiler文件不存在: {file_path}"
+
+def test_contention_states():
+    """测试 CPU 线程的 GIL 等待、锁等待与 sleep 分别计入不同状态"""
+    import time
+    import threading
+    from deeptracer.viztracerAnalyer.threadProfiler import ThreadSampler
+    lock = threading.Lock()
+    def spin():
+        end = time.perf_counter() + 0.3
+        while time.perf_counter() < end:
+            pass
+    def locked():
+        for _ in range(10):
+            with lock:
+                time.sleep(0.01)
+    def idle():
+        time.sleep(0.3)
+    threads = [threading.Thread(target=spin, name=f"spin-{i}") for i in range(2)]
+    threads += [threading.Thread(target=locked, name=f"locked-{i}") for i in range(2)]
+    threads.append(threading.Thread(target=idle, name="idle"))
+    with ThreadSampler(interval=0.005) as sampler:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    summary = sampler.contention()
+    by_name = {entry["name"]: entry for entry in summary["threads"]}
+    for name in ("spin-0", "spin-1"):
+        assert by_name[name]["gil"] > 0.05
+        assert by_name[name]["running"] > 0.05
+    assert by_name["locked-0"]["lock"] + by_name["locked-1"]["lock"] > 0.05
+    assert by_name["idle"]["wait"] > 0.2 and by_name["idle"]["gil"] < 0.05
+    assert summary["sites"][0]["state"] in ("gil", "lock")
+    session = sampler.session()
+    names = {frame.function for frame in session.root_frame().children}
+    assert {"spin-0", "spin-1", "idle"} <= names
+
+def test_cpu_time_only_for_live_threads():
+    """测试只查询仍存活线程的 CPU 时间"""
+    import threading
+    from deeptracer.viztracerAnalyer.threadProfiler import _thread_cpu_time
+    finished = threading.Thread(target=lambda: None)
+    finished.start()
+    finished.join()
+    with patch("time.pthread_getcpuclockid", create=True) as getcpuclockid:
+        assert _thread_cpu_time(finished) is None
+        assert _thread_cpu_time(None) is None
+    getcpuclockid.assert_not_called()
+    cpu = _thread_cpu_time(threading.current_thread())
+    assert cpu is None or cpu > 0
+
+def test_main_function(tmp_path):
+    import json
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    path = Analyzer.generate_thread_report("test/test_sources/test_fast.py",
+                                           formats=("html", "hotspots"))
+    assert path.endswith("report.html")
+    with open(Analyzer.report_paths["threads"], encoding="utf-8") as fp:
+        report = json.load(fp)
+    assert report["threads"][0]["name"] == "MainThread"
+    assert set(report["totals"]) == {"running", "gil", "lock", "wait"}
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
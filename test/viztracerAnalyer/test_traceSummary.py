@@ -0,0 +1,80 @@
+from unittest.mock import Mock, patch
+
+def _write_trace(path):
+    """写入按函数退出顺序排列的追踪文件 main -> (work -> fib -> fib, idle)"""
+    import json
+    events = [
+        {"ph": "M", "pid": 1, "tid": 2, "name": "thread_name", "args": {"name": "MainThread"}},
+        {"ph": "X", "pid": 1, "tid": 2, "ts": 12.0, "dur": 3.0, "name": "fib (/src/a.py:7)"},
+        {"ph": "X", "pid": 1, "tid": 2, "ts": 11.0, "dur": 6.0, "name": "fib (/src/a.py:7)"},
+        {"ph": "X", "pid": 1, "tid": 2, "ts": 10.0, "dur": 10.0, "name": "work (/src/a.py:3)"},
+        {"ph": "B", "pid": 1, "tid": 2, "ts": 20.0, "name": "idle (/src/a.py:12)"},
+        {"ph": "E", "pid": 1, "tid": 2, "ts": 50.0},
+        {"ph": "X", "pid": 1, "tid": 2, "ts": 0.0, "dur": 60.0, "name": "main (/src/a.py:1)"},
+        {"ph": "X", "pid": 1, "tid": 3, "ts": 5.0, "dur": 20.0, "name": "work (/src/a.py:3)"},
+    ]
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump({"traceEvents": events, "viztracer_metadata": {"version": "1.1.1"}}, fp, indent=2)
+
+def test_traceSummary_structure():
+    """测试模块traceSummary的基本结构"""
+    import os
+    file_path = os.path.join('deeptracer', 'viztracerAnalyer', 'traceSummary.py')
+    assert os.path.exists(file_path), f"traceSummary文件不存在: {file_path}"
+
+def test_iter_trace_events_small_chunks(tmp_path):
+    """测试事件跨越读取边界时仍能完整解码"""
+    import json
+    from deeptracer.viztracerAnalyer.traceSummary import iter_trace_events, is_trace_file
+    path = tmp_path / "t.json"
+    _write_trace(path)
+    assert is_trace_file(str(path))
+    events = list(iter_trace_events(str(path), chunk_size=7))
+    assert events == json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    array_path = tmp_path / "array.json"
+    array_path.write_text(json.dumps(events), encoding="utf-8")
+    assert list(iter_trace_events(str(array_path), chunk_size=5)) == events
+
+def test_summarize_external_sort(tmp_path):
+    """测试外部排序后的总耗时、自身耗时、调用次数与折叠栈"""
+    import pytest
+    from deeptracer.viztracerAnalyer.traceSummary import TraceSummarizer
+    path = tmp_path / "job.trace.json"
+    _write_trace(path)
+    summarizer = TraceSummarizer(str(path), chunk_spans=2)
+    summary = summarizer.summarize(top_n=None)
+    by_name = {entry["function"]: entry for entry in summary["hotspots"]}
+    assert by_name["fib"]["calls"] == 2
+    assert by_name["fib"]["total_time"] == pytest.approx(6e-6)
+    assert by_name["fib"]["self_time"] == pytest.approx(6e-6)
+    assert by_name["work"]["calls"] == 2
+    assert by_name["work"]["self_time"] == pytest.approx(24e-6)
+    assert by_name["idle"]["self_time"] == pytest.approx(30e-6)
+    assert by_name["main"]["self_time"] == pytest.approx(20e-6)
+    assert by_name["main"]["file"] == "/src/a.py" and by_name["main"]["line"] == 1
+    assert summary["duration"] == pytest.approx(60e-6)
+    assert {thread["tid"]: thread["name"] for thread in summary["threads"]} == {"2": "MainThread", "3": ""}
+    collapsed = summarizer.render_collapsed()
+    assert "main (/src/a.py:1);work (/src/a.py:3);fib (/src/a.py:7);fib (/src/a.py:7) 3\n" in collapsed
+    assert "main (/src/a.py:1);idle (/src/a.py:12) 30\n" in collapsed
+    report_paths = summarizer.save(top_n=2)
+    assert report_paths["summary"].endswith("job.summary.json")
+    assert not list(tmp_path.glob(".trace-sort-*"))
+
+def test_main_function(tmp_path):
+    import json
+    import pytest
+    pytest.importorskip("viztracer")
+    from deeptracer.viztracerAnalyer import PyInstrumentAnalyzer
+    Analyzer = PyInstrumentAnalyzer(default_report_path=str(tmp_path / "report.html"))
+    Analyzer.generate_perf_report("test/test_sources/test_fast.py",
+                                  formats=("trace",),
+                                  backend="viztracer")
+    with open(Analyzer.report_paths["summary"], encoding="utf-8") as fp:
+        summary = json.load(fp)
+    assert any(entry["function"] == "slow_sum" for entry in summary["hotspots"])
+    assert (tmp_path / "report.collapsed.txt").exists()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])